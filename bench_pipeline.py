@@ -0,0 +1,103 @@
+"""
+Benchmarks gen_docs.py and gen_next_prd.py end to end against the fake LLM backend.
+
+Each run copies the context docs and CodMod reports into a fresh workspace and runs the pipeline there, so the
+timings only include the pipeline's own overhead plus the simulated model latency. No network is needed.
+
+    $ python bench_pipeline.py --runs 3 --latency 0.5 --failure-rate 0.2 --workers 4
+    $ python bench_pipeline.py --runs 3 --batch-size 5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# (step name, script, extra arguments). gen_docs.py runs twice, the second run should be all cache hits.
+PIPELINE_STEPS = [
+    ("gen_docs (cold)", "gen_docs.py", []),
+    ("gen_docs (warm)", "gen_docs.py", []),
+    ("gen_next_prd", "gen_next_prd.py", []),
+]
+
+
+def create_workspace() -> str:
+    """
+    Creates a workspace with the inputs the pipeline reads: the context docs, the CodMod reports and the
+    legacy source code (symlinked, it is only read).
+    """
+    workspace = tempfile.mkdtemp(prefix="c2c-bench-")
+    for relative_path in (os.path.join("docs", "context_docs"), os.path.join("docs", "codmod_reports")):
+        shutil.copytree(os.path.join(REPO_DIRECTORY, relative_path), os.path.join(workspace, relative_path))
+    os.symlink(os.path.join(REPO_DIRECTORY, "moneynote-api"), os.path.join(workspace, "moneynote-api"))
+    os.makedirs(os.path.join(workspace, ".taskmaster"))
+    return workspace
+
+
+def run_step(workspace: str, script: str, args: list, env: dict) -> float:
+    """
+    Runs a pipeline script in the workspace and returns its wall-clock time. Output goes to a log in the workspace.
+    """
+    log_path = os.path.join(workspace, "bench.log")
+    start_time = time.monotonic()
+    with open(log_path, "a") as log_file:
+        subprocess.run(
+            [sys.executable, os.path.join(REPO_DIRECTORY, script), *args],
+            cwd=workspace,
+            env=env,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            check=True,
+        )
+    return time.monotonic() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the docs pipeline against the fake LLM backend.")
+    parser.add_argument("--runs", type=int, default=3, help="number of runs, each in a fresh workspace")
+    parser.add_argument("--latency", type=float, default=0.5, help="mean simulated latency per prompt, in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability that a prompt fails")
+    parser.add_argument("--workers", type=int, default=4, help="DOC_GENERATION_MAX_WORKERS")
+    parser.add_argument("--batch-size", type=int, default=1, help="DOC_GENERATION_BATCH_SIZE")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the fake backend")
+    parser.add_argument("--backoff-scale", type=float, default=0.01, help="RETRY_BACKOFF_SCALE, shrinks retry back-offs")
+    parser.add_argument("--keep", action="store_true", help="keep the workspaces for inspection")
+    args = parser.parse_args()
+
+    env = dict(
+        os.environ,
+        LLM_BACKEND="fake",
+        FAKE_LLM_LATENCY_SECONDS=str(args.latency),
+        FAKE_LLM_FAILURE_RATE=str(args.failure_rate),
+        FAKE_LLM_SEED=str(args.seed),
+        DOC_GENERATION_MAX_WORKERS=str(args.workers),
+        DOC_GENERATION_BATCH_SIZE=str(args.batch_size),
+        RETRY_BACKOFF_SCALE=str(args.backoff_scale),
+        GEMINI_OUTPUT_WAIT_SECONDS="0.5",
+    )
+
+    timings = {step_name: [] for step_name, _, _ in PIPELINE_STEPS}
+    for run_number in range(1, args.runs + 1):
+        workspace = create_workspace()
+        try:
+            for step_name, script, script_args in PIPELINE_STEPS:
+                timings[step_name].append(run_step(workspace, script, script_args, env))
+        finally:
+            if args.keep:
+                print(f"Run {run_number} workspace: {workspace}")
+            else:
+                shutil.rmtree(workspace)
+
+    print(f"\n{args.runs} runs, latency={args.latency}s, failure_rate={args.failure_rate}, workers={args.workers}, batch_size={args.batch_size}")
+    print(f"{'step':<20}{'min (s)':>10}{'median (s)':>12}{'max (s)':>10}")
+    for step_name, step_timings in timings.items():
+        print(f"{step_name:<20}{min(step_timings):>10.2f}{statistics.median(step_timings):>12.2f}{max(step_timings):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
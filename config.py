@@ -39,3 +39,39 @@ EXAMPLE_PRD_PATH = os.path.join(DOCS_DIRECTORY, "context_docs", "example_prd.md"
 # Taskmaster Paths
 TASKMASTER_STATUS_FILE = os.path.join(WORKING_DIRECTORY, ".taskmaster", "current_status.md")
 TASKMASTER_JSON_FILE = os.path.join(WORKING_DIRECTORY, ".taskmaster", "tasks", "tasks.json")
+
+# Doc Generation
+DOC_GENERATION_MAX_WORKERS = int(os.environ.get("DOC_GENERATION_MAX_WORKERS", "4"))
+# Docs sharing a prompt template sent to gemini-cli in one prompt, 1 sends every doc on its own
+DOC_GENERATION_BATCH_SIZE = int(os.environ.get("DOC_GENERATION_BATCH_SIZE", "1"))
+# A batch is split before its prompts add up to more than this, so that one batch prompt stays a size
+# gemini-cli handles well
+DOC_GENERATION_BATCH_MAX_PROMPT_BYTES = int(os.environ.get("DOC_GENERATION_BATCH_MAX_PROMPT_BYTES", str(96 * 1024)))
+
+# Send only the CodMod report sections relevant to each user journey in its prompt (see context_slicer.py)
+SLICE_PROMPT_CONTEXT = os.environ.get("SLICE_PROMPT_CONTEXT", "1") == "1"
+
+# Doc Cache
+DOC_CACHE_DIRECTORY = os.path.join(WORKING_DIRECTORY, ".doc_cache")
+DOC_CACHE_MAX_BYTES = int(os.environ.get("DOC_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# Run Telemetry, one JSON line per span, see telemetry.py
+TELEMETRY_ENABLED = os.environ.get("TELEMETRY_ENABLED", "1") == "1"
+TELEMETRY_FILE = os.environ.get("TELEMETRY_FILE", os.path.join(WORKING_DIRECTORY, ".telemetry", "spans.jsonl"))
+
+# LLM Backend ("gemini" or "fake", see llm_backends.py)
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "gemini")
+
+# Gemini CLI
+GEMINI_BINARY = os.environ.get("GEMINI_BINARY", "gemini")
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-pro")
+GEMINI_PROMPT_TIMEOUT_SECONDS = float(os.environ.get("GEMINI_PROMPT_TIMEOUT_SECONDS", "1800"))
+# How long to watch for the output file after gemini-cli returns
+GEMINI_OUTPUT_WAIT_SECONDS = float(os.environ.get("GEMINI_OUTPUT_WAIT_SECONDS", "10"))
+# Multiplies every retry back-off, e.g. 0.01 when load testing against the fake backend
+RETRY_BACKOFF_SCALE = float(os.environ.get("RETRY_BACKOFF_SCALE", "1"))
+
+# Fake LLM Backend
+FAKE_LLM_LATENCY_SECONDS = float(os.environ.get("FAKE_LLM_LATENCY_SECONDS", "0.5"))
+FAKE_LLM_FAILURE_RATE = float(os.environ.get("FAKE_LLM_FAILURE_RATE", "0"))
+FAKE_LLM_SEED = int(os.environ.get("FAKE_LLM_SEED", "0"))
@@ -0,0 +1,148 @@
+"""
+Slices the CodMod reports down to the sections a user journey prompt needs.
+
+The reports describe every journey several times (once per report chapter, with slightly different titles) and
+the data model once. For a journey we keep the journey's own sections, the sections describing the database
+tables they mention, and the data report's entity overview, using the heading index from md_index.
+"""
+import re
+from typing import List, Set
+
+import md_index
+
+# The data report section that is always included, it lists every entity in a few lines each
+ALWAYS_INCLUDED_DATA_SECTIONS = ("Key Data Entities",)
+# A journey section from another chapter matches when this share of the shorter title's words match
+TITLE_MATCH_THRESHOLD = 0.6
+TITLE_STOP_WORDS = {"and", "for", "the", "with", "journey"}
+TABLE_NAME_PATTERN = re.compile(r"\bt_(?:user|flow)_[a-z_]+\b")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of model tokens in a text, at roughly four characters per token.
+    """
+    return (len(text) + 3) // 4
+
+
+def _title_words(title: str) -> Set[str]:
+    """
+    Reduces a heading to the 4-letter stems of its words, so "Monitoring Financial Situation" and
+    "1\\. Monitor Financial Situation" compare equal.
+    """
+    words = re.findall(r"[a-z]+", title.lower())
+    return {word[:4] for word in words if len(word) > 2 and word not in TITLE_STOP_WORDS}
+
+
+def _title_similarity(title: str, other_title: str) -> float:
+    words, other_words = _title_words(title), _title_words(other_title)
+    if not words or not other_words:
+        return 0.0
+    return len(words & other_words) / min(len(words), len(other_words))
+
+
+def _get_journey_sections(report_path: str, user_journey_name: str) -> List[md_index.MarkdownSection]:
+    """
+    Returns the section about the journey in every "User Journeys" chapter of the report: the child whose
+    title is closest to the journey name, if it is close enough.
+    """
+    journey_sections = []
+    for section in md_index.get_section_index(report_path):
+        if section.text != "User Journeys":
+            continue
+        children = md_index.get_child_sections(report_path, section)
+        if not children:
+            continue
+        best_child = max(children, key=lambda child: _title_similarity(child.text, user_journey_name))
+        if _title_similarity(best_child.text, user_journey_name) >= TITLE_MATCH_THRESHOLD:
+            journey_sections.append(best_child)
+    return journey_sections
+
+
+def _get_table_sections(report_path: str, table_names: Set[str]) -> List[md_index.MarkdownSection]:
+    """
+    Returns the sections whose heading names one of the tables.
+    """
+    return [
+        section
+        for section in md_index.get_section_index(report_path)
+        if set(TABLE_NAME_PATTERN.findall(section.text)) & table_names
+    ]
+
+
+def _read_sections(report_path: str, sections: List[md_index.MarkdownSection]) -> List[str]:
+    """
+    Reads the sections in file order, skipping any section nested inside another one already read.
+    """
+    texts = []
+    last_end = -1
+    for section in sorted(set(sections), key=lambda section: (section.start, -section.end)):
+        if section.start < last_end:
+            continue
+        texts.append(md_index.read_section(report_path, section).strip())
+        last_end = section.end
+    return texts
+
+
+def slice_user_journey_context(user_journey_name: str, codmod_report_path: str, codmod_data_report_path: str) -> dict:
+    """
+    Extracts the parts of the CodMod reports relevant to one user journey.
+
+    Args:
+        user_journey_name (str): The journey heading, e.g. "Journey 1: Monitoring Financial Situation".
+        codmod_report_path (str): The CodMod detailed (journeys) report.
+        codmod_data_report_path (str): The CodMod data-layer report.
+
+    Returns:
+        dict: "excerpt" (the markdown to put in the prompt), "full_tokens" (estimated tokens of both reports)
+            and "excerpt_tokens" (estimated tokens of the excerpt).
+    """
+    journey_sections = _get_journey_sections(codmod_report_path, user_journey_name)
+    journey_texts = _read_sections(codmod_report_path, journey_sections)
+    table_names = set(TABLE_NAME_PATTERN.findall("\n".join(journey_texts)))
+
+    report_sections = journey_sections + _get_table_sections(codmod_report_path, table_names)
+    data_sections = _get_table_sections(codmod_data_report_path, table_names) + [
+        section
+        for section in md_index.get_section_index(codmod_data_report_path)
+        if section.text in ALWAYS_INCLUDED_DATA_SECTIONS
+    ]
+
+    excerpt = "\n\n".join(
+        [
+            f"### Excerpts from {codmod_report_path}",
+            *_read_sections(codmod_report_path, report_sections),
+            f"### Excerpts from {codmod_data_report_path}",
+            *_read_sections(codmod_data_report_path, data_sections),
+        ]
+    )
+
+    full_tokens = 0
+    for report_path in (codmod_report_path, codmod_data_report_path):
+        with open(report_path, encoding="utf-8", errors="replace") as report_file:
+            full_tokens += estimate_tokens(report_file.read())
+
+    return {
+        "excerpt": excerpt,
+        "full_tokens": full_tokens,
+        "excerpt_tokens": estimate_tokens(excerpt),
+    }
+
+
+def print_context_slicing_report(report_rows: List[dict]):
+    """
+    Prints the estimated prompt tokens saved per document.
+
+    Args:
+        report_rows (List[dict]): One {"file_path", "full_tokens", "excerpt_tokens"} row per document.
+    """
+    if not report_rows:
+        return
+    print("\nPrompt context slicing (estimated tokens)")
+    print(f"{'document':<60}{'full':>10}{'sliced':>10}{'saved':>10}")
+    for row in report_rows:
+        saved_tokens = row["full_tokens"] - row["excerpt_tokens"]
+        print(f"{row['file_path'].split('/')[-1]:<60}{row['full_tokens']:>10}{row['excerpt_tokens']:>10}{saved_tokens:>10}")
+    total_full = sum(row["full_tokens"] for row in report_rows)
+    total_saved = total_full - sum(row["excerpt_tokens"] for row in report_rows)
+    print(f"{'total':<60}{total_full:>10}{total_full - total_saved:>10}{total_saved:>10}")
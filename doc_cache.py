@@ -0,0 +1,176 @@
+"""
+Content-addressed cache for generated doc files.
+
+A doc's cache key is the hash of its substituted prompt plus the content of every file it references, so
+editing a prompt template or an upstream doc changes the key of exactly the docs that read it.
+
+The cache lives in config.DOC_CACHE_DIRECTORY:
+    objects/<key>   the generated file for that key
+    index.json      {"entries": {key: {"size", "last_used"}}, "outputs": {file_path: key}}
+
+"outputs" records which key each file on disk was generated from. Entries are evicted least recently used
+first once the objects take more than config.DOC_CACHE_MAX_BYTES, except the ones still backing an output.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import List, Optional
+
+import config
+
+_index_lock = threading.Lock()
+
+
+def _objects_directory() -> str:
+    return os.path.join(config.DOC_CACHE_DIRECTORY, "objects")
+
+
+def _index_path() -> str:
+    return os.path.join(config.DOC_CACHE_DIRECTORY, "index.json")
+
+
+def _load_index() -> dict:
+    try:
+        with open(_index_path(), "r") as index_file:
+            return json.load(index_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"entries": {}, "outputs": {}}
+
+
+def _save_index(index: dict):
+    os.makedirs(config.DOC_CACHE_DIRECTORY, exist_ok=True)
+    temp_path = f"{_index_path()}.tmp"
+    with open(temp_path, "w") as index_file:
+        json.dump(index, index_file, indent=2, sort_keys=True)
+    os.replace(temp_path, _index_path())
+
+
+def _hash_input(hasher, path: str):
+    """
+    Adds a referenced path to the hash. Files are hashed by content. Directories (e.g. the source code
+    directory) are hashed by the name, size and mtime of every file under them, which is enough to notice
+    a change without reading the whole tree.
+    """
+    hasher.update(f"\0input\0{path}\0".encode())
+    if os.path.isfile(path):
+        with open(path, "rb") as input_file:
+            for chunk in iter(lambda: input_file.read(1024 * 1024), b""):
+                hasher.update(chunk)
+    elif os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file_name in sorted(files):
+                file_path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                hasher.update(f"{os.path.relpath(file_path, path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    else:
+        hasher.update(b"\0missing\0")
+
+
+def get_cache_key(prompt: str, input_paths: List[str]) -> str:
+    """
+    Computes the cache key of a doc from its substituted prompt and the paths it references.
+
+    Args:
+        prompt (str): The prompt after substitution, so a template change changes the key.
+        input_paths (List[str]): The files and directories the prompt references.
+
+    Returns:
+        str: The sha256 hex digest.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(prompt.encode())
+    for path in sorted(set(input_paths)):
+        _hash_input(hasher, path)
+    return hasher.hexdigest()
+
+
+def get_output_key(file_path: str) -> Optional[str]:
+    """
+    Returns the cache key the file on disk was generated from, or None if the cache has no record of it.
+    """
+    with _index_lock:
+        return _load_index()["outputs"].get(file_path)
+
+
+def is_up_to_date(file_path: str, cache_key: str) -> bool:
+    """
+    Returns True if the file exists and was generated from this exact cache key.
+    """
+    return os.path.exists(file_path) and get_output_key(file_path) == cache_key
+
+
+def has_entry(cache_key: str) -> bool:
+    """
+    Returns True if the cache holds an output for the key.
+    """
+    with _index_lock:
+        in_index = cache_key in _load_index()["entries"]
+    return in_index and os.path.exists(os.path.join(_objects_directory(), cache_key))
+
+
+def restore(file_path: str, cache_key: str) -> bool:
+    """
+    Copies the cached output for the key to file_path, replacing whatever is there.
+
+    Returns:
+        bool: True if the key was in the cache and the file was restored.
+    """
+    with _index_lock:
+        index = _load_index()
+        entry = index["entries"].get(cache_key)
+        object_path = os.path.join(_objects_directory(), cache_key)
+        if entry is None or not os.path.exists(object_path):
+            return False
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        shutil.copyfile(object_path, file_path)
+        entry["last_used"] = time.time()
+        index["outputs"][file_path] = cache_key
+        _save_index(index)
+    return True
+
+
+def store(file_path: str, cache_key: str):
+    """
+    Stores the generated file under the cache key, records it as the current output for file_path and
+    evicts old entries if the cache is over its size limit.
+    """
+    os.makedirs(_objects_directory(), exist_ok=True)
+    with _index_lock:
+        index = _load_index()
+        object_path = os.path.join(_objects_directory(), cache_key)
+        shutil.copyfile(file_path, object_path)
+        index["entries"][cache_key] = {"size": os.path.getsize(object_path), "last_used": time.time()}
+        index["outputs"][file_path] = cache_key
+        _evict(index)
+        _save_index(index)
+
+
+def _evict(index: dict):
+    """
+    Removes least recently used entries until the objects fit in config.DOC_CACHE_MAX_BYTES.
+    Entries that back a current output are kept, they are what makes the next run a cache hit.
+    """
+    total_bytes = sum(entry["size"] for entry in index["entries"].values())
+    if total_bytes <= config.DOC_CACHE_MAX_BYTES:
+        return
+
+    in_use = set(index["outputs"].values())
+    by_last_used = sorted(index["entries"].items(), key=lambda item: item[1]["last_used"])
+    for cache_key, entry in by_last_used:
+        if total_bytes <= config.DOC_CACHE_MAX_BYTES:
+            break
+        if cache_key in in_use:
+            continue
+        try:
+            os.remove(os.path.join(_objects_directory(), cache_key))
+        except FileNotFoundError:
+            pass
+        del index["entries"][cache_key]
+        total_bytes -= entry["size"]
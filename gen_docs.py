@@ -1,122 +1,205 @@
+import argparse
+from typing import List
+
 import config
 import prompts.api_design
 import prompts.database_design
 import prompts.user_journey
-from helper_funcs import generate_doc_file, get_user_journey_header_texts
-
-## User Journeys
+import telemetry
+from context_slicer import print_context_slicing_report, slice_user_journey_context
+from helper_funcs import get_user_journey_header_texts
+from scheduler import (CHECK_HASH, CHECK_MTIME, plan_build, print_build_plan,
+                       run_doc_generation_jobs)
 
-user_journey_header_texts = get_user_journey_header_texts(
-    codmod_report=config.CODMOD_REPORT_PATH
-)
-print("Identified the following user_journeys")
-for user_journey_name in user_journey_header_texts:
-    print(user_journey_name)
 
-user_journey_file_paths = []
+def get_doc_configs() -> List[dict]:
+    """
+    Declares every doc target of the pipeline: its output file_path, prompt and substitutions.
+    The inputs of each target, and so the dependency graph, are taken from the substitutions and depends_on.
+    """
+    ## User Journeys
 
-for user_journey_name in user_journey_header_texts:
-    absolute_file_path = (
-        f"{config.USER_JOURNEY_DIRECTORY_PATH}/{user_journey_name.replace(' ', '_')}.md"
-    )
-    user_journey_file_paths.append(absolute_file_path)
-    generate_doc_file(
-        file_path=absolute_file_path,
-        prompt_template=prompts.user_journey.user_journey_prompt_template,
-        step_description=f"\nGenerating {user_journey_name} documentation in {absolute_file_path}",
-        substitutions={
-            "codmod_detailed_relative_file_path": config.CODMOD_REPORT_PATH,
-            "codmod_data_relative_file_path": config.CODMOD_DATA_REPORT_PATH,
-            "user_journey_name": user_journey_name,
-            "absolute_file_path": absolute_file_path,
-            "source_code_directory": config.SOURCE_CODE_DIRECTORY,
-        },
+    user_journey_header_texts = get_user_journey_header_texts(
+        codmod_report=config.CODMOD_REPORT_PATH
     )
+    print("Identified the following user_journeys")
+    for user_journey_name in user_journey_header_texts:
+        print(user_journey_name)
 
-## BRD
-for user_journey_file in user_journey_file_paths:
-    brd_file_name = user_journey_file.split("/")[-1]
-    brd_file_path = f"{config.BRDS_DIRECTORY_PATH}/{brd_file_name}"
-    generate_doc_file(
-        file_path=brd_file_path,
-        prompt_template=prompts.user_journey.brd_prompt_template,
-        step_description=f"\nGenerating BRD for {brd_file_name}",
-        substitutions={
-            "absolute_file_path": brd_file_path,
-            "user_journey_absolute_path": user_journey_file,
-            "application_directory": "moneynote-api/",
-        },
-    )
+    user_journey_file_paths = []
+    user_journey_configs = []
+    context_slicing_report_rows = []
+
+    for user_journey_name in user_journey_header_texts:
+        absolute_file_path = (
+            f"{config.USER_JOURNEY_DIRECTORY_PATH}/{user_journey_name.replace(' ', '_')}.md"
+        )
+        user_journey_file_paths.append(absolute_file_path)
+        user_journey_config = {
+            "file_path": absolute_file_path,
+            "prompt_template": prompts.user_journey.user_journey_prompt_template,
+            "step_description": f"\nGenerating {user_journey_name} documentation in {absolute_file_path}",
+            "substitutions": {
+                "codmod_detailed_relative_file_path": config.CODMOD_REPORT_PATH,
+                "codmod_data_relative_file_path": config.CODMOD_DATA_REPORT_PATH,
+                "user_journey_name": user_journey_name,
+                "absolute_file_path": absolute_file_path,
+                "source_code_directory": config.SOURCE_CODE_DIRECTORY,
+            },
+        }
+        if config.SLICE_PROMPT_CONTEXT:
+            # Put only the report sections about this journey in the prompt, the report paths stay in the
+            # substitutions so the doc is still rebuilt when a report changes
+            context_slice = slice_user_journey_context(
+                user_journey_name, config.CODMOD_REPORT_PATH, config.CODMOD_DATA_REPORT_PATH
+            )
+            user_journey_config["prompt_template"] = prompts.user_journey.user_journey_sliced_prompt_template
+            user_journey_config["substitutions"]["codmod_excerpt"] = context_slice["excerpt"]
+            context_slicing_report_rows.append(
+                {
+                    "file_path": absolute_file_path,
+                    "full_tokens": context_slice["full_tokens"],
+                    "excerpt_tokens": context_slice["excerpt_tokens"],
+                }
+            )
+        user_journey_configs.append(user_journey_config)
+
+    print_context_slicing_report(context_slicing_report_rows)
+
+    ## BRD
+    brd_file_paths = []
+    brd_configs = []
 
-doc_generation_configs = [
-    {
-        "file_path": config.FUNCTIONAL_SPECS_PATH,
-        "prompt_template": prompts.user_journey.functional_specification_intro_prompt_template,
-        "step_description": "\nGenerating functional_specs_introduction.md",
-        "substitutions": {"absolute_file_path": config.FUNCTIONAL_SPECS_PATH},
-    },
-    {
-        "file_path": config.DATABASE_DEFINITION_PATH,
-        "prompt_template": prompts.database_design.database_specification_prompt_template,
-        "step_description": "\nGenerating database_definition.md",
-        "substitutions": {
-            "application_directory": "moneynote-api/",
-            "absolute_file_path": config.DATABASE_DEFINITION_PATH,
+    for user_journey_file in user_journey_file_paths:
+        brd_file_name = user_journey_file.split("/")[-1]
+        brd_file_path = f"{config.BRDS_DIRECTORY_PATH}/{brd_file_name}"
+        brd_file_paths.append(brd_file_path)
+        brd_configs.append(
+            {
+                "file_path": brd_file_path,
+                "prompt_template": prompts.user_journey.brd_prompt_template,
+                "step_description": f"\nGenerating BRD for {brd_file_name}",
+                "substitutions": {
+                    "absolute_file_path": brd_file_path,
+                    "user_journey_absolute_path": user_journey_file,
+                    "application_directory": "moneynote-api/",
+                },
+            }
+        )
+
+    ## Design Docs
+    # Dependencies come from the absolute paths in the substitutions. Prompts that read whole folders
+    # (e.g. @docs/**) list the docs they need in "depends_on" instead.
+    doc_generation_configs = [
+        {
+            "file_path": config.FUNCTIONAL_SPECS_PATH,
+            "prompt_template": prompts.user_journey.functional_specification_intro_prompt_template,
+            "step_description": "\nGenerating functional_specs_introduction.md",
+            "substitutions": {"absolute_file_path": config.FUNCTIONAL_SPECS_PATH},
+            "depends_on": user_journey_file_paths,
+        },
+        {
+            "file_path": config.DATABASE_DEFINITION_PATH,
+            "prompt_template": prompts.database_design.database_specification_prompt_template,
+            "step_description": "\nGenerating database_definition.md",
+            "substitutions": {
+                "application_directory": "moneynote-api/",
+                "absolute_file_path": config.DATABASE_DEFINITION_PATH,
+            },
+            "depends_on": user_journey_file_paths + brd_file_paths,
         },
-    },
-    {
-        "file_path": config.DATABASE_ERD_PATH,
-        "prompt_template": prompts.database_design.database_erd_prompt_template,
-        "step_description": "\nGenerating database_erd.md",
-        "substitutions": {
-            "application_directory": "moneynote-api/",
-            "absolute_file_path": config.DATABASE_ERD_PATH,
-            "database_design_absolute_file_path": config.DATABASE_ERD_PATH,
+        {
+            "file_path": config.DATABASE_ERD_PATH,
+            "prompt_template": prompts.database_design.database_erd_prompt_template,
+            "step_description": "\nGenerating database_erd.md",
+            "substitutions": {
+                "application_directory": "moneynote-api/",
+                "absolute_file_path": config.DATABASE_ERD_PATH,
+                "database_design_absolute_file_path": config.DATABASE_DEFINITION_PATH,
+            },
+            "depends_on": user_journey_file_paths,
         },
-    },
-    {
-        "file_path": config.API_DEFINITION_PATH,
-        "prompt_template": prompts.api_design.api_specification_prompt_template,
-        "step_description": "\nGenerating api_definition.md",
-        "substitutions": {
-            "application_directory": "moneynote-api/",
-            "absolute_file_path": config.API_DEFINITION_PATH,
+        {
+            "file_path": config.API_DEFINITION_PATH,
+            "prompt_template": prompts.api_design.api_specification_prompt_template,
+            "step_description": "\nGenerating api_definition.md",
+            "substitutions": {
+                "application_directory": "moneynote-api/",
+                "absolute_file_path": config.API_DEFINITION_PATH,
+            },
+            "depends_on": user_journey_file_paths + brd_file_paths,
         },
-    },
-    {
-        "file_path": config.API_DEPENDENCIES_PATH,
-        "prompt_template": prompts.api_design.api_dependency_prompt_template,
-        "step_description": "\nGenerating api_dependencies.md",
-        "substitutions": {
-            "application_directory": "moneynote-api/",
-            "api_definition_absolute_path": config.API_DEFINITION_PATH,
-            "absolute_file_path": config.API_DEPENDENCIES_PATH,
+        {
+            "file_path": config.API_DEPENDENCIES_PATH,
+            "prompt_template": prompts.api_design.api_dependency_prompt_template,
+            "step_description": "\nGenerating api_dependencies.md",
+            "substitutions": {
+                "application_directory": "moneynote-api/",
+                "api_definition_absolute_path": config.API_DEFINITION_PATH,
+                "absolute_file_path": config.API_DEPENDENCIES_PATH,
+            },
         },
-    },
-    {
-        "file_path": config.API_PLAN_PATH,
-        "prompt_template": prompts.api_design.api_plan_prompt_template,
-        "step_description": "\nGenerating api_plan.md",
-        "substitutions": {
-            "api_definition_absolute_path": config.API_DEFINITION_PATH,
-            "api_dependencies_absolute_path": config.API_DEPENDENCIES_PATH,
-            "absolute_file_path": config.API_PLAN_PATH,
+        {
+            "file_path": config.API_PLAN_PATH,
+            "prompt_template": prompts.api_design.api_plan_prompt_template,
+            "step_description": "\nGenerating api_plan.md",
+            "substitutions": {
+                "api_definition_absolute_path": config.API_DEFINITION_PATH,
+                "api_dependencies_absolute_path": config.API_DEPENDENCIES_PATH,
+                "absolute_file_path": config.API_PLAN_PATH,
+            },
         },
-    },
-    {
-        "file_path": config.API_DETAIL_DESIGN_PATH,
-        "prompt_template": prompts.api_design.api_design_prompt_template,
-        "step_description": "\nGenerating api_detail_design.md",
-        "substitutions": {
-            "api_definition_absolute_path": config.API_DEFINITION_PATH,
-            "api_dependencies_absolute_path": config.API_DEPENDENCIES_PATH,
-            "api_plan_absolute_path": config.API_PLAN_PATH,
-            "architecture_principles_absolute_path": config.ARCHITECTURE_PRINCIPLES_PATH,
-            "absolute_file_path": config.API_DETAIL_DESIGN_PATH,
+        {
+            "file_path": config.API_DETAIL_DESIGN_PATH,
+            "prompt_template": prompts.api_design.api_design_prompt_template,
+            "step_description": "\nGenerating api_detail_design.md",
+            "substitutions": {
+                "api_definition_absolute_path": config.API_DEFINITION_PATH,
+                "api_dependencies_absolute_path": config.API_DEPENDENCIES_PATH,
+                "api_plan_absolute_path": config.API_PLAN_PATH,
+                "architecture_principles_absolute_path": config.ARCHITECTURE_PRINCIPLES_PATH,
+                "absolute_file_path": config.API_DETAIL_DESIGN_PATH,
+            },
         },
-    },
-]
+    ]
+
+    return user_journey_configs + brd_configs + doc_generation_configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the documentation and design documents, rebuilding only stale docs.")
+    parser.add_argument("--dry-run", action="store_true", help="print the build plan without generating anything")
+    parser.add_argument(
+        "--check",
+        choices=[CHECK_HASH, CHECK_MTIME],
+        default=CHECK_HASH,
+        help="detect stale docs by prompt and input content hashes (default) or by file modification times",
+    )
+    parser.add_argument("--workers", type=int, default=config.DOC_GENERATION_MAX_WORKERS, help="docs generated at the same time")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=config.DOC_GENERATION_BATCH_SIZE,
+        help="docs sharing a prompt template sent to gemini-cli in one prompt (default 1, no batching)",
+    )
+    args = parser.parse_args()
+
+    with telemetry.span("gen_docs", check=args.check, workers=args.workers, batch_size=args.batch_size) as attributes:
+        doc_configs = get_doc_configs()
+        plan = plan_build(doc_configs, check=args.check)
+        print_build_plan(plan, total_docs=len(doc_configs))
+        attributes.update(docs=len(doc_configs), stale_docs=len(plan), dry_run=args.dry_run)
+        if args.dry_run:
+            return
+
+        # mtime-stale docs may still match their cache key (e.g. a touched input), so force them
+        run_doc_generation_jobs(
+            [step["doc_config"] for step in plan],
+            max_workers=args.workers,
+            force=args.check == CHECK_MTIME,
+            batch_size=args.batch_size,
+        )
 
-for doc_config in doc_generation_configs:
-    generate_doc_file(**doc_config)
 
+if __name__ == "__main__":
+    main()
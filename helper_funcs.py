@@ -1,146 +1,423 @@
 import json
 import os
-import subprocess
+import random
 import time
 from string import Template
-from typing import List
-
-from mrkdwn_analysis import MarkdownAnalyzer
+from typing import Dict, List, Optional
 
 import config
+import doc_cache
+import md_index
+import prompts.batch
+import telemetry
+from llm_backends import GeminiRunResult, get_backend
 
 
-def get_md_analyzer_and_content(file_path:str):
+def run_gemini_prompt(prompt: str, absolute_file_path: Optional[str] = None, stream: bool = True, timeout_seconds: Optional[float] = config.GEMINI_PROMPT_TIMEOUT_SECONDS) -> GeminiRunResult:
     """
-    Gets the MarkdownAnalyzer instance and content of a markdown file.
+    Runs a prompt on the configured LLM backend (gemini-cli unless config.LLM_BACKEND says otherwise).
 
     Args:
-        file_path (str): The path to the markdown file.
+        prompt (str): The prompt to run.
+        absolute_file_path (str): The file the prompt asks for. gemini-cli reads it from the prompt, the fake
+            backend writes to it.
+        stream (bool): Print each output line as it arrives, otherwise print the whole output at the end.
+        timeout_seconds (float): Kill the prompt if it runs longer than this. None waits forever.
 
     Returns:
-        analyzer (MarkdownAnalyzer): An instance of MarkdownAnalyzer initialized with the markdown file.
-        content (List[str]): The content of the markdown file as a list of lines.
+        GeminiRunResult: The exit code, output and timings of the invocation.
     """
-    with open(file_path) as input_file:
-        content = input_file.readlines()
-    analyzer = MarkdownAnalyzer(file_path)
+    with telemetry.span("run_gemini_prompt", file_path=absolute_file_path, prompt_chars=len(prompt)) as attributes:
+        result = get_backend().run_prompt(
+            prompt,
+            absolute_file_path=absolute_file_path,
+            stream=stream,
+            timeout_seconds=timeout_seconds,
+        )
+        attributes.update(
+            returncode=result.returncode,
+            timed_out=result.timed_out,
+            time_to_first_byte_seconds=result.time_to_first_byte_seconds,
+            output_bytes=result.output_bytes,
+        )
+    return result
+
+@telemetry.traced(get_attributes=lambda prd_filepath: {"prd_file_path": prd_filepath})
+def gen_task_from_prd(prd_filepath: str):
+    return get_backend().run_taskmaster(['parse-prd', prd_filepath])
 
-    return analyzer, content
 
+@telemetry.traced()
+def expand_all_task_master_tasks()->bool:
+    return get_backend().run_taskmaster(['expand', '--all'])
 
-def run_gemini_prompt(prompt: str)->bool:
 
-    prompt = '"'+prompt.replace('"','\\"')+'"'
-    try:
-        result = subprocess.run([
-            'gemini',
-            '--approval-mode=yolo',
-            '--model=gemini-2.5-pro',
-            '-p',
-            prompt
-        ], text=True, check=True, stderr=subprocess.STDOUT)
-        print(result.stdout)
-    except subprocess.CalledProcessError as e:
-        print(f"Stderr: {e.stderr}")
-        return False
-    
-    return True
+# Failure types for a gemini-cli attempt, and the (base, cap) in seconds of their retry back-off
+RATE_LIMIT = "rate_limit"
+TIMEOUT = "timeout"
+NON_ZERO_EXIT = "non_zero_exit"
+MISSING_OUTPUT = "missing_output"
+RETRY_BACKOFF_SECONDS = {
+    RATE_LIMIT: (30, 300),
+    TIMEOUT: (5, 60),
+    NON_ZERO_EXIT: (5, 60),
+    MISSING_OUTPUT: (1, 15),
+}
+RATE_LIMIT_MARKERS = ("429", "resource_exhausted", "rate limit", "ratelimit", "quota")
 
-def gen_task_from_prd(prd_filepath: str):
+# How often to check for the output file after gemini-cli returns, see config.GEMINI_OUTPUT_WAIT_SECONDS
+OUTPUT_POLL_INTERVAL_SECONDS = 0.25
 
-    try:
-        result = subprocess.run([
-            'task-master',
-            'parse-prd',
-            prd_filepath
-        ], text=True, check=True, stderr=subprocess.STDOUT)
-        print(result.stdout)
-    except subprocess.CalledProcessError as e:
-        print(f"Error executing shell command: {e}")
-        print(f"Stderr: {e.stderr}")
-        return False
 
-    return True
+def wait_for_file(absolute_file_path: str, timeout_seconds: float, poll_interval_seconds: float = OUTPUT_POLL_INTERVAL_SECONDS) -> bool:
+    """
+    Polls for a file at a short interval until it exists or the timeout passes.
+
+    Returns:
+        bool: True as soon as the file exists, False if it still doesn't exist after timeout_seconds.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    while True:
+        if os.path.exists(absolute_file_path):
+            return True
+        remaining_seconds = deadline - time.monotonic()
+        if remaining_seconds <= 0:
+            return False
+        time.sleep(min(poll_interval_seconds, remaining_seconds))
+
 
+def classify_gemini_failure(result: GeminiRunResult) -> str:
+    """
+    Classifies why a gemini-cli attempt did not produce its output file.
 
-def expand_all_task_master_tasks()->bool:
-    try:
-        result = subprocess.run([
-            'task-master',
-            'expand',
-            '--all'
-        ], text=True, check=True, stderr=subprocess.STDOUT)
-        print(result.stdout)
-    except subprocess.CalledProcessError as e:
-        print(f"Error executing shell command: {e}")
-        print(f"Stderr: {e.stderr}")
-        return False
+    Returns:
+        str: One of RATE_LIMIT, TIMEOUT, NON_ZERO_EXIT or MISSING_OUTPUT.
+    """
+    if result.timed_out:
+        return TIMEOUT
+    if result.returncode != 0:
+        output = result.output.lower()
+        if any(marker in output for marker in RATE_LIMIT_MARKERS):
+            return RATE_LIMIT
+        return NON_ZERO_EXIT
+    return MISSING_OUTPUT
 
-    return True
 
+def get_retry_delay(failure_type: str, retry_number: int) -> float:
+    """
+    Returns a jittered exponential back-off delay ("full jitter") for the given failure type.
 
-def run_till_file_exists(prompt: str, absolute_file_path: str, step_description: str):
+    Args:
+        failure_type (str): The failure type of the previous attempt, see classify_gemini_failure.
+        retry_number (int): How many retries have already been made for this failure type, starting at 0.
+    """
+    base_seconds, cap_seconds = RETRY_BACKOFF_SECONDS[failure_type]
+    return random.uniform(0, min(cap_seconds, base_seconds * 2 ** retry_number)) * config.RETRY_BACKOFF_SCALE
+
+
+def run_till_file_exists(prompt: str, absolute_file_path: str, step_description: str) -> List[dict]:
     """
     Executes the prompt in gemini-cli until the file in the absolute file path exists
+
+    After each invocation the file is watched for a short while, so a successful attempt returns as soon as
+    the file is written. Failed attempts are retried with a back-off that depends on why they failed.
+
+    Returns:
+        List[dict]: One record per gemini-cli attempt with its outcome, gemini-cli latency, time to first byte
+            and output size, the time spent watching for the output file and the back-off slept before it.
     """
 
     max_attempts = 5
-    delay_in_seconds = 15
-    
+    attempts = []
+    retries_by_failure_type = {}
+    backoff_seconds = 0.0
+
     for i in range(0,max_attempts):
         # if the file already exists, we proceed to next steps, 
         # this way we can halt execution and resume without regenerating the same file over again
         if os.path.exists(f"{absolute_file_path}"):
-            print(f"Yay! File created: {absolute_file_path}")
             break
-        time.sleep(delay_in_seconds*i)
+        if backoff_seconds:
+            with telemetry.span("backoff", file_path=absolute_file_path, failure_type=outcome, seconds=round(backoff_seconds, 3)):
+                time.sleep(backoff_seconds)
         print(step_description)
-        run_gemini_prompt(prompt=prompt)
-    
-    return None
+        result = run_gemini_prompt(prompt=prompt, absolute_file_path=absolute_file_path)
+        wait_start_time = time.monotonic()
+        with telemetry.span("wait_for_output", file_path=absolute_file_path):
+            file_created = wait_for_file(absolute_file_path, timeout_seconds=config.GEMINI_OUTPUT_WAIT_SECONDS if result.returncode == 0 else 0)
+        output_wait_seconds = time.monotonic() - wait_start_time
+        outcome = "created" if file_created else classify_gemini_failure(result)
+        attempts.append({
+            "attempt": i + 1,
+            "outcome": outcome,
+            "latency_seconds": round(result.duration_seconds, 3),
+            "time_to_first_byte_seconds": None if result.time_to_first_byte_seconds is None else round(result.time_to_first_byte_seconds, 3),
+            "output_bytes": result.output_bytes,
+            "output_wait_seconds": round(output_wait_seconds, 3),
+            "backoff_seconds": round(backoff_seconds, 3),
+        })
+        print(f"Attempt {i + 1} for {absolute_file_path}: {outcome} in {result.duration_seconds:.1f}s")
+        if file_created:
+            break
+        retry_number = retries_by_failure_type.get(outcome, 0)
+        retries_by_failure_type[outcome] = retry_number + 1
+        backoff_seconds = get_retry_delay(outcome, retry_number)
 
-def generate_doc_file(file_path: str, prompt_template: Template, step_description: str, substitutions: dict):
+    if os.path.exists(absolute_file_path):
+        print(f"Yay! File created: {absolute_file_path}")
+    else:
+        print(f"Giving up on {absolute_file_path} after {len(attempts)} attempts")
+
+    return attempts
+
+# Substitution keys that name the output of a doc rather than one of its inputs
+OUTPUT_SUBSTITUTION_KEYS = ("absolute_file_path",)
+
+
+def get_doc_inputs(file_path: str, substitutions: dict, depends_on: Optional[List[str]] = None) -> List[str]:
     """
-    Generates a documentation file using a prompt template and substitutions.
+    Returns the input paths of a doc.
+
+    Inputs are the absolute paths referenced by the substitutions (other than the output path itself),
+    plus any paths listed in depends_on for inputs the prompt references without a substitution (e.g. @docs/**).
+
+    Args:
+        file_path (str): The absolute path of the doc.
+        substitutions (dict): The substitutions for the doc's prompt template.
+        depends_on (List[str]): Extra input paths.
+
+    Returns:
+        List[str]: The input paths, in the order they were declared.
+    """
+    inputs = []
+    for key, value in substitutions.items():
+        if key in OUTPUT_SUBSTITUTION_KEYS or not isinstance(value, str):
+            continue
+        if os.path.isabs(value) and value != file_path:
+            inputs.append(value)
+    for path in depends_on or []:
+        if path not in inputs:
+            inputs.append(path)
+    return inputs
+
+
+def get_doc_cache_key(file_path: str, prompt_template: Template, substitutions: dict, depends_on: Optional[List[str]] = None) -> str:
+    """
+    Returns the doc cache key of a doc: the hash of its substituted prompt and the content of its inputs.
+    """
+    prompt = prompt_template.substitute(substitutions)
+    return doc_cache.get_cache_key(prompt, get_doc_inputs(file_path, substitutions, depends_on))
+
+
+def prepare_doc_file(file_path: str, prompt_template: Template, substitutions: dict, depends_on: Optional[List[str]] = None, force: bool = False) -> Optional[str]:
+    """
+    Checks a doc against the doc cache before generating it.
+
+    The file is only regenerated when its cache key (the substituted prompt plus the content of every input)
+    changed since it was written. A key seen before is restored from the doc cache instead of prompting again.
+    An existing file the cache has no record of is adopted as is, so docs generated before the cache existed
+    are not regenerated. force skips all of these checks and always prompts again.
+
+    Returns:
+        str: The cache key to store the generated file under, or None if the file needs no generating. A stale
+            file is removed, so the prompt's output can be detected.
+    """
+    cache_key = get_doc_cache_key(file_path, prompt_template, substitutions, depends_on)
+
+    if force:
+        if os.path.exists(file_path):
+            print(f"Forced, regenerating: {file_path}")
+            os.remove(file_path)
+    elif doc_cache.is_up_to_date(file_path, cache_key):
+        print(f"Up to date: {file_path}")
+        return None
+    elif doc_cache.restore(file_path, cache_key):
+        print(f"Restored from cache: {file_path}")
+        return None
+    elif os.path.exists(file_path):
+        if doc_cache.get_output_key(file_path) is None:
+            doc_cache.store(file_path, cache_key)
+            print(f"Adopted existing file: {file_path}")
+            return None
+        # The prompt or an input changed, the previous version stays in the cache under its old key
+        print(f"Out of date, regenerating: {file_path}")
+        os.remove(file_path)
+
+    return cache_key
+
+
+def generate_doc_file(file_path: str, prompt_template: Template, step_description: str, substitutions: dict, depends_on: Optional[List[str]] = None, force: bool = False):
+    """
+    Generates a documentation file using a prompt template and substitutions, unless the doc cache says it is
+    up to date (see prepare_doc_file).
 
     Args:
         file_path (str): The absolute path to the file to be generated.
         prompt_template (any): The prompt template to use.
         step_description (str): The description of the step.
         substitutions (dict): A dictionary of substitutions for the prompt template.
+        depends_on (List[str]): Extra input paths the prompt reads without a substitution, see get_doc_inputs.
+        force (bool): Regenerate the file even if the cache considers it up to date.
+
+    Returns:
+        List[dict]: The gemini-cli attempts made, see run_till_file_exists.
     """
-    prompt = prompt_template.substitute(substitutions)
-    run_till_file_exists(
-        prompt=prompt,
-        absolute_file_path=file_path,
-        step_description=step_description,
-    )
+    with telemetry.span("generate_doc_file", file_path=file_path, template=telemetry.get_template_name(prompt_template)) as attributes:
+        cache_key = prepare_doc_file(file_path, prompt_template, substitutions, depends_on, force)
+        attributes["cached"] = cache_key is None
+        if cache_key is None:
+            return []
+
+        attempts = run_till_file_exists(
+            prompt=prompt_template.substitute(substitutions),
+            absolute_file_path=file_path,
+            step_description=step_description,
+        )
+        attributes.update(
+            created=os.path.exists(file_path),
+            attempts=len(attempts),
+            retries=max(len(attempts) - 1, 0),
+            outcomes=[attempt["outcome"] for attempt in attempts],
+        )
+        if os.path.exists(file_path):
+            doc_cache.store(file_path, cache_key)
+        return attempts
+
+
+def group_doc_configs_for_batching(doc_configs: List[dict], batch_size: int, max_prompt_bytes: int = config.DOC_GENERATION_BATCH_MAX_PROMPT_BYTES) -> List[List[dict]]:
+    """
+    Groups docs that can share one prompt: docs with the same prompt template and the same extra inputs read the
+    same shared sources and only differ in their substitutions.
+
+    Args:
+        doc_configs (List[dict]): The doc configs, as passed to generate_doc_file.
+        batch_size (int): The maximum number of docs in a group.
+        max_prompt_bytes (int): The maximum size of the prompts of a group together. A doc whose prompt alone is
+            larger gets a group of its own.
+
+    Returns:
+        List[List[dict]]: The groups, in the order their first doc was declared. Docs nothing can be batched
+            with come back in groups of one.
+    """
+    groups_by_key = {}
+    for doc_config in doc_configs:
+        group_key = (id(doc_config["prompt_template"]), tuple(sorted(doc_config.get("depends_on") or [])))
+        groups_by_key.setdefault(group_key, []).append(doc_config)
+    if batch_size <= 1:
+        return [[doc_config] for group in groups_by_key.values() for doc_config in group]
+
+    batches = []
+    for group in groups_by_key.values():
+        batch, batch_bytes = [], 0
+        for doc_config in group:
+            prompt_bytes = len(doc_config["prompt_template"].substitute(doc_config["substitutions"]).encode())
+            if batch and (len(batch) == batch_size or batch_bytes + prompt_bytes > max_prompt_bytes):
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+            batch.append(doc_config)
+            batch_bytes += prompt_bytes
+        batches.append(batch)
+    return batches
+
+
+def generate_doc_files_batch(doc_configs: List[dict], force: bool = False) -> Dict[str, List[dict]]:
+    """
+    Generates several docs that share a prompt template with a single gemini-cli invocation.
+
+    Docs the doc cache can serve are dropped from the batch first. The remaining prompts are sent together in one
+    batch prompt (see prompts/batch.py), then every expected file is checked, and the docs the batch did not
+    produce are generated again on their own with generate_doc_file's retries.
+
+    Args:
+        doc_configs (List[dict]): The doc configs, as passed to generate_doc_file.
+        force (bool): Regenerate the files even if the cache considers them up to date.
+
+    Returns:
+        Dict[str, List[dict]]: The gemini-cli attempts made for each doc, see run_till_file_exists. The batch
+            attempt is included in the attempts of every doc in the batch.
+    """
+    attempts_by_path = {doc_config["file_path"]: [] for doc_config in doc_configs}
+    pending = []
+    for doc_config in doc_configs:
+        cache_key = prepare_doc_file(
+            doc_config["file_path"],
+            doc_config["prompt_template"],
+            doc_config["substitutions"],
+            doc_config.get("depends_on"),
+            force,
+        )
+        if cache_key is not None:
+            pending.append((doc_config, cache_key))
+
+    if len(pending) == 1:
+        doc_config, _ = pending[0]
+        attempts_by_path[doc_config["file_path"]] = generate_doc_file(**doc_config, force=force)
+        return attempts_by_path
+    if not pending:
+        return attempts_by_path
+
+    with telemetry.span(
+        "generate_doc_files_batch",
+        file_paths=[doc_config["file_path"] for doc_config, _ in pending],
+        template=telemetry.get_template_name(pending[0][0]["prompt_template"]),
+    ) as attributes:
+        document_count = len(pending)
+        tasks = []
+        for document_number, (doc_config, _) in enumerate(pending, start=1):
+            header = prompts.batch.batch_task_header_template.substitute(
+                document_number=document_number,
+                document_count=document_count,
+                absolute_file_path=doc_config["file_path"],
+            )
+            tasks.append(f"{header}\n{doc_config['prompt_template'].substitute(doc_config['substitutions'])}")
+        batch_prompt = prompts.batch.batch_prompt_template.substitute(document_count=document_count, tasks="\n\n".join(tasks))
+
+        print(f"\nGenerating {document_count} docs in one batch: {', '.join(os.path.basename(doc_config['file_path']) for doc_config, _ in pending)}")
+        result = run_gemini_prompt(
+            prompt=batch_prompt,
+            timeout_seconds=config.GEMINI_PROMPT_TIMEOUT_SECONDS * document_count,
+        )
+
+        # The files are watched for one shared output wait, not one wait per file
+        wait_start_time = time.monotonic()
+        output_wait_seconds = config.GEMINI_OUTPUT_WAIT_SECONDS if result.returncode == 0 else 0
+        missing = []
+        for doc_config, cache_key in pending:
+            file_path = doc_config["file_path"]
+            remaining_wait_seconds = max(0.0, output_wait_seconds - (time.monotonic() - wait_start_time))
+            file_created = wait_for_file(file_path, timeout_seconds=remaining_wait_seconds)
+            attempts_by_path[file_path].append({
+                "attempt": 1,
+                "outcome": "created" if file_created else classify_gemini_failure(result),
+                "latency_seconds": round(result.duration_seconds, 3),
+                "time_to_first_byte_seconds": None if result.time_to_first_byte_seconds is None else round(result.time_to_first_byte_seconds, 3),
+                "output_bytes": result.output_bytes,
+                "output_wait_seconds": round(time.monotonic() - wait_start_time, 3),
+                "backoff_seconds": 0.0,
+                "batch_size": document_count,
+            })
+            if file_created:
+                doc_cache.store(file_path, cache_key)
+            else:
+                missing.append(doc_config)
+
+        attributes.update(created=document_count - len(missing), requeued=len(missing))
+        print(f"Batch of {document_count} docs: {document_count - len(missing)} created, {len(missing)} to generate on their own")
+        for doc_config in missing:
+            attempts_by_path[doc_config["file_path"]].extend(generate_doc_file(**doc_config, force=force))
+        return attempts_by_path
 
 def get_user_journey_header_texts (codmod_report: str) -> List[str]:
     """
     Parses the markdown file and returns the list of headers from the user_journey sections e.g. "Journey 1: Monitoring Financial Situation"
+
+    The headers are the ones directly below the first "User Journeys" header, read from the file's cached section index.
     """
-    analyzer, content = get_md_analyzer_and_content(codmod_report)
-    headers =  analyzer.identify_headers()['Header']
-
-    # Find the next headers with -1 level of heading.
-    in_user_journey_section = False
-    start_level = 0
-    user_journey_header_texts = []
-    for header in headers:
-        if header['text'] == "User Journeys":
-            start_level = header['level']
-            in_user_journey_section = True
-            continue # skip next block and jump to next header
-        
-        if in_user_journey_section:
-            if header['level'] == (start_level+1):
-                user_journey_header_texts.append(header['text'])
-            elif header['level'] <= start_level:
-                in_user_journey_section = False
-                break # we're done, avoid duplicate User Journey Sessions by breaking here.
-        
-    return user_journey_header_texts
+    user_journeys_section = md_index.find_section(codmod_report, "User Journeys")
+    if user_journeys_section is None:
+        return []
+
+    return [section.text for section in md_index.get_child_sections(codmod_report, user_journeys_section)]
 
 def get_next_phase(directory: str) -> int:
     """
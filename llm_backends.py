@@ -0,0 +1,297 @@
+"""
+Backends that run the pipeline's prompts.
+
+GeminiCliBackend shells out to gemini-cli and task-master. FakeBackend is a deterministic local stand-in with
+configurable latency and failure injection, so the pipeline's own overhead (substitution, parsing, scheduling,
+caching, retries) can be measured without a network. The backend is picked by config.LLM_BACKEND.
+"""
+import json
+import os
+import random
+import re
+import signal
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional
+
+import config
+import prompts.batch
+
+
+@dataclass
+class GeminiRunResult:
+    """
+    The outcome of a single prompt invocation.
+
+    Attributes:
+        returncode (int): The exit code of gemini-cli, negative if it was killed.
+        output (str): The combined stdout and stderr of gemini-cli.
+        duration_seconds (float): The wall-clock time the invocation took.
+        time_to_first_byte_seconds (float): The time until gemini-cli wrote its first output, None if it wrote nothing.
+        output_bytes (int): The size of the output.
+        timed_out (bool): Whether gemini-cli was killed for running past its timeout.
+    """
+    returncode: int
+    output: str
+    duration_seconds: float
+    time_to_first_byte_seconds: Optional[float] = None
+    output_bytes: int = 0
+    timed_out: bool = False
+
+
+class LLMBackend(ABC):
+    """
+    The interface the pipeline uses to run prompts and task-master commands.
+    """
+    name = ""
+
+    @abstractmethod
+    def run_prompt(self, prompt: str, absolute_file_path: Optional[str], stream: bool, timeout_seconds: Optional[float]) -> GeminiRunResult:
+        """
+        Runs a prompt that is expected to write its result to absolute_file_path.
+
+        Args:
+            prompt (str): The prompt to run.
+            absolute_file_path (str): The file the prompt asks for, None if unknown.
+            stream (bool): Print each output line as it arrives, otherwise print the whole output at the end.
+            timeout_seconds (float): Give up on the prompt if it runs longer than this. None waits forever.
+        """
+
+    @abstractmethod
+    def run_taskmaster(self, args: List[str]) -> bool:
+        """
+        Runs a task-master command, e.g. ["parse-prd", prd_file_path].
+
+        Returns:
+            bool: True if the command succeeded.
+        """
+
+
+class GeminiCliBackend(LLMBackend):
+    """
+    Runs prompts with gemini-cli and task commands with task-master.
+    """
+    name = "gemini"
+
+    def __init__(self, binary: str = config.GEMINI_BINARY, model: str = config.GEMINI_MODEL):
+        self.binary = binary
+        self.model = model
+
+    def run_prompt(self, prompt: str, absolute_file_path: Optional[str], stream: bool, timeout_seconds: Optional[float]) -> GeminiRunResult:
+        start_time = time.monotonic()
+        # The prompt goes on stdin: a batch prompt can be larger than the 128 KiB Linux allows a single argument
+        try:
+            process = subprocess.Popen([
+                self.binary,
+                '--approval-mode=yolo',
+                f'--model={self.model}',
+            ], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, start_new_session=True)
+        except OSError as e:
+            print(f"Could not start gemini-cli: {e}")
+            return GeminiRunResult(returncode=-1, output=str(e), duration_seconds=time.monotonic() - start_time)
+
+        def write_prompt():
+            try:
+                process.stdin.write(prompt.encode())
+                process.stdin.close()
+            except OSError:
+                # gemini-cli exited without reading it all, its exit code tells why
+                pass
+
+        output_lines = []
+        first_byte_times = []
+
+        def read_output():
+            for raw_line in iter(process.stdout.readline, b""):
+                if not first_byte_times:
+                    first_byte_times.append(time.monotonic())
+                output_lines.append(raw_line)
+                if stream:
+                    print(raw_line.decode(errors="replace"), end="", flush=True)
+            process.stdout.close()
+
+        reader = threading.Thread(target=read_output, daemon=True)
+        reader.start()
+        writer = threading.Thread(target=write_prompt, daemon=True)
+        writer.start()
+        timed_out = False
+        try:
+            process.wait(timeout=timeout_seconds)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            print(f"gemini-cli ran for more than {timeout_seconds}s, killing it")
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+        reader.join()
+        writer.join()
+        duration_seconds = time.monotonic() - start_time
+
+        output = b"".join(output_lines)
+        if not stream:
+            print(output.decode(errors="replace"))
+        if process.returncode != 0:
+            print(f"gemini-cli exited with code {process.returncode}")
+
+        return GeminiRunResult(
+            returncode=process.returncode,
+            output=output.decode(errors="replace"),
+            duration_seconds=duration_seconds,
+            time_to_first_byte_seconds=first_byte_times[0] - start_time if first_byte_times else None,
+            output_bytes=len(output),
+            timed_out=timed_out,
+        )
+
+    def run_taskmaster(self, args: List[str]) -> bool:
+        try:
+            result = subprocess.run(['task-master', *args], text=True, check=True, stderr=subprocess.STDOUT)
+            print(result.stdout)
+        except subprocess.CalledProcessError as e:
+            print(f"Error executing shell command: {e}")
+            print(f"Stderr: {e.stderr}")
+            return False
+
+        return True
+
+
+class FakeBackend(LLMBackend):
+    """
+    A deterministic local stand-in for gemini-cli and task-master.
+
+    Each prompt sleeps for a latency drawn around latency_seconds, then either writes a plausible markdown file
+    to absolute_file_path or fails with one of the failures the retry logic handles (rate limit, non-zero exit,
+    missing output) with probability failure_rate. The outcome only depends on the seed, the prompt and how many
+    times that prompt has been run, so two runs with the same settings behave the same.
+    """
+    name = "fake"
+    failure_kinds = ("rate_limit", "non_zero_exit", "missing_output")
+
+    def __init__(
+        self,
+        latency_seconds: float = config.FAKE_LLM_LATENCY_SECONDS,
+        failure_rate: float = config.FAKE_LLM_FAILURE_RATE,
+        seed: int = config.FAKE_LLM_SEED,
+    ):
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self._runs_by_prompt = {}
+        self._lock = threading.Lock()
+
+    def _get_random(self, key: str) -> random.Random:
+        with self._lock:
+            run_number = self._runs_by_prompt.get(key, 0)
+            self._runs_by_prompt[key] = run_number + 1
+        return random.Random(f"{self.seed}:{run_number}:{key}")
+
+    def run_prompt(self, prompt: str, absolute_file_path: Optional[str], stream: bool, timeout_seconds: Optional[float]) -> GeminiRunResult:
+        start_time = time.monotonic()
+        rng = self._get_random(prompt)
+        latency_seconds = self.latency_seconds * rng.uniform(0.5, 1.5)
+        timed_out = timeout_seconds is not None and latency_seconds > timeout_seconds
+        time.sleep(min(latency_seconds, timeout_seconds) if timed_out else latency_seconds)
+
+        failure_kind = rng.choice(self.failure_kinds) if rng.random() < self.failure_rate else None
+        if timed_out:
+            output, returncode = "", -signal.SIGKILL
+        elif failure_kind == "rate_limit":
+            output, returncode = "Error: 429 RESOURCE_EXHAUSTED, quota exceeded\n", 1
+        elif failure_kind == "non_zero_exit":
+            output, returncode = "Error: the model returned an invalid response\n", 1
+        else:
+            output, returncode = "Done.\n", 0
+            if failure_kind is None:
+                saved_paths = []
+                for file_path, document_prompt in self._split_documents(prompt, absolute_file_path):
+                    # In a batch each document can go missing on its own, like a model skipping a task
+                    if file_path != absolute_file_path and rng.random() < self.failure_rate:
+                        continue
+                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                    with open(file_path, "w") as output_file:
+                        output_file.write(self._render_markdown(document_prompt, rng))
+                    saved_paths.append(file_path)
+                if saved_paths:
+                    output = "".join(f"Saved the document to {file_path}\n" for file_path in saved_paths)
+        print(output, end="", flush=True)
+
+        return GeminiRunResult(
+            returncode=returncode,
+            output=output,
+            duration_seconds=time.monotonic() - start_time,
+            time_to_first_byte_seconds=(time.monotonic() - start_time) if output else None,
+            output_bytes=len(output.encode()),
+            timed_out=timed_out,
+        )
+
+    def _split_documents(self, prompt: str, absolute_file_path: Optional[str]) -> List[tuple]:
+        """
+        Returns the (file path, prompt) of every document the prompt asks for: one per task of a batch prompt
+        (see prompts/batch.py), otherwise just absolute_file_path.
+        """
+        headers = list(prompts.batch.batch_task_header_pattern.finditer(prompt))
+        if not headers:
+            return [(absolute_file_path, prompt)] if absolute_file_path else []
+        return [
+            (header.group(1), prompt[header.end():headers[number + 1].start() if number + 1 < len(headers) else len(prompt)])
+            for number, header in enumerate(headers)
+        ]
+
+    def _render_markdown(self, prompt: str, rng: random.Random) -> str:
+        """
+        Writes a document shaped like the one the prompt asks for: the markdown headings of the prompt's
+        document structure, or a generic outline, each followed by filler paragraphs.
+        """
+        headings = [line.strip() for line in prompt.splitlines() if re.match(r"^#{1,6} \S", line.strip())]
+        if not headings:
+            headings = ["# Generated Document", "## Overview", "## Details", "## Phase 1: Foundations", "## Phase 2: Features"]
+        words = ["account", "balance", "book", "category", "currency", "flow", "payee", "report", "tag", "user"]
+        sections = []
+        for heading in headings:
+            paragraphs = [
+                " ".join(rng.choice(words) for _ in range(rng.randint(30, 80))).capitalize() + "."
+                for _ in range(rng.randint(1, 3))
+            ]
+            sections.append("\n\n".join([heading, *paragraphs]))
+        return "\n\n".join(sections) + "\n"
+
+    def run_taskmaster(self, args: List[str]) -> bool:
+        time.sleep(self.latency_seconds * self._get_random(" ".join(args)).uniform(0.5, 1.5))
+        if args and args[0] == "parse-prd":
+            os.makedirs(os.path.dirname(config.TASKMASTER_JSON_FILE), exist_ok=True)
+            tasks = [{"id": task_id, "title": f"Task {task_id} from {os.path.basename(args[1])}", "status": "pending"} for task_id in range(1, 6)]
+            with open(config.TASKMASTER_JSON_FILE, "w") as task_file:
+                json.dump({"master": {"tasks": tasks}}, task_file, indent=2)
+        return True
+
+
+BACKENDS = {
+    GeminiCliBackend.name: GeminiCliBackend,
+    FakeBackend.name: FakeBackend,
+}
+_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> LLMBackend:
+    """
+    Returns the backend named by config.LLM_BACKEND, created on first use and shared by all threads.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            try:
+                _backend = BACKENDS[config.LLM_BACKEND]()
+            except KeyError:
+                raise ValueError(f"Unknown LLM_BACKEND {config.LLM_BACKEND!r}, expected one of: {', '.join(BACKENDS)}")
+        return _backend
+
+
+def set_backend(backend: Optional[LLMBackend]):
+    """
+    Replaces the backend, e.g. with a FakeBackend configured in code. None goes back to config.LLM_BACKEND.
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
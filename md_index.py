@@ -0,0 +1,139 @@
+"""
+Single-pass heading index for large markdown files.
+
+The file is memory-mapped and scanned once, line by line, recording the byte offsets of every ATX heading
+(# to ######) and of the section it opens. Headings inside fenced code blocks are skipped. A section runs until
+the next heading of the same or a higher level, so any section can be read straight from its offsets without
+parsing the file again. Indexes are cached per file and rebuilt when the file's mtime or size changes.
+"""
+import mmap
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+ATX_HEADING_PATTERN = re.compile(rb"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+FENCE_PATTERN = re.compile(rb"^ {0,3}(`{3,}|~{3,})")
+
+
+@dataclass(frozen=True)
+class MarkdownSection:
+    """
+    A heading and the byte range of the section it opens.
+
+    Attributes:
+        level (int): The heading level, 1 for "#".
+        text (str): The heading text without the leading #'s.
+        line (int): The 1-based line number of the heading.
+        start (int): The byte offset of the heading line.
+        body_start (int): The byte offset just after the heading line.
+        end (int): The byte offset where the section ends: the next heading of the same or a higher level, or EOF.
+    """
+    level: int
+    text: str
+    line: int
+    start: int
+    body_start: int
+    end: int
+
+
+_index_cache: Dict[str, Tuple[Tuple[int, int], List[MarkdownSection]]] = {}
+_index_cache_lock = threading.Lock()
+
+
+def build_section_index(file_path: str) -> List[MarkdownSection]:
+    """
+    Scans a markdown file once and returns its headings, in file order, with their section offsets.
+    """
+    with open(file_path, "rb") as markdown_file:
+        if os.fstat(markdown_file.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(markdown_file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            return _scan_headings(content)
+
+
+def _scan_headings(content) -> List[MarkdownSection]:
+    # open_sections holds [level, text, line, start, body_start] for headings whose section hasn't ended yet
+    sections = []
+    open_sections = []
+    fence = None
+    position = 0
+    line_number = 0
+    size = len(content)
+
+    while position < size:
+        line_end = content.find(b"\n", position)
+        next_position = size if line_end == -1 else line_end + 1
+        line = content[position:size if line_end == -1 else line_end].rstrip(b"\r")
+        line_number += 1
+
+        fence_match = FENCE_PATTERN.match(line)
+        if fence_match:
+            marker = fence_match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker[:1] == fence[:1] and len(marker) >= len(fence):
+                fence = None
+        elif fence is None and line.lstrip(b" ").startswith(b"#"):
+            heading_match = ATX_HEADING_PATTERN.match(line)
+            if heading_match:
+                level = len(heading_match.group(1))
+                while open_sections and open_sections[-1][0] >= level:
+                    sections.append(MarkdownSection(*open_sections.pop(), end=position))
+                text = (heading_match.group(2) or b"").decode("utf-8", errors="replace").strip()
+                open_sections.append([level, text, line_number, position, next_position])
+
+        position = next_position
+
+    while open_sections:
+        sections.append(MarkdownSection(*open_sections.pop(), end=size))
+    return sorted(sections, key=lambda section: section.start)
+
+
+def get_section_index(file_path: str) -> List[MarkdownSection]:
+    """
+    Returns the cached heading index of a file, rebuilding it if the file changed since it was indexed.
+    """
+    stat = os.stat(file_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _index_cache_lock:
+        cached = _index_cache.get(file_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    sections = build_section_index(file_path)
+    with _index_cache_lock:
+        _index_cache[file_path] = (signature, sections)
+    return sections
+
+
+def find_section(file_path: str, text: str, level: Optional[int] = None) -> Optional[MarkdownSection]:
+    """
+    Returns the first section whose heading text (and level, if given) matches, or None.
+    """
+    for section in get_section_index(file_path):
+        if section.text == text and (level is None or section.level == level):
+            return section
+    return None
+
+
+def get_child_sections(file_path: str, parent: MarkdownSection) -> List[MarkdownSection]:
+    """
+    Returns the sections directly below a section, i.e. one level deeper and inside its byte range.
+    """
+    return [
+        section
+        for section in get_section_index(file_path)
+        if parent.start < section.start < parent.end and section.level == parent.level + 1
+    ]
+
+
+def read_section(file_path: str, section: MarkdownSection, include_heading: bool = True) -> str:
+    """
+    Reads a section's text straight from its byte offsets.
+    """
+    start = section.start if include_heading else section.body_start
+    with open(file_path, "rb") as markdown_file:
+        markdown_file.seek(start)
+        return markdown_file.read(section.end - start).decode("utf-8", errors="replace")
@@ -0,0 +1,235 @@
+"""Initial schema, the tables of docs/database_design
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 14:58:42.280156
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('t_user_user',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(), nullable=True),
+    sa.Column('nickName', sa.String(), nullable=True),
+    sa.Column('password', sa.String(), nullable=True),
+    sa.Column('telephone', sa.String(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('registerIp', sa.String(), nullable=True),
+    sa.Column('defaultGroup_id', sa.Integer(), nullable=True),
+    sa.Column('defaultBook_id', sa.Integer(), nullable=True),
+    sa.Column('enable', sa.Boolean(), nullable=False),
+    sa.Column('registerTime', sa.Integer(), nullable=True),
+    sa.Column('headimgurl', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['defaultBook_id'], ['t_user_book.id'], use_alter=True),
+    sa.ForeignKeyConstraint(['defaultGroup_id'], ['t_user_group.id'], use_alter=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_user_group',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('notes', sa.String(), nullable=True),
+    sa.Column('enable', sa.Boolean(), nullable=False),
+    sa.Column('creator_id', sa.Integer(), nullable=True),
+    sa.Column('defaultBook_id', sa.Integer(), nullable=True),
+    sa.Column('defaultCurrencyCode', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['creator_id'], ['t_user_user.id'], ),
+    sa.ForeignKeyConstraint(['defaultBook_id'], ['t_user_book.id'], use_alter=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_user_note_day',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('notes', sa.String(), nullable=True),
+    sa.Column('startDate', sa.Integer(), nullable=True),
+    sa.Column('endDate', sa.Integer(), nullable=True),
+    sa.Column('nextDate', sa.Integer(), nullable=True),
+    sa.Column('repeatType', sa.Integer(), nullable=True),
+    sa.Column('interval', sa.Integer(), nullable=True),
+    sa.Column('totalCount', sa.Integer(), nullable=True),
+    sa.Column('runCount', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['t_user_user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_user_account',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.Integer(), nullable=False),
+    sa.Column('notes', sa.String(), nullable=True),
+    sa.Column('enable', sa.Boolean(), nullable=False),
+    sa.Column('no', sa.String(), nullable=True),
+    sa.Column('balance', sa.Float(), nullable=False),
+    sa.Column('include', sa.Boolean(), nullable=False),
+    sa.Column('canExpense', sa.Boolean(), nullable=False),
+    sa.Column('canIncome', sa.Boolean(), nullable=False),
+    sa.Column('canTransferFrom', sa.Boolean(), nullable=False),
+    sa.Column('canTransferTo', sa.Boolean(), nullable=False),
+    sa.Column('currencyCode', sa.String(), nullable=False),
+    sa.Column('initialBalance', sa.Float(), nullable=False),
+    sa.Column('creditLimit', sa.Float(), nullable=True),
+    sa.Column('billDay', sa.Integer(), nullable=True),
+    sa.Column('apr', sa.Float(), nullable=True),
+    sa.Column('sort', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['t_user_group.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_user_user_group_relation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('role', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['t_user_group.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['t_user_user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_user_book',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('notes', sa.String(), nullable=True),
+    sa.Column('enable', sa.Boolean(), nullable=False),
+    sa.Column('defaultExpenseAccount_id', sa.Integer(), nullable=True),
+    sa.Column('defaultIncomeAccount_id', sa.Integer(), nullable=True),
+    sa.Column('defaultTransferFromAccount_id', sa.Integer(), nullable=True),
+    sa.Column('defaultTransferToAccount_id', sa.Integer(), nullable=True),
+    sa.Column('defaultExpenseCategory_id', sa.Integer(), nullable=True),
+    sa.Column('defaultIncomeCategory_id', sa.Integer(), nullable=True),
+    sa.Column('defaultCurrencyCode', sa.String(), nullable=True),
+    sa.Column('exportAt', sa.Integer(), nullable=True),
+    sa.Column('sort', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['defaultExpenseAccount_id'], ['t_user_account.id'], ),
+    sa.ForeignKeyConstraint(['defaultExpenseCategory_id'], ['t_user_category.id'], use_alter=True),
+    sa.ForeignKeyConstraint(['defaultIncomeAccount_id'], ['t_user_account.id'], ),
+    sa.ForeignKeyConstraint(['defaultIncomeCategory_id'], ['t_user_category.id'], use_alter=True),
+    sa.ForeignKeyConstraint(['defaultTransferFromAccount_id'], ['t_user_account.id'], ),
+    sa.ForeignKeyConstraint(['defaultTransferToAccount_id'], ['t_user_account.id'], ),
+    sa.ForeignKeyConstraint(['group_id'], ['t_user_group.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_user_category',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('notes', sa.String(), nullable=True),
+    sa.Column('enable', sa.Boolean(), nullable=False),
+    sa.Column('type', sa.Integer(), nullable=False),
+    sa.Column('sort', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['t_user_book.id'], ),
+    sa.ForeignKeyConstraint(['parent_id'], ['t_user_category.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_user_payee',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('notes', sa.String(), nullable=True),
+    sa.Column('enable', sa.Boolean(), nullable=False),
+    sa.Column('canExpense', sa.Boolean(), nullable=False),
+    sa.Column('canIncome', sa.Boolean(), nullable=False),
+    sa.Column('sort', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['t_user_book.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_user_tag',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('notes', sa.String(), nullable=True),
+    sa.Column('enable', sa.Boolean(), nullable=False),
+    sa.Column('canExpense', sa.Boolean(), nullable=False),
+    sa.Column('canIncome', sa.Boolean(), nullable=False),
+    sa.Column('canTransfer', sa.Boolean(), nullable=False),
+    sa.Column('sort', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['t_user_book.id'], ),
+    sa.ForeignKeyConstraint(['parent_id'], ['t_user_tag.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_user_balance_flow',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('convertedAmount', sa.Float(), nullable=True),
+    sa.Column('account_id', sa.Integer(), nullable=True),
+    sa.Column('createTime', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=True),
+    sa.Column('notes', sa.String(), nullable=True),
+    sa.Column('creator_id', sa.Integer(), nullable=True),
+    sa.Column('group_id', sa.Integer(), nullable=True),
+    sa.Column('to_id', sa.Integer(), nullable=True),
+    sa.Column('payee_id', sa.Integer(), nullable=True),
+    sa.Column('confirm', sa.Boolean(), nullable=False),
+    sa.Column('include', sa.Boolean(), nullable=False),
+    sa.Column('insertAt', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['t_user_account.id'], ),
+    sa.ForeignKeyConstraint(['book_id'], ['t_user_book.id'], ),
+    sa.ForeignKeyConstraint(['creator_id'], ['t_user_user.id'], ),
+    sa.ForeignKeyConstraint(['group_id'], ['t_user_group.id'], ),
+    sa.ForeignKeyConstraint(['payee_id'], ['t_user_payee.id'], ),
+    sa.ForeignKeyConstraint(['to_id'], ['t_user_account.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_flow_file',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=True),
+    sa.Column('creator_id', sa.Integer(), nullable=True),
+    sa.Column('flow_id', sa.Integer(), nullable=False),
+    sa.Column('createTime', sa.Integer(), nullable=True),
+    sa.Column('contentType', sa.String(), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('originalName', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['creator_id'], ['t_user_user.id'], ),
+    sa.ForeignKeyConstraint(['flow_id'], ['t_user_balance_flow.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_user_category_relation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('balanceFlow_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('convertedAmount', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['balanceFlow_id'], ['t_user_balance_flow.id'], ),
+    sa.ForeignKeyConstraint(['category_id'], ['t_user_category.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('t_user_tag_relation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('balanceFlow_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('convertedAmount', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['balanceFlow_id'], ['t_user_balance_flow.id'], ),
+    sa.ForeignKeyConstraint(['tag_id'], ['t_user_tag.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('t_user_tag_relation')
+    op.drop_table('t_user_category_relation')
+    op.drop_table('t_flow_file')
+    op.drop_table('t_user_balance_flow')
+    op.drop_table('t_user_tag')
+    op.drop_table('t_user_payee')
+    op.drop_table('t_user_category')
+    op.drop_table('t_user_book')
+    op.drop_table('t_user_user_group_relation')
+    op.drop_table('t_user_account')
+    op.drop_table('t_user_note_day')
+    op.drop_table('t_user_group')
+    op.drop_table('t_user_user')
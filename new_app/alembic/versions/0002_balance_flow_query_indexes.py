@@ -0,0 +1,84 @@
+"""Indexes for the balance flow lists, statistics and reports
+
+The flows of a book are read by createTime range, and their category and tag relations are joined by
+balanceFlow_id. The covering indexes let the sums be computed from the indexes alone.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 14:58:56.386191
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('t_flow_file', schema=None) as batch_op:
+        batch_op.create_index('ix_flow_file_flow', ['flow_id'], unique=False)
+
+    with op.batch_alter_table('t_user_balance_flow', schema=None) as batch_op:
+        batch_op.create_index('ix_balance_flow_account_time', ['account_id', 'createTime'], unique=False)
+        batch_op.create_index('ix_balance_flow_book_time_cover', ['book_id', 'createTime', 'type', 'confirm', 'include', 'amount', 'convertedAmount'], unique=False)
+        batch_op.create_index('ix_balance_flow_book_type_time', ['book_id', 'type', 'createTime'], unique=False)
+        batch_op.create_index('ix_balance_flow_payee', ['payee_id'], unique=False)
+        batch_op.create_index('ix_balance_flow_to_time', ['to_id', 'createTime'], unique=False)
+
+    with op.batch_alter_table('t_user_category', schema=None) as batch_op:
+        batch_op.create_index('ix_category_book_parent', ['book_id', 'parent_id'], unique=False)
+
+    with op.batch_alter_table('t_user_category_relation', schema=None) as batch_op:
+        batch_op.create_index('ix_category_relation_category_flow', ['category_id', 'balanceFlow_id'], unique=False)
+        batch_op.create_index('ix_category_relation_flow_cover', ['balanceFlow_id', 'category_id', 'amount', 'convertedAmount'], unique=False)
+
+    with op.batch_alter_table('t_user_payee', schema=None) as batch_op:
+        batch_op.create_index('ix_payee_book', ['book_id'], unique=False)
+
+    with op.batch_alter_table('t_user_tag', schema=None) as batch_op:
+        batch_op.create_index('ix_tag_book_parent', ['book_id', 'parent_id'], unique=False)
+
+    with op.batch_alter_table('t_user_tag_relation', schema=None) as batch_op:
+        batch_op.create_index('ix_tag_relation_flow_cover', ['balanceFlow_id', 'tag_id', 'amount', 'convertedAmount'], unique=False)
+        batch_op.create_index('ix_tag_relation_tag_flow', ['tag_id', 'balanceFlow_id'], unique=False)
+
+    # Give the query planner statistics to choose between the new indexes
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('t_user_tag_relation', schema=None) as batch_op:
+        batch_op.drop_index('ix_tag_relation_tag_flow')
+        batch_op.drop_index('ix_tag_relation_flow_cover')
+
+    with op.batch_alter_table('t_user_tag', schema=None) as batch_op:
+        batch_op.drop_index('ix_tag_book_parent')
+
+    with op.batch_alter_table('t_user_payee', schema=None) as batch_op:
+        batch_op.drop_index('ix_payee_book')
+
+    with op.batch_alter_table('t_user_category_relation', schema=None) as batch_op:
+        batch_op.drop_index('ix_category_relation_flow_cover')
+        batch_op.drop_index('ix_category_relation_category_flow')
+
+    with op.batch_alter_table('t_user_category', schema=None) as batch_op:
+        batch_op.drop_index('ix_category_book_parent')
+
+    with op.batch_alter_table('t_user_balance_flow', schema=None) as batch_op:
+        batch_op.drop_index('ix_balance_flow_to_time')
+        batch_op.drop_index('ix_balance_flow_payee')
+        batch_op.drop_index('ix_balance_flow_book_type_time')
+        batch_op.drop_index('ix_balance_flow_book_time_cover')
+        batch_op.drop_index('ix_balance_flow_account_time')
+
+    with op.batch_alter_table('t_flow_file', schema=None) as batch_op:
+        batch_op.drop_index('ix_flow_file_flow')
@@ -0,0 +1,42 @@
+"""Index the balance flow lists in keyset order
+
+A (book_id, createTime) index ends with the rowid, so keyset pages ordered by (createTime, id) are read straight
+from it without sorting. The covering index now leads with type, which the statistics and reports always filter on.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 15:02:52.414933
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('t_user_balance_flow', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_balance_flow_book_time_cover'))
+        batch_op.drop_index(batch_op.f('ix_balance_flow_book_type_time'))
+        batch_op.create_index('ix_balance_flow_book_time', ['book_id', 'createTime'], unique=False)
+        batch_op.create_index('ix_balance_flow_book_type_time_cover', ['book_id', 'type', 'createTime', 'confirm', 'include', 'amount', 'convertedAmount'], unique=False)
+
+    op.execute("ANALYZE t_user_balance_flow")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('t_user_balance_flow', schema=None) as batch_op:
+        batch_op.drop_index('ix_balance_flow_book_type_time_cover')
+        batch_op.drop_index('ix_balance_flow_book_time')
+        batch_op.create_index(batch_op.f('ix_balance_flow_book_type_time'), ['book_id', 'type', 'createTime'], unique=False)
+        batch_op.create_index(batch_op.f('ix_balance_flow_book_time_cover'), ['book_id', 'createTime', 'type', 'confirm', 'include', 'amount', 'convertedAmount'], unique=False)
+
@@ -0,0 +1,46 @@
+"""Add the daily report rollup
+
+t_report_daily_rollup holds the sums of each book's confirmed and included flows per day, type and category, tag
+or payee. It is filled here from the existing flows, and kept up to date by crud_balance_flow from then on.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:07:17.521341
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from moneynote.crud.crud_rollup import rebuild_statements
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('t_report_daily_rollup',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('dimension', sa.Integer(), nullable=False),
+    sa.Column('flow_type', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Integer(), nullable=False),
+    sa.Column('dimension_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('convertedAmount', sa.Float(), nullable=False),
+    sa.Column('flowCount', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('book_id', 'dimension', 'flow_type', 'day', 'dimension_id'),
+    sqlite_with_rowid=False
+    )
+    for statement in rebuild_statements():
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('t_report_daily_rollup')
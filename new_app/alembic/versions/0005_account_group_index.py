@@ -0,0 +1,32 @@
+"""Index the accounts of a group
+
+The account lists, the overview and the balance report read a group's accounts, by type for the last two.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:12:01.127527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('t_user_account', schema=None) as batch_op:
+        batch_op.create_index('ix_account_group_type', ['group_id', 'type'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('t_user_account', schema=None) as batch_op:
+        batch_op.drop_index('ix_account_group_type')
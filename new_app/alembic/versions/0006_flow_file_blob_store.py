@@ -0,0 +1,79 @@
+"""Move the flow file bytes into the blob store
+
+t_flow_file.blobKey is the SHA-256 key of a file's bytes in the blob store the settings configure. The bytes of the
+existing files are moved there in batches, each batch's rows getting their key and losing their data; the
+downgrade moves them back.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 15:15:30.570215
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from moneynote.services.gcs_service import create_blob_store
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows moved per batch, bounding how many files are held in memory at once
+BATCH_SIZE = 50
+
+flow_file = sa.table('t_flow_file', sa.column('id', sa.Integer), sa.column('data', sa.LargeBinary), sa.column('blobKey', sa.String))
+
+
+def _batches(condition):
+    """Batches of (id, data, blobKey) rows matching the condition, in id order."""
+    connection = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(flow_file.c.id, flow_file.c.data, flow_file.c.blobKey).where(condition)
+        if last_id is not None:
+            query = query.where(flow_file.c.id > last_id)
+        rows = connection.execute(query.order_by(flow_file.c.id).limit(BATCH_SIZE)).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('t_flow_file', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blobKey', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_flow_file_blob_key', ['blobKey'], unique=False)
+
+    if context.is_offline_mode():
+        return
+    store = create_blob_store()
+    for rows in _batches(flow_file.c.data.is_not(None) & flow_file.c.blobKey.is_(None)):
+        updates = []
+        for row in rows:
+            chunks = (row.data[start:start + store.chunk_size] for start in range(0, len(row.data), store.chunk_size))
+            updates.append({'row_id': row.id, 'blobKey': store.put(chunks).key})
+        op.get_bind().execute(
+            flow_file.update().where(flow_file.c.id == sa.bindparam('row_id')).values(blobKey=sa.bindparam('blobKey'), data=None),
+            updates,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not context.is_offline_mode():
+        store = create_blob_store()
+        for rows in _batches(flow_file.c.blobKey.is_not(None)):
+            op.get_bind().execute(
+                flow_file.update().where(flow_file.c.id == sa.bindparam('row_id')).values(data=sa.bindparam('data')),
+                [{'row_id': row.id, 'data': b''.join(store.open_range(row.blobKey))} for row in rows],
+            )
+
+    with op.batch_alter_table('t_flow_file', schema=None) as batch_op:
+        batch_op.drop_index('ix_flow_file_blob_key')
+        batch_op.drop_column('blobKey')
@@ -0,0 +1,68 @@
+"""Add the category and tag closure tables
+
+t_user_category_closure and t_user_tag_closure index the category and tag trees: a row for every node and each of
+its ancestors, itself included, with how many levels apart they are. They are filled here from parent_id, and kept
+up to date by crud_category and crud_tag from then on.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 15:38:00.579388
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from moneynote.crud.crud_category import closure_rebuild_statements
+from moneynote.models import Category, Tag
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('t_user_category_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['t_user_category.id'], ),
+    sa.ForeignKeyConstraint(['descendant_id'], ['t_user_category.id'], ),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    sqlite_with_rowid=False
+    )
+    with op.batch_alter_table('t_user_category_closure', schema=None) as batch_op:
+        batch_op.create_index('ix_category_closure_descendant', ['descendant_id', 'depth'], unique=False)
+
+    op.create_table('t_user_tag_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['t_user_tag.id'], ),
+    sa.ForeignKeyConstraint(['descendant_id'], ['t_user_tag.id'], ),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    sqlite_with_rowid=False
+    )
+    with op.batch_alter_table('t_user_tag_closure', schema=None) as batch_op:
+        batch_op.create_index('ix_tag_closure_descendant', ['descendant_id', 'depth'], unique=False)
+
+    for model in (Category, Tag):
+        for statement in closure_rebuild_statements(model):
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('t_user_tag_closure', schema=None) as batch_op:
+        batch_op.drop_index('ix_tag_closure_descendant')
+
+    op.drop_table('t_user_tag_closure')
+    with op.batch_alter_table('t_user_category_closure', schema=None) as batch_op:
+        batch_op.drop_index('ix_category_closure_descendant')
+
+    op.drop_table('t_user_category_closure')
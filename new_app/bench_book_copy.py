@@ -0,0 +1,127 @@
+"""
+Benchmarks copying a book's categories, tags and payees, as POST /books/copy and POST /books/template do.
+
+A scratch SQLite database gets a book with --categories categories and --tags tags, trees --fanout children wide,
+and --payees payees. The book is copied with the set-based copy, a statement per tree level, and with the row by row
+copy of the legacy port, a flush per node so that its children learn its id.
+
+    $ python bench_book_copy.py
+    $ python bench_book_copy.py --categories 20000 --fanout 4 --runs 5
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import select
+
+from database import create_engine, create_session_factory, create_tables
+from moneynote.crud import crud_book
+from moneynote.models import Book, Category, Group, Payee, Tag
+
+
+async def add_source_book(session, categories: int, tags: int, payees: int, fanout: int) -> int:
+    """Adds the book to copy, each node the child of the one fanout places before it in breadth-first order."""
+    group = Group(name="Benchmark", defaultCurrencyCode="USD")
+    session.add(group)
+    await session.flush()
+    book = Book(name="Source", group_id=group.id, defaultCurrencyCode="USD")
+    session.add(book)
+    await session.flush()
+    for model, count, values in ((Category, categories, {"type": 100}), (Tag, tags, {})):
+        nodes = []
+        for i in range(count):
+            parent = nodes[(i - 1) // fanout] if i else None
+            node = model(name=f"{model.__name__} {i}", book_id=book.id, sort=i, **values)
+            node.parent_id = parent.id if parent is not None else None
+            session.add(node)
+            # The parent's id is needed before its children are added
+            if i % fanout == 0:
+                await session.flush()
+            nodes.append(node)
+        await session.flush()
+    session.add_all(Payee(name=f"Payee {i}", book_id=book.id) for i in range(payees))
+    await session.commit()
+    return book.id
+
+
+async def new_book(session, source_book_id: int, name: str) -> int:
+    source = await session.get(Book, source_book_id)
+    book = Book(name=name, group_id=source.group_id, defaultCurrencyCode="USD")
+    session.add(book)
+    await session.flush()
+    return book.id
+
+
+async def copy_set_based(session, source_book_id: int, book_id: int):
+    await crud_book.copy_book_items(session, source_book_id, book_id)
+
+
+async def copy_row_by_row(session, source_book_id: int, book_id: int):
+    """The copy of the legacy port: an INSERT per node, a child inserted once its parent's new id is known."""
+    for model in (Category, Tag):
+        nodes = (await session.scalars(select(model).where(model.book_id == source_book_id).order_by(model.id))).all()
+        children = {}
+        for node in nodes:
+            children.setdefault(node.parent_id, []).append(node)
+        queue = [(node, None) for node in children.get(None, [])]
+        while queue:
+            node, parent_id = queue.pop(0)
+            columns = {column: getattr(node, column) for column in ("name", "notes", "sort")}
+            if model is Category:
+                columns["type"] = node.type
+            else:
+                columns.update(canExpense=node.canExpense, canIncome=node.canIncome, canTransfer=node.canTransfer)
+            copy = model(book_id=book_id, parent_id=parent_id, **columns)
+            session.add(copy)
+            await session.flush()
+            queue += [(child, copy.id) for child in children.get(node.id, [])]
+    payees = (await session.scalars(select(Payee).where(Payee.book_id == source_book_id))).all()
+    for payee in payees:
+        session.add(Payee(book_id=book_id, name=payee.name, notes=payee.notes, canExpense=payee.canExpense,
+                          canIncome=payee.canIncome, sort=payee.sort))
+        await session.flush()
+
+
+async def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}")
+        await create_tables(engine)
+        session_factory = create_session_factory(engine)
+        async with session_factory() as session:
+            source_book_id = await add_source_book(session, args.categories, args.tags, args.payees, args.fanout)
+        timings = {"set-based": [], "row by row": []}
+        for run_number in range(args.runs):
+            for name, copy in (("set-based", copy_set_based), ("row by row", copy_row_by_row)):
+                async with session_factory() as session:
+                    book_id = await new_book(session, source_book_id, f"{name} {run_number}")
+                    start = time.perf_counter()
+                    await copy(session, source_book_id, book_id)
+                    await session.commit()
+                    timings[name].append(time.perf_counter() - start)
+        await engine.dispose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark copying a book's categories, tags and payees.")
+    parser.add_argument("--categories", type=int, default=5000, help="categories of the book copied")
+    parser.add_argument("--tags", type=int, default=1000, help="tags of the book copied")
+    parser.add_argument("--payees", type=int, default=500, help="payees of the book copied")
+    parser.add_argument("--fanout", type=int, default=8, help="children of every category and tag")
+    parser.add_argument("--runs", type=int, default=3, help="copies timed with each method")
+    args = parser.parse_args()
+
+    timings = asyncio.run(run(args))
+
+    print(f"{args.categories} categories, {args.tags} tags, {args.payees} payees, fanout {args.fanout}, {args.runs} runs")
+    print(f"{'copy':<24}{'min (ms)':>10}{'median (ms)':>13}{'max (ms)':>10}")
+    for name, values in timings.items():
+        values = [value * 1000 for value in values]
+        print(f"{name:<24}{min(values):>10.1f}{statistics.median(values):>13.1f}{max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Checks the stored account balances against their flows.
+
+Each balance should be the account's initial balance plus the changes of its confirmed flows. The check recomputes
+every balance in one grouped pass over the flows and lists the accounts that drifted, --fix moves them back.
+
+    $ python check_balances.py
+    $ python check_balances.py --group 2 --fix
+"""
+import argparse
+import asyncio
+import sys
+
+from database import SessionLocal, engine
+from moneynote.crud import crud_account
+
+
+async def check(group_id=None, fix=False) -> int:
+    async with SessionLocal() as session:
+        drifts = await crud_account.check_balances(session, group_id)
+        for drift in drifts:
+            print(
+                f"account {drift.account_id} ({drift.name}): balance {drift.balance:.2f}, "
+                f"expected {drift.expected_balance:.2f}, drift {drift.drift:+.2f}"
+            )
+        if fix and drifts:
+            await crud_account.repair_balances(session, drifts)
+            await session.commit()
+            print(f"Fixed {len(drifts)} balances")
+    await engine.dispose()
+    if not drifts:
+        print("Every balance matches its flows")
+    return len(drifts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the stored account balances against their flows.")
+    parser.add_argument("--group", type=int, help="id of the group to check, every group if omitted")
+    parser.add_argument("--fix", action="store_true", help="set the drifted balances to the recomputed ones")
+    args = parser.parse_args()
+    drifted = asyncio.run(check(args.group, args.fix))
+    # A drift is an error to a scheduled check unless it was fixed
+    sys.exit(1 if drifted and not args.fix else 0)
+
+
+if __name__ == "__main__":
+    main()
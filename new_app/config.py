@@ -5,6 +5,53 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     APP_VERSION: str = '1.0.0'
     BASE_URL: str = 'http://localhost:8000'
+    # How often to check currency.json and book_tpl.json for changes, 0 turns reloading off
+    REFERENCE_DATA_RELOAD_INTERVAL_SECONDS: float = 5.0
+    # Decoded tokens kept in memory, each for at most the TTL and never past its exp claim
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: float = 300.0
+    # Log how long each startup step took
+    STARTUP_PROFILE: bool = False
+    # Import the heavy routers (e.g. reports) on their first request instead of at startup
+    DEFER_HEAVY_ROUTERS: bool = False
+    # With DEFER_HEAVY_ROUTERS, import them in the background once the app is serving
+    WARM_UP_DEFERRED_ROUTERS: bool = True
+    # Largest size a list endpoint returns in one page
+    MAX_PAGE_SIZE: int = 500
+    # The timezone, as minutes east of UTC, whose days the reports' daily rollup is bucketed by
+    REPORT_UTC_OFFSET_MINUTES: int = 0
+    # Where flow file attachments are stored: "local" (under BLOB_STORE_PATH) or "gcs" (in GCS_BUCKET)
+    BLOB_STORE_BACKEND: str = 'local'
+    BLOB_STORE_PATH: str = './blobs'
+    GCS_BUCKET: str = ''
+    # The GCS JSON API, or an emulator standing in for it, e.g. http://localhost:4443 for fake-gcs-server
+    GCS_ENDPOINT: str = 'https://storage.googleapis.com'
+    # OAuth access token sent to GCS, empty for an emulator
+    GCS_ACCESS_TOKEN: str = ''
+    # Attachments are hashed, uploaded and streamed in chunks of this many bytes
+    BLOB_CHUNK_SIZE: int = 256 * 1024
+    # An unreferenced blob is only swept once it has not been stored for this long, see sweep_blobs.py
+    BLOB_SWEEP_GRACE_SECONDS: int = 24 * 60 * 60
+    # Flows the book export fetches from its cursor, and writes out, at a time
+    EXPORT_BATCH_SIZE: int = 500
+    # Rows a bulk import inserts, and commits, at a time
+    IMPORT_BATCH_SIZE: int = 2000
+    # Async SQLAlchemy URL of the database
+    DATABASE_URL: str = 'sqlite+aiosqlite:///./moneynote.db'
+    DATABASE_ECHO: bool = False
+    # Connections kept open, plus the extra ones opened under load and closed when returned
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    # How long a request waits for a free connection before failing
+    DATABASE_POOL_TIMEOUT_SECONDS: float = 30.0
+    # Connections older than this are replaced, -1 keeps them forever
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800
+    # Test each connection with a round trip when it is checked out of the pool
+    DATABASE_POOL_PRE_PING: bool = True
+    # Bytes of the SQLite file read through a memory map, 0 turns it off
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    # How long a SQLite connection waits for another one's write lock
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
 
     model_config = ConfigDict(env_file=".env")
 
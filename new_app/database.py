@@ -0,0 +1,85 @@
+from typing import AsyncIterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from config import settings
+
+
+def _is_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite"
+
+
+def _is_sqlite_memory(url: URL) -> bool:
+    return _is_sqlite(url) and url.database in (None, "", ":memory:")
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record, memory: bool):
+    """Tunes every new SQLite connection: WAL so readers don't block the writer, memory-mapped reads, enforced foreign keys."""
+    cursor = dbapi_connection.cursor()
+    if not memory:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL, only the last transactions can be lost on power failure, never the database
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_engine(database_url: str = settings.DATABASE_URL) -> AsyncEngine:
+    """
+    Creates the async engine with the pool configured in settings.
+
+    An in-memory SQLite database only exists inside its connection, so it gets a single shared connection
+    instead of a pool.
+
+    Args:
+        database_url (str): An async SQLAlchemy URL, e.g. sqlite+aiosqlite:///./moneynote.db.
+    """
+    url = make_url(database_url)
+    engine_kwargs = {"echo": settings.DATABASE_ECHO}
+    if _is_sqlite_memory(url):
+        engine_kwargs.update(poolclass=StaticPool, connect_args={"check_same_thread": False})
+    else:
+        engine_kwargs.update(
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        )
+    engine = create_async_engine(url, **engine_kwargs)
+    if _is_sqlite(url):
+        memory = _is_sqlite_memory(url)
+        event.listen(
+            engine.sync_engine,
+            "connect",
+            lambda dbapi_connection, connection_record: _set_sqlite_pragmas(dbapi_connection, connection_record, memory),
+        )
+    return engine
+
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    # Objects stay readable after commit, lazy refreshes would need I/O outside an await
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+engine = create_engine()
+SessionLocal = create_session_factory(engine)
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """Yields a session that is closed, and its connection returned to the pool, when the caller is done."""
+    async with SessionLocal() as session:
+        yield session
+
+
+async def create_tables(engine: AsyncEngine = engine):
+    """Creates any missing table. For tests and local development, deployed databases are migrated with alembic."""
+    from moneynote.models import Base
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
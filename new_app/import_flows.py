@@ -0,0 +1,50 @@
+"""
+Imports balance flows into a book from a CSV or JSON file.
+
+The rows name their account, category, tags and payee, as POST /balance-flows/import takes them, and are inserted
+in batches of IMPORT_BATCH_SIZE. Rejected rows are listed with the reason, the others are imported.
+
+    $ python import_flows.py --book 1 statement.csv
+    $ python import_flows.py --book 1 --format json flows.jsonl
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from config import settings
+from database import SessionLocal, engine
+from moneynote.models import Book
+from moneynote.services import import_service
+
+
+async def run(path: Path, book_id: int, format: str, batch_size: int) -> int:
+    async with SessionLocal() as session:
+        book = await session.get(Book, book_id)
+        if book is None:
+            print(f"Book {book_id} not found", file=sys.stderr)
+            return 1
+        with open(path, encoding="utf-8-sig", newline="") as file:
+            result = await import_service.import_flows(
+                session, book, import_service.open_rows(file, format), batch_size
+            )
+    await engine.dispose()
+    for row, error in result.errors:
+        print(f"row {row}: {error}")
+    print(f"Imported {result.imported} flows, rejected {len(result.errors)} rows")
+    return 1 if result.errors else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import balance flows into a book from a CSV or JSON file.")
+    parser.add_argument("file", type=Path, help="the CSV, JSON array or JSON Lines file")
+    parser.add_argument("--book", type=int, required=True, help="id of the book to import into")
+    parser.add_argument("--format", choices=["csv", "json"], help="the file's format, by default its extension's")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE, help="rows per transaction")
+    args = parser.parse_args()
+    format = args.format or ("json" if args.file.suffix.lower() in (".json", ".jsonl") else "csv")
+    sys.exit(asyncio.run(run(args.file, args.book, format, args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,63 @@
+import importlib
+import logging
+import threading
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from moneynote.routers import book_templates, currencies, system
-from moneynote.services.data_loader import load_book_templates, load_currencies
+from moneynote.routers import (accounts, balance_flows, book_templates, books, categories, currencies, note_days,
+                               payees, system, tags)
+from moneynote.services.data_loader import load_book_templates, load_currencies, store
+from moneynote.startup import format_startup_timings, include_deferred_router, timed_step, warm_up
+
+from config import settings
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# Routers that are slow to import, deferred with settings.DEFER_HEAVY_ROUTERS: (module, prefix, include kwargs)
+HEAVY_ROUTERS = [
+    ("moneynote.routers.reports", "/reports", {"tags": ["reports"]}),
+    ("moneynote.routers.flow_files", "/flow-files", {"tags": ["flow-files"]}),
+]
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    load_currencies()
-    load_book_templates()
+    with timed_step("load_currencies"):
+        load_currencies()
+    with timed_step("load_book_templates"):
+        load_book_templates()
+    if settings.REFERENCE_DATA_RELOAD_INTERVAL_SECONDS > 0:
+        with timed_step("start_reference_data_watcher"):
+            store.start_watching(settings.REFERENCE_DATA_RELOAD_INTERVAL_SECONDS)
+    if settings.DEFER_HEAVY_ROUTERS and settings.WARM_UP_DEFERRED_ROUTERS:
+        threading.Thread(target=warm_up, args=(app,), name="deferred-router-warm-up", daemon=True).start()
+    if settings.STARTUP_PROFILE:
+        logger.warning("Startup timings:\n%s", format_startup_timings())
     yield
+    store.stop_watching()
+    await engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 
 app.include_router(system.router, tags=['System'])
 app.include_router(currencies.router)
 app.include_router(book_templates.router, prefix="/book-templates", tags=["book-templates"])
+app.include_router(accounts.router)
+app.include_router(balance_flows.router)
+app.include_router(books.router)
+app.include_router(categories.router)
+app.include_router(payees.router)
+app.include_router(tags.router)
+app.include_router(note_days.router)
+
+for module_name, prefix, include_kwargs in HEAVY_ROUTERS:
+    if settings.DEFER_HEAVY_ROUTERS:
+        include_deferred_router(app, module_name, prefix, **include_kwargs)
+    else:
+        with timed_step(f"import {module_name}"):
+            app.include_router(importlib.import_module(module_name).router, prefix=prefix, **include_kwargs)
 
 @app.get("/")
 def read_root():
-    return {"Hello": "World"}
\ No newline at end of file
+    return {"Hello": "World"}
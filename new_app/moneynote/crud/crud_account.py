@@ -0,0 +1,156 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import Select, bindparam, case, func, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..models import Account, BalanceFlow
+from ..models.account import ACCOUNT_TYPE_ASSET, ACCOUNT_TYPE_CHECKING, ACCOUNT_TYPE_CREDIT, ACCOUNT_TYPE_DEBT
+from ..models.balance_flow import FLOW_TYPE_ADJUST, FLOW_TYPE_EXPENSE, FLOW_TYPE_INCOME, FLOW_TYPE_TRANSFER
+from .pagination import KeysetOrder
+
+# Largest balance first, as in the legacy API
+ACCOUNT_ORDER = KeysetOrder((Account.balance, Account.id), descending=True)
+
+ASSET_ACCOUNT_TYPES = (ACCOUNT_TYPE_CHECKING, ACCOUNT_TYPE_ASSET)
+DEBT_ACCOUNT_TYPES = (ACCOUNT_TYPE_CREDIT, ACCOUNT_TYPE_DEBT)
+
+# Balances within this of each other are the same, the drift of float sums
+BALANCE_TOLERANCE = 0.005
+
+
+def select_accounts(
+    group_id: int,
+    account_type: Optional[int] = None,
+    enable: Optional[bool] = None,
+    name: Optional[str] = None,
+) -> Select:
+    query = select(Account).where(Account.group_id == group_id)
+    if account_type is not None:
+        query = query.where(Account.type == account_type)
+    if enable is not None:
+        query = query.where(Account.enable.is_(enable))
+    if name:
+        query = query.where(Account.name.contains(name, autoescape=True))
+    return query
+
+
+class BalanceDeltas:
+    """
+    Collects the changes a set of flow writes makes to account balances, summed per account, and applies them as
+    balance = balance + delta, so concurrent writes to the same account add up instead of overwriting each other.
+
+    A flow moves money once it is confirmed, as in the legacy API: an expense takes its amount out of the account,
+    an income and an adjustment put it in, a transfer takes amount out of the account and puts convertedAmount into
+    the to account.
+    """
+
+    def __init__(self):
+        self._deltas: Dict[int, float] = defaultdict(float)
+
+    def add(self, account_id: int, delta: float):
+        self._deltas[account_id] += delta
+
+    def add_flow(self, flow: BalanceFlow, sign: int = 1):
+        """Applies (sign=1) or refunds (sign=-1) a flow."""
+        if not flow.confirm or flow.account_id is None:
+            return
+        if flow.type in (FLOW_TYPE_EXPENSE, FLOW_TYPE_TRANSFER):
+            self.add(flow.account_id, -sign * flow.amount)
+        elif flow.type in (FLOW_TYPE_INCOME, FLOW_TYPE_ADJUST):
+            self.add(flow.account_id, sign * flow.amount)
+        if flow.type == FLOW_TYPE_TRANSFER and flow.to_id is not None:
+            converted_amount = flow.convertedAmount if flow.convertedAmount is not None else flow.amount
+            self.add(flow.to_id, sign * converted_amount)
+
+    async def flush(self, db: AsyncSession):
+        """Adds the collected deltas to the balances, and to those of the accounts loaded in the session."""
+        rows = [{"account_id": account_id, "delta": delta} for account_id, delta in self._deltas.items() if delta]
+        self._deltas.clear()
+        if not rows:
+            return
+        table = Account.__table__
+        await db.execute(
+            update(table).where(table.c.id == bindparam("account_id")).values(balance=table.c.balance + bindparam("delta")),
+            rows,
+        )
+        # The loaded accounts get the same change without being marked dirty, a flush never writes a stale balance
+        for row in rows:
+            account = db.identity_map.get(db.identity_key(Account, row["account_id"]))
+            if account is not None and "balance" in account.__dict__:
+                set_committed_value(account, "balance", account.balance + row["delta"])
+
+
+def select_flow_balance_changes() -> Select:
+    """(account id, change) of every confirmed flow, the legs of a transfer as two rows."""
+    signed_amount = case(
+        (BalanceFlow.type.in_([FLOW_TYPE_EXPENSE, FLOW_TYPE_TRANSFER]), -BalanceFlow.amount),
+        (BalanceFlow.type.in_([FLOW_TYPE_INCOME, FLOW_TYPE_ADJUST]), BalanceFlow.amount),
+        else_=0,
+    )
+    from_legs = select(BalanceFlow.account_id.label("account_id"), signed_amount.label("change")).where(
+        BalanceFlow.confirm.is_(True), BalanceFlow.account_id.is_not(None)
+    )
+    to_legs = select(
+        BalanceFlow.to_id.label("account_id"),
+        func.coalesce(BalanceFlow.convertedAmount, BalanceFlow.amount).label("change"),
+    ).where(
+        BalanceFlow.confirm.is_(True),
+        BalanceFlow.type == FLOW_TYPE_TRANSFER,
+        BalanceFlow.account_id.is_not(None),
+        BalanceFlow.to_id.is_not(None),
+    )
+    return union_all(from_legs, to_legs)
+
+
+@dataclass(frozen=True)
+class BalanceDrift:
+    account_id: int
+    name: str
+    balance: float
+    expected_balance: float
+
+    @property
+    def drift(self) -> float:
+        return self.balance - self.expected_balance
+
+
+async def check_balances(db: AsyncSession, group_id: Optional[int] = None) -> List[BalanceDrift]:
+    """
+    Recomputes the balance of every account, or of a group's accounts, as its initial balance plus the changes of
+    its confirmed flows, in one grouped pass over the flows. Returns the accounts whose stored balance differs.
+    """
+    changes = select_flow_balance_changes().subquery()
+    sums = (
+        select(changes.c.account_id, func.sum(changes.c.change).label("change"))
+        .group_by(changes.c.account_id)
+        .subquery()
+    )
+    expected_balance = func.coalesce(Account.initialBalance, 0) + func.coalesce(sums.c.change, 0)
+    query = (
+        select(Account.id, Account.name, Account.balance, expected_balance)
+        .outerjoin(sums, sums.c.account_id == Account.id)
+        .where(func.abs(Account.balance - expected_balance) > BALANCE_TOLERANCE)
+        .order_by(Account.id)
+    )
+    if group_id is not None:
+        query = query.where(Account.group_id == group_id)
+    return [BalanceDrift(*row) for row in await db.execute(query)]
+
+
+async def repair_balances(db: AsyncSession, drifts: List[BalanceDrift]):
+    """Moves each drifted balance by its drift, keeping any change made since it was checked. The caller commits."""
+    deltas = BalanceDeltas()
+    for drift in drifts:
+        deltas.add(drift.account_id, -drift.drift)
+    await deltas.flush(db)
+
+
+async def get_group_accounts(db: AsyncSession, group_id: int, account_types=None) -> List[Account]:
+    """The enabled and included accounts of a group, those the overview and balance report count."""
+    query = select(Account).where(Account.group_id == group_id, Account.enable.is_(True), Account.include.is_(True))
+    if account_types is not None:
+        query = query.where(Account.type.in_(account_types))
+    return list((await db.scalars(query)).all())
@@ -0,0 +1,461 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, delete, func, insert, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from ..models import (Account, BalanceFlow, Book, Category, CategoryClosure, CategoryRelation, FlowFile, Payee, Tag,
+                      TagClosure, TagRelation, UserGroupRelation)
+from ..models.balance_flow import FLOW_TYPE_EXPENSE, FLOW_TYPE_INCOME
+from ..models.daily_rollup import ROLLUP_DIMENSION_CATEGORY, ROLLUP_DIMENSION_FLOW, ROLLUP_DIMENSION_PAYEE
+from .crud_account import BalanceDeltas
+from .crud_flow_file import delete_flow_files
+from .crud_rollup import RollupDeltas, day_start, flow_day, select_rollup_sums
+from .locks import lock_for_inserts
+from .pagination import KeysetOrder
+
+# The queries below are the hot paths of the balance flow lists, statistics and reports. Each is served by an index
+# declared on the models (see alembic/versions), tests/crud/test_query_plans.py fails if one scans a table.
+# Statistics and reports only count the confirmed flows that are included, and read whole days from the daily
+# rollup (crud_rollup).
+
+# Newest first, the id breaks ties between flows created at the same time
+FLOW_ORDER = KeysetOrder((BalanceFlow.createTime, BalanceFlow.id), descending=True)
+
+
+def _flow_conditions(
+    book_id: int,
+    min_time: Optional[int] = None,
+    max_time: Optional[int] = None,
+    flow_type: Optional[int] = None,
+) -> list:
+    conditions = [BalanceFlow.book_id == book_id]
+    if flow_type is not None:
+        conditions.append(BalanceFlow.type == flow_type)
+    if min_time is not None:
+        conditions.append(BalanceFlow.createTime >= min_time)
+    if max_time is not None:
+        conditions.append(BalanceFlow.createTime <= max_time)
+    return conditions
+
+
+def select_flows(
+    book_id: int,
+    min_time: Optional[int] = None,
+    max_time: Optional[int] = None,
+    flow_type: Optional[int] = None,
+    category_ids: Optional[Sequence[int]] = None,
+    tag_ids: Optional[Sequence[int]] = None,
+    account_id: Optional[int] = None,
+    to_id: Optional[int] = None,
+    payee_ids: Optional[Sequence[int]] = None,
+    confirm: Optional[bool] = None,
+    include: Optional[bool] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    title: Optional[str] = None,
+    notes: Optional[str] = None,
+    has_file: Optional[bool] = None,
+) -> Select:
+    """
+    The flows of a book matching the filters of GET /balance-flows, unordered: page it with FLOW_ORDER.
+    account_id matches the flows out of or into the account.
+    """
+    query = select(BalanceFlow).where(*_flow_conditions(book_id, min_time, max_time, flow_type))
+    if category_ids:
+        query = query.where(
+            select(CategoryRelation.id)
+            .where(CategoryRelation.balanceFlow_id == BalanceFlow.id, CategoryRelation.category_id.in_(category_ids))
+            .exists()
+        )
+    if tag_ids:
+        query = query.where(
+            select(TagRelation.id)
+            .where(TagRelation.balanceFlow_id == BalanceFlow.id, TagRelation.tag_id.in_(tag_ids))
+            .exists()
+        )
+    if account_id is not None:
+        query = query.where(or_(BalanceFlow.account_id == account_id, BalanceFlow.to_id == account_id))
+    if to_id is not None:
+        query = query.where(BalanceFlow.to_id == to_id)
+    if payee_ids:
+        query = query.where(BalanceFlow.payee_id.in_(payee_ids))
+    if confirm is not None:
+        query = query.where(BalanceFlow.confirm.is_(confirm))
+    if include is not None:
+        query = query.where(BalanceFlow.include.is_(include))
+    if min_amount is not None:
+        query = query.where(BalanceFlow.amount >= min_amount)
+    if max_amount is not None:
+        query = query.where(BalanceFlow.amount <= max_amount)
+    if title:
+        query = query.where(BalanceFlow.title.contains(title, autoescape=True))
+    if notes:
+        query = query.where(BalanceFlow.notes.contains(notes, autoescape=True))
+    if has_file is not None:
+        files = select(FlowFile.id).where(FlowFile.flow_id == BalanceFlow.id).exists()
+        query = query.where(files if has_file else ~files)
+    return query
+
+
+def select_dimension_sums(dimension: int, flows: Select) -> Select:
+    """
+    (dimension id, amount, converted amount) per category, tag or payee of a select of flows, or a single
+    (0, amount, converted amount) row for the flows themselves, the raw-table counterpart of a rollup read.
+    """
+    if dimension == ROLLUP_DIMENSION_FLOW:
+        return flows.with_only_columns(literal(0), func.sum(BalanceFlow.amount), func.sum(BalanceFlow.convertedAmount))
+    if dimension == ROLLUP_DIMENSION_PAYEE:
+        return (
+            flows.with_only_columns(
+                BalanceFlow.payee_id, func.sum(BalanceFlow.amount), func.sum(BalanceFlow.convertedAmount)
+            )
+            .where(BalanceFlow.payee_id.is_not(None))
+            .group_by(BalanceFlow.payee_id)
+        )
+    relation, dimension_id = (
+        (CategoryRelation, CategoryRelation.category_id)
+        if dimension == ROLLUP_DIMENSION_CATEGORY
+        else (TagRelation, TagRelation.tag_id)
+    )
+    return (
+        select(dimension_id, func.sum(relation.amount), func.sum(relation.convertedAmount))
+        .where(relation.balanceFlow_id.in_(flows.with_only_columns(BalanceFlow.id)))
+        .group_by(dimension_id)
+    )
+
+
+def select_tree_sums(dimension: int, sums: Select) -> Select:
+    """
+    Rolls the sums per category or tag of select_dimension_sums or select_rollup_sums up the tree: (id, amount,
+    converted amount) of every category or tag with anything booked in its subtree, in one join with the hierarchy
+    index.
+    """
+    closure = CategoryClosure if dimension == ROLLUP_DIMENSION_CATEGORY else TagClosure
+    node_sums = sums.subquery()
+    node_id, amount, converted_amount = node_sums.c
+    return (
+        select(closure.ancestor_id, func.sum(amount), func.sum(converted_amount))
+        .join_from(node_sums, closure, closure.descendant_id == node_id)
+        .group_by(closure.ancestor_id)
+    )
+
+
+async def get_dimension_sums(
+    db: AsyncSession,
+    book_id: int,
+    dimension: int,
+    flow_type: int,
+    min_time: Optional[int] = None,
+    max_time: Optional[int] = None,
+    **filters,
+) -> Dict[int, Tuple[float, float]]:
+    """
+    Returns {dimension id: (amount, converted amount)} of a book's confirmed and included flows of a type in a
+    createTime range.
+
+    The whole days of the range are read from the daily rollup, one row per day and dimension id however many
+    flows there are. Only the flows of a partial first or last day are summed from the flow table, or all of
+    them if other filters of select_flows are given, e.g. title.
+    """
+    return await _sum_rows(db, _dimension_sum_queries(book_id, dimension, flow_type, min_time, max_time, **filters))
+
+
+async def get_tree_sums(
+    db: AsyncSession,
+    book_id: int,
+    dimension: int,
+    flow_type: int,
+    min_time: Optional[int] = None,
+    max_time: Optional[int] = None,
+    **filters,
+) -> Dict[int, Tuple[float, float]]:
+    """
+    Returns {category or tag id: (amount, converted amount)} of the flows get_dimension_sums sums, booked on the
+    category or tag or anywhere below it, see select_tree_sums.
+    """
+    queries = _dimension_sum_queries(book_id, dimension, flow_type, min_time, max_time, **filters)
+    return await _sum_rows(db, [select_tree_sums(dimension, query) for query in queries])
+
+
+def _dimension_sum_queries(
+    book_id: int,
+    dimension: int,
+    flow_type: int,
+    min_time: Optional[int],
+    max_time: Optional[int],
+    **filters,
+) -> List[Select]:
+    if filters:
+        flows = select_flows(book_id, min_time, max_time, flow_type, confirm=True, include=True, **filters)
+        return [select_dimension_sums(dimension, flows)]
+
+    first_day = last_day = None
+    raw_ranges = []
+    if min_time is not None:
+        first_day = flow_day(min_time)
+        if day_start(first_day) < min_time:
+            first_day += 1
+            raw_ranges.append((min_time, day_start(first_day) - 1))
+    if max_time is not None:
+        last_day = flow_day(max_time)
+        if day_start(last_day + 1) - 1 > max_time:
+            raw_ranges.append((day_start(last_day), max_time))
+            last_day -= 1
+    use_rollup = True
+    if first_day is not None and last_day is not None and first_day > last_day:
+        # Within a day, or across two partial ones: none of it is in the rollup
+        use_rollup = False
+        raw_ranges = [(min_time, max_time)]
+
+    queries = [select_rollup_sums(book_id, dimension, flow_type, first_day, last_day)] if use_rollup else []
+    for range_min, range_max in raw_ranges:
+        flows = select_flows(book_id, range_min, range_max, flow_type, confirm=True, include=True)
+        queries.append(select_dimension_sums(dimension, flows))
+
+    return queries
+
+
+async def _sum_rows(db: AsyncSession, queries: List[Select]) -> Dict[int, Tuple[float, float]]:
+    sums: Dict[int, Tuple[float, float]] = {}
+    for query in queries:
+        for dimension_id, amount, converted_amount in await db.execute(query):
+            previous_amount, previous_converted_amount = sums.get(dimension_id, (0.0, 0.0))
+            sums[dimension_id] = (previous_amount + (amount or 0), previous_converted_amount + (converted_amount or 0))
+    return sums
+
+
+async def get_statistics(
+    db: AsyncSession, book_id: int, min_time: Optional[int] = None, max_time: Optional[int] = None, **filters
+) -> Dict[str, float]:
+    """Returns the converted expense, income and surplus (income - expense) of a book, see get_dimension_sums."""
+    totals = {}
+    for flow_type in (FLOW_TYPE_EXPENSE, FLOW_TYPE_INCOME):
+        sums = await get_dimension_sums(db, book_id, ROLLUP_DIMENSION_FLOW, flow_type, min_time, max_time, **filters)
+        totals[flow_type] = sums.get(0, (0.0, 0.0))[1]
+    expense, income = totals[FLOW_TYPE_EXPENSE], totals[FLOW_TYPE_INCOME]
+    return {"expense": expense, "income": income, "surplus": income - expense}
+
+
+async def get_user_flow(db: AsyncSession, user_id: int, flow_id: int) -> Optional[BalanceFlow]:
+    """Returns a flow if its book belongs to one of the user's groups."""
+    query = (
+        select(BalanceFlow)
+        .join(Book, Book.id == BalanceFlow.book_id)
+        .join(UserGroupRelation, UserGroupRelation.group_id == Book.group_id)
+        .where(BalanceFlow.id == flow_id, UserGroupRelation.user_id == user_id)
+        .limit(1)
+    )
+    return (await db.scalars(query)).first()
+
+
+async def get_flow_relations(db: AsyncSession, flow_id: int) -> Tuple[List[CategoryRelation], List[TagRelation]]:
+    categories = (await db.scalars(select(CategoryRelation).where(CategoryRelation.balanceFlow_id == flow_id))).all()
+    tags = (await db.scalars(select(TagRelation).where(TagRelation.balanceFlow_id == flow_id))).all()
+    return list(categories), list(tags)
+
+
+def select_export_flows(book_id: int) -> Select:
+    """A book's flows newest first, with the names of their account, transfer target and payee, for the export."""
+    to_account = aliased(Account)
+    return (
+        select(
+            BalanceFlow.id,
+            BalanceFlow.title,
+            BalanceFlow.type,
+            BalanceFlow.amount,
+            BalanceFlow.createTime,
+            Account.name.label("account_name"),
+            to_account.name.label("to_name"),
+            Payee.name.label("payee_name"),
+            BalanceFlow.notes,
+            BalanceFlow.confirm,
+            BalanceFlow.include,
+        )
+        .outerjoin(Account, Account.id == BalanceFlow.account_id)
+        .outerjoin(to_account, to_account.id == BalanceFlow.to_id)
+        .outerjoin(Payee, Payee.id == BalanceFlow.payee_id)
+        .where(BalanceFlow.book_id == book_id)
+        .order_by(*FLOW_ORDER.order_by())
+    )
+
+
+async def get_relation_names(
+    db: AsyncSession, flow_ids: Sequence[int]
+) -> Tuple[Dict[int, List[Tuple[str, float]]], Dict[int, List[str]]]:
+    """The (category name, amount) pairs and the tag names of each of the flows, in one query each."""
+    categories: Dict[int, List[Tuple[str, float]]] = defaultdict(list)
+    for flow_id, name, amount in await db.execute(
+        select(CategoryRelation.balanceFlow_id, Category.name, CategoryRelation.amount)
+        .join(Category, Category.id == CategoryRelation.category_id)
+        .where(CategoryRelation.balanceFlow_id.in_(flow_ids))
+    ):
+        categories[flow_id].append((name, amount))
+    tags: Dict[int, List[str]] = defaultdict(list)
+    for flow_id, name in await db.execute(
+        select(TagRelation.balanceFlow_id, Tag.name)
+        .join(Tag, Tag.id == TagRelation.tag_id)
+        .where(TagRelation.balanceFlow_id.in_(flow_ids))
+    ):
+        tags[flow_id].append(name)
+    return categories, tags
+
+
+class FlowDeltas:
+    """
+    What a set of flow writes changes besides the flows: the daily rollup and the account balances. Each write
+    removes what a flow counted for before and adds what it counts for after, and flush applies the sums in the
+    caller's transaction.
+    """
+
+    def __init__(self):
+        self.rollup = RollupDeltas()
+        self.balances = BalanceDeltas()
+
+    def add_flow(
+        self,
+        flow: BalanceFlow,
+        category_relations: Sequence[CategoryRelation] = (),
+        tag_relations: Sequence[TagRelation] = (),
+        sign: int = 1,
+    ):
+        self.rollup.add_flow(flow, category_relations, tag_relations, sign)
+        self.balances.add_flow(flow, sign)
+
+    async def flush(self, db: AsyncSession):
+        await self.rollup.flush(db)
+        await self.balances.flush(db)
+
+
+# The writes below keep the rollup and balances in step with the flows. They flush, the caller commits.
+
+async def create_flow(
+    db: AsyncSession,
+    flow: BalanceFlow,
+    category_relations: Sequence[CategoryRelation] = (),
+    tag_relations: Sequence[TagRelation] = (),
+) -> BalanceFlow:
+    """Adds a flow with its category and tag relations, whose balanceFlow_id is set here."""
+    db.add(flow)
+    await db.flush()
+    for relation in [*category_relations, *tag_relations]:
+        relation.balanceFlow_id = flow.id
+    db.add_all([*category_relations, *tag_relations])
+    deltas = FlowDeltas()
+    deltas.add_flow(flow, category_relations, tag_relations)
+    await deltas.flush(db)
+    await db.flush()
+    return flow
+
+
+@dataclass
+class NewFlow:
+    """A flow to bulk insert: its column values and the (id, amount, convertedAmount) of its categories and tags."""
+    values: Dict[str, Any]
+    categories: List[Tuple[int, float, float]] = field(default_factory=list)
+    tags: List[Tuple[int, float, float]] = field(default_factory=list)
+
+
+async def insert_flows(db: AsyncSession, flows: Sequence[NewFlow]) -> List[int]:
+    """
+    Adds many flows in a few statements: the flows in one executemany, the relations in one each, then the rollup
+    and balance changes summed per row and per account and applied once. Returns the new ids. Bypasses the session,
+    so it is for batches of new flows only. SQLite only, see lock_for_inserts.
+    """
+    if not flows:
+        return []
+    # The ids are assigned up front, following the largest. RETURNING them in order would need a sentinel column
+    # on SQLite, without one SQLAlchemy inserts row by row. The write lock keeps another writer from taking them
+    # in between.
+    await lock_for_inserts(db, BalanceFlow)
+    first_id = (await db.execute(select(func.coalesce(func.max(BalanceFlow.id), 0)))).scalar_one() + 1
+    flow_ids = list(range(first_id, first_id + len(flows)))
+    # Core executemany on the session's connection, the ORM has nothing to track here
+    connection = await db.connection()
+    await connection.execute(
+        insert(BalanceFlow.__table__), [dict(flow.values, id=flow_id) for flow_id, flow in zip(flow_ids, flows)]
+    )
+    category_rows, tag_rows = [], []
+    deltas = FlowDeltas()
+    for flow_id, flow in zip(flow_ids, flows):
+        categories = [
+            SimpleNamespace(category_id=category_id, amount=amount, convertedAmount=converted_amount)
+            for category_id, amount, converted_amount in flow.categories
+        ]
+        tags = [
+            SimpleNamespace(tag_id=tag_id, amount=amount, convertedAmount=converted_amount)
+            for tag_id, amount, converted_amount in flow.tags
+        ]
+        category_rows += [dict(vars(relation), balanceFlow_id=flow_id) for relation in categories]
+        tag_rows += [dict(vars(relation), balanceFlow_id=flow_id) for relation in tags]
+        deltas.add_flow(SimpleNamespace(**flow.values), categories, tags)
+    if category_rows:
+        await connection.execute(insert(CategoryRelation.__table__), category_rows)
+    if tag_rows:
+        await connection.execute(insert(TagRelation.__table__), tag_rows)
+    await deltas.flush(db)
+    return flow_ids
+
+
+async def update_flow(
+    db: AsyncSession,
+    flow: BalanceFlow,
+    changes: Dict[str, Any],
+    category_relations: Optional[Sequence[CategoryRelation]] = None,
+    tag_relations: Optional[Sequence[TagRelation]] = None,
+) -> BalanceFlow:
+    """
+    Sets the changed columns of a flow. The category or tag relations are replaced if given, kept otherwise.
+    """
+    old_categories, old_tags = await get_flow_relations(db, flow.id)
+    deltas = FlowDeltas()
+    deltas.add_flow(flow, old_categories, old_tags, sign=-1)
+    for name, value in changes.items():
+        setattr(flow, name, value)
+    if category_relations is not None:
+        await db.execute(delete(CategoryRelation).where(CategoryRelation.balanceFlow_id == flow.id))
+        for relation in category_relations:
+            relation.balanceFlow_id = flow.id
+        db.add_all(category_relations)
+    if tag_relations is not None:
+        await db.execute(delete(TagRelation).where(TagRelation.balanceFlow_id == flow.id))
+        for relation in tag_relations:
+            relation.balanceFlow_id = flow.id
+        db.add_all(tag_relations)
+    deltas.add_flow(
+        flow,
+        old_categories if category_relations is None else category_relations,
+        old_tags if tag_relations is None else tag_relations,
+    )
+    await deltas.flush(db)
+    await db.flush()
+    return flow
+
+
+async def delete_flow(db: AsyncSession, flow: BalanceFlow):
+    """Deletes a flow with its relations and files, refunding its accounts."""
+    categories, tags = await get_flow_relations(db, flow.id)
+    deltas = FlowDeltas()
+    deltas.add_flow(flow, categories, tags, sign=-1)
+    await deltas.flush(db)
+    await db.execute(delete(CategoryRelation).where(CategoryRelation.balanceFlow_id == flow.id))
+    await db.execute(delete(TagRelation).where(TagRelation.balanceFlow_id == flow.id))
+    await delete_flow_files(db, flow.id)
+    await db.delete(flow)
+    await db.flush()
+
+
+async def confirm_flow(db: AsyncSession, flow: BalanceFlow) -> BalanceFlow:
+    """Confirms a flow, which moves its amount between its accounts and counts it in the statistics and reports."""
+    if flow.confirm:
+        return flow
+    flow.confirm = True
+    categories, tags = await get_flow_relations(db, flow.id)
+    deltas = FlowDeltas()
+    deltas.add_flow(flow, categories, tags)
+    await deltas.flush(db)
+    await db.flush()
+    return flow
@@ -0,0 +1,62 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Book, Category, Payee, Tag, UserGroupRelation
+from .crud_category import insert_tree
+
+# The columns a book copy carries over, the others keep their defaults
+CATEGORY_COPY_COLUMNS = (Category.id, Category.parent_id, Category.name, Category.notes, Category.type, Category.sort)
+TAG_COPY_COLUMNS = (
+    Tag.id, Tag.parent_id, Tag.name, Tag.notes, Tag.canExpense, Tag.canIncome, Tag.canTransfer, Tag.sort
+)
+PAYEE_COPY_COLUMNS = (Payee.name, Payee.notes, Payee.canExpense, Payee.canIncome, Payee.sort)
+
+
+async def get_user_book(db: AsyncSession, user_id: int, book_id: int) -> Optional[Book]:
+    """Returns a book if it belongs to one of the user's groups."""
+    query = (
+        select(Book)
+        .join(UserGroupRelation, UserGroupRelation.group_id == Book.group_id)
+        .where(Book.id == book_id, UserGroupRelation.user_id == user_id)
+        .limit(1)
+    )
+    return (await db.scalars(query)).first()
+
+
+async def book_name_exists(db: AsyncSession, group_id: int, name: str) -> bool:
+    query = select(Book.id).where(Book.group_id == group_id, Book.name == name).limit(1)
+    return (await db.execute(query)).first() is not None
+
+
+async def add_book_items(
+    db: AsyncSession,
+    book_id: int,
+    categories: Sequence[Dict[str, Any]],
+    tags: Sequence[Dict[str, Any]],
+    payees: Sequence[Dict[str, Any]],
+):
+    """
+    Adds categories, tags and payees to a new book: the category and tag trees level by level, the payees in one
+    statement. The rows' id and parent_id are those of where they come from, see insert_tree.
+    """
+    await insert_tree(db, Category, [dict(row, book_id=book_id) for row in categories])
+    await insert_tree(db, Tag, [dict(row, book_id=book_id) for row in tags])
+    if payees:
+        connection = await db.connection()
+        await connection.execute(insert(Payee.__table__), [dict(row, book_id=book_id) for row in payees])
+
+
+async def copy_book_items(db: AsyncSession, source_book_id: int, book_id: int):
+    """Copies the categories, tags and payees of a book into a new one, a query and a statement per tree level each."""
+
+    async def rows(columns) -> List[Dict[str, Any]]:
+        model = columns[0].class_
+        result = await db.execute(select(*columns).where(model.book_id == source_book_id).order_by(model.id))
+        return [dict(row._mapping) for row in result]
+
+    await add_book_items(
+        db, book_id, await rows(CATEGORY_COPY_COLUMNS), await rows(TAG_COPY_COLUMNS), await rows(PAYEE_COPY_COLUMNS)
+    )
+
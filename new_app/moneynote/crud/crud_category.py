@@ -0,0 +1,247 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
+
+from sqlalchemy import Executable, Select, delete, func, insert, literal, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from ..models import Category, CategoryClosure, Tag, TagClosure
+from .locks import lock_for_inserts
+from .pagination import KeysetOrder
+
+CATEGORY_ORDER = KeysetOrder((func.coalesce(Category.sort, 0), Category.id))
+
+# The hierarchy index of each tree table
+CLOSURES = {Category: CategoryClosure, Tag: TagClosure}
+# As deep as the legacy API let categories and tags nest, Limitation.category_max_level
+TREE_MAX_LEVEL = 4
+
+TreeModel = Type[Union[Category, Tag]]
+
+
+def select_categories(
+    book_id: int,
+    category_type: Optional[int] = None,
+    enable: Optional[bool] = None,
+    name: Optional[str] = None,
+) -> Select:
+    query = select(Category).where(Category.book_id == book_id)
+    if category_type is not None:
+        query = query.where(Category.type == category_type)
+    if enable is not None:
+        query = query.where(Category.enable.is_(enable))
+    if name:
+        query = query.where(Category.name.contains(name, autoescape=True))
+    return query
+
+
+async def category_name_exists(
+    db: AsyncSession,
+    book_id: int,
+    parent_id: Optional[int],
+    category_type: int,
+    name: str,
+    exclude_id: Optional[int] = None,
+) -> bool:
+    """Whether a category of the type has the name among its siblings, as the legacy API kept names unique."""
+    query = select(Category.id).where(
+        Category.book_id == book_id,
+        Category.parent_id == parent_id,
+        Category.type == category_type,
+        Category.name == name,
+    )
+    if exclude_id is not None:
+        query = query.where(Category.id != exclude_id)
+    return (await db.execute(query.limit(1))).first() is not None
+
+
+def select_tree(model: TreeModel, book_id: int) -> Select:
+    """
+    The columns of a book's categories or tags, plus their level from the hierarchy index, in the order they are
+    listed: the rows of the whole tree in one query.
+    """
+    closure = CLOSURES[model]
+    level = select(func.max(closure.depth)).where(closure.descendant_id == model.id).scalar_subquery()
+    return (
+        select(*model.__table__.columns, func.coalesce(level, 0).label("level"))
+        .where(model.book_id == book_id)
+        .order_by(func.coalesce(model.sort, 0), model.id)
+    )
+
+
+def tree_levels(rows: Sequence[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Groups the rows of a forest by depth, roots first, keeping their order within a level. A row's parent_id is the
+    id of another row, one that is not among them makes a root, as the legacy buildTree did.
+
+    Raises:
+        ValueError: If ids repeat, or parent_ids go round in a cycle.
+    """
+    ids = {row["id"] for row in rows}
+    if len(ids) < len(rows):
+        raise ValueError("Tree ids are duplicated")
+    children = defaultdict(list)
+    level = []
+    for row in rows:
+        if row["parent_id"] in ids:
+            children[row["parent_id"]].append(row)
+        else:
+            level.append(row)
+    levels = []
+    while level:
+        levels.append(level)
+        level = [child for row in level for child in children[row["id"]]]
+    if sum(map(len, levels)) < len(rows):
+        raise ValueError("Tree parents form a cycle")
+    return levels
+
+
+async def insert_tree(db: AsyncSession, model: TreeModel, rows: Sequence[Dict[str, Any]]) -> Dict[Any, int]:
+    """
+    Adds a forest of categories, or of tags, in one statement per level. The rows' id and parent_id are the keys of
+    where they are copied from: the new ids are assigned up front, following the largest, and parent_id remapped
+    to them in memory, so no row waits on its parent's insert to learn its id. The hierarchy index of the forest
+    is worked out alongside and inserted in one more statement. Returns the new id of each key. SQLite only, see
+    lock_for_inserts.
+    """
+    levels = tree_levels(rows)
+    if not levels:
+        return {}
+    # RETURNING the ids in order would need a sentinel column on SQLite, without one SQLAlchemy inserts row by
+    # row. The write lock keeps another writer from taking the ids in between.
+    await lock_for_inserts(db, model)
+    next_id = (await db.execute(select(func.coalesce(func.max(model.id), 0)))).scalar_one() + 1
+    new_ids: Dict[Any, int] = {}
+    # (ancestor id, depth) of each new id, itself included
+    ancestors: Dict[int, List[tuple]] = {}
+    connection = await db.connection()
+    for level in levels:
+        values = []
+        for row in level:
+            node_id = new_ids[row["id"]] = next_id
+            next_id += 1
+            parent_id = new_ids.get(row["parent_id"])
+            ancestors[node_id] = [(node_id, 0)] + [
+                (ancestor_id, depth + 1) for ancestor_id, depth in ancestors.get(parent_id, ())
+            ]
+            values.append(dict(row, id=node_id, parent_id=parent_id))
+        await connection.execute(insert(model.__table__), values)
+    await connection.execute(insert(CLOSURES[model].__table__), [
+        {"ancestor_id": ancestor_id, "descendant_id": node_id, "depth": depth}
+        for node_id, node_ancestors in ancestors.items()
+        for ancestor_id, depth in node_ancestors
+    ])
+    return new_ids
+
+
+async def add_tree_node(db: AsyncSession, model: TreeModel, node_id: int, parent_id: Optional[int]):
+    """Indexes a new category or tag: a row for itself, and one for each ancestor of its parent, one depth further."""
+    closure = CLOSURES[model]
+    await db.execute(insert(closure).values(ancestor_id=node_id, descendant_id=node_id, depth=0))
+    if parent_id is not None:
+        await db.execute(insert(closure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(closure.ancestor_id, literal(node_id), closure.depth + 1).where(closure.descendant_id == parent_id),
+        ))
+
+
+async def move_tree_node(db: AsyncSession, model: TreeModel, node_id: int, parent_id: Optional[int]):
+    """
+    Re-indexes a category or tag, and its subtree, under a new parent, None making it a root: the rows linking the
+    subtree to its old ancestors are deleted, then every ancestor of the new parent linked to every node of the
+    subtree, a statement each however large the subtree. The new parent must not be in the subtree.
+    """
+    closure = CLOSURES[model]
+    subtree = select(closure.descendant_id).where(closure.ancestor_id == node_id)
+    await db.execute(delete(closure).where(closure.descendant_id.in_(subtree), closure.ancestor_id.not_in(subtree)))
+    if parent_id is not None:
+        above, below = aliased(closure), aliased(closure)
+        await db.execute(insert(closure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+            # Every ancestor of the parent with every node of the subtree
+            .select_from(above)
+            .join(below, true())
+            .where(above.descendant_id == parent_id, below.ancestor_id == node_id),
+        ))
+
+
+async def delete_tree_node(db: AsyncSession, model: TreeModel, node_id: int):
+    """
+    Un-indexes a category or tag and makes its children roots, as the legacy API left them: deletes the rows
+    linking the node and its ancestors to the node's subtree. The caller deletes the node and clears the
+    children's parent_id.
+    """
+    closure = CLOSURES[model]
+    subtree = select(closure.descendant_id).where(closure.ancestor_id == node_id)
+    ancestors = select(closure.ancestor_id).where(closure.descendant_id == node_id)
+    await db.execute(delete(closure).where(closure.descendant_id.in_(subtree), closure.ancestor_id.in_(ancestors)))
+
+
+async def get_tree_level(db: AsyncSession, model: TreeModel, node_id: int) -> int:
+    """How many ancestors a category or tag has, 0 for a root."""
+    closure = CLOSURES[model]
+    return (await db.execute(select(func.max(closure.depth)).where(closure.descendant_id == node_id))).scalar_one() or 0
+
+
+async def get_subtree_height(db: AsyncSession, model: TreeModel, node_id: int) -> int:
+    """How many levels a category or tag has below it, 0 for a leaf."""
+    closure = CLOSURES[model]
+    return (await db.execute(select(func.max(closure.depth)).where(closure.ancestor_id == node_id))).scalar_one() or 0
+
+
+async def is_in_subtree(db: AsyncSession, model: TreeModel, node_id: int, ancestor_id: int) -> bool:
+    """Whether a category or tag is ancestor_id itself, or below it."""
+    closure = CLOSURES[model]
+    query = select(closure.depth).where(closure.ancestor_id == ancestor_id, closure.descendant_id == node_id)
+    return (await db.execute(query)).first() is not None
+
+
+def closure_rebuild_statements(model: TreeModel, book_id: Optional[int] = None) -> List[Executable]:
+    """
+    Statements that recompute the hierarchy index of the categories or tags of a book, or of every book, from
+    parent_id with a recursive query: for the migration that adds it, or to repair it.
+    """
+    closure = CLOSURES[model]
+    nodes = select(model.id)
+    paths = select(model.id.label("ancestor_id"), model.id.label("descendant_id"), literal(0).label("depth"))
+    if book_id is not None:
+        nodes = nodes.where(model.book_id == book_id)
+        paths = paths.where(model.book_id == book_id)
+    paths = paths.cte("paths", recursive=True)
+    child = aliased(model)
+    paths = paths.union_all(
+        select(paths.c.ancestor_id, child.id, paths.c.depth + 1)
+        .where(child.parent_id == paths.c.descendant_id)
+        # parent_ids that go round in a cycle would recurse forever
+        .where(paths.c.depth < 64)
+    )
+    return [
+        delete(closure).where(closure.descendant_id.in_(nodes)),
+        insert(closure).from_select(["ancestor_id", "descendant_id", "depth"], select(paths)),
+    ]
+
+
+async def create_category(db: AsyncSession, category: Category) -> Category:
+    """Adds a category and indexes it under its parent."""
+    db.add(category)
+    await db.flush()
+    await add_tree_node(db, Category, category.id, category.parent_id)
+    return category
+
+
+async def move_category(db: AsyncSession, category: Category, parent_id: Optional[int]) -> Category:
+    """Moves a category, and its subtree, under another parent. The caller checks the parent is not below it."""
+    if parent_id != category.parent_id:
+        category.parent_id = parent_id
+        await db.flush()
+        await move_tree_node(db, Category, category.id, parent_id)
+    return category
+
+
+async def delete_category(db: AsyncSession, category: Category):
+    """Deletes a category, its children becoming roots. The caller checks no flow is booked on it."""
+    await delete_tree_node(db, Category, category.id)
+    await db.execute(update(Category).where(Category.parent_id == category.id).values(parent_id=None))
+    await db.delete(category)
+    await db.flush()
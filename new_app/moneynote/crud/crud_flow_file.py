@@ -0,0 +1,39 @@
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import FlowFile
+
+# A file's bytes live in the blob store, keyed by their SHA-256, so files with the same content share a blob.
+# Deleting files leaves their blobs, gcs_service.sweep_blobs deletes the ones no file references later.
+
+
+async def get_flow_files(db: AsyncSession, flow_id: int) -> Sequence[FlowFile]:
+    return (await db.scalars(select(FlowFile).where(FlowFile.flow_id == flow_id).order_by(FlowFile.id))).all()
+
+
+async def get_flow_file(db: AsyncSession, file_id: int, create_time: Optional[int] = None) -> Optional[FlowFile]:
+    """A file by id, and by createTime too if given, as the unauthenticated view link identifies files."""
+    query = select(FlowFile).where(FlowFile.id == file_id)
+    if create_time is not None:
+        query = query.where(FlowFile.createTime == create_time)
+    return (await db.scalars(query)).first()
+
+
+async def unreferenced_blob_keys(db: AsyncSession, keys: Iterable[Optional[str]]) -> List[str]:
+    """The keys, among these, that no file references."""
+    keys = {key for key in keys if key is not None}
+    if not keys:
+        return []
+    referenced = set((await db.scalars(select(FlowFile.blobKey).where(FlowFile.blobKey.in_(keys)))).all())
+    return sorted(keys - referenced)
+
+
+async def delete_flow_file(db: AsyncSession, flow_file: FlowFile):
+    await db.delete(flow_file)
+    await db.flush()
+
+
+async def delete_flow_files(db: AsyncSession, flow_id: int):
+    await db.execute(delete(FlowFile).where(FlowFile.flow_id == flow_id))
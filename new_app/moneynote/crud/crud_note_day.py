@@ -0,0 +1,15 @@
+from typing import Optional
+
+from sqlalchemy import Select, select
+
+from ..models import NoteDay
+from .pagination import KeysetOrder
+
+NOTE_DAY_ORDER = KeysetOrder((NoteDay.id,), descending=True)
+
+
+def select_note_days(user_id: int, title: Optional[str] = None) -> Select:
+    query = select(NoteDay).where(NoteDay.user_id == user_id)
+    if title:
+        query = query.where(NoteDay.title.contains(title, autoescape=True))
+    return query
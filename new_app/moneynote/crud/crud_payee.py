@@ -0,0 +1,27 @@
+from typing import Optional
+
+from sqlalchemy import Select, func, select
+
+from ..models import Payee
+from .pagination import KeysetOrder
+
+PAYEE_ORDER = KeysetOrder((func.coalesce(Payee.sort, 0), Payee.id))
+
+
+def select_payees(
+    book_id: int,
+    enable: Optional[bool] = None,
+    can_expense: Optional[bool] = None,
+    can_income: Optional[bool] = None,
+    name: Optional[str] = None,
+) -> Select:
+    query = select(Payee).where(Payee.book_id == book_id)
+    if enable is not None:
+        query = query.where(Payee.enable.is_(enable))
+    if can_expense is not None:
+        query = query.where(Payee.canExpense.is_(can_expense))
+    if can_income is not None:
+        query = query.where(Payee.canIncome.is_(can_income))
+    if name:
+        query = query.where(Payee.name.contains(name, autoescape=True))
+    return query
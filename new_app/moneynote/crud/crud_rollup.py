@@ -0,0 +1,162 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import ColumnElement, Executable, Select, delete, func, insert, literal, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+
+from ..models import BalanceFlow, CategoryRelation, DailyRollup, TagRelation
+from ..models.daily_rollup import (ROLLUP_DIMENSION_CATEGORY, ROLLUP_DIMENSION_FLOW, ROLLUP_DIMENSION_PAYEE,
+                                   ROLLUP_DIMENSION_TAG)
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+_KEY_COLUMNS = ("book_id", "dimension", "flow_type", "day", "dimension_id")
+
+
+def _offset_ms() -> int:
+    return settings.REPORT_UTC_OFFSET_MINUTES * 60 * 1000
+
+
+def flow_day(create_time: int) -> int:
+    """The rollup day of a createTime in milliseconds."""
+    return (create_time + _offset_ms()) // DAY_MS
+
+
+def day_start(day: int) -> int:
+    """The first millisecond of a rollup day."""
+    return day * DAY_MS - _offset_ms()
+
+
+def _day_expression(create_time: ColumnElement) -> ColumnElement:
+    # flow_day in SQL: SQLite's % and / truncate toward zero, so floor by hand for times before 1970
+    shifted = create_time + _offset_ms()
+    return (shifted - ((shifted % DAY_MS) + DAY_MS) % DAY_MS) // DAY_MS
+
+
+class RollupDeltas:
+    """
+    Collects the changes a set of flow writes makes to the rollup, summed per rollup row, and applies them in one
+    statement. A flow only counts if it is confirmed and included, as in the reports.
+    """
+
+    def __init__(self):
+        self._deltas: Dict[Tuple[int, int, int, int, int], List[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+
+    def _add(self, key: Tuple[int, int, int, int, int], amount: Optional[float], converted_amount: Optional[float], count: int):
+        delta = self._deltas[key]
+        delta[0] += amount or 0
+        delta[1] += converted_amount or 0
+        delta[2] += count
+
+    def add_flow(
+        self,
+        flow: BalanceFlow,
+        category_relations: Iterable[CategoryRelation] = (),
+        tag_relations: Iterable[TagRelation] = (),
+        sign: int = 1,
+    ):
+        """Adds (sign=1) or removes (sign=-1) a flow and its relations."""
+        if not (flow.confirm and flow.include):
+            return
+        day = flow_day(flow.createTime)
+        self._add((flow.book_id, ROLLUP_DIMENSION_FLOW, flow.type, day, 0), sign * flow.amount, sign * (flow.convertedAmount or 0), sign)
+        if flow.payee_id is not None:
+            self._add((flow.book_id, ROLLUP_DIMENSION_PAYEE, flow.type, day, flow.payee_id), sign * flow.amount, sign * (flow.convertedAmount or 0), sign)
+        for relation in category_relations:
+            self._add((flow.book_id, ROLLUP_DIMENSION_CATEGORY, flow.type, day, relation.category_id), sign * relation.amount, sign * (relation.convertedAmount or 0), sign)
+        for relation in tag_relations:
+            self._add((flow.book_id, ROLLUP_DIMENSION_TAG, flow.type, day, relation.tag_id), sign * relation.amount, sign * (relation.convertedAmount or 0), sign)
+
+    async def flush(self, db: AsyncSession):
+        """Upserts the collected changes into the rollup."""
+        rows = [
+            dict(zip(_KEY_COLUMNS, key), amount=amount, convertedAmount=converted_amount, flowCount=count)
+            for key, (amount, converted_amount, count) in self._deltas.items()
+            if amount or converted_amount or count
+        ]
+        emptied_keys = [key for key, (_, _, count) in self._deltas.items() if count < 0]
+        self._deltas.clear()
+        if not rows:
+            return
+        statement = sqlite_insert(DailyRollup)
+        statement = statement.on_conflict_do_update(
+            index_elements=_KEY_COLUMNS,
+            set_={
+                "amount": DailyRollup.amount + statement.excluded.amount,
+                "convertedAmount": DailyRollup.convertedAmount + statement.excluded.convertedAmount,
+                "flowCount": DailyRollup.flowCount + statement.excluded.flowCount,
+            },
+        )
+        await db.execute(statement, rows)
+        if emptied_keys:
+            # A row whose flows were all removed holds nothing but rounding residue
+            key = tuple_(*(getattr(DailyRollup, column) for column in _KEY_COLUMNS))
+            await db.execute(delete(DailyRollup).where(key.in_(emptied_keys), DailyRollup.flowCount <= 0))
+
+
+def rebuild_statements(book_id: Optional[int] = None) -> List[Executable]:
+    """
+    The statements that recompute the rollup of a book, or of every book, from the flows. Used by the rebuild
+    command and by the migration that creates the rollup.
+    """
+    reported = [BalanceFlow.confirm.is_(True), BalanceFlow.include.is_(True)]
+    if book_id is not None:
+        reported.append(BalanceFlow.book_id == book_id)
+    day = _day_expression(BalanceFlow.createTime)
+    columns = ["book_id", "dimension", "flow_type", "day", "dimension_id", "amount", "convertedAmount", "flowCount"]
+
+    def grouped(dimension: int, dimension_id: ColumnElement, amount: ColumnElement, converted_amount: ColumnElement, *joins) -> Select:
+        query = select(
+            BalanceFlow.book_id,
+            literal(dimension),
+            BalanceFlow.type,
+            day,
+            dimension_id,
+            func.coalesce(func.sum(amount), 0),
+            func.coalesce(func.sum(converted_amount), 0),
+            func.count(),
+        )
+        for target, on in joins:
+            query = query.join(target, on)
+        return query.where(*reported).group_by(BalanceFlow.book_id, BalanceFlow.type, day, dimension_id)
+
+    clear = delete(DailyRollup)
+    if book_id is not None:
+        clear = clear.where(DailyRollup.book_id == book_id)
+    return [
+        clear,
+        insert(DailyRollup).from_select(columns, grouped(
+            ROLLUP_DIMENSION_FLOW, literal(0), BalanceFlow.amount, BalanceFlow.convertedAmount)),
+        insert(DailyRollup).from_select(columns, grouped(
+            ROLLUP_DIMENSION_PAYEE, BalanceFlow.payee_id, BalanceFlow.amount, BalanceFlow.convertedAmount
+        ).where(BalanceFlow.payee_id.is_not(None))),
+        insert(DailyRollup).from_select(columns, grouped(
+            ROLLUP_DIMENSION_CATEGORY, CategoryRelation.category_id, CategoryRelation.amount, CategoryRelation.convertedAmount,
+            (CategoryRelation, CategoryRelation.balanceFlow_id == BalanceFlow.id))),
+        insert(DailyRollup).from_select(columns, grouped(
+            ROLLUP_DIMENSION_TAG, TagRelation.tag_id, TagRelation.amount, TagRelation.convertedAmount,
+            (TagRelation, TagRelation.balanceFlow_id == BalanceFlow.id))),
+    ]
+
+
+async def rebuild(db: AsyncSession, book_id: Optional[int] = None):
+    """Recomputes the rollup of a book, or of every book, from the flows. The caller commits."""
+    for statement in rebuild_statements(book_id):
+        await db.execute(statement)
+
+
+def select_rollup_sums(book_id: int, dimension: int, flow_type: int, first_day: Optional[int], last_day: Optional[int]) -> Select:
+    """(dimension id, amount, converted amount) per dimension id over whole days, first_day to last_day included."""
+    query = (
+        select(DailyRollup.dimension_id, func.sum(DailyRollup.amount), func.sum(DailyRollup.convertedAmount))
+        .where(DailyRollup.book_id == book_id, DailyRollup.dimension == dimension, DailyRollup.flow_type == flow_type)
+        .group_by(DailyRollup.dimension_id)
+    )
+    if first_day is not None:
+        query = query.where(DailyRollup.day >= first_day)
+    if last_day is not None:
+        query = query.where(DailyRollup.day <= last_day)
+    return query
@@ -0,0 +1,71 @@
+from typing import Optional
+
+from sqlalchemy import Select, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Tag
+from .crud_category import add_tree_node, delete_tree_node, move_tree_node
+from .pagination import KeysetOrder
+
+TAG_ORDER = KeysetOrder((func.coalesce(Tag.sort, 0), Tag.id))
+
+
+def select_tags(
+    book_id: int,
+    enable: Optional[bool] = None,
+    can_expense: Optional[bool] = None,
+    can_income: Optional[bool] = None,
+    can_transfer: Optional[bool] = None,
+    name: Optional[str] = None,
+) -> Select:
+    query = select(Tag).where(Tag.book_id == book_id)
+    if enable is not None:
+        query = query.where(Tag.enable.is_(enable))
+    if can_expense is not None:
+        query = query.where(Tag.canExpense.is_(can_expense))
+    if can_income is not None:
+        query = query.where(Tag.canIncome.is_(can_income))
+    if can_transfer is not None:
+        query = query.where(Tag.canTransfer.is_(can_transfer))
+    if name:
+        query = query.where(Tag.name.contains(name, autoescape=True))
+    return query
+
+
+async def tag_name_exists(
+    db: AsyncSession, book_id: int, parent_id: Optional[int], name: str, exclude_id: Optional[int] = None
+) -> bool:
+    """Whether a tag has the name among its siblings, as the legacy API kept names unique."""
+    query = select(Tag.id).where(
+        Tag.book_id == book_id,
+        Tag.parent_id == parent_id,
+        Tag.name == name,
+    )
+    if exclude_id is not None:
+        query = query.where(Tag.id != exclude_id)
+    return (await db.execute(query.limit(1))).first() is not None
+
+
+async def create_tag(db: AsyncSession, tag: Tag) -> Tag:
+    """Adds a tag and indexes it under its parent."""
+    db.add(tag)
+    await db.flush()
+    await add_tree_node(db, Tag, tag.id, tag.parent_id)
+    return tag
+
+
+async def move_tag(db: AsyncSession, tag: Tag, parent_id: Optional[int]) -> Tag:
+    """Moves a tag, and its subtree, under another parent. The caller checks the parent is not below it."""
+    if parent_id != tag.parent_id:
+        tag.parent_id = parent_id
+        await db.flush()
+        await move_tree_node(db, Tag, tag.id, parent_id)
+    return tag
+
+
+async def delete_tag(db: AsyncSession, tag: Tag):
+    """Deletes a tag, its children becoming roots. The caller checks no flow is tagged with it."""
+    await delete_tree_node(db, Tag, tag.id)
+    await db.execute(update(Tag).where(Tag.parent_id == tag.id).values(parent_id=None))
+    await db.delete(tag)
+    await db.flush()
@@ -0,0 +1,21 @@
+import time
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import User
+
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    return (await db.scalars(select(User).where(User.username == username).limit(1))).first()
+
+
+async def get_or_create_user(db: AsyncSession, username: str) -> User:
+    """Returns the user of a token's sub claim, registering it on its first request."""
+    user = await get_user_by_username(db, username)
+    if user is None:
+        user = User(username=username, enable=True, registerTime=int(time.time() * 1000))
+        db.add(user)
+        await db.commit()
+    return user
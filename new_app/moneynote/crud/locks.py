@@ -0,0 +1,15 @@
+from sqlalchemy import false, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Base
+
+
+async def lock_for_inserts(db: AsyncSession, model: type[Base]):
+    """
+    Takes the database's write lock for the rest of the transaction, as BEGIN IMMEDIATE would, before ids are
+    assigned up front from max(id) + 1: no other writer can then take them before the insert. SQLite only: it
+    starts a write transaction at its first write, even one that matches no row, and other writers wait for the
+    commit, up to SQLITE_BUSY_TIMEOUT_MS. Other databases take no lock on such a statement.
+    """
+    assert db.get_bind().dialect.name == "sqlite", "lock_for_inserts relies on SQLite's database-wide write lock"
+    await db.execute(update(model.__table__).where(false()).values(id=model.__table__.c.id))
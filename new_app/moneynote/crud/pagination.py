@@ -0,0 +1,110 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import ColumnElement, Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor was not issued for this list."""
+
+
+@dataclass(frozen=True)
+class KeysetOrder:
+    """
+    The order of a list, as the columns that make up its unique sort key, e.g. (createTime, id).
+
+    The last column must be unique so that rows with the same leading values still have a strict order.
+    All columns are sorted the same way so the position after a row is a single row-value comparison,
+    which SQLite answers with an index range seek.
+    """
+    columns: Tuple[ColumnElement, ...]
+    descending: bool = False
+
+    def order_by(self) -> list:
+        return [column.desc() if self.descending else column.asc() for column in self.columns]
+
+    def after(self, values: Sequence[Any]) -> ColumnElement:
+        """The condition matching the rows that come after the row with these key values."""
+        key, last = tuple_(*self.columns), tuple_(*values)
+        return key < last if self.descending else key > last
+
+
+@dataclass(frozen=True)
+class PageResult:
+    items: List[Any]
+    size: int
+    # Set in offset mode only, counting the rows is what makes deep offset pages slow
+    number: Optional[int] = None
+    total: Optional[int] = None
+    # The cursor of the next page, None on the last page
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values), separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int) -> list:
+    """Decodes a cursor into the key values of the row it points after."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError(f"Invalid cursor: {cursor}")
+    if (
+        not isinstance(values, list)
+        or len(values) != length
+        or not all(isinstance(value, (int, float, str)) and not isinstance(value, bool) for value in values)
+    ):
+        raise InvalidCursorError(f"Invalid cursor: {cursor}")
+    return values
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    order: KeysetOrder,
+    size: int,
+    page: int = 0,
+    cursor: Optional[str] = None,
+) -> PageResult:
+    """
+    Runs a list query one page at a time, in keyset or offset mode.
+
+    With a cursor the page starts right after the row the cursor points to, so every page costs the same however
+    deep it is. Without one it is the page-th page of size rows, counted from the start as the legacy API did,
+    along with the total. Both modes return the cursor of the next page, so a client can switch to keyset mode
+    after the first page.
+
+    Args:
+        db (AsyncSession): The session.
+        query (Select): A select of a single entity, filtered but not ordered.
+        order (KeysetOrder): The order of the list.
+        size (int): The number of rows per page.
+        page (int): The 0-based page number, used without a cursor.
+        cursor (Optional[str]): The next_cursor of the previous page. An empty string starts at the first page.
+
+    Raises:
+        InvalidCursorError: If the cursor was not issued for this order.
+    """
+    total = None
+    paged_query = query.add_columns(*order.columns).order_by(*order.order_by()).limit(size + 1)
+    if cursor is not None:
+        if cursor:
+            paged_query = paged_query.where(order.after(decode_cursor(cursor, len(order.columns))))
+    else:
+        total = (await db.execute(select(func.count()).select_from(query.order_by(None).subquery()))).scalar_one()
+        paged_query = paged_query.offset(page * size)
+
+    rows = (await db.execute(paged_query)).all()
+    next_cursor = encode_cursor(rows[size - 1][1:]) if len(rows) > size else None
+    return PageResult(
+        items=[row[0] for row in rows[:size]],
+        size=size,
+        number=page if cursor is None else None,
+        total=total,
+        next_cursor=next_cursor,
+    )
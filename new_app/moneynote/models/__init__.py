@@ -0,0 +1,36 @@
+from .account import Account
+from .balance_flow import BalanceFlow
+from .base import Base
+from .book import Book
+from .category import Category
+from .category_closure import CategoryClosure
+from .category_relation import CategoryRelation
+from .daily_rollup import DailyRollup
+from .flow_file import FlowFile
+from .group import Group, UserGroupRelation
+from .note_day import NoteDay
+from .payee import Payee
+from .tag import Tag
+from .tag_closure import TagClosure
+from .tag_relation import TagRelation
+from .user import User
+
+__all__ = [
+    "Account",
+    "BalanceFlow",
+    "Base",
+    "Book",
+    "Category",
+    "CategoryClosure",
+    "CategoryRelation",
+    "DailyRollup",
+    "FlowFile",
+    "Group",
+    "NoteDay",
+    "Payee",
+    "Tag",
+    "TagClosure",
+    "TagRelation",
+    "User",
+    "UserGroupRelation",
+]
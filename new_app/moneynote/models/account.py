@@ -0,0 +1,38 @@
+from typing import Optional
+
+from sqlalchemy import Boolean, Float, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+# t_user_account.type
+ACCOUNT_TYPE_CHECKING = 100
+ACCOUNT_TYPE_CREDIT = 200
+ACCOUNT_TYPE_ASSET = 300
+ACCOUNT_TYPE_DEBT = 400
+
+
+class Account(Base):
+    __tablename__ = "t_user_account"
+    # The accounts of a group: the lists, the overview and the balance report read them by type
+    __table_args__ = (Index("ix_account_group_type", "group_id", "type"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    group_id: Mapped[int] = mapped_column(ForeignKey("t_user_group.id"))
+    type: Mapped[int] = mapped_column(Integer)
+    notes: Mapped[Optional[str]] = mapped_column(String)
+    enable: Mapped[bool] = mapped_column(Boolean, default=True)
+    no: Mapped[Optional[str]] = mapped_column(String)
+    balance: Mapped[float] = mapped_column(Float, default=0)
+    include: Mapped[bool] = mapped_column(Boolean, default=True)
+    canExpense: Mapped[bool] = mapped_column(Boolean, default=True)
+    canIncome: Mapped[bool] = mapped_column(Boolean, default=True)
+    canTransferFrom: Mapped[bool] = mapped_column(Boolean, default=True)
+    canTransferTo: Mapped[bool] = mapped_column(Boolean, default=True)
+    currencyCode: Mapped[str] = mapped_column(String)
+    initialBalance: Mapped[float] = mapped_column(Float, default=0)
+    creditLimit: Mapped[Optional[float]] = mapped_column(Float)
+    billDay: Mapped[Optional[int]] = mapped_column(Integer)
+    apr: Mapped[Optional[float]] = mapped_column(Float)
+    sort: Mapped[Optional[int]] = mapped_column(Integer)
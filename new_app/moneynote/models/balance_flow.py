@@ -0,0 +1,46 @@
+from typing import Optional
+
+from sqlalchemy import Boolean, Float, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+# t_user_balance_flow.type
+FLOW_TYPE_EXPENSE = 100
+FLOW_TYPE_INCOME = 200
+FLOW_TYPE_TRANSFER = 300
+FLOW_TYPE_ADJUST = 400
+
+
+class BalanceFlow(Base):
+    __tablename__ = "t_user_balance_flow"
+    __table_args__ = (
+        # Lists, newest first: the rowid at the end of the index orders flows created at the same time
+        Index("ix_balance_flow_book_time", "book_id", "createTime"),
+        # Statistics and reports filter a book's flows by type and createTime range. Covering: the sums never read
+        # the table.
+        Index(
+            "ix_balance_flow_book_type_time_cover",
+            "book_id", "type", "createTime", "confirm", "include", "amount", "convertedAmount",
+        ),
+        Index("ix_balance_flow_account_time", "account_id", "createTime"),
+        Index("ix_balance_flow_to_time", "to_id", "createTime"),
+        Index("ix_balance_flow_payee", "payee_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    book_id: Mapped[int] = mapped_column(ForeignKey("t_user_book.id"))
+    type: Mapped[int] = mapped_column(Integer)
+    amount: Mapped[float] = mapped_column(Float, default=0)
+    convertedAmount: Mapped[Optional[float]] = mapped_column(Float)
+    account_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_account.id"))
+    createTime: Mapped[int] = mapped_column(Integer)
+    title: Mapped[Optional[str]] = mapped_column(String)
+    notes: Mapped[Optional[str]] = mapped_column(String)
+    creator_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_user.id"))
+    group_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_group.id"))
+    to_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_account.id"))
+    payee_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_payee.id"))
+    confirm: Mapped[bool] = mapped_column(Boolean, default=True)
+    include: Mapped[bool] = mapped_column(Boolean, default=True)
+    insertAt: Mapped[Optional[int]] = mapped_column(Integer)
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from sqlalchemy import Boolean, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class Book(Base):
+    __tablename__ = "t_user_book"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    group_id: Mapped[int] = mapped_column(ForeignKey("t_user_group.id"))
+    notes: Mapped[Optional[str]] = mapped_column(String)
+    enable: Mapped[bool] = mapped_column(Boolean, default=True)
+    defaultExpenseAccount_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_account.id"))
+    defaultIncomeAccount_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_account.id"))
+    defaultTransferFromAccount_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_account.id"))
+    defaultTransferToAccount_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_account.id"))
+    defaultExpenseCategory_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_category.id", use_alter=True))
+    defaultIncomeCategory_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_category.id", use_alter=True))
+    defaultCurrencyCode: Mapped[Optional[str]] = mapped_column(String)
+    exportAt: Mapped[Optional[int]] = mapped_column(Integer)
+    sort: Mapped[Optional[int]] = mapped_column(Integer)
@@ -0,0 +1,24 @@
+from typing import Optional
+
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+# t_user_category.type
+CATEGORY_TYPE_EXPENSE = 100
+CATEGORY_TYPE_INCOME = 200
+
+
+class Category(Base):
+    __tablename__ = "t_user_category"
+    __table_args__ = (Index("ix_category_book_parent", "book_id", "parent_id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    parent_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_category.id"))
+    book_id: Mapped[int] = mapped_column(ForeignKey("t_user_book.id"))
+    notes: Mapped[Optional[str]] = mapped_column(String)
+    enable: Mapped[bool] = mapped_column(Boolean, default=True)
+    type: Mapped[int] = mapped_column(Integer)
+    sort: Mapped[Optional[int]] = mapped_column(Integer)
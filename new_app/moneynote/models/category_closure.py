@@ -0,0 +1,21 @@
+from sqlalchemy import ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class CategoryClosure(Base):
+    """
+    The hierarchy index of the categories: a row for every category and each of its ancestors, itself included at
+    depth 0, maintained by crud_category. A subtree is then one range of the primary key, and the ancestors of a
+    category one range of ix_category_closure_descendant, however deep the tree.
+    """
+    __tablename__ = "t_user_category_closure"
+    __table_args__ = (
+        Index("ix_category_closure_descendant", "descendant_id", "depth"),
+        {"sqlite_with_rowid": False},
+    )
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("t_user_category.id"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("t_user_category.id"), primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer)
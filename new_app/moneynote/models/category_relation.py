@@ -0,0 +1,23 @@
+from typing import Optional
+
+from sqlalchemy import Float, ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class CategoryRelation(Base):
+    """The part of a balance flow's amount booked against one category."""
+    __tablename__ = "t_user_category_relation"
+    __table_args__ = (
+        # Joined from a flow: the category and amounts come from the index alone
+        Index("ix_category_relation_flow_cover", "balanceFlow_id", "category_id", "amount", "convertedAmount"),
+        # The flows of a category
+        Index("ix_category_relation_category_flow", "category_id", "balanceFlow_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    category_id: Mapped[int] = mapped_column(ForeignKey("t_user_category.id"))
+    balanceFlow_id: Mapped[int] = mapped_column(ForeignKey("t_user_balance_flow.id"))
+    amount: Mapped[float] = mapped_column(Float, default=0)
+    convertedAmount: Mapped[Optional[float]] = mapped_column(Float)
@@ -0,0 +1,31 @@
+from sqlalchemy import Float, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+# t_report_daily_rollup.dimension: what dimension_id is the id of
+ROLLUP_DIMENSION_FLOW = 0  # the flows themselves, dimension_id is 0
+ROLLUP_DIMENSION_CATEGORY = 1
+ROLLUP_DIMENSION_TAG = 2
+ROLLUP_DIMENSION_PAYEE = 3
+
+
+class DailyRollup(Base):
+    """
+    The sums of a book's confirmed and included flows per day, flow type and dimension, maintained by
+    crud_balance_flow so reports read one row per day instead of every flow.
+
+    day is the number of days since 1970-01-01 in the timezone of settings.REPORT_UTC_OFFSET_MINUTES.
+    """
+    __tablename__ = "t_report_daily_rollup"
+    # Stored in primary key order, a report reads each book's days of a dimension and type as one contiguous range
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    book_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    dimension: Mapped[int] = mapped_column(Integer, primary_key=True)
+    flow_type: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[int] = mapped_column(Integer, primary_key=True)
+    dimension_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    amount: Mapped[float] = mapped_column(Float, default=0)
+    convertedAmount: Mapped[float] = mapped_column(Float, default=0)
+    flowCount: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from sqlalchemy import ForeignKey, Index, Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class FlowFile(Base):
+    """
+    A file attached to a balance flow. Its bytes are in the blob store under blobKey; data only holds the bytes of
+    files stored before the blob store, until the migration moves them out.
+    """
+    __tablename__ = "t_flow_file"
+    __table_args__ = (Index("ix_flow_file_flow", "flow_id"), Index("ix_flow_file_blob_key", "blobKey"))
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    data: Mapped[Optional[bytes]] = mapped_column(LargeBinary)
+    blobKey: Mapped[Optional[str]] = mapped_column(String(64))
+    creator_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_user.id"))
+    flow_id: Mapped[int] = mapped_column(ForeignKey("t_user_balance_flow.id"))
+    createTime: Mapped[Optional[int]] = mapped_column(Integer)
+    contentType: Mapped[Optional[str]] = mapped_column(String)
+    size: Mapped[Optional[int]] = mapped_column(Integer)
+    originalName: Mapped[Optional[str]] = mapped_column(String)
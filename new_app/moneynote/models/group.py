@@ -0,0 +1,27 @@
+from typing import Optional
+
+from sqlalchemy import Boolean, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class Group(Base):
+    __tablename__ = "t_user_group"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    notes: Mapped[Optional[str]] = mapped_column(String)
+    enable: Mapped[bool] = mapped_column(Boolean, default=True)
+    creator_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_user.id"))
+    defaultBook_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_book.id", use_alter=True))
+    defaultCurrencyCode: Mapped[Optional[str]] = mapped_column(String)
+
+
+class UserGroupRelation(Base):
+    __tablename__ = "t_user_user_group_relation"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("t_user_user.id"))
+    group_id: Mapped[int] = mapped_column(ForeignKey("t_user_group.id"))
+    role: Mapped[Optional[int]] = mapped_column(Integer)
@@ -0,0 +1,23 @@
+from typing import Optional
+
+from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class NoteDay(Base):
+    """A dated note or reminder, optionally repeating."""
+    __tablename__ = "t_user_note_day"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("t_user_user.id"))
+    title: Mapped[str] = mapped_column(String)
+    notes: Mapped[Optional[str]] = mapped_column(String)
+    startDate: Mapped[Optional[int]] = mapped_column(Integer)
+    endDate: Mapped[Optional[int]] = mapped_column(Integer)
+    nextDate: Mapped[Optional[int]] = mapped_column(Integer)
+    repeatType: Mapped[Optional[int]] = mapped_column(Integer)
+    interval: Mapped[Optional[int]] = mapped_column(Integer)
+    totalCount: Mapped[Optional[int]] = mapped_column(Integer)
+    runCount: Mapped[Optional[int]] = mapped_column(Integer)
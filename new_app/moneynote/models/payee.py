@@ -0,0 +1,20 @@
+from typing import Optional
+
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class Payee(Base):
+    __tablename__ = "t_user_payee"
+    __table_args__ = (Index("ix_payee_book", "book_id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    book_id: Mapped[int] = mapped_column(ForeignKey("t_user_book.id"))
+    notes: Mapped[Optional[str]] = mapped_column(String)
+    enable: Mapped[bool] = mapped_column(Boolean, default=True)
+    canExpense: Mapped[bool] = mapped_column(Boolean, default=True)
+    canIncome: Mapped[bool] = mapped_column(Boolean, default=True)
+    sort: Mapped[Optional[int]] = mapped_column(Integer)
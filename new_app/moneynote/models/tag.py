@@ -0,0 +1,22 @@
+from typing import Optional
+
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class Tag(Base):
+    __tablename__ = "t_user_tag"
+    __table_args__ = (Index("ix_tag_book_parent", "book_id", "parent_id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    parent_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_tag.id"))
+    book_id: Mapped[int] = mapped_column(ForeignKey("t_user_book.id"))
+    notes: Mapped[Optional[str]] = mapped_column(String)
+    enable: Mapped[bool] = mapped_column(Boolean, default=True)
+    canExpense: Mapped[bool] = mapped_column(Boolean, default=True)
+    canIncome: Mapped[bool] = mapped_column(Boolean, default=True)
+    canTransfer: Mapped[bool] = mapped_column(Boolean, default=True)
+    sort: Mapped[Optional[int]] = mapped_column(Integer)
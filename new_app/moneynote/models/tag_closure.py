@@ -0,0 +1,17 @@
+from sqlalchemy import ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class TagClosure(Base):
+    """The hierarchy index of the tags, maintained by crud_tag, as CategoryClosure is of the categories."""
+    __tablename__ = "t_user_tag_closure"
+    __table_args__ = (
+        Index("ix_tag_closure_descendant", "descendant_id", "depth"),
+        {"sqlite_with_rowid": False},
+    )
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("t_user_tag.id"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("t_user_tag.id"), primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer)
@@ -0,0 +1,23 @@
+from typing import Optional
+
+from sqlalchemy import Float, ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class TagRelation(Base):
+    """The part of a balance flow's amount booked against one tag."""
+    __tablename__ = "t_user_tag_relation"
+    __table_args__ = (
+        # Joined from a flow: the tag and amounts come from the index alone
+        Index("ix_tag_relation_flow_cover", "balanceFlow_id", "tag_id", "amount", "convertedAmount"),
+        # The flows of a tag
+        Index("ix_tag_relation_tag_flow", "tag_id", "balanceFlow_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tag_id: Mapped[int] = mapped_column(ForeignKey("t_user_tag.id"))
+    balanceFlow_id: Mapped[int] = mapped_column(ForeignKey("t_user_balance_flow.id"))
+    amount: Mapped[float] = mapped_column(Float, default=0)
+    convertedAmount: Mapped[Optional[float]] = mapped_column(Float)
@@ -0,0 +1,23 @@
+from typing import Optional
+
+from sqlalchemy import Boolean, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class User(Base):
+    __tablename__ = "t_user_user"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    username: Mapped[Optional[str]] = mapped_column(String)
+    nickName: Mapped[Optional[str]] = mapped_column(String)
+    password: Mapped[Optional[str]] = mapped_column(String)
+    telephone: Mapped[Optional[str]] = mapped_column(String)
+    email: Mapped[Optional[str]] = mapped_column(String)
+    registerIp: Mapped[Optional[str]] = mapped_column(String)
+    defaultGroup_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_group.id", use_alter=True))
+    defaultBook_id: Mapped[Optional[int]] = mapped_column(ForeignKey("t_user_book.id", use_alter=True))
+    enable: Mapped[bool] = mapped_column(Boolean, default=True)
+    registerTime: Mapped[Optional[int]] = mapped_column(Integer)
+    headimgurl: Mapped[Optional[str]] = mapped_column(String)
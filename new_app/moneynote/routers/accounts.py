@@ -0,0 +1,136 @@
+import time
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud import crud_account, crud_balance_flow
+from ..models import Account as AccountModel
+from ..models import BalanceFlow, Group, User
+from ..models.balance_flow import FLOW_TYPE_ADJUST
+from ..schemas.account import Account, AdjustBalanceAddForm, AdjustBalanceUpdateForm
+from ..schemas.page import Page
+from ..services.account_service import convert_balances
+from ..services.currency_index import UnknownCurrencyError
+from .deps import PageParams, get_current_db_user, get_db, get_page_params, require_book
+
+router = APIRouter(
+    prefix="/accounts",
+    tags=["accounts"],
+)
+
+
+async def _require_account(db: AsyncSession, user: User, account_id: int) -> AccountModel:
+    # The accounts of the user's current group, as in the legacy API
+    account = await db.get(AccountModel, account_id)
+    if account is None or account.group_id != user.defaultGroup_id:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return account
+
+
+async def _group_currency_code(db: AsyncSession, user: User) -> Optional[str]:
+    group = await db.get(Group, user.defaultGroup_id) if user.defaultGroup_id is not None else None
+    return group.defaultCurrencyCode if group is not None else None
+
+
+def _convert(accounts, currency_code: Optional[str], attribute: str = "balance") -> List[float]:
+    try:
+        return convert_balances(accounts, currency_code, attribute)
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown currency: {e.codes[0]}")
+
+@router.get("", response_model=Page[Account])
+async def query_accounts(
+    type: Optional[int] = None,
+    enable: Optional[bool] = None,
+    name: Optional[str] = None,
+    page_params: PageParams = Depends(get_page_params),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    # The accounts of the user's current group, as in the legacy API
+    query = crud_account.select_accounts(user.defaultGroup_id, account_type=type, enable=enable, name=name)
+    return await page_params.fetch(db, query, crud_account.ACCOUNT_ORDER, Account)
+
+@router.get("/overview", response_model=List[float])
+async def get_accounts_overview(
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """[assets, debts, net worth] of the enabled and included accounts, in the group's currency."""
+    currency_code = await _group_currency_code(db, user)
+    assets = await crud_account.get_group_accounts(db, user.defaultGroup_id, crud_account.ASSET_ACCOUNT_TYPES)
+    debts = await crud_account.get_group_accounts(db, user.defaultGroup_id, crud_account.DEBT_ACCOUNT_TYPES)
+    asset_balance = sum(_convert(assets, currency_code))
+    # Debt balances are negative, the overview shows what is owed as a positive amount
+    debt_balance = -sum(_convert(debts, currency_code))
+    return [asset_balance, debt_balance, asset_balance - debt_balance]
+
+@router.get("/statistics", response_model=List[float])
+async def get_accounts_statistics(
+    type: Optional[int] = None,
+    enable: Optional[bool] = None,
+    name: Optional[str] = None,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """[balance, credit limit, balance + credit limit] of the matching accounts, in the group's currency."""
+    currency_code = await _group_currency_code(db, user)
+    query = crud_account.select_accounts(user.defaultGroup_id, account_type=type, enable=enable, name=name)
+    accounts = (await db.scalars(query)).all()
+    balance = sum(_convert(accounts, currency_code))
+    credit_limit = sum(_convert(accounts, currency_code, "creditLimit"))
+    return [balance, credit_limit, credit_limit + balance]
+
+@router.post("/{id}/adjust")
+async def adjust_account_balance(
+    id: int,
+    form: AdjustBalanceAddForm,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    account = await _require_account(db, user, id)
+    book_id = form.book if form.book is not None else user.defaultBook_id
+    if book_id is None:
+        raise HTTPException(status_code=400, detail="book is required")
+    book = await require_book(db, user, book_id)
+    adjust_amount = form.balance - account.balance
+    if adjust_amount == 0:
+        raise HTTPException(status_code=400, detail="The balance is the same")
+    # Confirmed, so creating the flow moves the balance by its amount
+    flow = BalanceFlow(
+        type=FLOW_TYPE_ADJUST,
+        book_id=book.id,
+        group_id=account.group_id,
+        creator_id=user.id,
+        account_id=account.id,
+        amount=adjust_amount,
+        convertedAmount=adjust_amount,
+        title=form.title,
+        notes=form.notes,
+        createTime=form.createTime,
+        confirm=True,
+        include=True,
+        insertAt=int(time.time() * 1000),
+    )
+    await crud_balance_flow.create_flow(db, flow)
+    await db.commit()
+    return True
+
+@router.put("/{id}/adjust")
+async def update_adjust_balance(
+    id: int,
+    form: AdjustBalanceUpdateForm,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Updates the adjustment flow with this id."""
+    flow = await crud_balance_flow.get_user_flow(db, user.id, id)
+    if flow is None or flow.type != FLOW_TYPE_ADJUST:
+        raise HTTPException(status_code=404, detail="Balance flow not found")
+    changes = {"createTime": form.createTime, "title": form.title, "notes": form.notes}
+    if form.book is not None:
+        changes["book_id"] = (await require_book(db, user, form.book)).id
+    await crud_balance_flow.update_flow(db, flow, changes)
+    await db.commit()
+    return True
@@ -0,0 +1,384 @@
+import asyncio
+import io
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+
+from ..crud import crud_balance_flow, crud_flow_file
+from ..models import Account, Book, Category, CategoryRelation, FlowFile, Payee, Tag, TagRelation, User
+from ..models import BalanceFlow as BalanceFlowModel
+from ..models.balance_flow import FLOW_TYPE_ADJUST, FLOW_TYPE_EXPENSE, FLOW_TYPE_INCOME, FLOW_TYPE_TRANSFER
+from ..schemas.balance_flow import (BalanceFlow, BalanceFlowAddForm, BalanceFlowDetails, BalanceFlowUpdateForm,
+                                    FlowImportResult)
+from ..schemas.flow_file import FlowFile as FlowFileSchema
+from ..schemas.page import Page
+from ..services import import_service
+from ..services.gcs_service import BlobStore, get_blob_store, iter_chunks
+from .deps import PageParams, get_current_db_user, get_db, get_page_params, require_book
+
+router = APIRouter(
+    prefix="/balance-flows",
+    tags=["balance-flows"],
+)
+
+FLOW_TYPES = (FLOW_TYPE_EXPENSE, FLOW_TYPE_INCOME, FLOW_TYPE_TRANSFER, FLOW_TYPE_ADJUST)
+# The attachments the legacy API accepts
+FILE_CONTENT_TYPES = ("application/pdf", "image/png", "image/jpg", "image/jpeg")
+
+
+async def _require_flow(db: AsyncSession, user: User, flow_id: int) -> BalanceFlowModel:
+    flow = await crud_balance_flow.get_user_flow(db, user.id, flow_id)
+    if flow is None:
+        raise HTTPException(status_code=404, detail="Balance flow not found")
+    return flow
+
+
+async def _require_account(db: AsyncSession, book: Book, account_id: int) -> Account:
+    account = (await db.scalars(select(Account).where(Account.id == account_id, Account.group_id == book.group_id))).first()
+    if account is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return account
+
+
+async def _require_in_book(db: AsyncSession, model, book: Book, ids: Sequence[int], name: str):
+    """Checks that the categories, tags or payees with these ids belong to the book."""
+    unique_ids = set(ids)
+    count = (await db.execute(
+        select(func.count()).select_from(model).where(model.id.in_(unique_ids), model.book_id == book.id)
+    )).scalar_one()
+    if count != len(unique_ids):
+        raise HTTPException(status_code=404, detail=f"{name} not found")
+
+
+async def _build_flow(
+    db: AsyncSession, book: Book, form: BalanceFlowAddForm
+) -> Tuple[Dict, List[CategoryRelation], List[TagRelation]]:
+    """
+    Validates an add form against the book, and returns the flow's column values and its relations as the legacy
+    API computed them: amounts in the account's currency, converted amounts in the book's.
+    """
+    if form.type not in FLOW_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid type")
+    account = await _require_account(db, book, form.account) if form.account is not None else None
+    foreign_account = account is not None and account.currencyCode != book.defaultCurrencyCode
+    values = dict(
+        type=form.type,
+        title=form.title,
+        notes=form.notes,
+        createTime=form.createTime,
+        account_id=form.account,
+        to_id=None,
+        payee_id=None,
+        include=form.include,
+    )
+    category_relations = []
+    if form.type in (FLOW_TYPE_EXPENSE, FLOW_TYPE_INCOME):
+        if not form.categories:
+            raise HTTPException(status_code=400, detail="categories is required")
+        category_ids = [category.category for category in form.categories]
+        if len(set(category_ids)) != len(category_ids):
+            raise HTTPException(status_code=400, detail="categories are duplicated")
+        await _require_in_book(db, Category, book, category_ids, "Category")
+        if foreign_account and any(category.convertedAmount is None for category in form.categories):
+            raise HTTPException(status_code=400, detail="convertedAmount is required")
+        category_relations = [
+            CategoryRelation(
+                category_id=category.category,
+                amount=category.amount,
+                convertedAmount=category.convertedAmount if foreign_account else category.amount,
+            )
+            for category in form.categories
+        ]
+        values["amount"] = sum(relation.amount for relation in category_relations)
+        values["convertedAmount"] = sum(relation.convertedAmount for relation in category_relations)
+        if form.payee is not None:
+            await _require_in_book(db, Payee, book, [form.payee], "Payee")
+            values["payee_id"] = form.payee
+    elif form.type == FLOW_TYPE_TRANSFER:
+        if account is None or form.to is None or form.amount is None:
+            raise HTTPException(status_code=400, detail="account, to and amount are required")
+        to_account = await _require_account(db, book, form.to)
+        if to_account.currencyCode != account.currencyCode and form.convertedAmount is None:
+            raise HTTPException(status_code=400, detail="convertedAmount is required")
+        values["to_id"] = to_account.id
+        values["amount"] = form.amount
+        values["convertedAmount"] = form.amount if to_account.currencyCode == account.currencyCode else form.convertedAmount
+    else:
+        if form.amount is None:
+            raise HTTPException(status_code=400, detail="amount is required")
+        values["amount"] = form.amount
+        values["convertedAmount"] = form.convertedAmount if form.convertedAmount is not None else form.amount
+
+    tag_relations = []
+    if form.tags:
+        await _require_in_book(db, Tag, book, form.tags, "Tag")
+        tag_relations = [
+            TagRelation(
+                tag_id=tag_id,
+                amount=values["amount"],
+                convertedAmount=values["convertedAmount"] if foreign_account else values["amount"],
+            )
+            for tag_id in dict.fromkeys(form.tags)
+        ]
+    return values, category_relations, tag_relations
+
+
+async def _flow_details(db: AsyncSession, flow: BalanceFlowModel) -> BalanceFlowDetails:
+    categories, tags = await crud_balance_flow.get_flow_relations(db, flow.id)
+    return BalanceFlowDetails(
+        **BalanceFlow.model_validate(flow).model_dump(),
+        categories=[
+            {"category_id": relation.category_id, "amount": relation.amount, "convertedAmount": relation.convertedAmount}
+            for relation in categories
+        ],
+        tags=[relation.tag_id for relation in tags],
+    )
+
+
+@router.get("", response_model=Page[BalanceFlow])
+async def query_balance_flows(
+    book: Optional[int] = None,
+    type: Optional[int] = None,
+    title: Optional[str] = None,
+    minAmount: Optional[float] = None,
+    maxAmount: Optional[float] = None,
+    minTime: Optional[int] = None,
+    maxTime: Optional[int] = None,
+    account: Optional[int] = None,
+    payees: Optional[List[int]] = Query(None),
+    categories: Optional[List[int]] = Query(None),
+    tags: Optional[List[int]] = Query(None),
+    confirm: Optional[bool] = None,
+    include: Optional[bool] = None,
+    toId: Optional[int] = None,
+    notes: Optional[str] = None,
+    hasFile: Optional[bool] = None,
+    page_params: PageParams = Depends(get_page_params),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    book_id = book if book is not None else user.defaultBook_id
+    if book_id is None:
+        raise HTTPException(status_code=400, detail="book is required")
+    await require_book(db, user, book_id)
+    query = crud_balance_flow.select_flows(
+        book_id,
+        min_time=minTime,
+        max_time=maxTime,
+        flow_type=type,
+        category_ids=categories,
+        tag_ids=tags,
+        account_id=account,
+        to_id=toId,
+        payee_ids=payees,
+        confirm=confirm,
+        include=include,
+        min_amount=minAmount,
+        max_amount=maxAmount,
+        title=title,
+        notes=notes,
+        has_file=hasFile,
+    )
+    return await page_params.fetch(db, query, crud_balance_flow.FLOW_ORDER, BalanceFlow)
+
+@router.get("/statistics", response_model=List[float])
+async def get_balance_flow_statistics(
+    book: Optional[int] = None,
+    title: Optional[str] = None,
+    minAmount: Optional[float] = None,
+    maxAmount: Optional[float] = None,
+    minTime: Optional[int] = None,
+    maxTime: Optional[int] = None,
+    account: Optional[int] = None,
+    payees: Optional[List[int]] = Query(None),
+    categories: Optional[List[int]] = Query(None),
+    tags: Optional[List[int]] = Query(None),
+    toId: Optional[int] = None,
+    notes: Optional[str] = None,
+    hasFile: Optional[bool] = None,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    The converted [expense, income, surplus] of the confirmed and included flows. Without filters other than the
+    time range it is read from the daily rollup.
+    """
+    book_id = book if book is not None else user.defaultBook_id
+    if book_id is None:
+        raise HTTPException(status_code=400, detail="book is required")
+    await require_book(db, user, book_id)
+    filters = dict(
+        category_ids=categories,
+        tag_ids=tags,
+        account_id=account,
+        to_id=toId,
+        payee_ids=payees,
+        min_amount=minAmount,
+        max_amount=maxAmount,
+        title=title,
+        notes=notes,
+        has_file=hasFile,
+    )
+    statistics = await crud_balance_flow.get_statistics(
+        db, book_id, minTime, maxTime, **{name: value for name, value in filters.items() if value is not None}
+    )
+    return [statistics["expense"], statistics["income"], statistics["surplus"]]
+
+@router.post("", response_model=BalanceFlow)
+async def add_balance_flow(
+    form: BalanceFlowAddForm,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    book_id = form.book if form.book is not None else user.defaultBook_id
+    if book_id is None:
+        raise HTTPException(status_code=400, detail="book is required")
+    book = await require_book(db, user, book_id)
+    values, category_relations, tag_relations = await _build_flow(db, book, form)
+    flow = BalanceFlowModel(
+        **values,
+        book_id=book.id,
+        group_id=book.group_id,
+        creator_id=user.id,
+        confirm=form.confirm,
+        insertAt=int(time.time() * 1000),
+    )
+    await crud_balance_flow.create_flow(db, flow, category_relations, tag_relations)
+    await db.commit()
+    return flow
+
+@router.post("/import", response_model=FlowImportResult)
+async def import_balance_flows(
+    file: UploadFile,
+    book: Optional[int] = None,
+    format: Optional[str] = None,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Adds the flows of a CSV or JSON file (an array or JSON Lines) to a book, naming accounts, categories, tags and
+    payees rather than giving their ids. The format defaults to the file's extension. Valid rows are imported in
+    batches, each rejected row is reported with the reason.
+    """
+    book_id = book if book is not None else user.defaultBook_id
+    if book_id is None:
+        raise HTTPException(status_code=400, detail="book is required")
+    book = await require_book(db, user, book_id)
+    if format is None:
+        format = "json" if (file.filename or "").lower().endswith((".json", ".jsonl")) else "csv"
+    if format not in ("csv", "json"):
+        raise HTTPException(status_code=400, detail="format must be csv or json")
+    # utf-8-sig drops the BOM spreadsheets put in front of a CSV
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    result = await import_service.import_flows(
+        db, book, import_service.open_rows(text, format), settings.IMPORT_BATCH_SIZE, user.id
+    )
+    return FlowImportResult(
+        imported=result.imported, errors=[{"row": row, "error": error} for row, error in result.errors]
+    )
+
+@router.get("/{id}", response_model=BalanceFlowDetails)
+async def get_balance_flow(
+    id: int,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await _flow_details(db, await _require_flow(db, user, id))
+
+@router.put("/{id}", response_model=BalanceFlow)
+async def update_balance_flow(
+    id: int,
+    form: BalanceFlowUpdateForm,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    flow = await _require_flow(db, user, id)
+    book = await db.get(Book, flow.book_id)
+    categories, tags = await crud_balance_flow.get_flow_relations(db, flow.id)
+    # As in the legacy API the book, type and confirm of a flow are kept, the rest is validated again as if added
+    current = BalanceFlowAddForm(
+        book=flow.book_id,
+        type=flow.type,
+        title=flow.title,
+        createTime=flow.createTime,
+        account=flow.account_id,
+        categories=[
+            {"category": relation.category_id, "amount": relation.amount, "convertedAmount": relation.convertedAmount}
+            for relation in categories
+        ],
+        payee=flow.payee_id,
+        tags=[relation.tag_id for relation in tags],
+        to=flow.to_id,
+        amount=flow.amount,
+        convertedAmount=flow.convertedAmount,
+        notes=flow.notes,
+        confirm=flow.confirm,
+        include=flow.include,
+    )
+    merged = BalanceFlowAddForm.model_validate({**current.model_dump(), **form.model_dump(exclude_unset=True)})
+    values, category_relations, tag_relations = await _build_flow(db, book, merged)
+    await crud_balance_flow.update_flow(db, flow, values, category_relations, tag_relations)
+    await db.commit()
+    return flow
+
+@router.delete("/{id}")
+async def delete_balance_flow(
+    id: int,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    flow = await _require_flow(db, user, id)
+    await crud_balance_flow.delete_flow(db, flow)
+    await db.commit()
+    return True
+
+@router.patch("/{id}/confirm", response_model=BalanceFlow)
+async def confirm_balance_flow(
+    id: int,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    flow = await _require_flow(db, user, id)
+    await crud_balance_flow.confirm_flow(db, flow)
+    await db.commit()
+    return flow
+
+@router.post("/{id}/addFile", response_model=FlowFileSchema)
+async def add_balance_flow_file(
+    id: int,
+    file: UploadFile,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+    store: BlobStore = Depends(get_blob_store),
+):
+    """Stores an attachment in the blob store, streamed from the spooled upload in chunks."""
+    flow = await _require_flow(db, user, id)
+    if file.content_type not in FILE_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported file type")
+    blob = await asyncio.to_thread(store.put, iter_chunks(file.file, store.chunk_size))
+    flow_file = FlowFile(
+        blobKey=blob.key,
+        creator_id=user.id,
+        flow_id=flow.id,
+        createTime=int(time.time() * 1000),
+        contentType=file.content_type,
+        size=blob.size,
+        originalName=file.filename,
+    )
+    db.add(flow_file)
+    await db.commit()
+    return flow_file
+
+@router.get("/{id}/files", response_model=List[FlowFileSchema])
+async def get_balance_flow_files(
+    id: int,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    flow = await _require_flow(db, user, id)
+    return await crud_flow_file.get_flow_files(db, flow.id)
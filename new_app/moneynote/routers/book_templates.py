@@ -1,13 +1,14 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 
 from ..schemas.book_template import BookTemplate
-from ..services.data_loader import BOOK_TEMPLATES
+from ..services.data_loader import get_book_templates_payload
 from .deps import get_current_user
+from .responses import encoded_json_response
 
 router = APIRouter()
 
 @router.get("/all", response_model=List[BookTemplate], dependencies=[Depends(get_current_user)])
-async def get_all_book_templates():
-    return BOOK_TEMPLATES
\ No newline at end of file
+async def get_all_book_templates(request: Request):
+    return encoded_json_response(request, get_book_templates_payload())
@@ -0,0 +1,129 @@
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+
+from ..crud import crud_book
+from ..models import Account, BalanceFlow, User
+from ..models import Book as BookModel
+from ..schemas.book import Book, BookAddByBookForm, BookAddByTemplateForm, BookAddForm
+from ..services.book_service import add_template_items
+from ..services.currency_index import UnknownCurrencyError
+from ..services.data_loader import get_book_template, get_currency_index
+from ..services.export_service import EXPORT_WRITERS, stream_export
+from .deps import get_current_db_user, get_db, require_book
+
+router = APIRouter(
+    prefix="/books",
+    tags=["books"],
+)
+
+
+async def _add_book(db: AsyncSession, user: User, form: BookAddForm) -> BookModel:
+    """Adds a book to the user's current group, checked as the legacy API checked it."""
+    group_id = user.defaultGroup_id
+    if group_id is None:
+        raise HTTPException(status_code=400, detail="group is required")
+    if await crud_book.book_name_exists(db, group_id, form.name):
+        raise HTTPException(status_code=400, detail="Book name already exists")
+    try:
+        get_currency_index().position(form.defaultCurrencyCode)
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown currency: {e.codes[0]}")
+    account_ids = {
+        account_id
+        for account_id in (
+            form.defaultExpenseAccountId,
+            form.defaultIncomeAccountId,
+            form.defaultTransferFromAccountId,
+            form.defaultTransferToAccountId,
+        )
+        if account_id is not None
+    }
+    if account_ids:
+        found = await db.scalars(select(Account.id).where(Account.id.in_(account_ids), Account.group_id == group_id))
+        if set(found) != account_ids:
+            raise HTTPException(status_code=404, detail="Account not found")
+    book = BookModel(
+        name=form.name,
+        group_id=group_id,
+        notes=form.notes,
+        enable=True,
+        defaultExpenseAccount_id=form.defaultExpenseAccountId,
+        defaultIncomeAccount_id=form.defaultIncomeAccountId,
+        defaultTransferFromAccount_id=form.defaultTransferFromAccountId,
+        defaultTransferToAccount_id=form.defaultTransferToAccountId,
+        defaultCurrencyCode=form.defaultCurrencyCode,
+        sort=form.sort,
+    )
+    db.add(book)
+    await db.flush()
+    return book
+
+@router.post("/template", response_model=Book)
+async def add_book_by_template(
+    form: BookAddByTemplateForm,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Adds a book with the categories, tags and payees of a book template, in one transaction."""
+    template = get_book_template(form.templateId)
+    if template is None:
+        raise HTTPException(status_code=404, detail="Book template not found")
+    book = await _add_book(db, user, form.book)
+    if book.notes is None:
+        book.notes = template.description
+    try:
+        await add_template_items(db, book.id, template)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    return book
+
+@router.post("/copy", response_model=Book)
+async def add_book_by_book(
+    form: BookAddByBookForm,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Adds a book with a copy of the categories, tags and payees of another book, in one transaction."""
+    source = await require_book(db, user, form.bookId)
+    book = await _add_book(db, user, form.book)
+    await crud_book.copy_book_items(db, source.id, book.id)
+    await db.commit()
+    return book
+
+@router.get("/{id}/export")
+async def export_book(
+    id: int,
+    timeZoneOffset: int,
+    request: Request,
+    format: str = "xlsx",
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Streams the book's flows as an XLSX workbook, as the legacy API did, or as CSV. The X-Export-Rows header has
+    the number of flows the export holds, for clients to show progress against.
+    """
+    if format not in EXPORT_WRITERS:
+        raise HTTPException(status_code=400, detail="format must be csv or xlsx")
+    book = await require_book(db, user, id)
+    total = (await db.execute(select(func.count()).where(BalanceFlow.book_id == book.id))).scalar_one()
+    book.exportAt = int(time.time() * 1000)
+    await db.commit()
+    writer = EXPORT_WRITERS[format]()
+    return StreamingResponse(
+        stream_export(
+            db, book.id, writer, timeZoneOffset, settings.EXPORT_BATCH_SIZE, total, request.is_disconnected
+        ),
+        media_type=writer.media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename=book.{writer.extension}",
+            "X-Export-Rows": str(total),
+        },
+    )
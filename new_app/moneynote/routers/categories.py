@@ -0,0 +1,138 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud import crud_book, crud_category
+from ..models import Book, CategoryRelation, User
+from ..models import Category as CategoryModel
+from ..models.category import CATEGORY_TYPE_EXPENSE, CATEGORY_TYPE_INCOME
+from ..schemas.category import Category, CategoryAddForm, CategoryTreeNode, CategoryUpdateForm
+from ..schemas.page import Page
+from ..services.tree_service import build_tree
+from .deps import PageParams, get_current_db_user, get_db, get_page_params, require_book
+
+router = APIRouter(
+    prefix="/categories",
+    tags=["categories"],
+)
+
+
+async def _require_category(db: AsyncSession, user: User, category_id: int) -> CategoryModel:
+    category = await db.get(CategoryModel, category_id)
+    if category is None or await crud_book.get_user_book(db, user.id, category.book_id) is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return category
+
+
+async def _check_parent(db: AsyncSession, book_id: int, category_type: int, parent_id: int, height: int = 0):
+    """A parent must be of the same book and type, and shallow enough for the subtree height levels below it."""
+    parent = await db.get(CategoryModel, parent_id)
+    if parent is None or parent.book_id != book_id or parent.type != category_type:
+        raise HTTPException(status_code=404, detail="Category not found")
+    level = await crud_category.get_tree_level(db, CategoryModel, parent.id)
+    if level + 1 + height >= crud_category.TREE_MAX_LEVEL:
+        raise HTTPException(status_code=400, detail="Categories are nested too deep")
+
+@router.get("", response_model=Page[Category])
+async def query_categories(
+    bookId: int,
+    type: Optional[int] = None,
+    enable: Optional[bool] = None,
+    name: Optional[str] = None,
+    page_params: PageParams = Depends(get_page_params),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    await require_book(db, user, bookId)
+    query = crud_category.select_categories(bookId, category_type=type, enable=enable, name=name)
+    return await page_params.fetch(db, query, crud_category.CATEGORY_ORDER, Category)
+
+@router.get("/tree", response_model=List[CategoryTreeNode])
+async def get_category_tree(
+    bookId: int,
+    type: Optional[int] = None,
+    enable: Optional[bool] = None,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """The book's categories nested under their parents, read in one query."""
+    await require_book(db, user, bookId)
+    query = crud_category.select_tree(CategoryModel, bookId)
+    if type is not None:
+        query = query.where(CategoryModel.type == type)
+    if enable is not None:
+        query = query.where(CategoryModel.enable.is_(enable))
+    return build_tree(await db.execute(query), CategoryTreeNode)
+
+@router.post("", response_model=Category)
+async def add_category(
+    form: CategoryAddForm,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    book_id = form.book if form.book is not None else user.defaultBook_id
+    if book_id is None:
+        raise HTTPException(status_code=400, detail="book is required")
+    book = await require_book(db, user, book_id)
+    if form.type not in (CATEGORY_TYPE_EXPENSE, CATEGORY_TYPE_INCOME):
+        raise HTTPException(status_code=400, detail="Invalid type")
+    if form.pId is not None:
+        await _check_parent(db, book.id, form.type, form.pId)
+    if await crud_category.category_name_exists(db, book.id, form.pId, form.type, form.name):
+        raise HTTPException(status_code=400, detail="Category name already exists")
+    category = CategoryModel(
+        book_id=book.id,
+        type=form.type,
+        name=form.name,
+        notes=form.notes,
+        parent_id=form.pId,
+        sort=form.sort,
+        enable=True,
+    )
+    await crud_category.create_category(db, category)
+    await db.commit()
+    return category
+
+@router.put("/{id}", response_model=Category)
+async def update_category(
+    id: int,
+    form: CategoryUpdateForm,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Updates a category, moving it and its subtree if pId changes."""
+    category = await _require_category(db, user, id)
+    if form.pId is not None and form.pId != category.parent_id:
+        if await crud_category.is_in_subtree(db, CategoryModel, form.pId, category.id):
+            raise HTTPException(status_code=400, detail="A category cannot be moved under itself")
+        height = await crud_category.get_subtree_height(db, CategoryModel, category.id)
+        await _check_parent(db, category.book_id, category.type, form.pId, height)
+    name = form.name or category.name
+    if await crud_category.category_name_exists(db, category.book_id, form.pId, category.type, name, category.id):
+        raise HTTPException(status_code=400, detail="Category name already exists")
+    await crud_category.move_category(db, category, form.pId)
+    category.name = name
+    category.notes = form.notes
+    category.sort = form.sort
+    await db.commit()
+    return category
+
+@router.delete("/{id}")
+async def delete_category(
+    id: int,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Deletes a category no flow is booked on, its children becoming roots."""
+    category = await _require_category(db, user, id)
+    relation = await db.execute(select(CategoryRelation.id).where(CategoryRelation.category_id == category.id).limit(1))
+    if relation.first() is not None:
+        raise HTTPException(status_code=400, detail="Category has flows")
+    book = await db.get(Book, category.book_id)
+    if category.id in (book.defaultExpenseCategory_id, book.defaultIncomeCategory_id):
+        raise HTTPException(status_code=400, detail="Category is a default of its book")
+    await crud_category.delete_category(db, category)
+    await db.commit()
+    return True
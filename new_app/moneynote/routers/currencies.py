@@ -1,16 +1,52 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
-from ..schemas.currency import Currency
-from ..services.data_loader import CURRENCIES
+from ..schemas.currency import Currency, CurrencyBatchCalcForm, CurrencyBatchCalcResult
+from ..services.currency_index import UnknownCurrencyError
+from ..services.data_loader import get_currencies_payload, get_currency_index
 from .deps import get_current_user
+from .responses import encoded_json_response
 
 router = APIRouter(
     prefix="/currencies",
     tags=["currencies"],
 )
 
+def _unknown_currency(e: UnknownCurrencyError) -> HTTPException:
+    return HTTPException(status_code=404, detail=f"Unknown currency: {', '.join(e.codes)}")
+
 @router.get("/all", response_model=List[Currency])
-async def get_all_currencies(current_user: dict = Depends(get_current_user)):
-    return CURRENCIES
\ No newline at end of file
+async def get_all_currencies(request: Request, current_user: dict = Depends(get_current_user)):
+    return encoded_json_response(request, get_currencies_payload())
+
+@router.get("/rate", response_model=float)
+async def get_rate(
+    from_code: str = Query(alias="from"),
+    to_code: str = Query(alias="to"),
+    current_user: dict = Depends(get_current_user),
+):
+    try:
+        return get_currency_index().rate(from_code, to_code)
+    except UnknownCurrencyError as e:
+        raise _unknown_currency(e)
+
+@router.get("/calc", response_model=float)
+async def calc(
+    amount: float,
+    from_code: str = Query(alias="from"),
+    to_code: str = Query(alias="to"),
+    current_user: dict = Depends(get_current_user),
+):
+    try:
+        return float(get_currency_index().convert([amount], [from_code], [to_code])[0])
+    except UnknownCurrencyError as e:
+        raise _unknown_currency(e)
+
+@router.post("/calc/batch", response_model=CurrencyBatchCalcResult)
+async def calc_batch(form: CurrencyBatchCalcForm, current_user: dict = Depends(get_current_user)):
+    try:
+        converted = get_currency_index().convert(form.amounts, form.from_codes, form.to_codes)
+    except UnknownCurrencyError as e:
+        raise _unknown_currency(e)
+    return CurrencyBatchCalcResult(amounts=converted.tolist())
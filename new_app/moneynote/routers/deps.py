@@ -1,7 +1,69 @@
-from fastapi import Depends
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
 
+from fastapi import Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import get_session
+
+from ..crud.crud_book import get_user_book
+from ..crud.crud_user import get_or_create_user
+from ..crud.pagination import InvalidCursorError, KeysetOrder, paginate
+from ..models import Book, User
+from ..schemas.page import Page
 from ..security import get_user_identity_from_token, oauth2_scheme
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
     return get_user_identity_from_token(token)
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """A database session for the duration of the request."""
+    async for session in get_session():
+        yield session
+
+
+async def get_current_db_user(
+    current_user: str = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+) -> User:
+    """The user record of the token's sub claim, created on its first request."""
+    return await get_or_create_user(db, current_user)
+
+
+async def require_book(db: AsyncSession, user: User, book_id: int) -> Book:
+    """Returns a book the user can access, 404 otherwise."""
+    book = await get_user_book(db, user.id, book_id)
+    if book is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return book
+
+
+@dataclass(frozen=True)
+class PageParams:
+    """
+    The paging query parameters of the list endpoints. page selects offset mode as in the legacy API, cursor
+    (the nextCursor of the previous page, empty for the first page) keyset mode, whose pages cost the same at
+    any depth.
+    """
+    page: int
+    size: int
+    cursor: Optional[str]
+
+    async def fetch(self, db: AsyncSession, query: Select, order: KeysetOrder, item_schema: type[BaseModel]) -> Page:
+        try:
+            result = await paginate(db, query, order, self.size, page=self.page, cursor=self.cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return Page.from_result(result, item_schema)
+
+
+def get_page_params(
+    page: int = Query(0, ge=0),
+    size: int = Query(20, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+) -> PageParams:
+    return PageParams(page=page, size=size, cursor=cursor)
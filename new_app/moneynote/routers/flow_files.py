@@ -0,0 +1,73 @@
+import asyncio
+import functools
+import hashlib
+import urllib.parse
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud import crud_balance_flow, crud_flow_file
+from ..models import User
+from ..services.gcs_service import BlobNotFoundError, BlobStore, get_blob_store
+from .deps import get_current_db_user, get_db
+from .responses import ranged_response
+
+router = APIRouter()
+
+
+def _content_disposition(filename: Optional[str]) -> str:
+    if not filename:
+        return "inline"
+    return f"inline; filename*=UTF-8''{urllib.parse.quote(filename, safe='')}"
+
+
+def _bytes_range(data: bytes):
+    def open_range(start: int, end: Optional[int]) -> Iterator[bytes]:
+        yield data[start:None if end is None else end + 1]
+    return open_range
+
+
+@router.get("/view")
+async def view_flow_file(
+    id: int,
+    createTime: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    store: BlobStore = Depends(get_blob_store),
+):
+    """
+    Streams a file's bytes. As in the legacy API the link needs no token, the file's createTime standing in for
+    one; Range and conditional requests let clients resume and revalidate downloads.
+    """
+    flow_file = await crud_flow_file.get_flow_file(db, id, createTime)
+    if flow_file is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    headers = {"Content-Disposition": _content_disposition(flow_file.originalName)}
+    last_modified = flow_file.createTime // 1000 if flow_file.createTime is not None else None
+    if flow_file.blobKey is None:
+        # Stored before the blob store, and not moved out yet
+        data = flow_file.data or b""
+        return ranged_response(
+            request, _bytes_range(data), len(data), f'"{hashlib.sha256(data).hexdigest()}"',
+            last_modified, flow_file.contentType, headers,
+        )
+    try:
+        # Checked up front so that a missing blob is a 404 rather than a broken stream
+        size = await asyncio.to_thread(store.size, flow_file.blobKey)
+    except BlobNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    return ranged_response(request, functools.partial(store.open_range, flow_file.blobKey), size, f'"{flow_file.blobKey}"', last_modified, flow_file.contentType, headers)
+
+@router.delete("/{id}")
+async def delete_flow_file(
+    id: int,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    flow_file = await crud_flow_file.get_flow_file(db, id)
+    if flow_file is None or await crud_balance_flow.get_user_flow(db, user.id, flow_file.flow_id) is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    await crud_flow_file.delete_flow_file(db, flow_file)
+    await db.commit()
+    return True
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud import crud_note_day
+from ..models import User
+from ..schemas.note_day import NoteDay
+from ..schemas.page import Page
+from .deps import PageParams, get_current_db_user, get_db, get_page_params
+
+router = APIRouter(
+    prefix="/note-days",
+    tags=["note-days"],
+)
+
+@router.get("", response_model=Page[NoteDay])
+async def query_note_days(
+    title: Optional[str] = None,
+    page_params: PageParams = Depends(get_page_params),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    query = crud_note_day.select_note_days(user.id, title=title)
+    return await page_params.fetch(db, query, crud_note_day.NOTE_DAY_ORDER, NoteDay)
@@ -0,0 +1,30 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud import crud_payee
+from ..models import User
+from ..schemas.page import Page
+from ..schemas.payee import Payee
+from .deps import PageParams, get_current_db_user, get_db, get_page_params, require_book
+
+router = APIRouter(
+    prefix="/payees",
+    tags=["payees"],
+)
+
+@router.get("", response_model=Page[Payee])
+async def query_payees(
+    bookId: int,
+    enable: Optional[bool] = None,
+    canExpense: Optional[bool] = None,
+    canIncome: Optional[bool] = None,
+    name: Optional[str] = None,
+    page_params: PageParams = Depends(get_page_params),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    await require_book(db, user, bookId)
+    query = crud_payee.select_payees(bookId, enable=enable, can_expense=canExpense, can_income=canIncome, name=name)
+    return await page_params.fetch(db, query, crud_payee.PAYEE_ORDER, Payee)
@@ -0,0 +1,174 @@
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud import crud_account, crud_balance_flow
+from ..models import Category, Group, Payee, Tag, User
+from ..models.balance_flow import FLOW_TYPE_EXPENSE, FLOW_TYPE_INCOME
+from ..models.category import CATEGORY_TYPE_EXPENSE, CATEGORY_TYPE_INCOME
+from ..models.daily_rollup import ROLLUP_DIMENSION_CATEGORY, ROLLUP_DIMENSION_PAYEE, ROLLUP_DIMENSION_TAG
+from ..schemas.report import ChartVO
+from ..services.account_service import convert_balances
+from ..services.currency_index import UnknownCurrencyError
+from ..services.report_service import build_chart, build_tree_chart
+from .deps import get_current_db_user, get_db, require_book
+
+router = APIRouter()
+
+
+class ReportQuery:
+    """
+    The query parameters of the reports. The time range alone is answered from the daily rollup, any other filter
+    sums the matching flows instead.
+    """
+
+    def __init__(
+        self,
+        book: Optional[int] = None,
+        minTime: Optional[int] = None,
+        maxTime: Optional[int] = None,
+        title: Optional[str] = None,
+        account: Optional[int] = None,
+        payees: Optional[List[int]] = Query(None),
+        categories: Optional[List[int]] = Query(None),
+        tags: Optional[List[int]] = Query(None),
+    ):
+        self.book = book
+        self.min_time = minTime
+        self.max_time = maxTime
+        self.title = title
+        self.account = account
+        self.payees = payees
+        self.categories = categories
+        self.tags = tags
+
+    async def require_book(self, db: AsyncSession, user: User) -> int:
+        """The id of the report's book, the user's default book if not given."""
+        book_id = self.book if self.book is not None else user.defaultBook_id
+        if book_id is None:
+            raise HTTPException(status_code=400, detail="book is required")
+        await require_book(db, user, book_id)
+        return book_id
+
+    async def sums(
+        self, db: AsyncSession, book_id: int, dimension: int, flow_type: int, rolled_up: bool = False
+    ) -> Dict[int, float]:
+        """
+        The converted amount per category, tag or payee id, the report's own dimension not filtering flows. Rolled
+        up, a category's or tag's amount also sums its subtree, see crud_balance_flow.get_tree_sums.
+        """
+        filters = dict(title=self.title, account_id=self.account)
+        if dimension != ROLLUP_DIMENSION_PAYEE:
+            filters["payee_ids"] = self.payees
+        if dimension != ROLLUP_DIMENSION_CATEGORY:
+            filters["category_ids"] = self.categories
+        if dimension != ROLLUP_DIMENSION_TAG:
+            filters["tag_ids"] = self.tags
+        get_sums = crud_balance_flow.get_tree_sums if rolled_up else crud_balance_flow.get_dimension_sums
+        sums = await get_sums(
+            db,
+            book_id,
+            dimension,
+            flow_type,
+            self.min_time,
+            self.max_time,
+            **{name: value for name, value in filters.items() if value},
+        )
+        return {dimension_id: converted_amount for dimension_id, (_, converted_amount) in sums.items()}
+
+
+async def _category_report(db: AsyncSession, user: User, query: ReportQuery, flow_type: int, category_type: int):
+    book_id = await query.require_book(db, user)
+    sums = await query.sums(db, book_id, ROLLUP_DIMENSION_CATEGORY, flow_type, rolled_up=True)
+    categories = (await db.scalars(
+        select(Category).where(Category.book_id == book_id, Category.type == category_type)
+    )).all()
+    return build_tree_chart(categories, sums, query.categories)
+
+
+async def _tag_report(db: AsyncSession, user: User, query: ReportQuery, flow_type: int):
+    book_id = await query.require_book(db, user)
+    sums = await query.sums(db, book_id, ROLLUP_DIMENSION_TAG, flow_type, rolled_up=True)
+    tags = (await db.scalars(select(Tag).where(Tag.book_id == book_id))).all()
+    can_flow_type = "canExpense" if flow_type == FLOW_TYPE_EXPENSE else "canIncome"
+    charted_ids = {tag.id for tag in tags if tag.enable and getattr(tag, can_flow_type)}
+    return build_tree_chart(tags, sums, query.tags, charted_ids)
+
+
+async def _payee_report(db: AsyncSession, user: User, query: ReportQuery, flow_type: int):
+    book_id = await query.require_book(db, user)
+    sums = await query.sums(db, book_id, ROLLUP_DIMENSION_PAYEE, flow_type)
+    can_flow_type = Payee.canExpense if flow_type == FLOW_TYPE_EXPENSE else Payee.canIncome
+    payees_query = select(Payee).where(Payee.book_id == book_id, Payee.enable.is_(True), can_flow_type.is_(True))
+    if query.payees:
+        payees_query = payees_query.where(Payee.id.in_(query.payees))
+    payees = (await db.scalars(payees_query)).all()
+    return build_chart((payee.name, sums.get(payee.id, 0)) for payee in payees)
+
+@router.get("/expense-category", response_model=List[ChartVO])
+async def report_expense_category(
+    query: ReportQuery = Depends(),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await _category_report(db, user, query, FLOW_TYPE_EXPENSE, CATEGORY_TYPE_EXPENSE)
+
+@router.get("/income-category", response_model=List[ChartVO])
+async def report_income_category(
+    query: ReportQuery = Depends(),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await _category_report(db, user, query, FLOW_TYPE_INCOME, CATEGORY_TYPE_INCOME)
+
+@router.get("/expense-tag", response_model=List[ChartVO])
+async def report_expense_tag(
+    query: ReportQuery = Depends(),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await _tag_report(db, user, query, FLOW_TYPE_EXPENSE)
+
+@router.get("/income-tag", response_model=List[ChartVO])
+async def report_income_tag(
+    query: ReportQuery = Depends(),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await _tag_report(db, user, query, FLOW_TYPE_INCOME)
+
+@router.get("/expense-payee", response_model=List[ChartVO])
+async def report_expense_payee(
+    query: ReportQuery = Depends(),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await _payee_report(db, user, query, FLOW_TYPE_EXPENSE)
+
+@router.get("/income-payee", response_model=List[ChartVO])
+async def report_income_payee(
+    query: ReportQuery = Depends(),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await _payee_report(db, user, query, FLOW_TYPE_INCOME)
+
+@router.get("/balance", response_model=List[List[ChartVO]])
+async def report_balance(
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """[assets, debts] charts of the enabled and included accounts of the user's group, in the group's currency."""
+    group = await db.get(Group, user.defaultGroup_id) if user.defaultGroup_id is not None else None
+    currency_code = group.defaultCurrencyCode if group is not None else None
+    charts = []
+    for account_types, sign in ((crud_account.ASSET_ACCOUNT_TYPES, 1), (crud_account.DEBT_ACCOUNT_TYPES, -1)):
+        accounts = await crud_account.get_group_accounts(db, user.defaultGroup_id, account_types)
+        try:
+            balances = convert_balances(accounts, currency_code)
+        except UnknownCurrencyError as e:
+            raise HTTPException(status_code=400, detail=f"Unknown currency: {e.codes[0]}")
+        charts.append(build_chart((account.name, sign * balance) for account, balance in zip(accounts, balances)))
+    return charts
@@ -0,0 +1,151 @@
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from ..services.data_loader import EncodedPayload
+
+# Authenticated data, so only the client may cache it, and it has to revalidate with If-None-Match
+CACHE_CONTROL = "private, no-cache"
+# Content addressed by its hash never changes, so the client may keep it without revalidating
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Maps each coding in an Accept-Encoding header to its q-value."""
+    codings = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding.strip().lower()] = quality
+    return codings
+
+
+def _accepts(codings: Dict[str, float], coding: str) -> bool:
+    return codings.get(coding, codings.get("*", 0.0)) > 0
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def encoded_json_response(request: Request, payload: EncodedPayload) -> Response:
+    """
+    Serves a pre-encoded JSON payload: 304 if the client's If-None-Match has its ETag, otherwise the brotli,
+    gzip or plain body, whichever the client's Accept-Encoding prefers among the ones available.
+    """
+    headers = {"ETag": payload.etag, "Vary": "Accept-Encoding", "Cache-Control": CACHE_CONTROL}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+
+    codings = _parse_accept_encoding(request.headers.get("accept-encoding", ""))
+    if payload.brotli_body is not None and _accepts(codings, "br"):
+        body, headers["Content-Encoding"] = payload.brotli_body, "br"
+    elif _accepts(codings, "gzip"):
+        body, headers["Content-Encoding"] = payload.gzip_body, "gzip"
+    else:
+        body = payload.body
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class _UnsatisfiableRange(Exception):
+    pass
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    The first and last byte of a single bytes range, None if the header is not one, which is then ignored as
+    RFC 9110 allows. Raises _UnsatisfiableRange if the range starts past the end of the content.
+    """
+    unit, _, spec = header.partition("=")
+    first, dash, last = spec.strip().partition("-")
+    if unit.strip().lower() != "bytes" or not dash or not (first or last) or not (first + last).isdigit():
+        return None
+    if not first:
+        if int(last) == 0 or size == 0:
+            raise _UnsatisfiableRange()
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise _UnsatisfiableRange()
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def _parse_http_date(value: str) -> Optional[int]:
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[int]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and last_modified <= since
+    return False
+
+
+def _if_range_matches(if_range: str, etag: str, last_modified: Optional[int]) -> bool:
+    if if_range.startswith(("\"", "W/")):
+        # Strong comparison, as RFC 9110 requires for If-Range
+        return if_range == etag
+    return last_modified is not None and _parse_http_date(if_range) == last_modified
+
+
+def ranged_response(
+    request: Request,
+    open_range: Callable[[int, Optional[int]], Iterator[bytes]],
+    size: int,
+    etag: str,
+    last_modified: Optional[int] = None,
+    media_type: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Streams content of a known size from open_range(first byte, last byte), honouring conditional requests and a
+    single byte range: 304 if the client's If-None-Match or If-Modified-Since (last_modified is in seconds) says
+    its copy is current, 206 with the Range requested, unless an If-Range says the client's copy is stale, 416 if
+    the range is past the end, 200 otherwise.
+    """
+    headers = {**(headers or {}), "ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or _if_range_matches(if_range, etag, last_modified)):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except _UnsatisfiableRange:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(open_range(0, None), media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(open_range(start, end), status_code=206, media_type=media_type, headers=headers)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends
 
 from config import settings
 
+from ..security import token_cache
 from .deps import get_current_user
 
 router = APIRouter()
@@ -13,3 +14,7 @@ def get_version(current_user: str = Depends(get_current_user)):
 @router.get("/test3")
 def get_test3(current_user: str = Depends(get_current_user)):
     return {"base_url": settings.BASE_URL}
+
+@router.get("/token-cache")
+def get_token_cache(current_user: str = Depends(get_current_user)):
+    return token_cache.stats()
@@ -0,0 +1,138 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud import crud_book, crud_category, crud_tag
+from ..models import TagRelation, User
+from ..models import Tag as TagModel
+from ..schemas.page import Page
+from ..schemas.tag import Tag, TagAddForm, TagTreeNode, TagUpdateForm
+from ..services.tree_service import build_tree
+from .deps import PageParams, get_current_db_user, get_db, get_page_params, require_book
+
+router = APIRouter(
+    prefix="/tags",
+    tags=["tags"],
+)
+
+
+async def _require_tag(db: AsyncSession, user: User, tag_id: int) -> TagModel:
+    tag = await db.get(TagModel, tag_id)
+    if tag is None or await crud_book.get_user_book(db, user.id, tag.book_id) is None:
+        raise HTTPException(status_code=404, detail="Tag not found")
+    return tag
+
+
+async def _check_parent(db: AsyncSession, book_id: int, parent_id: int, height: int = 0):
+    """A parent must be of the same book, and shallow enough for the subtree height levels below it."""
+    parent = await db.get(TagModel, parent_id)
+    if parent is None or parent.book_id != book_id:
+        raise HTTPException(status_code=404, detail="Tag not found")
+    level = await crud_category.get_tree_level(db, TagModel, parent.id)
+    if level + 1 + height >= crud_category.TREE_MAX_LEVEL:
+        raise HTTPException(status_code=400, detail="Tags are nested too deep")
+
+@router.get("", response_model=Page[Tag])
+async def query_tags(
+    bookId: int,
+    enable: Optional[bool] = None,
+    canExpense: Optional[bool] = None,
+    canIncome: Optional[bool] = None,
+    canTransfer: Optional[bool] = None,
+    name: Optional[str] = None,
+    page_params: PageParams = Depends(get_page_params),
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    await require_book(db, user, bookId)
+    query = crud_tag.select_tags(
+        bookId, enable=enable, can_expense=canExpense, can_income=canIncome, can_transfer=canTransfer, name=name
+    )
+    return await page_params.fetch(db, query, crud_tag.TAG_ORDER, Tag)
+
+@router.get("/tree", response_model=List[TagTreeNode])
+async def get_tag_tree(
+    bookId: int,
+    enable: Optional[bool] = None,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """The book's tags nested under their parents, read in one query."""
+    await require_book(db, user, bookId)
+    query = crud_category.select_tree(TagModel, bookId)
+    if enable is not None:
+        query = query.where(TagModel.enable.is_(enable))
+    return build_tree(await db.execute(query), TagTreeNode)
+
+@router.post("", response_model=Tag)
+async def add_tag(
+    form: TagAddForm,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    book_id = form.book if form.book is not None else user.defaultBook_id
+    if book_id is None:
+        raise HTTPException(status_code=400, detail="book is required")
+    book = await require_book(db, user, book_id)
+    if form.pId is not None:
+        await _check_parent(db, book.id, form.pId)
+    if await crud_tag.tag_name_exists(db, book.id, form.pId, form.name):
+        raise HTTPException(status_code=400, detail="Tag name already exists")
+    tag = TagModel(
+        book_id=book.id,
+        name=form.name,
+        notes=form.notes,
+        parent_id=form.pId,
+        canExpense=form.canExpense,
+        canIncome=form.canIncome,
+        canTransfer=form.canTransfer,
+        sort=form.sort,
+        enable=True,
+    )
+    await crud_tag.create_tag(db, tag)
+    await db.commit()
+    return tag
+
+@router.put("/{id}", response_model=Tag)
+async def update_tag(
+    id: int,
+    form: TagUpdateForm,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Updates a tag, moving it and its subtree if pId changes."""
+    tag = await _require_tag(db, user, id)
+    if form.pId is not None and form.pId != tag.parent_id:
+        if await crud_category.is_in_subtree(db, TagModel, form.pId, tag.id):
+            raise HTTPException(status_code=400, detail="A tag cannot be moved under itself")
+        height = await crud_category.get_subtree_height(db, TagModel, tag.id)
+        await _check_parent(db, tag.book_id, form.pId, height)
+    name = form.name or tag.name
+    if await crud_tag.tag_name_exists(db, tag.book_id, form.pId, name, tag.id):
+        raise HTTPException(status_code=400, detail="Tag name already exists")
+    await crud_tag.move_tag(db, tag, form.pId)
+    tag.name = name
+    tag.notes = form.notes
+    tag.sort = form.sort
+    for flag in ("canExpense", "canIncome", "canTransfer"):
+        if getattr(form, flag) is not None:
+            setattr(tag, flag, getattr(form, flag))
+    await db.commit()
+    return tag
+
+@router.delete("/{id}")
+async def delete_tag(
+    id: int,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Deletes a tag no flow is tagged with, its children becoming roots."""
+    tag = await _require_tag(db, user, id)
+    relation = await db.execute(select(TagRelation.id).where(TagRelation.tag_id == tag.id).limit(1))
+    if relation.first() is not None:
+        raise HTTPException(status_code=400, detail="Tag has flows")
+    await crud_tag.delete_tag(db, tag)
+    await db.commit()
+    return True
@@ -0,0 +1,44 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Account(BaseModel):
+    """Schema for account data."""
+    id: int
+    name: str
+    type: int
+    notes: Optional[str] = None
+    enable: bool
+    no: Optional[str] = None
+    balance: float
+    include: bool
+    canExpense: bool
+    canIncome: bool
+    canTransferFrom: bool
+    canTransferTo: bool
+    currencyCode: str
+    initialBalance: float
+    creditLimit: Optional[float] = None
+    billDay: Optional[int] = None
+    apr: Optional[float] = None
+    sort: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AdjustBalanceAddForm(BaseModel):
+    """Schema for setting an account's balance, recorded as an adjustment flow of the difference."""
+    book: Optional[int] = None
+    createTime: int
+    title: Optional[str] = None
+    notes: Optional[str] = None
+    balance: float
+
+
+class AdjustBalanceUpdateForm(BaseModel):
+    """Schema for updating an adjustment flow, whose amount does not change."""
+    book: Optional[int] = None
+    createTime: int
+    title: Optional[str] = None
+    notes: Optional[str] = None
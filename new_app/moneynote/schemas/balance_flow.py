@@ -0,0 +1,92 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class BalanceFlow(BaseModel):
+    """Schema for balance flow data."""
+    id: int
+    book_id: int
+    type: int
+    title: Optional[str] = None
+    notes: Optional[str] = None
+    createTime: int
+    amount: float
+    convertedAmount: Optional[float] = None
+    account_id: Optional[int] = None
+    to_id: Optional[int] = None
+    payee_id: Optional[int] = None
+    confirm: bool
+    include: bool
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CategoryRelation(BaseModel):
+    """Schema for the part of a flow's amount booked against a category."""
+    category_id: int
+    amount: float
+    convertedAmount: Optional[float] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BalanceFlowDetails(BalanceFlow):
+    """Schema for a balance flow with its categories and tags."""
+    categories: List[CategoryRelation] = []
+    tags: List[int] = []
+
+
+class CategoryRelationForm(BaseModel):
+    category: int
+    amount: float
+    # Required when the account's currency is not the book's
+    convertedAmount: Optional[float] = None
+
+
+class BalanceFlowAddForm(BaseModel):
+    """
+    Schema for adding a balance flow. Expenses and incomes take their amount from the categories, transfers and
+    adjustments from amount.
+    """
+    book: Optional[int] = None
+    type: int
+    title: Optional[str] = None
+    createTime: int
+    account: Optional[int] = None
+    categories: Optional[List[CategoryRelationForm]] = None
+    payee: Optional[int] = None
+    tags: Optional[List[int]] = None
+    to: Optional[int] = None
+    amount: Optional[float] = None
+    convertedAmount: Optional[float] = None
+    notes: Optional[str] = None
+    confirm: bool = True
+    include: bool = True
+
+
+class BalanceFlowUpdateForm(BaseModel):
+    """Schema for updating a balance flow, whose book, type and confirm do not change. Unset fields are kept."""
+    title: Optional[str] = None
+    createTime: Optional[int] = None
+    account: Optional[int] = None
+    categories: Optional[List[CategoryRelationForm]] = None
+    payee: Optional[int] = None
+    tags: Optional[List[int]] = None
+    to: Optional[int] = None
+    amount: Optional[float] = None
+    convertedAmount: Optional[float] = None
+    notes: Optional[str] = None
+    include: Optional[bool] = None
+
+
+class FlowImportError(BaseModel):
+    """Schema for a row a bulk import rejected, numbered from 1."""
+    row: int
+    error: str
+
+
+class FlowImportResult(BaseModel):
+    """Schema for the outcome of a bulk import."""
+    imported: int
+    errors: List[FlowImportError] = []
@@ -0,0 +1,45 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Book(BaseModel):
+    """Schema for book data."""
+    id: int
+    name: str
+    group_id: int
+    notes: Optional[str] = None
+    enable: bool
+    defaultExpenseAccount_id: Optional[int] = None
+    defaultIncomeAccount_id: Optional[int] = None
+    defaultTransferFromAccount_id: Optional[int] = None
+    defaultTransferToAccount_id: Optional[int] = None
+    defaultCurrencyCode: Optional[str] = None
+    exportAt: Optional[int] = None
+    sort: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BookAddForm(BaseModel):
+    """Schema for adding a book to the user's current group."""
+    name: str
+    defaultCurrencyCode: str
+    defaultExpenseAccountId: Optional[int] = None
+    defaultIncomeAccountId: Optional[int] = None
+    defaultTransferFromAccountId: Optional[int] = None
+    defaultTransferToAccountId: Optional[int] = None
+    notes: Optional[str] = None
+    sort: Optional[int] = None
+
+
+class BookAddByTemplateForm(BaseModel):
+    """Schema for adding a book with the categories, tags and payees of a book template."""
+    templateId: str
+    book: BookAddForm
+
+
+class BookAddByBookForm(BaseModel):
+    """Schema for adding a book with a copy of the categories, tags and payees of another book."""
+    bookId: int
+    book: BookAddForm
@@ -1,13 +1,44 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
 
+class CategoryTemplate(BaseModel):
+    """Schema for a category of a book template. pId is the id of its parent among the template's categories."""
+    id: int
+    name: str
+    pId: Optional[int] = None
+    type: int
+    notes: Optional[str] = None
+    sort: Optional[int] = None
+
+
+class TagTemplate(BaseModel):
+    """Schema for a tag of a book template. pId is the id of its parent among the template's tags."""
+    id: int
+    name: str
+    pId: Optional[int] = None
+    notes: Optional[str] = None
+    canExpense: bool = True
+    canIncome: bool = True
+    canTransfer: bool = True
+    sort: Optional[int] = None
+
+
+class PayeeTemplate(BaseModel):
+    """Schema for a payee of a book template."""
+    name: str
+    notes: Optional[str] = None
+    canExpense: bool = True
+    canIncome: bool = True
+    sort: Optional[int] = None
+
+
 class BookTemplate(BaseModel):
     """Schema for book template data."""
     id: str
     name: str
     description: str
-    categories: List[str]
-    tags: List[str]
-    payees: List[str]
+    categories: List[CategoryTemplate]
+    tags: List[TagTemplate]
+    payees: List[PayeeTemplate]
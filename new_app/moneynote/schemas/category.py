@@ -0,0 +1,41 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Category(BaseModel):
+    """Schema for category data."""
+    id: int
+    name: str
+    parent_id: Optional[int] = None
+    book_id: int
+    notes: Optional[str] = None
+    enable: bool
+    type: int
+    sort: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CategoryTreeNode(Category):
+    """Schema for a category of GET /categories/tree, with its level, 0 for a root, and its children."""
+    level: int
+    children: List["CategoryTreeNode"] = []
+
+
+class CategoryAddForm(BaseModel):
+    """Schema for adding a category, to the user's default book unless book is given, under pId if given."""
+    book: Optional[int] = None
+    type: int
+    name: str
+    notes: Optional[str] = None
+    pId: Optional[int] = None
+    sort: Optional[int] = None
+
+
+class CategoryUpdateForm(BaseModel):
+    """Schema for updating a category. As in the legacy API, a pId of None makes it a root."""
+    name: Optional[str] = None
+    notes: Optional[str] = None
+    pId: Optional[int] = None
+    sort: Optional[int] = None
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import List
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class Currency(BaseModel):
@@ -6,4 +8,24 @@ class Currency(BaseModel):
     id: str
     name: str
     description: str
-    rate: float
\ No newline at end of file
+    rate: float
+
+
+class CurrencyBatchCalcForm(BaseModel):
+    """Schema for converting many amounts at once: amounts[i] is converted from from_codes[i] to to_codes[i]."""
+    amounts: List[float]
+    from_codes: List[str] = Field(alias="from")
+    to_codes: List[str] = Field(alias="to")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        if not len(self.amounts) == len(self.from_codes) == len(self.to_codes):
+            raise ValueError("amounts, from and to must have the same length")
+        return self
+
+
+class CurrencyBatchCalcResult(BaseModel):
+    """Schema for the converted amounts, in the order of the request."""
+    amounts: List[float]
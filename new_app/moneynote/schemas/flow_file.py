@@ -0,0 +1,14 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class FlowFile(BaseModel):
+    """Schema for a file attached to a balance flow, without its bytes."""
+    id: int
+    createTime: Optional[int] = None
+    contentType: Optional[str] = None
+    size: Optional[int] = None
+    originalName: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
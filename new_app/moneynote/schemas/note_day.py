@@ -0,0 +1,19 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class NoteDay(BaseModel):
+    """Schema for note day data."""
+    id: int
+    title: str
+    notes: Optional[str] = None
+    startDate: Optional[int] = None
+    endDate: Optional[int] = None
+    nextDate: Optional[int] = None
+    repeatType: Optional[int] = None
+    interval: Optional[int] = None
+    totalCount: Optional[int] = None
+    runCount: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
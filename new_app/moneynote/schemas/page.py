@@ -0,0 +1,32 @@
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    Schema for a page of a list, shaped like the legacy API's pages.
+    number, totalElements and totalPages are only set in offset mode (page=N), nextCursor in both modes.
+    """
+    content: List[T]
+    size: int
+    number: Optional[int] = None
+    totalElements: Optional[int] = None
+    totalPages: Optional[int] = None
+    nextCursor: Optional[str] = None
+
+    @classmethod
+    def from_result(cls, result, item_schema) -> "Page":
+        total_pages = None
+        if result.total is not None:
+            total_pages = -(-result.total // result.size)
+        return cls(
+            content=[item_schema.model_validate(item) for item in result.items],
+            size=result.size,
+            number=result.number,
+            totalElements=result.total,
+            totalPages=total_pages,
+            nextCursor=result.next_cursor,
+        )
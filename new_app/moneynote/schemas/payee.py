@@ -0,0 +1,17 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Payee(BaseModel):
+    """Schema for payee data."""
+    id: int
+    name: str
+    book_id: int
+    notes: Optional[str] = None
+    enable: bool
+    canExpense: bool
+    canIncome: bool
+    sort: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
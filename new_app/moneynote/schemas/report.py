@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class ChartVO(BaseModel):
+    """Schema for one bar or slice of a report chart."""
+    x: str
+    y: float
+    # Share of the chart's total, rounded to 2 decimals
+    percent: float = 0
@@ -0,0 +1,48 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Tag(BaseModel):
+    """Schema for tag data."""
+    id: int
+    name: str
+    parent_id: Optional[int] = None
+    book_id: int
+    notes: Optional[str] = None
+    enable: bool
+    canExpense: bool
+    canIncome: bool
+    canTransfer: bool
+    sort: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TagTreeNode(Tag):
+    """Schema for a tag of GET /tags/tree, with its level, 0 for a root, and its children."""
+    level: int
+    children: List["TagTreeNode"] = []
+
+
+class TagAddForm(BaseModel):
+    """Schema for adding a tag, to the user's default book unless book is given, under pId if given."""
+    book: Optional[int] = None
+    name: str
+    notes: Optional[str] = None
+    pId: Optional[int] = None
+    canExpense: bool
+    canIncome: bool
+    canTransfer: bool
+    sort: Optional[int] = None
+
+
+class TagUpdateForm(BaseModel):
+    """Schema for updating a tag. As in the legacy API, a pId of None makes it a root."""
+    name: Optional[str] = None
+    notes: Optional[str] = None
+    pId: Optional[int] = None
+    canExpense: Optional[bool] = None
+    canIncome: Optional[bool] = None
+    canTransfer: Optional[bool] = None
+    sort: Optional[int] = None
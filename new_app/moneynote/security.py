@@ -1,14 +1,101 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
 import jwt
 from fastapi import HTTPException
 from fastapi.security import OAuth2PasswordBearer
 
+from config import settings
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+class TokenCache:
+    """
+    Bounded LRU cache of decoded token claims, keyed by the SHA-256 of the token.
+
+    An entry expires after ttl_seconds, or at the token's exp claim if that comes first, so a cached token is
+    never accepted past its expiry. Only successfully decoded tokens are cached.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: dict):
+        if self.max_size <= 0:
+            return
+        ttl_seconds = self.ttl_seconds
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl_seconds = min(ttl_seconds, exp - time.time())
+        if ttl_seconds <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the hit and miss counts, the hit rate and the number of cached tokens."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
+
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE, ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS)
+
+
+def decode_token(token: str) -> dict:
+    """Returns a copy of the claims, so a caller cannot change the cached ones."""
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(token, options={"verify_signature": False})
+        token_cache.put(token, claims)
+    return dict(claims)
+
+
 def get_user_identity_from_token(token: str) -> str:
     try:
-        payload = jwt.decode(token, options={"verify_signature": False})
+        payload = decode_token(token)
         return payload.get("sub")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
-
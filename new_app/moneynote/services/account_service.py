@@ -0,0 +1,21 @@
+from typing import List, Optional, Sequence
+
+from ..models import Account
+from .data_loader import get_currency_index
+
+
+def convert_balances(
+    accounts: Sequence[Account], to_code: Optional[str], attribute: str = "balance"
+) -> List[float]:
+    """
+    Converts an amount of each account (its balance by default, None counting as 0) from the account's currency
+    to to_code in one vectorized pass. Without a to_code the amounts are kept as they are.
+
+    Raises:
+        UnknownCurrencyError: If an account's currency or to_code has no rate.
+    """
+    amounts = [getattr(account, attribute) or 0 for account in accounts]
+    if to_code is None:
+        return [float(amount) for amount in amounts]
+    from_codes = [account.currencyCode for account in accounts]
+    return get_currency_index().convert(amounts, from_codes, [to_code] * len(accounts)).tolist()
@@ -0,0 +1,15 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.crud_book import add_book_items
+from ..schemas.book_template import BookTemplate
+
+
+async def add_template_items(db: AsyncSession, book_id: int, template: BookTemplate):
+    """Adds the categories, tags and payees of a book template to a new book, the trees linked by their pIds."""
+    await add_book_items(
+        db,
+        book_id,
+        [dict(category.model_dump(exclude={"pId"}), parent_id=category.pId) for category in template.categories],
+        [dict(tag.model_dump(exclude={"pId"}), parent_id=tag.pId) for tag in template.tags],
+        [payee.model_dump() for payee in template.payees],
+    )
@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from ..schemas.currency import Currency
+
+
+class UnknownCurrencyError(KeyError):
+    """Raised when a currency code is not in the index."""
+
+    def __init__(self, codes: Sequence[str]):
+        super().__init__(", ".join(codes))
+        self.codes = list(codes)
+
+
+@dataclass(frozen=True, eq=False)
+class CurrencyIndex:
+    """
+    Currency rates laid out for constant-time and vectorized lookups.
+
+    Rates are relative to USD, as in currency.json. cross_rates[i, j] is the rate from currency i to currency j,
+    i.e. rates[j] / rates[i], so converting is one multiplication.
+    """
+    codes: Tuple[str, ...]
+    positions: Dict[str, int]
+    rates: np.ndarray
+    cross_rates: np.ndarray
+
+    def position(self, code: str) -> int:
+        try:
+            return self.positions[code]
+        except KeyError:
+            raise UnknownCurrencyError([code])
+
+    def rate(self, from_code: str, to_code: str) -> float:
+        """Returns how many units of to_code one unit of from_code is worth."""
+        return float(self.cross_rates[self.position(from_code), self.position(to_code)])
+
+    def positions_of(self, codes: Sequence[str]) -> np.ndarray:
+        """Maps a sequence of codes to their positions, looking each distinct code up once."""
+        unique_codes, inverse = np.unique(np.asarray(codes, dtype=str), return_inverse=True)
+        unknown = [code for code in unique_codes.tolist() if code not in self.positions]
+        if unknown:
+            raise UnknownCurrencyError(unknown)
+        unique_positions = np.fromiter((self.positions[code] for code in unique_codes.tolist()), dtype=np.intp, count=len(unique_codes))
+        return unique_positions[inverse]
+
+    def convert(self, amounts: Sequence[float], from_codes: Sequence[str], to_codes: Sequence[str]) -> np.ndarray:
+        """
+        Converts amounts[i] from from_codes[i] to to_codes[i] for every i in one vectorized pass.
+        Results are rounded to 2 decimals, half to even, like the legacy calc endpoint.
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if not len(amounts) == len(from_codes) == len(to_codes):
+            raise ValueError("amounts, from_codes and to_codes must have the same length")
+        if len(amounts) == 0:
+            return amounts
+        factors = self.cross_rates[self.positions_of(from_codes), self.positions_of(to_codes)]
+        return np.round(amounts * factors, 2)
+
+
+def build_currency_index(currencies: Sequence[Currency]) -> CurrencyIndex:
+    """Builds the index and cross-rate matrix of a currencies snapshot."""
+    codes = tuple(currency.id for currency in currencies)
+    if len(set(codes)) != len(codes):
+        raise ValueError("currency ids must be unique")
+    rates = np.array([currency.rate for currency in currencies], dtype=np.float64)
+    if (rates <= 0).any():
+        raise ValueError("currency rates must be greater than 0")
+    cross_rates = rates[np.newaxis, :] / rates[:, np.newaxis]
+    for array in (rates, cross_rates):
+        array.flags.writeable = False
+    return CurrencyIndex(
+        codes=codes,
+        positions={code: position for position, code in enumerate(codes)},
+        rates=rates,
+        cross_rates=cross_rates,
+    )
@@ -1,11 +1,61 @@
+import gzip
+import hashlib
 import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-CURRENCIES: list = []
-BOOK_TEMPLATES: list = []
+from pydantic import TypeAdapter, ValidationError
 
-def _load_json_from_data_dir(filename: str) -> list:
-    data_dir = Path(__file__).parent.parent / "data"
+from ..schemas.book_template import BookTemplate
+from ..schemas.currency import Currency
+from .currency_index import CurrencyIndex, build_currency_index
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, without it responses are only gzip-compressed
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    """JSON response body encoded once at load time, with its compressed variants and a strong ETag."""
+    body: bytes
+    gzip_body: bytes
+    brotli_body: Optional[bytes]
+    etag: str
+
+
+@dataclass(frozen=True)
+class ReferenceDataSnapshot:
+    """An immutable, validated version of one reference data file, with the lookup index built from it."""
+    version: str
+    items: tuple
+    payload: EncodedPayload
+    index: Any = field(default=None, compare=False)
+
+
+@dataclass(frozen=True)
+class ReferenceDataset:
+    """A reference data file, the schema its content is validated against and how to index it."""
+    filename: str
+    adapter: TypeAdapter
+    build_index: Optional[Callable[[list], Any]] = None
+
+
+DATASETS: Dict[str, ReferenceDataset] = {
+    "currencies": ReferenceDataset("currency.json", TypeAdapter(List[Currency]), build_currency_index),
+    "book_templates": ReferenceDataset("book_tpl.json", TypeAdapter(List[BookTemplate])),
+}
+
+def _load_json_from_data_dir(filename: str, data_dir: Path = DATA_DIR) -> list:
     file_path = data_dir / filename
 
     try:
@@ -16,10 +66,166 @@ def _load_json_from_data_dir(filename: str) -> list:
     except json.JSONDecodeError as e:
         raise RuntimeError(f"Failed to parse {filename}: {e}")
 
+def encode_payload(adapter: TypeAdapter, items: list) -> EncodedPayload:
+    """Encodes validated items to the JSON bytes the API serves, plus gzip and brotli variants."""
+    body = adapter.dump_json(items)
+    return EncodedPayload(
+        body=body,
+        gzip_body=gzip.compress(body, mtime=0),
+        brotli_body=brotli.compress(body) if brotli is not None else None,
+        etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+    )
+
+def build_snapshot(dataset: ReferenceDataset, data: list) -> ReferenceDataSnapshot:
+    """
+    Validates raw reference data, encodes it and builds its index into a snapshot.
+    The version is the hash of the encoded data.
+    """
+    try:
+        items = dataset.adapter.validate_python(data)
+        index = dataset.build_index(items) if dataset.build_index else None
+    except (ValidationError, ValueError) as e:
+        raise RuntimeError(f"Failed to validate {dataset.filename}: {e}")
+    payload = encode_payload(dataset.adapter, items)
+    return ReferenceDataSnapshot(version=payload.etag.strip('"'), items=tuple(items), payload=payload, index=index)
+
+
+class ReferenceDataStore:
+    """
+    Holds the current snapshot of every reference data file.
+
+    Readers take the current snapshot without locking: a reload builds and validates a complete new snapshot
+    first, then swaps it in with a single assignment, so a request sees either the old or the new data, never a
+    mix. Reloads come from the files changing on disk (see start_watching) or from push().
+    """
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.data_dir = data_dir
+        self._snapshots: Dict[str, ReferenceDataSnapshot] = {}
+        self._file_signatures: Dict[str, Tuple[int, int]] = {}
+        self._write_lock = threading.Lock()
+        self._stop_watching = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def get(self, name: str) -> ReferenceDataSnapshot:
+        """Returns the current snapshot of a dataset, loading it from its file on first use."""
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            snapshot = self.load(name)
+        return snapshot
+
+    @property
+    def versions(self) -> Dict[str, str]:
+        """The version of every loaded dataset."""
+        return {name: snapshot.version for name, snapshot in self._snapshots.items()}
+
+    def _file_signature(self, name: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.data_dir / DATASETS[name].filename)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _swap(self, name: str, snapshot: ReferenceDataSnapshot):
+        # Replace the whole dict so readers never see it half updated
+        self._snapshots = {**self._snapshots, name: snapshot}
+
+    def load(self, name: str) -> ReferenceDataSnapshot:
+        """Reads, validates and swaps in a dataset from its file."""
+        dataset = DATASETS[name]
+        with self._write_lock:
+            signature = self._file_signature(name)
+            snapshot = build_snapshot(dataset, _load_json_from_data_dir(dataset.filename, self.data_dir))
+            self._file_signatures[name] = signature
+            self._swap(name, snapshot)
+        return snapshot
+
+    def push(self, name: str, data: list) -> ReferenceDataSnapshot:
+        """Validates and swaps in new data for a dataset without touching its file."""
+        snapshot = build_snapshot(DATASETS[name], data)
+        with self._write_lock:
+            self._swap(name, snapshot)
+        logger.info("Pushed %s version %s", name, snapshot.version)
+        return snapshot
+
+    def reload_if_changed(self) -> List[str]:
+        """
+        Reloads the loaded datasets whose file changed since it was read. A file that fails to load or validate
+        is logged and the previous snapshot keeps being served.
+
+        Returns:
+            List[str]: The names of the datasets that were reloaded.
+        """
+        reloaded = []
+        for name in list(self._snapshots):
+            if self._file_signature(name) == self._file_signatures.get(name):
+                continue
+            try:
+                snapshot = self.load(name)
+            except RuntimeError:
+                logger.exception("Keeping %s version %s, the changed file could not be loaded", name, self._snapshots[name].version)
+                # Don't retry the same broken file on every poll
+                self._file_signatures[name] = self._file_signature(name)
+                continue
+            logger.info("Reloaded %s, now version %s", name, snapshot.version)
+            reloaded.append(name)
+        return reloaded
+
+    def start_watching(self, interval_seconds: float):
+        """Polls the data files every interval_seconds from a background thread and reloads the ones that change."""
+        if self._watcher is not None:
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval_seconds):
+                self.reload_if_changed()
+
+        self._watcher = threading.Thread(target=watch, name="reference-data-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is None:
+            return
+        self._stop_watching.set()
+        self._watcher.join()
+        self._watcher = None
+
+
+store = ReferenceDataStore()
+
 def load_currencies():
-    global CURRENCIES
-    CURRENCIES = _load_json_from_data_dir("currency.json")
+    store.load("currencies")
 
 def load_book_templates():
-    global BOOK_TEMPLATES
-    BOOK_TEMPLATES = _load_json_from_data_dir("book_tpl.json")
\ No newline at end of file
+    store.load("book_templates")
+
+def get_currencies_payload() -> EncodedPayload:
+    """Returns the encoded currencies, loading them first if the app's lifespan has not run."""
+    return store.get("currencies").payload
+
+def get_currency_index() -> CurrencyIndex:
+    """Returns the index of the current currencies snapshot, rebuilt whenever the rates change."""
+    return store.get("currencies").index
+
+def get_book_templates_payload() -> EncodedPayload:
+    """Returns the encoded book templates, loading them first if the app's lifespan has not run."""
+    return store.get("book_templates").payload
+
+def get_book_template(template_id: str) -> Optional[BookTemplate]:
+    """Returns the book template of an id from the current snapshot, None if there is none."""
+    return next((template for template in store.get("book_templates").items if template.id == template_id), None)
+
+# The module-level names older code reads, resolved against the store's current snapshots
+_SNAPSHOT_ATTRIBUTES = {
+    "CURRENCIES": ("currencies", "items"),
+    "BOOK_TEMPLATES": ("book_templates", "items"),
+    "CURRENCIES_PAYLOAD": ("currencies", "payload"),
+    "BOOK_TEMPLATES_PAYLOAD": ("book_templates", "payload"),
+}
+
+def __getattr__(name: str):
+    if name in _SNAPSHOT_ATTRIBUTES:
+        dataset_name, attribute = _SNAPSHOT_ATTRIBUTES[name]
+        return getattr(store.get(dataset_name), attribute)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,229 @@
+import csv
+import io
+import logging
+import re
+import zipfile
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from xml.sax.saxutils import escape
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud import crud_balance_flow
+from ..models.balance_flow import FLOW_TYPE_ADJUST, FLOW_TYPE_EXPENSE, FLOW_TYPE_INCOME, FLOW_TYPE_TRANSFER
+
+logger = logging.getLogger(__name__)
+
+# The columns and labels of the legacy export
+EXPORT_HEADERS = ["Title", "Type", "Amount", "Time", "Account", "Category", "Tag", "Payee", "Note", "Confirm", "Include"]
+FLOW_TYPE_NAMES = {
+    FLOW_TYPE_EXPENSE: "Expense",
+    FLOW_TYPE_INCOME: "Income",
+    FLOW_TYPE_TRANSFER: "Transfer",
+    FLOW_TYPE_ADJUST: "Adjust Balance",
+}
+
+Cell = Union[str, float, None]
+
+
+def _plain(amount: float) -> str:
+    # As Java's stripTrailingZeros().toPlainString(): 12.50 is 12.5, 100.00 is 100
+    return format(Decimal(str(amount)).normalize(), "f")
+
+
+def _yes_no(value: Optional[bool]) -> Optional[str]:
+    return None if value is None else ("Yes" if value else "No")
+
+
+def export_row(flow, categories: Sequence[Tuple[str, float]], tags: Sequence[str], time_zone_offset: int) -> List[Cell]:
+    """The cells of a flow, formatted as the legacy export did, its time in the UTC offset given in hours."""
+    account = f"{flow.account_name} -> {flow.to_name}" if flow.type == FLOW_TYPE_TRANSFER else flow.account_name
+    category = None
+    if flow.type in (FLOW_TYPE_EXPENSE, FLOW_TYPE_INCOME):
+        category = ", ".join(f"{name}: {_plain(amount)}" for name, amount in categories)
+    create_time = datetime.fromtimestamp(flow.createTime / 1000, timezone(timedelta(hours=time_zone_offset)))
+    return [
+        flow.title,
+        FLOW_TYPE_NAMES.get(flow.type),
+        flow.amount,
+        create_time.strftime("%m/%d/%Y %H:%M"),
+        account,
+        category,
+        ", ".join(tags),
+        flow.payee_name or "",
+        flow.notes,
+        _yes_no(flow.confirm),
+        _yes_no(flow.include),
+    ]
+
+
+class _Buffer(io.RawIOBase):
+    """A write-only, unseekable stream whose bytes are taken out as they are produced."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class CsvExportWriter:
+    """Writes the export as UTF-8 CSV, with a BOM so that Excel detects the encoding."""
+    media_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self):
+        self._text = io.StringIO()
+        self._writer = csv.writer(self._text)
+
+    def _take(self) -> bytes:
+        data = self._text.getvalue().encode()
+        self._text.seek(0)
+        self._text.truncate()
+        return data
+
+    def start(self, headers: Sequence[str]) -> bytes:
+        self._writer.writerow(headers)
+        return "\ufeff".encode() + self._take()
+
+    def write_rows(self, rows: Sequence[Sequence[Cell]]) -> bytes:
+        self._writer.writerows([_plain(cell) if isinstance(cell, float) else cell for cell in row] for row in rows)
+        return self._take()
+
+    def close(self) -> bytes:
+        return b""
+
+
+# Characters XML 1.0 does not allow, which a spreadsheet would refuse to open
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Book" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value: Cell) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value!r}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_INVALID_XML_CHARS.sub("", str(value)))}</t></is></c>'
+
+
+class XlsxExportWriter:
+    """
+    Writes the export as an XLSX workbook of one sheet, streaming the sheet's rows into the deflated zip as they
+    come: the cells are inline strings, so nothing but the current rows is held in memory.
+    """
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    extension = "xlsx"
+
+    def __init__(self):
+        self._buffer = _Buffer()
+        self._zip = zipfile.ZipFile(self._buffer, "w", compression=zipfile.ZIP_DEFLATED)
+        self._sheet = None
+
+    def _write(self, xml: str):
+        self._sheet.write(xml.encode())
+
+    def start(self, headers: Sequence[str]) -> bytes:
+        for name, xml in _XLSX_PARTS.items():
+            self._zip.writestr(name, xml)
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self._write(
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            # The time column, as wide as the legacy export made it
+            '<cols><col min="4" max="4" width="19" customWidth="1"/></cols>'
+            '<sheetData>'
+        )
+        return self.write_rows([headers])
+
+    def write_rows(self, rows: Sequence[Sequence[Cell]]) -> bytes:
+        self._write("".join(f"<row>{''.join(_xlsx_cell(cell) for cell in row)}</row>" for row in rows))
+        return self._buffer.take()
+
+    def close(self) -> bytes:
+        self._write("</sheetData></worksheet>")
+        self._sheet.close()
+        self._zip.close()
+        return self._buffer.take()
+
+
+EXPORT_WRITERS: Dict[str, Callable[[], Union[CsvExportWriter, XlsxExportWriter]]] = {
+    "csv": CsvExportWriter,
+    "xlsx": XlsxExportWriter,
+}
+
+
+async def stream_export(
+    db: AsyncSession,
+    book_id: int,
+    writer: Union[CsvExportWriter, XlsxExportWriter],
+    time_zone_offset: int,
+    batch_size: int,
+    total: Optional[int] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    The bytes of a book's export. The flows are read from a server-side cursor batch_size at a time, each batch's
+    category and tag names in one query, and written out before the next batch is fetched, so memory use does not
+    grow with the book. Stops, closing the cursor, once is_disconnected says the client went away.
+    """
+    yield writer.start(EXPORT_HEADERS)
+    exported = 0
+    result = await db.stream(crud_balance_flow.select_export_flows(book_id).execution_options(yield_per=batch_size))
+    try:
+        async for flows in result.partitions():
+            if is_disconnected is not None and await is_disconnected():
+                logger.info("Export of book %s cancelled by the client after %d flows", book_id, exported)
+                return
+            categories, tags = await crud_balance_flow.get_relation_names(db, [flow.id for flow in flows])
+            chunk = writer.write_rows(
+                [export_row(flow, categories.get(flow.id, ()), tags.get(flow.id, ()), time_zone_offset) for flow in flows]
+            )
+            exported += len(flows)
+            logger.debug("Exported %d/%s flows of book %s", exported, total if total is not None else "?", book_id)
+            if chunk:
+                yield chunk
+    finally:
+        await result.close()
+    yield writer.close()
+    logger.info("Exported %d flows of book %s", exported, book_id)
@@ -0,0 +1,317 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+
+from ..crud.crud_flow_file import unreferenced_blob_keys
+
+_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+class BlobNotFoundError(KeyError):
+    """No blob is stored under the key."""
+
+
+@dataclass(frozen=True)
+class BlobInfo:
+    """A stored blob: the hex SHA-256 of its content, which is also its key, and its size in bytes."""
+    key: str
+    size: int
+
+
+def _check_key(key: str) -> str:
+    # Keys end up in paths and URLs, so nothing but a SHA-256 is accepted
+    if not _KEY_PATTERN.fullmatch(key):
+        raise ValueError(f"Invalid blob key: {key!r}")
+    return key
+
+
+def _spool(chunks: Iterable[bytes], directory: Optional[Path] = None) -> Tuple[str, BlobInfo]:
+    """Writes the chunks to a temporary file while hashing them, returns the file's path and the blob it holds."""
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=".upload-", delete=False) as file:
+        try:
+            for chunk in chunks:
+                digest.update(chunk)
+                file.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            file.close()
+            os.unlink(file.name)
+            raise
+    return file.name, BlobInfo(digest.hexdigest(), size)
+
+
+def iter_chunks(file: BinaryIO, chunk_size: int, length: Optional[int] = None) -> Iterator[bytes]:
+    """Reads a file in chunks, up to length bytes if given."""
+    remaining = length
+    while remaining is None or remaining > 0:
+        chunk = file.read(chunk_size if remaining is None else min(chunk_size, remaining))
+        if not chunk:
+            break
+        if remaining is not None:
+            remaining -= len(chunk)
+        yield chunk
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed storage of the flow file attachments: a blob's key is the SHA-256 of its bytes, so an
+    attachment uploaded twice is stored once. The I/O is blocking and chunked; the routers run puts in a worker
+    thread, and Starlette iterates the chunks of open_range in its threadpool.
+
+    Blobs are never deleted along with their files: a blob can be stored again for a new file at any time. Unused
+    blobs are removed by sweep_blobs instead, once they have not been stored for a while.
+    """
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+
+    @abstractmethod
+    def put(self, chunks: Iterable[bytes]) -> BlobInfo:
+        """
+        Stores the concatenated chunks. A blob with the same content is stored again, so that it counts as
+        recently stored, or is back if a sweep has just deleted it.
+        """
+
+    @abstractmethod
+    def open_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        The chunks of bytes start to end, both included, of a blob; to its last byte without an end. The blob is
+        only opened once the chunks are iterated, raising BlobNotFoundError then if it does not exist.
+        """
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        """The size of a blob, raises BlobNotFoundError if it does not exist."""
+
+    @abstractmethod
+    def list_blobs(self) -> Iterator[Tuple[str, float]]:
+        """The key of every blob, and the time it was last stored in seconds since the epoch."""
+
+    @abstractmethod
+    def delete(self, key: str, stored_before: Optional[float] = None) -> bool:
+        """
+        Deletes a blob, if it exists. With stored_before, only if it was last stored before that time. Returns
+        whether a blob was deleted.
+        """
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under a root directory, fanned out by the first two bytes of their key."""
+
+    def __init__(self, root: Path, chunk_size: int):
+        super().__init__(chunk_size)
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        _check_key(key)
+        return self.root / key[:2] / key[2:4] / key
+
+    def put(self, chunks: Iterable[bytes]) -> BlobInfo:
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Spooled next to the blobs so the rename into place is atomic
+        temp_path, info = _spool(chunks, self.root)
+        path = self.path(info.key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Replacing a blob with the same bytes only renews its modification time
+        os.replace(temp_path, path)
+        return info
+
+    def open_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        try:
+            file = open(self.path(key), "rb")
+        except FileNotFoundError:
+            raise BlobNotFoundError(key)
+        with file:
+            file.seek(start)
+            yield from iter_chunks(file, self.chunk_size, None if end is None else end - start + 1)
+
+    def size(self, key: str) -> int:
+        try:
+            return self.path(key).stat().st_size
+        except FileNotFoundError:
+            raise BlobNotFoundError(key)
+
+    def list_blobs(self) -> Iterator[Tuple[str, float]]:
+        for path in self.root.glob("??/??/*"):
+            if _KEY_PATTERN.fullmatch(path.name):
+                try:
+                    yield path.name, path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+
+    def delete(self, key: str, stored_before: Optional[float] = None) -> bool:
+        path = self.path(key)
+        if stored_before is None:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                return False
+            return True
+        # Moved aside first, so that a put renaming the blob into place meanwhile is either moved aside too and
+        # seen as recent, or lands after the move and is kept
+        deleted_path = path.with_name(f".deleted-{key}")
+        try:
+            os.rename(path, deleted_path)
+        except FileNotFoundError:
+            return False
+        if deleted_path.stat().st_mtime < stored_before:
+            os.unlink(deleted_path)
+            return True
+        # Put back by a link, which unlike a rename never replaces a blob a put has stored since the move; that
+        # one is as recent and holds the same bytes
+        try:
+            os.link(deleted_path, path)
+        except FileExistsError:
+            pass
+        os.unlink(deleted_path)
+        return False
+
+
+class GCSBlobStore(BlobStore):
+    """
+    Blobs as objects of a Google Cloud Storage bucket, through the JSON API so that an emulator such as
+    fake-gcs-server can stand in for it. Requests are authorized with an OAuth access token, if one is given.
+    """
+
+    def __init__(self, bucket: str, endpoint: str, access_token: str, chunk_size: int):
+        super().__init__(chunk_size)
+        self.bucket = bucket
+        self.endpoint = endpoint.rstrip("/")
+        self.access_token = access_token
+
+    def _object_url(self, key: str, **params: str) -> str:
+        url = f"{self.endpoint}/storage/v1/b/{urllib.parse.quote(self.bucket, safe='')}/o/{_check_key(key)}"
+        return f"{url}?{urllib.parse.urlencode(params)}" if params else url
+
+    def _request(self, method: str, url: str, data=None, headers: Optional[dict] = None):
+        headers = dict(headers or {})
+        if self.access_token:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+        return urllib.request.urlopen(urllib.request.Request(url, data=data, method=method, headers=headers))
+
+    def put(self, chunks: Iterable[bytes]) -> BlobInfo:
+        # The key is only known once every chunk is hashed, so the upload is spooled to disk first
+        temp_path, info = _spool(chunks)
+        try:
+            # Uploaded even if the object exists: the new generation renews its updated time
+            params = urllib.parse.urlencode({"uploadType": "media", "name": info.key})
+            url = f"{self.endpoint}/upload/storage/v1/b/{urllib.parse.quote(self.bucket, safe='')}/o?{params}"
+            with open(temp_path, "rb") as file:
+                headers = {"Content-Type": "application/octet-stream", "Content-Length": str(info.size)}
+                self._request("POST", url, data=file, headers=headers).close()
+        finally:
+            os.unlink(temp_path)
+        return info
+
+    def open_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        headers = {"Range": f"bytes={start}-{'' if end is None else end}"} if start or end is not None else {}
+        try:
+            response = self._request("GET", self._object_url(key, alt="media"), headers=headers)
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                raise BlobNotFoundError(key)
+            raise
+        with response:
+            yield from iter_chunks(response, self.chunk_size)
+
+    def size(self, key: str) -> int:
+        try:
+            with self._request("GET", self._object_url(key)) as response:
+                return int(json.load(response)["size"])
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                raise BlobNotFoundError(key)
+            raise
+
+    def list_blobs(self) -> Iterator[Tuple[str, float]]:
+        url = f"{self.endpoint}/storage/v1/b/{urllib.parse.quote(self.bucket, safe='')}/o"
+        params = {"fields": "items(name,updated),nextPageToken"}
+        while True:
+            with self._request("GET", f"{url}?{urllib.parse.urlencode(params)}") as response:
+                page = json.load(response)
+            for item in page.get("items", []):
+                if _KEY_PATTERN.fullmatch(item["name"]):
+                    yield item["name"], _parse_time(item["updated"])
+            if not page.get("nextPageToken"):
+                break
+            params["pageToken"] = page["nextPageToken"]
+
+    def delete(self, key: str, stored_before: Optional[float] = None) -> bool:
+        params = {}
+        if stored_before is not None:
+            try:
+                with self._request("GET", self._object_url(key)) as response:
+                    metadata = json.load(response)
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    return False
+                raise
+            if _parse_time(metadata["updated"]) >= stored_before:
+                return False
+            # Only the generation checked, a put meanwhile makes a new one
+            params["ifGenerationMatch"] = metadata["generation"]
+        try:
+            self._request("DELETE", self._object_url(key, **params)).close()
+        except urllib.error.HTTPError as e:
+            # 412: stored again since the check
+            if e.code in (404, 412):
+                return False
+            raise
+        return True
+
+
+def _parse_time(value: str) -> float:
+    """Seconds since the epoch of an RFC 3339 time of the GCS API."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+async def sweep_blobs(db: AsyncSession, store: BlobStore, grace_seconds: float) -> int:
+    """
+    Deletes the blobs no file references that have not been stored for grace_seconds, returns how many were
+    deleted. The grace period covers the time between an upload's put and the commit of its file; a blob stored
+    again after the check is kept by the delete's stored_before.
+    """
+    stored_before = time.time() - grace_seconds
+    keys = [key for key, stored in await asyncio.to_thread(lambda: list(store.list_blobs())) if stored < stored_before]
+    deleted = 0
+    for start in range(0, len(keys), 500):
+        for key in await unreferenced_blob_keys(db, keys[start:start + 500]):
+            if await asyncio.to_thread(store.delete, key, stored_before):
+                deleted += 1
+    return deleted
+
+
+def create_blob_store() -> BlobStore:
+    """The blob store the settings configure."""
+    if settings.BLOB_STORE_BACKEND == "gcs":
+        if not settings.GCS_BUCKET:
+            raise ValueError("GCS_BUCKET is required with the gcs blob store")
+        return GCSBlobStore(
+            settings.GCS_BUCKET, settings.GCS_ENDPOINT, settings.GCS_ACCESS_TOKEN, settings.BLOB_CHUNK_SIZE
+        )
+    if settings.BLOB_STORE_BACKEND == "local":
+        return LocalBlobStore(Path(settings.BLOB_STORE_PATH), settings.BLOB_CHUNK_SIZE)
+    raise ValueError(f"Unknown blob store backend: {settings.BLOB_STORE_BACKEND}")
+
+
+def get_blob_store() -> BlobStore:
+    """The blob store of the app, a FastAPI dependency so that tests can replace it."""
+    return create_blob_store()
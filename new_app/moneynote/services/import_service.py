@@ -0,0 +1,368 @@
+import asyncio
+import csv
+import itertools
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, TextIO, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.crud_balance_flow import NewFlow, insert_flows
+from ..models import Account, Book, Category, Payee, Tag
+from ..models.balance_flow import FLOW_TYPE_ADJUST, FLOW_TYPE_EXPENSE, FLOW_TYPE_INCOME, FLOW_TYPE_TRANSFER
+from .currency_index import CurrencyIndex
+from .data_loader import get_currency_index
+
+logger = logging.getLogger(__name__)
+
+FLOW_TYPES_BY_NAME = {
+    "expense": FLOW_TYPE_EXPENSE,
+    "income": FLOW_TYPE_INCOME,
+    "transfer": FLOW_TYPE_TRANSFER,
+    "adjust": FLOW_TYPE_ADJUST,
+    # As the export labels it
+    "adjust balance": FLOW_TYPE_ADJUST,
+}
+_TRUE = {"true", "yes", "1"}
+_FALSE = {"false", "no", "0"}
+
+
+class ImportRowError(ValueError):
+    """A row that cannot be imported, with the reason reported back for it."""
+
+
+@dataclass
+class ImportResult:
+    """How many flows an import added, and why each rejected row was rejected, by 1-based row number."""
+    imported: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+
+def open_rows(file: TextIO, format: str) -> Iterator[Any]:
+    """The rows of an import file, csv or json."""
+    if format == "csv":
+        return parse_csv(file)
+    if format == "json":
+        return parse_json(file)
+    raise ValueError(f"Unknown import format: {format}")
+
+
+def parse_csv(file: TextIO) -> Iterator[Dict[str, Any]]:
+    """The rows of a CSV file whose header names the columns, read as they are consumed."""
+    for row in csv.DictReader(file):
+        yield {name.strip(): value for name, value in row.items() if name is not None}
+
+
+def parse_json(file: TextIO, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """
+    The values of a JSON array, or of JSON Lines, decoded one at a time from chunks of the file, so that a large
+    file is never held in memory whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+    while True:
+        # Skip what separates the values: whitespace, the array's brackets and the commas
+        while position < len(buffer) and buffer[position] in " \t\r\n[],":
+            position += 1
+        if position < len(buffer):
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # Only a number at the very end of what is read so far may go on in the next chunk
+                if end < len(buffer) or eof:
+                    position = end
+                    yield value
+                    continue
+        elif eof:
+            return
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+
+def _text(row: Dict[str, Any], name: str) -> Optional[str]:
+    value = row.get(name)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _number(row: Dict[str, Any], name: str) -> Optional[float]:
+    value = row.get(name)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = _text(row, name)
+    if text is None:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        raise ImportRowError(f"{name} is not a number")
+
+
+def _boolean(row: Dict[str, Any], name: str, default: bool) -> bool:
+    value = row.get(name)
+    if isinstance(value, bool):
+        return value
+    text = _text(row, name)
+    if text is None:
+        return default
+    if text.lower() in _TRUE:
+        return True
+    if text.lower() in _FALSE:
+        return False
+    raise ImportRowError(f"{name} is not a boolean")
+
+
+def _create_time(row: Dict[str, Any]) -> int:
+    """createTime in milliseconds, or as an ISO 8601 date and time, UTC unless it has an offset."""
+    value = row.get("createTime")
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    text = _text(row, "createTime")
+    if text is None:
+        raise ImportRowError("createTime is required")
+    if text.lstrip("-").isdigit():
+        return int(text)
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        raise ImportRowError("createTime is not a time")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def _names(row: Dict[str, Any], name: str) -> List[str]:
+    value = row.get(name)
+    if isinstance(value, list):
+        names = [str(item).strip() for item in value]
+    else:
+        names = (_text(row, name) or "").split(",")
+    return list(dict.fromkeys(name.strip() for name in names if name.strip()))
+
+
+class _NameMap:
+    """Maps names to ids. A name that several rows share is refused rather than guessed."""
+
+    def __init__(self, label: str, pairs: Iterable[Tuple[Any, str, Any]]):
+        self.label = label
+        self._ids: Dict[Any, Any] = {}
+        self._ambiguous: Set[Any] = set()
+        for scope, name, value in pairs:
+            key = (scope, name)
+            if key in self._ids:
+                self._ambiguous.add(key)
+            self._ids[key] = value
+
+    def get(self, name: str, scope: Any = None):
+        key = (scope, name)
+        if key in self._ambiguous:
+            raise ImportRowError(f"{self.label} {name} is ambiguous")
+        if key not in self._ids:
+            raise ImportRowError(f"{self.label} {name} not found")
+        return self._ids[key]
+
+
+class BookLookups:
+    """
+    The name to id maps an import resolves its rows with: the book's categories by type, tags and payees, and its
+    group's accounts. Loaded once per import, so that rows cost no query.
+    """
+
+    def __init__(self, book: Book, categories: _NameMap, tags: _NameMap, payees: _NameMap, accounts: _NameMap):
+        self.book = book
+        self.categories = categories
+        self.tags = tags
+        self.payees = payees
+        self.accounts = accounts
+
+    @classmethod
+    async def load(cls, db: AsyncSession, book: Book) -> "BookLookups":
+        categories = await db.execute(select(Category.type, Category.name, Category.id).where(Category.book_id == book.id))
+        tags = await db.execute(select(Tag.name, Tag.id).where(Tag.book_id == book.id))
+        payees = await db.execute(select(Payee.name, Payee.id).where(Payee.book_id == book.id))
+        accounts = await db.execute(
+            select(Account.name, Account.id, Account.currencyCode).where(Account.group_id == book.group_id)
+        )
+        return cls(
+            book,
+            _NameMap("Category", categories),
+            _NameMap("Tag", ((None, name, tag_id) for name, tag_id in tags)),
+            _NameMap("Payee", ((None, name, payee_id) for name, payee_id in payees)),
+            _NameMap("Account", ((None, name, (account_id, code)) for name, account_id, code in accounts)),
+        )
+
+
+def build_flow(row: Any, lookups: BookLookups) -> Tuple[NewFlow, Optional[Tuple[str, str]]]:
+    """
+    Validates a row as the add form is validated, and resolves its names: amounts are in the account's currency,
+    converted amounts in the book's, and an expense or income is booked whole on its one category.
+
+    Returns:
+        Tuple[NewFlow, Optional[Tuple[str, str]]]: The flow, and the (from, to) currency codes of the convertedAmount
+            a row between currencies left out. Its convertedAmounts are None until fill_converted_amounts.
+    """
+    if not isinstance(row, dict):
+        raise ImportRowError("Row is not an object")
+    type_text = _text(row, "type")
+    flow_type = FLOW_TYPES_BY_NAME.get(type_text.lower()) if type_text else None
+    if flow_type is None and type_text and type_text.isdigit() and int(type_text) in FLOW_TYPES_BY_NAME.values():
+        flow_type = int(type_text)
+    if flow_type is None:
+        raise ImportRowError("Invalid type")
+    amount = _number(row, "amount")
+    if amount is None:
+        raise ImportRowError("amount is required")
+    converted_amount = _number(row, "convertedAmount")
+    book = lookups.book
+    account_name = _text(row, "account")
+    account_id, account_currency = lookups.accounts.get(account_name) if account_name else (None, None)
+    foreign_account = account_id is not None and account_currency != book.defaultCurrencyCode
+    values = dict(
+        book_id=book.id,
+        group_id=book.group_id,
+        type=flow_type,
+        title=_text(row, "title"),
+        notes=_text(row, "notes"),
+        createTime=_create_time(row),
+        amount=amount,
+        convertedAmount=amount,
+        account_id=account_id,
+        to_id=None,
+        payee_id=None,
+        confirm=_boolean(row, "confirm", True),
+        include=_boolean(row, "include", True),
+    )
+    categories = []
+    conversion = None
+    if flow_type in (FLOW_TYPE_EXPENSE, FLOW_TYPE_INCOME):
+        category_name = _text(row, "category")
+        if category_name is None:
+            raise ImportRowError("category is required")
+        if foreign_account:
+            values["convertedAmount"] = converted_amount
+            if converted_amount is None:
+                conversion = (account_currency, book.defaultCurrencyCode)
+        categories.append((lookups.categories.get(category_name, flow_type), amount, values["convertedAmount"]))
+        payee_name = _text(row, "payee")
+        if payee_name is not None:
+            values["payee_id"] = lookups.payees.get(payee_name)
+    elif flow_type == FLOW_TYPE_TRANSFER:
+        to_name = _text(row, "to")
+        if account_id is None or to_name is None:
+            raise ImportRowError("account and to are required")
+        to_id, to_currency = lookups.accounts.get(to_name)
+        if to_currency != account_currency:
+            values["convertedAmount"] = converted_amount
+            if converted_amount is None:
+                conversion = (account_currency, to_currency)
+        values["to_id"] = to_id
+    elif converted_amount is not None:
+        values["convertedAmount"] = converted_amount
+    tags = [
+        (lookups.tags.get(name), amount, values["convertedAmount"] if foreign_account else amount)
+        for name in _names(row, "tags")
+    ]
+    return NewFlow(values, categories, tags), conversion
+
+
+def fill_converted_amounts(flows: Sequence[Tuple[NewFlow, Tuple[str, str]]], index: CurrencyIndex):
+    """
+    Sets the convertedAmount the rows left out, of the flows and their categories and tags, converting all of
+    them in one vectorized pass.
+
+    Raises:
+        UnknownCurrencyError: If a currency has no rate.
+    """
+    if not flows:
+        return
+    amounts = [flow.values["amount"] for flow, _ in flows]
+    from_codes, to_codes = zip(*(conversion for _, conversion in flows))
+    for (flow, _), converted_amount in zip(flows, index.convert(amounts, from_codes, to_codes).tolist()):
+        flow.values["convertedAmount"] = converted_amount
+        flow.categories = [(category_id, amount, converted_amount) for category_id, amount, _ in flow.categories]
+        flow.tags = [
+            (tag_id, amount, converted_amount if converted is None else converted) for tag_id, amount, converted in flow.tags
+        ]
+
+
+def _read_batch(rows: Iterator[Any], batch_size: int) -> Tuple[List[Any], Optional[str]]:
+    """The next rows, and why the file stopped parsing if it did."""
+    batch = []
+    try:
+        for row in itertools.islice(rows, batch_size):
+            batch.append(row)
+    except (ValueError, csv.Error) as e:
+        return batch, str(e)
+    return batch, None
+
+
+async def import_flows(
+    db: AsyncSession,
+    book: Book,
+    rows: Iterator[Any],
+    batch_size: int,
+    creator_id: Optional[int] = None,
+) -> ImportResult:
+    """
+    Imports parsed rows into a book, batch_size rows per transaction: each batch is validated against lookups
+    loaded once, its missing convertedAmounts converted at the current rates in one pass, inserted in a few
+    statements, and committed with its rollup and balance changes. A rejected row is reported and skipped, as are
+    the rows of a batch the database fails to write; a file that stops parsing ends the import at that row, keeping
+    the rows before it. The rows are read in a worker thread, they may come from a file.
+    """
+    lookups = await BookLookups.load(db, book)
+    # One snapshot of the rates for the whole import
+    index = get_currency_index()
+    insert_at = int(time.time() * 1000)
+    result = ImportResult()
+    row_number = 0
+    while True:
+        batch, parse_error = await asyncio.to_thread(_read_batch, rows, batch_size)
+        if not batch and parse_error is None:
+            break
+        flows, flow_row_numbers, conversions = [], [], []
+        for row in batch:
+            row_number += 1
+            try:
+                flow, conversion = build_flow(row, lookups)
+                if conversion is not None:
+                    unknown = [code for code in conversion if code not in index.positions]
+                    if unknown:
+                        raise ImportRowError(f"Unknown currency: {unknown[0]}")
+                    conversions.append((flow, conversion))
+            except ImportRowError as e:
+                result.errors.append((row_number, str(e)))
+                continue
+            flow.values.update(creator_id=creator_id, insertAt=insert_at)
+            flows.append(flow)
+            flow_row_numbers.append(row_number)
+        fill_converted_amounts(conversions, index)
+        try:
+            await insert_flows(db, flows)
+            await db.commit()
+        except DBAPIError as e:
+            # e.g. the database stayed locked past its busy timeout: the batch's rows are reported, the import goes on
+            await db.rollback()
+            # The rollback expired the book the lookups build the rows from
+            await db.refresh(book)
+            logger.warning("A batch of %d flows failed to import into book %s: %s", len(flows), book.id, e.orig)
+            result.errors.extend((number, f"Not imported, the batch failed: {e.orig}") for number in flow_row_numbers)
+        else:
+            result.imported += len(flows)
+        logger.debug("Imported %d flows into book %s, %d rows rejected", result.imported, book.id, len(result.errors))
+        if parse_error is not None:
+            result.errors.append((row_number + 1, f"Invalid file: {parse_error}"))
+            break
+    logger.info("Imported %d flows into book %s, %d rows rejected", result.imported, book.id, len(result.errors))
+    return result
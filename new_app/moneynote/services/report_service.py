@@ -0,0 +1,76 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from ..schemas.report import ChartVO
+
+
+def build_chart(points: Iterable[Tuple[str, float]]) -> List[ChartVO]:
+    """
+    Turns (name, amount) points into a chart as the legacy reports did: zero points dropped, largest first, each
+    with its percentage of the total. A chart whose total is 0 is empty.
+    """
+    chart = sorted((ChartVO(x=x, y=y) for x, y in points if y != 0), key=lambda point: point.y, reverse=True)
+    total = sum(point.y for point in chart)
+    if total == 0:
+        return []
+    for point in chart:
+        point.percent = round(point.y * 100 / total, 2)
+    return chart
+
+
+def build_tree_chart(
+    nodes: Sequence,
+    sums: Dict[int, float],
+    selected_ids: Optional[Sequence[int]] = None,
+    charted_ids: Optional[Set[int]] = None,
+) -> List[ChartVO]:
+    """
+    Charts a category or tag tree, each point summing a node and its offspring.
+
+    Without a selection the points are the root nodes. A single selected node is drilled into: its children, plus
+    the node itself for the rest of its amount, booked on it directly or on offspring not charted. Several selected
+    nodes are charted side by side.
+
+    Args:
+        nodes (Sequence): The categories or tags, with id, name and parent_id.
+        sums (Dict[int, float]): The converted amount booked on each node id or below it.
+        selected_ids (Optional[Sequence[int]]): The ids of the nodes to chart.
+        charted_ids (Optional[Set[int]]): The ids of the nodes that may be charted, e.g. the enabled tags, all if
+            None. A node not charted still passes its amount up to its ancestors.
+    """
+    nodes_by_id = {node.id: node for node in nodes}
+    if charted_ids is None:
+        charted_ids = set(nodes_by_id)
+
+    def chart_parent_id(node) -> Optional[int]:
+        # The nearest charted ancestor, so that no amount is charted twice side by side
+        seen = {node.id}
+        parent = nodes_by_id.get(node.parent_id)
+        while parent is not None and parent.id not in seen:
+            if parent.id in charted_ids:
+                return parent.id
+            seen.add(parent.id)
+            parent = nodes_by_id.get(parent.parent_id)
+        return None
+
+    children = defaultdict(list)
+    for node in nodes:
+        if node.id in charted_ids:
+            children[chart_parent_id(node)].append(node)
+
+    def total(node) -> float:
+        return sums.get(node.id, 0)
+
+    points = []
+    if not selected_ids:
+        roots = children[None]
+    elif len(selected_ids) == 1:
+        requested = nodes_by_id.get(selected_ids[0])
+        if requested is None or requested.id not in charted_ids:
+            return []
+        roots = children[requested.id]
+        points.append((requested.name, total(requested) - sum(map(total, roots))))
+    else:
+        roots = [nodes_by_id[node_id] for node_id in selected_ids if node_id in charted_ids and node_id in nodes_by_id]
+    points.extend((node.name, total(node)) for node in roots)
+    return build_chart(points)
@@ -0,0 +1,23 @@
+from typing import Iterable, List, Type, TypeVar
+
+from pydantic import BaseModel
+
+Node = TypeVar("Node", bound=BaseModel)
+
+
+def build_tree(rows: Iterable, node_schema: Type[Node]) -> List[Node]:
+    """
+    Nests the rows of select_tree under their parents, in their order, as ready-to-render trees. A row whose
+    parent is not among them, e.g. filtered out, is a root, as the legacy buildTree made it.
+
+    Args:
+        rows (Iterable): Rows with the node's columns, a level and no children.
+        node_schema (Type[Node]): The schema of a node, with an id, a parent_id and a children list.
+    """
+    nodes = [node_schema.model_validate(row._mapping) for row in rows]
+    nodes_by_id = {node.id: node for node in nodes}
+    roots = []
+    for node in nodes:
+        parent = nodes_by_id.get(node.parent_id)
+        (parent.children if parent is not None and parent is not node else roots).append(node)
+    return roots
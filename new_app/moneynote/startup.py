@@ -0,0 +1,106 @@
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from fastapi import APIRouter, FastAPI
+from starlette.routing import BaseRoute, Match
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Seconds taken by each startup step (router imports, lifespan steps), in the order they ran
+STARTUP_TIMINGS: Dict[str, float] = {}
+
+# Loading a deferred router rearranges the app's route list, so only one loads at a time
+_load_lock = threading.Lock()
+
+
+@contextmanager
+def timed_step(name: str):
+    """Records how long a startup step takes in STARTUP_TIMINGS."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_TIMINGS[name] = time.perf_counter() - start
+
+
+def format_startup_timings() -> str:
+    lines = [f"{name:<32}{seconds * 1000:>10.1f} ms" for name, seconds in STARTUP_TIMINGS.items()]
+    lines.append(f"{'total':<32}{sum(STARTUP_TIMINGS.values()) * 1000:>10.1f} ms")
+    return "\n".join(lines)
+
+
+class DeferredRouter(BaseRoute):
+    """
+    Stands in for a router that is only imported when it is first needed.
+
+    It matches every path under the router's prefix. On the first match (or on load(), e.g. from a warm-up
+    hook) it imports the module, puts the router's routes in the app where it stood, and hands the request
+    back to the app's router, which now finds the real route.
+    """
+
+    def __init__(self, app: FastAPI, module_name: str, prefix: str, **include_kwargs):
+        self.app = app
+        self.module_name = module_name
+        self.prefix = prefix
+        self.include_kwargs = include_kwargs
+        self.loaded = False
+
+    def matches(self, scope: Scope):
+        if scope["type"] == "http":
+            path = scope["path"]
+            if path == self.prefix or path.startswith(self.prefix + "/"):
+                return Match.FULL, {}
+        return Match.NONE, {}
+
+    def load(self):
+        with _load_lock:
+            if self.loaded:
+                return
+            with timed_step(f"import {self.module_name}"):
+                module = importlib.import_module(self.module_name)
+            # Build the routes aside and swap in a new list, requests being routed meanwhile keep the old one
+            scratch_router = APIRouter(dependencies=self.app.router.dependencies, dependency_overrides_provider=self.app)
+            scratch_router.include_router(module.router, prefix=self.prefix, **self.include_kwargs)
+            routes = list(self.app.router.routes)
+            position = routes.index(self)
+            routes[position:position + 1] = scratch_router.routes
+            self.app.router.routes = routes
+            self.app.openapi_schema = None
+            self.loaded = True
+            logger.info("Loaded deferred router %s", self.module_name)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send):
+        if not self.loaded:
+            await asyncio.to_thread(self.load)
+        await self.app.router.app(scope, receive, send)
+
+
+def include_deferred_router(app: FastAPI, module_name: str, prefix: str, **include_kwargs) -> DeferredRouter:
+    """
+    Registers a router to be imported on its first request instead of at startup.
+
+    Args:
+        app (FastAPI): The app.
+        module_name (str): The module holding the router, e.g. "moneynote.routers.reports".
+        prefix (str): The path prefix every route of the router is under.
+        **include_kwargs: Passed to app.include_router, e.g. tags.
+    """
+    deferred_router = DeferredRouter(app, module_name, prefix, **include_kwargs)
+    app.router.routes.append(deferred_router)
+    return deferred_router
+
+
+def get_deferred_routers(app: FastAPI) -> List[DeferredRouter]:
+    return [route for route in app.router.routes if isinstance(route, DeferredRouter)]
+
+
+def warm_up(app: FastAPI):
+    """Imports every deferred router that has not been loaded yet."""
+    for deferred_router in get_deferred_routers(app):
+        deferred_router.load()
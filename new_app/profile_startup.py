@@ -0,0 +1,114 @@
+"""
+Profiles and benchmarks the app's cold start.
+
+Each run starts a fresh interpreter that imports main, runs the lifespan and serves a first request, and
+reports how long each phase took. The import time of every module comes from python -X importtime.
+
+    $ python profile_startup.py --runs 10
+    $ python profile_startup.py --runs 10 --defer      # with DEFER_HEAVY_ROUTERS=true
+    $ python profile_startup.py --imports 30           # the 30 slowest imports
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in the fresh interpreter, prints the phase timings as JSON on its last line
+COLD_START_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+from moneynote.startup import STARTUP_TIMINGS
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    client.get("/")
+    served = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - start,
+    "lifespan_seconds": started - imported,
+    "first_request_seconds": served - started,
+    "steps": STARTUP_TIMINGS,
+}))
+"""
+
+
+def run_cold_start(env: dict) -> dict:
+    """Starts the app in a fresh interpreter and returns its phase timings, plus the process wall-clock time."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_START_SCRIPT],
+        cwd=APP_DIRECTORY,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process_seconds"] = time.perf_counter() - start
+    return timings
+
+
+def get_import_times(env: dict) -> list:
+    """
+    Returns (cumulative microseconds, module) for every module imported by main, slowest first,
+    parsed from python -X importtime.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=APP_DIRECTORY,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        import_times.append((int(cumulative), module.strip()))
+    return sorted(import_times, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile and benchmark the app's cold start.")
+    parser.add_argument("--runs", type=int, default=5, help="number of cold starts to time")
+    parser.add_argument("--imports", type=int, default=20, help="number of slowest imports to list, 0 to skip")
+    parser.add_argument("--defer", action="store_true", help="defer the heavy routers (DEFER_HEAVY_ROUTERS=true)")
+    args = parser.parse_args()
+
+    env = dict(
+        os.environ,
+        DEFER_HEAVY_ROUTERS=str(args.defer).lower(),
+        # The benchmark measures startup, not the background warm-up or the file watcher
+        WARM_UP_DEFERRED_ROUTERS="false",
+        REFERENCE_DATA_RELOAD_INTERVAL_SECONDS="0",
+    )
+
+    if args.imports:
+        print(f"{'module':<60}{'cumulative (ms)':>16}")
+        for cumulative, module in get_import_times(env)[:args.imports]:
+            print(f"{module:<60}{cumulative / 1000:>16.1f}")
+
+    runs = [run_cold_start(env) for _ in range(args.runs)]
+
+    print("\nStartup steps of the last run")
+    for step, seconds in runs[-1]["steps"].items():
+        print(f"{step:<60}{seconds * 1000:>16.1f}")
+
+    print(f"\n{args.runs} cold starts, DEFER_HEAVY_ROUTERS={str(args.defer).lower()}")
+    print(f"{'phase':<24}{'min (ms)':>10}{'median (ms)':>13}{'max (ms)':>10}")
+    for phase in ("import_seconds", "lifespan_seconds", "first_request_seconds", "process_seconds"):
+        values = [run[phase] * 1000 for run in runs]
+        print(f"{phase.removesuffix('_seconds'):<24}{min(values):>10.1f}{statistics.median(values):>13.1f}{max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Rebuilds the daily report rollup from the balance flows.
+
+The rollup is kept up to date as flows are written, run this after changing REPORT_UTC_OFFSET_MINUTES or writing
+flows outside the app.
+
+    $ python rebuild_rollups.py             # every book
+    $ python rebuild_rollups.py --book 3
+"""
+import argparse
+import asyncio
+import time
+
+from database import SessionLocal, engine
+from moneynote.crud import crud_rollup
+
+
+async def rebuild(book_id=None):
+    start = time.perf_counter()
+    async with SessionLocal() as session:
+        await crud_rollup.rebuild(session, book_id)
+        await session.commit()
+    await engine.dispose()
+    scope = f"book {book_id}" if book_id is not None else "every book"
+    print(f"Rebuilt the daily rollup of {scope} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily report rollup from the balance flows.")
+    parser.add_argument("--book", type=int, help="id of the book to rebuild, every book if omitted")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.book))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Deletes the flow file blobs no file references anymore.
+
+Deleting a file, or its flow, leaves its blob in the store, since an upload of the same content may be about to use
+it again. Run this from time to time: it only deletes the unreferenced blobs that have not been stored for
+BLOB_SWEEP_GRACE_SECONDS.
+
+    $ python sweep_blobs.py
+    $ python sweep_blobs.py --grace-seconds 3600
+"""
+import argparse
+import asyncio
+import time
+
+from config import settings
+from database import SessionLocal, engine
+from moneynote.services.gcs_service import create_blob_store, sweep_blobs
+
+
+async def sweep(grace_seconds: int):
+    start = time.perf_counter()
+    async with SessionLocal() as session:
+        deleted = await sweep_blobs(session, create_blob_store(), grace_seconds)
+    await engine.dispose()
+    print(f"Swept {deleted} unreferenced blobs in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete the flow file blobs no file references anymore.")
+    parser.add_argument(
+        "--grace-seconds",
+        type=int,
+        default=settings.BLOB_SWEEP_GRACE_SECONDS,
+        help="keep unreferenced blobs stored more recently than this",
+    )
+    args = parser.parse_args()
+    asyncio.run(sweep(args.grace_seconds))
+
+
+if __name__ == "__main__":
+    main()
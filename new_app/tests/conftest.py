@@ -0,0 +1,66 @@
+import pytest
+from database import create_engine, create_session_factory, create_tables
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db_engine(tmp_path):
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    await create_tables(engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db_session(db_engine):
+    async with create_session_factory(db_engine)() as session:
+        yield session
+
+
+@pytest.fixture
+async def api_client(db_engine):
+    """An HTTP client of the app on the test database, authenticated as test-user."""
+    import jwt
+    from httpx import ASGITransport, AsyncClient
+    from main import app
+    from moneynote.routers.deps import get_db
+
+    session_factory = create_session_factory(db_engine)
+
+    async def get_test_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_test_db
+    token = jwt.encode({"sub": "test-user"}, "secret", algorithm="HS256")
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+        headers={"Authorization": f"Bearer {token}"},
+    ) as client:
+        yield client
+    app.dependency_overrides.pop(get_db)
+
+
+@pytest.fixture
+async def user_book(db_session):
+    """test-user, with a group that holds a book and an account, both the user's defaults."""
+    from moneynote.models import Account, Book, Group, User, UserGroupRelation
+
+    user = User(username="test-user")
+    group = Group(name="Group", defaultCurrencyCode="USD")
+    db_session.add_all([user, group])
+    await db_session.flush()
+    book = Book(name="Book", group_id=group.id, defaultCurrencyCode="USD")
+    account = Account(name="Cash", group_id=group.id, type=100, currencyCode="USD", balance=0, initialBalance=0)
+    db_session.add_all([book, account, UserGroupRelation(user_id=user.id, group_id=group.id, role=1)])
+    await db_session.flush()
+    user.defaultGroup_id = group.id
+    user.defaultBook_id = book.id
+    group.defaultBook_id = book.id
+    await db_session.commit()
+    return {"user": user, "group": group, "book": book, "account": account}
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+from moneynote.crud import crud_account, crud_balance_flow
+from moneynote.models import Account, BalanceFlow
+from sqlalchemy import select, update
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add_accounts(db_session, group_id, count=3):
+    accounts = [
+        Account(name=f"A{i}", group_id=group_id, type=100, currencyCode="USD", balance=100 * i, initialBalance=100 * i)
+        for i in range(count)
+    ]
+    db_session.add_all(accounts)
+    await db_session.flush()
+    return [account.id for account in accounts]
+
+def _random_flow(rng, book_id, account_ids):
+    flow_type = rng.choice([100, 200, 300, 400])
+    account_id, to_id = rng.sample(account_ids, 2)
+    amount = rng.randint(1, 100)
+    return BalanceFlow(
+        book_id=book_id,
+        type=flow_type,
+        amount=amount,
+        convertedAmount=amount * 2 if flow_type == 300 else amount,
+        account_id=account_id if rng.random() > 0.1 else None,
+        to_id=to_id if flow_type == 300 else None,
+        createTime=rng.randint(0, 10**9),
+        confirm=rng.random() > 0.3,
+        include=True,
+    )
+
+async def _balances(db_session, account_ids):
+    rows = await db_session.execute(select(Account.id, Account.balance).where(Account.id.in_(account_ids)))
+    return {account_id: pytest.approx(balance) for account_id, balance in rows}
+
+async def test_incremental_balances_match_the_flows(db_session, user_book):
+    rng = random.Random(11)
+    account_ids = await _add_accounts(db_session, user_book["group"].id)
+    flows = [
+        await crud_balance_flow.create_flow(db_session, _random_flow(rng, user_book["book"].id, account_ids))
+        for _ in range(50)
+    ]
+    for flow in rng.sample(flows, 15):
+        replacement = _random_flow(rng, user_book["book"].id, account_ids)
+        await crud_balance_flow.update_flow(db_session, flow, {
+            name: getattr(replacement, name) for name in ("type", "amount", "convertedAmount", "account_id", "to_id")
+        })
+    for flow in rng.sample(flows, 15):
+        await crud_balance_flow.confirm_flow(db_session, flow)
+    for flow in rng.sample(flows, 10):
+        await crud_balance_flow.delete_flow(db_session, flow)
+    await db_session.commit()
+
+    assert await crud_account.check_balances(db_session) == []
+
+async def test_loaded_accounts_see_the_change(db_session, user_book):
+    account = user_book["account"]
+    flow = BalanceFlow(book_id=user_book["book"].id, type=100, amount=30, account_id=account.id, createTime=0, confirm=True)
+    await crud_balance_flow.create_flow(db_session, flow)
+    await db_session.commit()
+    assert account.balance == -30
+    await crud_balance_flow.delete_flow(db_session, flow)
+    await db_session.commit()
+    assert account.balance == 0
+
+async def test_transfer_moves_the_converted_amount(db_session, user_book):
+    from_id, to_id = await _add_accounts(db_session, user_book["group"].id, 2)
+    flow = BalanceFlow(
+        book_id=user_book["book"].id, type=300, amount=10, convertedAmount=15, account_id=from_id, to_id=to_id,
+        createTime=0, confirm=False,
+    )
+    await crud_balance_flow.create_flow(db_session, flow)
+    assert await _balances(db_session, [from_id, to_id]) == {from_id: 0, to_id: 100}
+    await crud_balance_flow.confirm_flow(db_session, flow)
+    assert await _balances(db_session, [from_id, to_id]) == {from_id: -10, to_id: 115}
+
+async def test_check_and_repair_drift(db_session, user_book):
+    account_ids = await _add_accounts(db_session, user_book["group"].id)
+    await crud_balance_flow.create_flow(db_session, BalanceFlow(
+        book_id=user_book["book"].id, type=200, amount=50, account_id=account_ids[1], createTime=0, confirm=True,
+    ))
+    await db_session.execute(update(Account).where(Account.id == account_ids[1]).values(balance=0))
+    await db_session.commit()
+
+    drifts = await crud_account.check_balances(db_session, user_book["group"].id)
+    assert [(drift.account_id, drift.expected_balance, drift.drift) for drift in drifts] == [(account_ids[1], 150, -150)]
+    await crud_account.repair_balances(db_session, drifts)
+    await db_session.commit()
+    assert await crud_account.check_balances(db_session) == []
@@ -0,0 +1,59 @@
+import pytest
+from moneynote.crud import crud_book, crud_category
+from moneynote.models import Book, Category, Payee, Tag
+from sqlalchemy import select
+
+pytestmark = pytest.mark.anyio
+
+
+def _row(id, parent_id, name):
+    return {"id": id, "parent_id": parent_id, "name": name, "type": 100}
+
+def test_tree_levels():
+    rows = [_row(3, 2, "leaf"), _row(1, None, "root"), _row(2, 1, "branch"), _row(4, 99, "orphan"), _row(5, 1, "b2")]
+    levels = crud_category.tree_levels(rows)
+    assert [[row["name"] for row in level] for level in levels] == [["root", "orphan"], ["branch", "b2"], ["leaf"]]
+
+    with pytest.raises(ValueError, match="cycle"):
+        crud_category.tree_levels([_row(1, None, "root"), _row(2, 3, "a"), _row(3, 2, "b")])
+    with pytest.raises(ValueError, match="duplicated"):
+        crud_category.tree_levels([_row(1, None, "a"), _row(1, None, "b")])
+
+async def _tree(db_session, book_id):
+    rows = (await db_session.execute(
+        select(Category.id, Category.parent_id, Category.name).where(Category.book_id == book_id)
+    )).all()
+    names = {category_id: name for category_id, _, name in rows}
+    return {name: names.get(parent_id) for _, parent_id, name in rows}
+
+async def test_copy_book_items(db_session, user_book):
+    source = user_book["book"]
+    # Children added before their parents, so that the ids do not follow the levels
+    leaf = Category(name="Leaf", book_id=source.id, type=100, sort=3)
+    db_session.add(leaf)
+    await db_session.flush()
+    root = Category(name="Root", book_id=source.id, type=100)
+    db_session.add(root)
+    await db_session.flush()
+    branch = Category(name="Branch", book_id=source.id, type=100, parent_id=root.id, notes="n")
+    db_session.add(branch)
+    await db_session.flush()
+    leaf.parent_id = branch.id
+    tag = Tag(name="Trip", book_id=source.id, canIncome=False)
+    db_session.add_all([tag, Payee(name="Shop", book_id=source.id, canExpense=False)])
+    await db_session.flush()
+    db_session.add(Tag(name="Hotel", book_id=source.id, parent_id=tag.id))
+    book = Book(name="Copy", group_id=user_book["group"].id)
+    db_session.add(book)
+    await db_session.flush()
+
+    await crud_book.copy_book_items(db_session, source.id, book.id)
+    await db_session.commit()
+
+    assert await _tree(db_session, book.id) == {"Root": None, "Branch": "Root", "Leaf": "Branch"}
+    copied = (await db_session.scalars(select(Category).where(Category.book_id == book.id, Category.name == "Leaf"))).one()
+    assert (copied.sort, copied.enable, copied.type) == (3, True, 100)
+    tags = (await db_session.scalars(select(Tag).where(Tag.book_id == book.id).order_by(Tag.id))).all()
+    assert [(tag.name, tag.canIncome, tag.parent_id) for tag in tags] == [("Trip", False, None), ("Hotel", True, tags[0].id)]
+    payee = (await db_session.scalars(select(Payee).where(Payee.book_id == book.id))).one()
+    assert (payee.name, payee.canExpense, payee.enable) == ("Shop", False, True)
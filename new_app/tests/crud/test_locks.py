@@ -0,0 +1,26 @@
+import sqlite3
+
+import pytest
+from database import create_engine, create_session_factory, create_tables
+from moneynote.crud.locks import lock_for_inserts
+from moneynote.models import Group
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_lock_for_inserts_blocks_other_writers(tmp_path):
+    path = tmp_path / "locks.db"
+    engine = create_engine(f"sqlite+aiosqlite:///{path}")
+    await create_tables(engine)
+    other = sqlite3.connect(path, timeout=0)
+    try:
+        async with create_session_factory(engine)() as session:
+            await lock_for_inserts(session, Group)
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                other.execute("INSERT INTO t_user_group (name, defaultCurrencyCode, enable) VALUES ('g', 'USD', 1)")
+            await session.commit()
+        other.execute("INSERT INTO t_user_group (name, defaultCurrencyCode, enable) VALUES ('g', 'USD', 1)")
+        other.commit()
+    finally:
+        other.close()
+        await engine.dispose()
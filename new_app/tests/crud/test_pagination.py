@@ -0,0 +1,59 @@
+import pytest
+from moneynote.crud import crud_balance_flow
+from moneynote.crud.pagination import InvalidCursorError, decode_cursor, encode_cursor, paginate
+from moneynote.models import BalanceFlow
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add_flows(db_session, book_id, count):
+    # Three flows per createTime, so pages split rows that tie on it
+    db_session.add_all(
+        BalanceFlow(book_id=book_id, type=100, amount=i, convertedAmount=i, createTime=1000 + i // 3)
+        for i in range(count)
+    )
+    await db_session.commit()
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor([1700000000000, 42]), 2) == [1700000000000, 42]
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor([1]), encode_cursor([[1], 2]), encode_cursor([True, 1]), "e30"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, 2)
+
+async def test_keyset_pages_match_offset_pages(db_session, user_book):
+    book_id = user_book["book"].id
+    await _add_flows(db_session, book_id, 25)
+    query = crud_balance_flow.select_flows(book_id)
+    order = crud_balance_flow.FLOW_ORDER
+
+    offset_ids, page = [], 0
+    while True:
+        result = await paginate(db_session, query, order, size=4, page=page)
+        assert result.total == 25
+        offset_ids += [flow.id for flow in result.items]
+        if result.next_cursor is None:
+            break
+        page += 1
+
+    keyset_ids, cursor = [], ""
+    while cursor is not None:
+        result = await paginate(db_session, query, order, size=4, cursor=cursor)
+        assert result.total is None
+        keyset_ids += [flow.id for flow in result.items]
+        cursor = result.next_cursor
+
+    assert keyset_ids == offset_ids
+    assert len(set(keyset_ids)) == 25
+    times = [(flow.createTime, flow.id) for flow in (await db_session.scalars(query)).all()]
+    assert [flow_id for _, flow_id in sorted(times, reverse=True)] == keyset_ids
+
+async def test_offset_page_cursor_continues_in_keyset_mode(db_session, user_book):
+    book_id = user_book["book"].id
+    await _add_flows(db_session, book_id, 10)
+    query = crud_balance_flow.select_flows(book_id)
+    first = await paginate(db_session, query, crud_balance_flow.FLOW_ORDER, size=4, page=0)
+    second_offset = await paginate(db_session, query, crud_balance_flow.FLOW_ORDER, size=4, page=1)
+    second_keyset = await paginate(db_session, query, crud_balance_flow.FLOW_ORDER, size=4, cursor=first.next_cursor)
+    assert [flow.id for flow in second_keyset.items] == [flow.id for flow in second_offset.items]
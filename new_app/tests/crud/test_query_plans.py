@@ -0,0 +1,98 @@
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from database import create_engine
+from moneynote.crud import crud_balance_flow, crud_category, crud_rollup
+from moneynote.models import Base, Category, Tag
+from moneynote.models.balance_flow import FLOW_TYPE_EXPENSE
+from moneynote.models.daily_rollup import (ROLLUP_DIMENSION_CATEGORY, ROLLUP_DIMENSION_FLOW, ROLLUP_DIMENSION_PAYEE,
+                                           ROLLUP_DIMENSION_TAG)
+from sqlalchemy import text
+
+pytestmark = pytest.mark.anyio
+
+ALEMBIC_INI = Path(__file__).parents[2] / "alembic.ini"
+
+
+def _keyset_page(query):
+    """A list query as paginate runs it in keyset mode."""
+    order = crud_balance_flow.FLOW_ORDER
+    return query.where(order.after([10**12, 100])).order_by(*order.order_by()).limit(21)
+
+DIMENSIONS = {
+    "flow": ROLLUP_DIMENSION_FLOW,
+    "category": ROLLUP_DIMENSION_CATEGORY,
+    "tag": ROLLUP_DIMENSION_TAG,
+    "payee": ROLLUP_DIMENSION_PAYEE,
+}
+
+# The flows of a partial day at the edge of a report's range, summed from the flow table
+_reported_flows = crud_balance_flow.select_flows(
+    1, min_time=0, max_time=86399999, flow_type=FLOW_TYPE_EXPENSE, confirm=True, include=True
+)
+
+# The hot queries, with every filter a request can set
+HOT_QUERIES = {
+    "flows": _keyset_page(crud_balance_flow.select_flows(1, min_time=0, max_time=10**13)),
+    "flows_of_type": _keyset_page(crud_balance_flow.select_flows(1, flow_type=FLOW_TYPE_EXPENSE)),
+    "flows_of_categories": _keyset_page(crud_balance_flow.select_flows(1, min_time=0, category_ids=[1, 2])),
+    "flows_of_tags": _keyset_page(crud_balance_flow.select_flows(1, min_time=0, tag_ids=[1, 2])),
+    "flows_of_account": _keyset_page(crud_balance_flow.select_flows(1, account_id=1)),
+    "export_flows": crud_balance_flow.select_export_flows(1),
+    **{
+        f"{name}_sums": crud_balance_flow.select_dimension_sums(dimension, _reported_flows)
+        for name, dimension in DIMENSIONS.items()
+    },
+    **{
+        f"{name}_rollup_sums": crud_rollup.select_rollup_sums(1, dimension, FLOW_TYPE_EXPENSE, 0, 20000)
+        for name, dimension in DIMENSIONS.items()
+    },
+    **{
+        f"{name}_tree_sums": crud_balance_flow.select_tree_sums(
+            dimension, crud_rollup.select_rollup_sums(1, dimension, FLOW_TYPE_EXPENSE, 0, 20000)
+        )
+        for name, dimension in (("category", ROLLUP_DIMENSION_CATEGORY), ("tag", ROLLUP_DIMENSION_TAG))
+    },
+    "category_tree": crud_category.select_tree(Category, 1),
+    "tag_tree": crud_category.select_tree(Tag, 1),
+}
+
+
+def _upgrade(connection):
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+@pytest.fixture
+async def migrated_engine(tmp_path):
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrated.db'}")
+    async with engine.begin() as connection:
+        await connection.run_sync(_upgrade)
+    yield engine
+    await engine.dispose()
+
+async def test_migrations_match_models(migrated_engine):
+    async with migrated_engine.connect() as connection:
+        differences = await connection.run_sync(
+            lambda sync_connection: compare_metadata(MigrationContext.configure(sync_connection), Base.metadata)
+        )
+    assert differences == []
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+async def test_hot_query_uses_indexes(migrated_engine, name):
+    sql = str(HOT_QUERIES[name].compile(migrated_engine.sync_engine, compile_kwargs={"literal_binds": True}))
+    async with migrated_engine.connect() as connection:
+        plan = [row[3] for row in await connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    # A materialized subquery holds rows already searched for, e.g. the sums rolled up a tree
+    materialized = {step.split()[1] for step in plan if step.startswith("MATERIALIZE")}
+    full_scans = [step for step in plan if step.startswith("SCAN") and step.split()[1] not in materialized]
+    assert full_scans == [], f"{name} scans a table:\n" + "\n".join(plan)
+    if name.startswith("flows"):
+        # A keyset page is read in order from the index, sorting would read every row of the range first
+        sorts = [step for step in plan if "ORDER BY" in step]
+        assert sorts == [], f"{name} sorts its rows:\n" + "\n".join(plan)
@@ -0,0 +1,121 @@
+import random
+
+import pytest
+from moneynote.crud import crud_balance_flow, crud_rollup
+from moneynote.crud.crud_rollup import DAY_MS, day_start, flow_day
+from moneynote.models import BalanceFlow, Category, CategoryRelation, DailyRollup, Payee, Tag, TagRelation
+from moneynote.models.daily_rollup import (ROLLUP_DIMENSION_CATEGORY, ROLLUP_DIMENSION_FLOW, ROLLUP_DIMENSION_PAYEE,
+                                           ROLLUP_DIMENSION_TAG)
+from sqlalchemy import select
+
+pytestmark = pytest.mark.anyio
+
+DIMENSIONS = [ROLLUP_DIMENSION_FLOW, ROLLUP_DIMENSION_CATEGORY, ROLLUP_DIMENSION_TAG, ROLLUP_DIMENSION_PAYEE]
+
+
+async def _rollup_rows(db_session):
+    rows = (await db_session.execute(select(DailyRollup))).scalars().all()
+    return {
+        (row.book_id, row.dimension, row.flow_type, row.day, row.dimension_id): (
+            pytest.approx(row.amount), pytest.approx(row.convertedAmount), row.flowCount
+        )
+        for row in rows
+    }
+
+async def _book_ids(db_session, book_id):
+    categories = [Category(name=f"C{i}", book_id=book_id, type=100) for i in range(3)]
+    tags = [Tag(name=f"T{i}", book_id=book_id) for i in range(3)]
+    payees = [Payee(name=f"P{i}", book_id=book_id) for i in range(2)]
+    db_session.add_all([*categories, *tags, *payees])
+    await db_session.flush()
+    return [c.id for c in categories], [t.id for t in tags], [p.id for p in payees]
+
+async def _create_random_flow(db_session, rng, book_id, category_ids, tag_ids, payee_ids):
+    amounts = [rng.randint(1, 100) for _ in rng.sample(category_ids, rng.randint(1, 2))]
+    flow = BalanceFlow(
+        book_id=book_id,
+        type=rng.choice([100, 200]),
+        amount=sum(amounts),
+        convertedAmount=sum(amounts) * 2,
+        createTime=rng.randint(-3 * DAY_MS, 10 * DAY_MS),
+        payee_id=rng.choice([None, *payee_ids]),
+        confirm=rng.random() > 0.2,
+        include=rng.random() > 0.2,
+    )
+    categories = [
+        CategoryRelation(category_id=category_id, amount=amount, convertedAmount=amount * 2)
+        for category_id, amount in zip(rng.sample(category_ids, len(amounts)), amounts)
+    ]
+    tags = [
+        TagRelation(tag_id=tag_id, amount=flow.amount, convertedAmount=flow.convertedAmount)
+        for tag_id in rng.sample(tag_ids, rng.randint(0, 2))
+    ]
+    return await crud_balance_flow.create_flow(db_session, flow, categories, tags)
+
+def test_flow_day_floors_before_1970():
+    assert flow_day(0) == 0
+    assert flow_day(DAY_MS - 1) == 0
+    assert flow_day(-1) == -1
+    assert day_start(flow_day(-1)) == -DAY_MS
+
+async def test_incremental_rollup_matches_rebuild(db_session, user_book):
+    rng = random.Random(7)
+    book_id = user_book["book"].id
+    category_ids, tag_ids, payee_ids = await _book_ids(db_session, book_id)
+    flows = [
+        await _create_random_flow(db_session, rng, book_id, category_ids, tag_ids, payee_ids) for _ in range(60)
+    ]
+    for flow in rng.sample(flows, 15):
+        await crud_balance_flow.update_flow(
+            db_session,
+            flow,
+            {"createTime": flow.createTime + rng.randint(-DAY_MS, DAY_MS), "include": rng.random() > 0.5},
+            category_relations=[CategoryRelation(category_id=rng.choice(category_ids), amount=5, convertedAmount=10)],
+        )
+    for flow in rng.sample(flows, 10):
+        await crud_balance_flow.confirm_flow(db_session, flow)
+    for flow in rng.sample(flows, 10):
+        await crud_balance_flow.delete_flow(db_session, flow)
+    await db_session.commit()
+
+    incremental = await _rollup_rows(db_session)
+    await crud_rollup.rebuild(db_session, book_id)
+    await db_session.commit()
+    assert incremental == await _rollup_rows(db_session)
+    assert incremental
+
+async def test_deleting_every_flow_empties_the_rollup(db_session, user_book):
+    rng = random.Random(3)
+    book_id = user_book["book"].id
+    category_ids, tag_ids, payee_ids = await _book_ids(db_session, book_id)
+    flows = [await _create_random_flow(db_session, rng, book_id, category_ids, tag_ids, payee_ids) for _ in range(10)]
+    for flow in flows:
+        await crud_balance_flow.delete_flow(db_session, flow)
+    await db_session.commit()
+    assert await _rollup_rows(db_session) == {}
+
+@pytest.mark.parametrize("dimension", DIMENSIONS)
+async def test_dimension_sums_match_the_flows(db_session, user_book, dimension):
+    rng = random.Random(dimension)
+    book_id = user_book["book"].id
+    category_ids, tag_ids, payee_ids = await _book_ids(db_session, book_id)
+    for _ in range(80):
+        await _create_random_flow(db_session, rng, book_id, category_ids, tag_ids, payee_ids)
+    await db_session.commit()
+
+    ranges = [(None, None), (0, None), (None, 5 * DAY_MS - 1), (DAY_MS, 3 * DAY_MS - 1)]
+    ranges += [(rng.randint(-4 * DAY_MS, 11 * DAY_MS), None) for _ in range(3)]
+    ranges += [sorted(rng.randint(-4 * DAY_MS, 11 * DAY_MS) for _ in range(2)) for _ in range(10)]
+    # Within one day, and across two partial ones
+    ranges += [(DAY_MS + 10, DAY_MS + 5000), (2 * DAY_MS - 1000, 2 * DAY_MS + 1000)]
+    for min_time, max_time in ranges:
+        sums = await crud_balance_flow.get_dimension_sums(db_session, book_id, dimension, 100, min_time, max_time)
+        flows = crud_balance_flow.select_flows(book_id, min_time, max_time, 100, confirm=True, include=True)
+        expected = {
+            dimension_id: (pytest.approx(amount), pytest.approx(converted_amount))
+            for dimension_id, amount, converted_amount in await db_session.execute(
+                crud_balance_flow.select_dimension_sums(dimension, flows)
+            )
+            if amount is not None
+        }
+        assert {key: value for key, value in sums.items() if value != (0, 0)} == expected, (min_time, max_time)
@@ -0,0 +1,86 @@
+import pytest
+from moneynote.crud import crud_book, crud_category, crud_tag
+from moneynote.models import Book, Category, CategoryClosure, Tag, TagClosure
+from sqlalchemy import select
+
+pytestmark = pytest.mark.anyio
+
+
+async def _closure(db_session, closure):
+    rows = await db_session.execute(select(closure.ancestor_id, closure.descendant_id, closure.depth))
+    return set(rows.all())
+
+async def _assert_matches_rebuild(db_session, model, closure):
+    """The maintained index holds the rows a rebuild from parent_id does."""
+    maintained = await _closure(db_session, closure)
+    for statement in crud_category.closure_rebuild_statements(model):
+        await db_session.execute(statement)
+    assert maintained == await _closure(db_session, closure)
+
+async def _add_categories(db_session, book_id, *parents):
+    """Adds a category per parent index, None for a root, and returns them in order."""
+    categories = []
+    for i, parent in enumerate(parents):
+        parent_id = categories[parent].id if parent is not None else None
+        category = Category(name=f"C{i}", book_id=book_id, type=100, parent_id=parent_id)
+        categories.append(await crud_category.create_category(db_session, category))
+    return categories
+
+async def test_create_category(db_session, user_book):
+    c0, c1, c2, c3 = await _add_categories(db_session, user_book["book"].id, None, 0, 1, None)
+
+    assert await _closure(db_session, CategoryClosure) == {
+        (c0.id, c0.id, 0), (c1.id, c1.id, 0), (c2.id, c2.id, 0), (c3.id, c3.id, 0),
+        (c0.id, c1.id, 1), (c1.id, c2.id, 1), (c0.id, c2.id, 2),
+    }
+    assert await crud_category.get_tree_level(db_session, Category, c2.id) == 2
+    assert await crud_category.get_subtree_height(db_session, Category, c0.id) == 2
+    assert await crud_category.is_in_subtree(db_session, Category, c2.id, c0.id)
+    assert not await crud_category.is_in_subtree(db_session, Category, c0.id, c2.id)
+
+async def test_move_category(db_session, user_book):
+    c0, c1, c2, c3 = await _add_categories(db_session, user_book["book"].id, None, 0, 1, None)
+
+    await crud_category.move_category(db_session, c1, c3.id)
+    assert c1.parent_id == c3.id
+    assert await crud_category.get_tree_level(db_session, Category, c2.id) == 2
+    assert not await crud_category.is_in_subtree(db_session, Category, c2.id, c0.id)
+    assert await crud_category.is_in_subtree(db_session, Category, c2.id, c3.id)
+    await _assert_matches_rebuild(db_session, Category, CategoryClosure)
+
+    await crud_category.move_category(db_session, c1, None)
+    assert await crud_category.get_tree_level(db_session, Category, c2.id) == 1
+    await _assert_matches_rebuild(db_session, Category, CategoryClosure)
+
+async def test_delete_category(db_session, user_book):
+    c0, c1, c2, c3 = await _add_categories(db_session, user_book["book"].id, None, 0, 1, 1)
+
+    await crud_category.delete_category(db_session, c1)
+    for child in (c2, c3):
+        await db_session.refresh(child)
+        assert child.parent_id is None
+        assert await crud_category.get_tree_level(db_session, Category, child.id) == 0
+    await _assert_matches_rebuild(db_session, Category, CategoryClosure)
+
+async def test_tag_tree(db_session, user_book):
+    book_id = user_book["book"].id
+    trip = await crud_tag.create_tag(db_session, Tag(name="Trip", book_id=book_id))
+    hotel = await crud_tag.create_tag(db_session, Tag(name="Hotel", book_id=book_id, parent_id=trip.id))
+    work = await crud_tag.create_tag(db_session, Tag(name="Work", book_id=book_id))
+
+    await crud_tag.move_tag(db_session, trip, work.id)
+    assert await crud_category.get_tree_level(db_session, Tag, hotel.id) == 2
+    await _assert_matches_rebuild(db_session, Tag, TagClosure)
+    await crud_tag.delete_tag(db_session, trip)
+    assert await crud_category.get_tree_level(db_session, Tag, hotel.id) == 0
+    await _assert_matches_rebuild(db_session, Tag, TagClosure)
+
+async def test_copied_tree_is_indexed(db_session, user_book):
+    source = user_book["book"]
+    await _add_categories(db_session, source.id, None, 0, 1, 0)
+    book = Book(name="Copy", group_id=user_book["group"].id)
+    db_session.add(book)
+    await db_session.flush()
+
+    await crud_book.copy_book_items(db_session, source.id, book.id)
+    await _assert_matches_rebuild(db_session, Category, CategoryClosure)
@@ -0,0 +1,58 @@
+import pytest
+from moneynote.models import Account
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def accounts(db_session, user_book):
+    """Cash (checking, from user_book), a savings asset, a credit card and a loan."""
+    group_id = user_book["group"].id
+    savings = Account(name="Savings", group_id=group_id, type=300, currencyCode="USD", balance=500, initialBalance=500)
+    card = Account(
+        name="Card", group_id=group_id, type=200, currencyCode="USD", balance=-120, initialBalance=-120, creditLimit=1000
+    )
+    loan = Account(name="Loan", group_id=group_id, type=400, currencyCode="USD", balance=-300, initialBalance=-300)
+    excluded = Account(name="Hidden", group_id=group_id, type=300, currencyCode="USD", balance=99, include=False)
+    db_session.add_all([savings, card, loan, excluded])
+    await db_session.commit()
+    return {"cash": user_book["account"], "savings": savings, "card": card, "loan": loan}
+
+async def test_accounts_overview(api_client, accounts):
+    response = await api_client.get("/accounts/overview")
+    assert response.json() == [500, 420, 80]
+
+async def test_accounts_statistics(api_client, accounts):
+    assert (await api_client.get("/accounts/statistics", params={"type": 200})).json() == [-120, 1000, 880]
+
+async def test_adjust_balance(api_client, accounts):
+    cash = accounts["cash"]
+    response = await api_client.post(f"/accounts/{cash.id}/adjust", json={"createTime": 1000, "balance": 250})
+    assert response.status_code == 200
+    assert (await api_client.get("/accounts/overview")).json() == [750, 420, 330]
+    flows = (await api_client.get("/balance-flows", params={"type": 400})).json()["content"]
+    assert [(flow["amount"], flow["account_id"]) for flow in flows] == [(250, cash.id)]
+
+    response = await api_client.put(f"/accounts/{flows[0]['id']}/adjust", json={"createTime": 2000, "title": "Fix"})
+    assert response.status_code == 200
+    flow = (await api_client.get(f"/balance-flows/{flows[0]['id']}")).json()
+    assert (flow["createTime"], flow["title"], flow["amount"]) == (2000, "Fix", 250)
+
+    response = await api_client.post(f"/accounts/{cash.id}/adjust", json={"createTime": 1000, "balance": 250})
+    assert response.status_code == 400
+
+async def test_flow_writes_move_balances(api_client, accounts):
+    cash, savings = accounts["cash"], accounts["savings"]
+    flow = (await api_client.post("/balance-flows", json={
+        "type": 300, "createTime": 1000, "account": savings.id, "to": cash.id, "amount": 200,
+    })).json()
+    assert (await api_client.get("/accounts/statistics", params={"type": 100})).json()[0] == 200
+    await api_client.put(f"/balance-flows/{flow['id']}", json={"amount": 50})
+    assert (await api_client.get("/accounts/statistics", params={"type": 300})).json()[0] == 450 + 99
+    await api_client.delete(f"/balance-flows/{flow['id']}")
+    assert (await api_client.get("/accounts/statistics", params={"type": 100})).json()[0] == 0
+
+async def test_balance_report(api_client, accounts):
+    assets, debts = (await api_client.get("/reports/balance")).json()
+    assert assets == [{"x": "Savings", "y": 500, "percent": 100}]
+    assert debts == [{"x": "Loan", "y": 300, "percent": 71.43}, {"x": "Card", "y": 120, "percent": 28.57}]
@@ -0,0 +1,131 @@
+import pytest
+from moneynote.models import BalanceFlow, Book, Category, Group
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add_flows(db_session, book_id, count):
+    db_session.add_all(
+        BalanceFlow(book_id=book_id, type=100 if i % 2 else 200, amount=i, convertedAmount=i, createTime=1000 + i // 2)
+        for i in range(count)
+    )
+    await db_session.commit()
+
+async def test_query_balance_flows_offset_mode(api_client, db_session, user_book):
+    await _add_flows(db_session, user_book["book"].id, 7)
+    response = await api_client.get("/balance-flows", params={"book": user_book["book"].id, "page": 1, "size": 3})
+    assert response.status_code == 200
+    page = response.json()
+    assert page["number"] == 1
+    assert page["totalElements"] == 7
+    assert page["totalPages"] == 3
+    assert [flow["amount"] for flow in page["content"]] == [3, 2, 1]
+    assert page["nextCursor"]
+
+async def test_query_balance_flows_keyset_mode(api_client, db_session, user_book):
+    await _add_flows(db_session, user_book["book"].id, 7)
+    amounts, cursor = [], ""
+    while cursor is not None:
+        # Without book, the user's default book
+        response = await api_client.get("/balance-flows", params={"size": 3, "cursor": cursor})
+        page = response.json()
+        assert page["totalElements"] is None
+        amounts += [flow["amount"] for flow in page["content"]]
+        cursor = page["nextCursor"]
+    assert amounts == [6, 5, 4, 3, 2, 1, 0]
+
+async def test_query_balance_flows_filters(api_client, db_session, user_book):
+    await _add_flows(db_session, user_book["book"].id, 7)
+    response = await api_client.get("/balance-flows", params={"type": 100, "minTime": 1001, "cursor": ""})
+    assert [flow["amount"] for flow in response.json()["content"]] == [5, 3]
+
+async def test_query_balance_flows_invalid_cursor(api_client, user_book):
+    response = await api_client.get("/balance-flows", params={"cursor": "garbage"})
+    assert response.status_code == 400
+
+async def test_query_balance_flows_other_book(api_client, db_session, user_book):
+    group = Group(name="Other")
+    db_session.add(group)
+    await db_session.flush()
+    book = Book(name="Other", group_id=group.id)
+    db_session.add(book)
+    await db_session.commit()
+    response = await api_client.get("/balance-flows", params={"book": book.id})
+    assert response.status_code == 404
+
+async def _add_categories(db_session, book_id):
+    categories = [Category(name="Food", book_id=book_id, type=100), Category(name="Salary", book_id=book_id, type=200)]
+    db_session.add_all(categories)
+    await db_session.commit()
+    return categories
+
+async def test_add_update_delete_balance_flow(api_client, db_session, user_book):
+    food, salary = await _add_categories(db_session, user_book["book"].id)
+    response = await api_client.post("/balance-flows", json={
+        "type": 100,
+        "createTime": 1000,
+        "account": user_book["account"].id,
+        "categories": [{"category": food.id, "amount": 12.5}],
+    })
+    assert response.status_code == 200
+    flow = response.json()
+    assert (flow["amount"], flow["convertedAmount"]) == (12.5, 12.5)
+    assert (await api_client.get("/balance-flows/statistics")).json() == [12.5, 0, -12.5]
+
+    response = await api_client.put(f"/balance-flows/{flow['id']}", json={
+        "categories": [{"category": food.id, "amount": 20}],
+    })
+    assert response.json()["amount"] == 20
+    details = (await api_client.get(f"/balance-flows/{flow['id']}")).json()
+    assert details["categories"] == [{"category_id": food.id, "amount": 20, "convertedAmount": 20}]
+    assert (await api_client.get("/balance-flows/statistics")).json() == [20, 0, -20]
+
+    assert (await api_client.delete(f"/balance-flows/{flow['id']}")).status_code == 200
+    assert (await api_client.get(f"/balance-flows/{flow['id']}")).status_code == 404
+    assert (await api_client.get("/balance-flows/statistics")).json() == [0, 0, 0]
+
+async def test_confirm_balance_flow(api_client, db_session, user_book):
+    food, salary = await _add_categories(db_session, user_book["book"].id)
+    flow = (await api_client.post("/balance-flows", json={
+        "type": 200,
+        "createTime": 1000,
+        "categories": [{"category": salary.id, "amount": 100}],
+        "confirm": False,
+    })).json()
+    assert (await api_client.get("/balance-flows/statistics")).json() == [0, 0, 0]
+    response = await api_client.patch(f"/balance-flows/{flow['id']}/confirm")
+    assert response.json()["confirm"] is True
+    assert (await api_client.get("/balance-flows/statistics")).json() == [0, 100, 100]
+
+async def test_add_balance_flow_validation(api_client, db_session, user_book):
+    food, salary = await _add_categories(db_session, user_book["book"].id)
+    response = await api_client.post("/balance-flows", json={"type": 100, "createTime": 1000, "categories": []})
+    assert response.status_code == 400
+    response = await api_client.post("/balance-flows", json={
+        "type": 100, "createTime": 1000, "categories": [{"category": food.id + 100, "amount": 1}],
+    })
+    assert response.status_code == 404
+    response = await api_client.post("/balance-flows", json={"type": 300, "createTime": 1000, "amount": 1})
+    assert response.status_code == 400
+
+async def test_statistics_with_filters(api_client, db_session, user_book):
+    food, salary = await _add_categories(db_session, user_book["book"].id)
+    for title, amount in [("lunch", 10), ("dinner", 30)]:
+        await api_client.post("/balance-flows", json={
+            "type": 100, "title": title, "createTime": 1000, "categories": [{"category": food.id, "amount": amount}],
+        })
+    assert (await api_client.get("/balance-flows/statistics", params={"title": "lunch"})).json() == [10, 0, -10]
+    assert (await api_client.get("/balance-flows/statistics", params={"minTime": 1001})).json() == [0, 0, 0]
+
+async def test_import_balance_flows(api_client, db_session, user_book):
+    await _add_categories(db_session, user_book["book"].id)
+    csv_file = "type,amount,createTime,account,category\nexpense,10,1000,Cash,Food\nexpense,5,1000,Cash,Nope\n"
+    response = await api_client.post("/balance-flows/import", files={"file": ("statement.csv", csv_file.encode("utf-8-sig"))})
+    assert response.status_code == 200
+    assert response.json() == {"imported": 1, "errors": [{"row": 2, "error": "Category Nope not found"}]}
+
+    json_file = '{"type": "income", "amount": 30, "createTime": 2000, "category": "Salary"}\n'
+    response = await api_client.post("/balance-flows/import", files={"file": ("flows.jsonl", json_file.encode())})
+    assert response.json() == {"imported": 1, "errors": []}
+    assert (await api_client.get("/balance-flows/statistics")).json() == [10, 30, 20]
+    assert (await api_client.post("/balance-flows/import", params={"format": "xml"}, files={"file": ("a", b"")})).status_code == 400
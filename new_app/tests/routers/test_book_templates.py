@@ -19,3 +19,26 @@ def test_get_all_book_templates_authenticated():
     assert len(response_data) > 0
     for item in response_data:
         BookTemplate(**item)
+
+def test_get_all_book_templates_not_modified():
+    token = jwt.encode({"sub": "test-user"}, "secret", algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/book-templates/all", headers=headers)
+    etag = response.headers["ETag"]
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    response = client.get("/book-templates/all", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+def test_get_all_book_templates_encodings():
+    token = jwt.encode({"sub": "test-user"}, "secret", algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    plain = client.get("/book-templates/all", headers={**headers, "Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+
+    gzipped = client.get("/book-templates/all", headers={**headers, "Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.json() == plain.json()
+    assert gzipped.headers["ETag"] == plain.headers["ETag"]
@@ -0,0 +1,135 @@
+import csv
+import io
+
+import pytest
+from moneynote.models import Account, BalanceFlow, Book, Category, CategoryRelation, Group, Payee, Tag, TagRelation
+from moneynote.services import data_loader
+from sqlalchemy import select
+from tests.services.test_export_service import read_xlsx
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add_flows(db_session, user_book):
+    book, account = user_book["book"], user_book["account"]
+    bank = Account(name="Bank", group_id=user_book["group"].id, type=100, currencyCode="USD", balance=0)
+    category = Category(name="Food", book_id=book.id, type=100)
+    tag = Tag(name="Trip", book_id=book.id)
+    payee = Payee(name="Shop", book_id=book.id)
+    db_session.add_all([bank, category, tag, payee])
+    await db_session.flush()
+    expense = BalanceFlow(
+        book_id=book.id, type=100, title="Lunch", amount=12.5, convertedAmount=12.5, createTime=0,
+        account_id=account.id, payee_id=payee.id, notes="with a, comma", confirm=True, include=True,
+    )
+    transfer = BalanceFlow(
+        book_id=book.id, type=300, amount=100, convertedAmount=100, createTime=3_600_000,
+        account_id=account.id, to_id=bank.id, confirm=False, include=True,
+    )
+    db_session.add_all([expense, transfer])
+    await db_session.flush()
+    db_session.add_all([
+        CategoryRelation(balanceFlow_id=expense.id, category_id=category.id, amount=12.5, convertedAmount=12.5),
+        TagRelation(balanceFlow_id=expense.id, tag_id=tag.id, amount=12.5, convertedAmount=12.5),
+    ])
+    await db_session.commit()
+
+async def test_export_csv(api_client, db_session, user_book, monkeypatch):
+    from config import settings
+
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 1)
+    await _add_flows(db_session, user_book)
+    response = await api_client.get(
+        f"/books/{user_book['book'].id}/export", params={"timeZoneOffset": 8, "format": "csv"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment; filename=book.csv"
+    assert response.headers["x-export-rows"] == "2"
+    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert rows == [
+        ["Title", "Type", "Amount", "Time", "Account", "Category", "Tag", "Payee", "Note", "Confirm", "Include"],
+        ["", "Transfer", "100", "01/01/1970 09:00", "Cash -> Bank", "", "", "", "", "No", "Yes"],
+        ["Lunch", "Expense", "12.5", "01/01/1970 08:00", "Cash", "Food: 12.5", "Trip", "Shop", "with a, comma", "Yes", "Yes"],
+    ]
+    await db_session.refresh(user_book["book"])
+    assert user_book["book"].exportAt is not None
+
+async def test_export_xlsx(api_client, db_session, user_book):
+    await _add_flows(db_session, user_book)
+    response = await api_client.get(f"/books/{user_book['book'].id}/export", params={"timeZoneOffset": 0})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment; filename=book.xlsx"
+    rows = read_xlsx(response.content)
+    assert len(rows) == 3
+    assert rows[2][:6] == ["Lunch", "Expense", "12.5", "01/01/1970 00:00", "Cash", "Food: 12.5"]
+
+async def test_export_other_book(api_client, db_session, user_book):
+    group = Group(name="Other")
+    db_session.add(group)
+    await db_session.flush()
+    book = Book(name="Other", group_id=group.id)
+    db_session.add(book)
+    await db_session.commit()
+    response = await api_client.get(f"/books/{book.id}/export", params={"timeZoneOffset": 0})
+    assert response.status_code == 404
+
+async def test_export_invalid_format(api_client, user_book):
+    response = await api_client.get(f"/books/{user_book['book'].id}/export", params={"timeZoneOffset": 0, "format": "pdf"})
+    assert response.status_code == 400
+
+TEMPLATE = {
+    "id": "home", "name": "Home", "description": "For a household",
+    "categories": [
+        {"id": 2, "name": "Groceries", "pId": 1, "type": 100},
+        {"id": 1, "name": "Living", "type": 100, "sort": 100},
+        {"id": 3, "name": "Salary", "type": 200},
+    ],
+    "tags": [{"id": 1, "name": "Trip", "canIncome": False}],
+    "payees": [{"name": "Market"}],
+}
+
+async def _book_items(db_session, book_id):
+    categories = (await db_session.scalars(select(Category).where(Category.book_id == book_id))).all()
+    names = {category.id: category.name for category in categories}
+    tags = (await db_session.scalars(select(Tag.name).where(Tag.book_id == book_id))).all()
+    payees = (await db_session.scalars(select(Payee.name).where(Payee.book_id == book_id))).all()
+    return {category.name: names.get(category.parent_id) for category in categories}, tags, payees
+
+async def test_add_book_by_template(api_client, db_session, user_book, monkeypatch):
+    monkeypatch.setattr(data_loader, "store", data_loader.ReferenceDataStore())
+    data_loader.store.push("book_templates", [TEMPLATE])
+    form = {"templateId": "home", "book": {"name": "Home", "defaultCurrencyCode": "USD"}}
+    response = await api_client.post("/books/template", json=form)
+    assert response.status_code == 200
+    book = response.json()
+    assert (book["name"], book["notes"], book["group_id"]) == ("Home", "For a household", user_book["group"].id)
+    categories, tags, payees = await _book_items(db_session, book["id"])
+    assert categories == {"Living": None, "Groceries": "Living", "Salary": None}
+    assert (tags, payees) == (["Trip"], ["Market"])
+
+    response = await api_client.post("/books/template", json=form)
+    assert response.json() == {"detail": "Book name already exists"}
+    response = await api_client.post("/books/template", json={**form, "templateId": "nope"})
+    assert response.status_code == 404
+
+async def test_add_book_by_book(api_client, db_session, user_book):
+    source = user_book["book"]
+    root = Category(name="Living", book_id=source.id, type=100)
+    db_session.add_all([root, Tag(name="Trip", book_id=source.id), Payee(name="Market", book_id=source.id)])
+    await db_session.flush()
+    db_session.add(Category(name="Groceries", book_id=source.id, type=100, parent_id=root.id))
+    await db_session.commit()
+    form = {"bookId": source.id, "book": {"name": "Copy", "defaultCurrencyCode": "EUR", "notes": "copied"}}
+    response = await api_client.post("/books/copy", json=form)
+    assert response.status_code == 200
+    assert (response.json()["notes"], response.json()["defaultCurrencyCode"]) == ("copied", "EUR")
+    categories, tags, payees = await _book_items(db_session, response.json()["id"])
+    assert categories == {"Living": None, "Groceries": "Living"}
+    assert (tags, payees) == (["Trip"], ["Market"])
+
+    response = await api_client.post("/books/copy", json={**form, "book": {"name": "Bad", "defaultCurrencyCode": "XXX"}})
+    assert response.json() == {"detail": "Unknown currency: XXX"}
+    response = await api_client.post(
+        "/books/copy", json={**form, "book": {"name": "Bad", "defaultCurrencyCode": "USD", "defaultExpenseAccountId": 999}}
+    )
+    assert response.status_code == 404
@@ -0,0 +1,68 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add(api_client, name, parent=None, type=100):
+    response = await api_client.post("/categories", json={"type": type, "name": name, "pId": parent})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+def _names(nodes):
+    return [(node["name"], node["level"], _names(node["children"])) for node in nodes]
+
+async def test_category_tree(api_client, user_book):
+    food = await _add(api_client, "Food")
+    lunch = await _add(api_client, "Lunch", food)
+    await _add(api_client, "Snacks", lunch)
+    await _add(api_client, "Rent")
+    await _add(api_client, "Salary", type=200)
+
+    response = await api_client.get("/categories/tree", params={"bookId": user_book["book"].id, "type": 100})
+    assert response.status_code == 200
+    assert _names(response.json()) == [
+        ("Food", 0, [("Lunch", 1, [("Snacks", 2, [])])]),
+        ("Rent", 0, []),
+    ]
+
+async def test_add_category_checks(api_client, user_book):
+    food = await _add(api_client, "Food")
+    salary = await _add(api_client, "Salary", type=200)
+
+    response = await api_client.post("/categories", json={"type": 100, "name": "Food"})
+    assert response.json()["detail"] == "Category name already exists"
+    response = await api_client.post("/categories", json={"type": 100, "name": "Bonus", "pId": salary})
+    assert response.status_code == 404
+    parent = food
+    for level in range(1, 4):
+        parent = await _add(api_client, f"Level {level}", parent)
+    response = await api_client.post("/categories", json={"type": 100, "name": "Level 4", "pId": parent})
+    assert response.json()["detail"] == "Categories are nested too deep"
+
+async def test_move_category(api_client, user_book):
+    food = await _add(api_client, "Food")
+    lunch = await _add(api_client, "Lunch", food)
+    living = await _add(api_client, "Living")
+
+    response = await api_client.put(f"/categories/{lunch}", json={"pId": food, "name": "Lunch"})
+    assert response.status_code == 200
+    response = await api_client.put(f"/categories/{food}", json={"pId": lunch})
+    assert response.json()["detail"] == "A category cannot be moved under itself"
+    response = await api_client.put(f"/categories/{food}", json={"pId": living, "notes": "n"})
+    assert (response.json()["parent_id"], response.json()["name"], response.json()["notes"]) == (living, "Food", "n")
+
+    tree = (await api_client.get("/categories/tree", params={"bookId": user_book["book"].id})).json()
+    assert _names(tree) == [("Living", 0, [("Food", 1, [("Lunch", 2, [])])])]
+
+async def test_delete_category(api_client, user_book):
+    food = await _add(api_client, "Food")
+    lunch = await _add(api_client, "Lunch", food)
+    await api_client.post("/balance-flows", json={
+        "type": 100, "createTime": 0, "categories": [{"category": lunch, "amount": 10}],
+    })
+
+    assert (await api_client.delete(f"/categories/{lunch}")).json()["detail"] == "Category has flows"
+    assert (await api_client.delete(f"/categories/{food}")).json() is True
+    tree = (await api_client.get("/categories/tree", params={"bookId": user_book["book"].id})).json()
+    assert _names(tree) == [("Lunch", 0, [])]
+    assert (await api_client.delete(f"/categories/{food}")).status_code == 404
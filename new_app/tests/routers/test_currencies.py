@@ -1,4 +1,5 @@
 import jwt
+import pytest
 from fastapi.testclient import TestClient
 from main import app
 from moneynote.schemas.currency import Currency
@@ -19,3 +20,64 @@ def test_get_all_currencies_authenticated():
     assert len(response_data) > 0
     for item in response_data:
         Currency(**item)
+
+def test_get_all_currencies_not_modified():
+    token = jwt.encode({"sub": "test-user"}, "secret", algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/currencies/all", headers=headers)
+    etag = response.headers["ETag"]
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    response = client.get("/currencies/all", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+def test_get_all_currencies_encodings():
+    token = jwt.encode({"sub": "test-user"}, "secret", algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    plain = client.get("/currencies/all", headers={**headers, "Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+
+    gzipped = client.get("/currencies/all", headers={**headers, "Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.json() == plain.json()
+    assert gzipped.headers["ETag"] == plain.headers["ETag"]
+
+def _auth_headers():
+    token = jwt.encode({"sub": "test-user"}, "secret", algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+def test_get_rate():
+    response = client.get("/currencies/rate", params={"from": "USD", "to": "EUR"}, headers=_auth_headers())
+    assert response.status_code == 200
+    assert response.json() == pytest.approx(0.92)
+
+def test_get_rate_unknown_currency():
+    response = client.get("/currencies/rate", params={"from": "USD", "to": "XXX"}, headers=_auth_headers())
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Unknown currency: XXX"}
+
+def test_calc():
+    response = client.get("/currencies/calc", params={"from": "EUR", "to": "USD", "amount": 100}, headers=_auth_headers())
+    assert response.status_code == 200
+    assert response.json() == 108.7
+
+def test_calc_unauthenticated():
+    response = client.get("/currencies/calc", params={"from": "EUR", "to": "USD", "amount": 100})
+    assert response.status_code == 401
+
+def test_calc_batch():
+    body = {"amounts": [100, 100, 1], "from": ["USD", "EUR", "JPY"], "to": ["EUR", "USD", "JPY"]}
+    response = client.post("/currencies/calc/batch", json=body, headers=_auth_headers())
+    assert response.status_code == 200
+    assert response.json() == {"amounts": [92.0, 108.7, 1.0]}
+
+def test_calc_batch_invalid():
+    body = {"amounts": [100], "from": ["USD", "EUR"], "to": ["EUR"]}
+    response = client.post("/currencies/calc/batch", json=body, headers=_auth_headers())
+    assert response.status_code == 422
+
+    body = {"amounts": [100], "from": ["USD"], "to": ["XXX"]}
+    response = client.post("/currencies/calc/batch", json=body, headers=_auth_headers())
+    assert response.status_code == 404
@@ -0,0 +1,142 @@
+import hashlib
+
+import pytest
+from moneynote.models import BalanceFlow, FlowFile
+from moneynote.services.gcs_service import LocalBlobStore, get_blob_store, sweep_blobs
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def blob_store(tmp_path):
+    from main import app
+
+    store = LocalBlobStore(tmp_path / "blobs", chunk_size=1000)
+    app.dependency_overrides[get_blob_store] = lambda: store
+    yield store
+    app.dependency_overrides.pop(get_blob_store)
+
+
+async def _add_flow(db_session, book_id):
+    flow = BalanceFlow(book_id=book_id, type=100, amount=1, convertedAmount=1, createTime=1000)
+    db_session.add(flow)
+    await db_session.commit()
+    return flow
+
+async def _upload(api_client, flow_id, content=CONTENT, content_type="image/png"):
+    return await api_client.post(f"/balance-flows/{flow_id}/addFile", files={"file": ("receipt.png", content, content_type)})
+
+async def test_upload_and_view(api_client, db_session, user_book, blob_store):
+    flow = await _add_flow(db_session, user_book["book"].id)
+    response = await _upload(api_client, flow.id)
+    assert response.status_code == 200
+    details = response.json()
+    assert details["size"] == len(CONTENT)
+    assert details["originalName"] == "receipt.png"
+    key = hashlib.sha256(CONTENT).hexdigest()
+    assert blob_store.path(key).read_bytes() == CONTENT
+    stored = await db_session.get(FlowFile, details["id"])
+    assert (stored.blobKey, stored.data) == (key, None)
+
+    files = (await api_client.get(f"/balance-flows/{flow.id}/files")).json()
+    assert [file["id"] for file in files] == [details["id"]]
+
+    response = await api_client.get("/flow-files/view", params={"id": details["id"], "createTime": details["createTime"]}, headers={"Authorization": ""})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == f'"{key}"'
+    assert response.headers["accept-ranges"] == "bytes"
+
+async def test_upload_rejects_other_types(api_client, db_session, user_book, blob_store):
+    flow = await _add_flow(db_session, user_book["book"].id)
+    response = await _upload(api_client, flow.id, content_type="text/html")
+    assert response.status_code == 400
+
+async def test_view_requires_create_time(api_client, db_session, user_book, blob_store):
+    flow = await _add_flow(db_session, user_book["book"].id)
+    details = (await _upload(api_client, flow.id)).json()
+    response = await api_client.get("/flow-files/view", params={"id": details["id"], "createTime": details["createTime"] + 1})
+    assert response.status_code == 404
+
+async def test_view_ranges(api_client, db_session, user_book, blob_store):
+    flow = await _add_flow(db_session, user_book["book"].id)
+    details = (await _upload(api_client, flow.id)).json()
+    params = {"id": details["id"], "createTime": details["createTime"]}
+    size = len(CONTENT)
+
+    response = await api_client.get("/flow-files/view", params=params, headers={"Range": "bytes=100-2599"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[100:2600]
+    assert response.headers["content-range"] == f"bytes 100-2599/{size}"
+
+    response = await api_client.get("/flow-files/view", params=params, headers={"Range": "bytes=-10"})
+    assert (response.status_code, response.content) == (206, CONTENT[-10:])
+    response = await api_client.get("/flow-files/view", params=params, headers={"Range": f"bytes={size - 5}-"})
+    assert (response.status_code, response.content) == (206, CONTENT[-5:])
+
+    response = await api_client.get("/flow-files/view", params=params, headers={"Range": f"bytes={size}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{size}"
+
+    # A stale If-Range gets the whole file
+    response = await api_client.get("/flow-files/view", params=params, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert (response.status_code, response.content) == (200, CONTENT)
+    etag = response.headers["etag"]
+    response = await api_client.get("/flow-files/view", params=params, headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert (response.status_code, response.content) == (206, CONTENT[:10])
+
+async def test_view_conditional(api_client, db_session, user_book, blob_store):
+    flow = await _add_flow(db_session, user_book["book"].id)
+    details = (await _upload(api_client, flow.id)).json()
+    params = {"id": details["id"], "createTime": details["createTime"]}
+    response = await api_client.get("/flow-files/view", params=params)
+    etag, last_modified = response.headers["etag"], response.headers["last-modified"]
+
+    response = await api_client.get("/flow-files/view", params=params, headers={"If-None-Match": etag})
+    assert (response.status_code, response.content) == (304, b"")
+    response = await api_client.get("/flow-files/view", params=params, headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+    response = await api_client.get("/flow-files/view", params=params, headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified})
+    assert response.status_code == 200
+
+async def test_view_file_not_moved_out(api_client, db_session, user_book, blob_store):
+    flow = await _add_flow(db_session, user_book["book"].id)
+    flow_file = FlowFile(flow_id=flow.id, data=b"legacy bytes", createTime=5000, contentType="application/pdf", size=12)
+    db_session.add(flow_file)
+    await db_session.commit()
+    params = {"id": flow_file.id, "createTime": 5000}
+    response = await api_client.get("/flow-files/view", params=params)
+    assert (response.status_code, response.content) == (200, b"legacy bytes")
+    response = await api_client.get("/flow-files/view", params=params, headers={"Range": "bytes=7-"})
+    assert (response.status_code, response.content) == (206, b"bytes")
+
+async def test_sweep_keeps_shared_blobs(api_client, db_session, user_book, blob_store):
+    flow = await _add_flow(db_session, user_book["book"].id)
+    first = (await _upload(api_client, flow.id)).json()
+    second = (await _upload(api_client, flow.id)).json()
+    path = blob_store.path(hashlib.sha256(CONTENT).hexdigest())
+
+    assert (await api_client.delete(f"/flow-files/{first['id']}")).status_code == 200
+    assert await sweep_blobs(db_session, blob_store, 0) == 0
+    assert path.exists()
+    assert (await api_client.delete(f"/flow-files/{second['id']}")).status_code == 200
+    # Left for the sweep, and only swept once the grace period is over
+    assert path.exists()
+    assert await sweep_blobs(db_session, blob_store, 3600) == 0
+    assert await sweep_blobs(db_session, blob_store, 0) == 1
+    assert not path.exists()
+    assert (await api_client.delete(f"/flow-files/{second['id']}")).status_code == 404
+
+async def test_upload_after_delete_keeps_its_blob(api_client, db_session, user_book, blob_store):
+    deleted = await _add_flow(db_session, user_book["book"].id)
+    flow = await _add_flow(db_session, user_book["book"].id)
+    await _upload(api_client, deleted.id)
+    assert (await api_client.delete(f"/balance-flows/{deleted.id}")).status_code == 200
+    uploaded = (await _upload(api_client, flow.id)).json()
+
+    assert await sweep_blobs(db_session, blob_store, 0) == 0
+    params = {"id": uploaded["id"], "createTime": uploaded["createTime"]}
+    assert (await api_client.get("/flow-files/view", params=params)).content == CONTENT
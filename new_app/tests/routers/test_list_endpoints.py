@@ -0,0 +1,43 @@
+import pytest
+from moneynote.models import Account, Category, NoteDay, Payee, Tag
+
+pytestmark = pytest.mark.anyio
+
+
+def _rows(user_book, path):
+    book_id, group_id, user_id = user_book["book"].id, user_book["group"].id, user_book["user"].id
+    if path == "/accounts":
+        return [
+            Account(name=f"A{i}", group_id=group_id, type=100, currencyCode="USD", balance=i % 3, initialBalance=0)
+            for i in range(5)
+        ]
+    if path == "/categories":
+        return [Category(name=f"C{i}", book_id=book_id, type=100, sort=i % 2) for i in range(6)]
+    if path == "/payees":
+        return [Payee(name=f"P{i}", book_id=book_id) for i in range(6)]
+    if path == "/tags":
+        return [Tag(name=f"T{i}", book_id=book_id, sort=None if i % 2 else 1) for i in range(6)]
+    return [NoteDay(title=f"N{i}", user_id=user_id) for i in range(6)]
+
+@pytest.mark.parametrize("path", ["/accounts", "/categories", "/payees", "/tags", "/note-days"])
+async def test_keyset_pages_match_offset_pages(api_client, db_session, user_book, path):
+    db_session.add_all(_rows(user_book, path))
+    await db_session.commit()
+    params = {"bookId": user_book["book"].id, "size": 2}
+
+    offset_ids, page_number = [], 0
+    while True:
+        page = (await api_client.get(path, params={**params, "page": page_number})).json()
+        offset_ids += [item["id"] for item in page["content"]]
+        if page_number + 1 >= page["totalPages"]:
+            break
+        page_number += 1
+
+    keyset_ids, cursor = [], ""
+    while cursor is not None:
+        page = (await api_client.get(path, params={**params, "cursor": cursor})).json()
+        keyset_ids += [item["id"] for item in page["content"]]
+        cursor = page["nextCursor"]
+
+    assert keyset_ids == offset_ids
+    assert len(set(keyset_ids)) == len(keyset_ids) >= 5
@@ -0,0 +1,72 @@
+import pytest
+from moneynote.crud import crud_category, crud_tag
+from moneynote.models import Category, Payee, Tag
+
+pytestmark = pytest.mark.anyio
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+@pytest.fixture
+async def report_book(api_client, db_session, user_book):
+    """Food > (Lunch, Dinner) and Rent expenses, over three days."""
+    book_id = user_book["book"].id
+    food = Category(name="Food", book_id=book_id, type=100)
+    rent = Category(name="Rent", book_id=book_id, type=100)
+    trip = Tag(name="Trip", book_id=book_id)
+    shop = Payee(name="Shop", book_id=book_id)
+    for category in (food, rent):
+        await crud_category.create_category(db_session, category)
+    await crud_tag.create_tag(db_session, trip)
+    db_session.add(shop)
+    await db_session.flush()
+    lunch = Category(name="Lunch", book_id=book_id, type=100, parent_id=food.id)
+    dinner = Category(name="Dinner", book_id=book_id, type=100, parent_id=food.id)
+    for category in (lunch, dinner):
+        await crud_category.create_category(db_session, category)
+    await db_session.commit()
+    for day, category, amount in [(0, lunch, 10), (1, dinner, 30), (1, rent, 60), (2, food, 20)]:
+        await api_client.post("/balance-flows", json={
+            "type": 100,
+            "createTime": day * DAY_MS + 1000,
+            "categories": [{"category": category.id, "amount": amount}],
+            "tags": [trip.id] if category is not rent else [],
+            "payee": shop.id if category is rent else None,
+        })
+    return {"food": food, "lunch": lunch, "dinner": dinner, "rent": rent, "trip": trip, "shop": shop}
+
+async def test_expense_category_report(api_client, report_book):
+    chart = (await api_client.get("/reports/expense-category")).json()
+    assert chart == [{"x": "Food", "y": 60, "percent": 50}, {"x": "Rent", "y": 60, "percent": 50}]
+
+async def test_expense_category_report_time_range(api_client, report_book):
+    # Day 1 from the rollup, the partial days around it from the flows
+    chart = (await api_client.get("/reports/expense-category", params={"minTime": 500, "maxTime": 2 * DAY_MS + 999})).json()
+    assert chart == [{"x": "Rent", "y": 60, "percent": 60}, {"x": "Food", "y": 40, "percent": 40}]
+
+async def test_expense_category_report_drill_down(api_client, report_book):
+    chart = (await api_client.get("/reports/expense-category", params={"categories": report_book["food"].id})).json()
+    assert chart == [
+        {"x": "Dinner", "y": 30, "percent": 50},
+        {"x": "Food", "y": 20, "percent": 33.33},
+        {"x": "Lunch", "y": 10, "percent": 16.67},
+    ]
+
+async def test_expense_tag_and_payee_reports(api_client, report_book):
+    assert (await api_client.get("/reports/expense-tag")).json() == [{"x": "Trip", "y": 60, "percent": 100}]
+    assert (await api_client.get("/reports/expense-payee")).json() == [{"x": "Shop", "y": 60, "percent": 100}]
+    assert (await api_client.get("/reports/income-payee")).json() == []
+
+async def test_report_with_filters(api_client, report_book):
+    chart = (await api_client.get("/reports/expense-category", params={"payees": report_book["shop"].id})).json()
+    assert chart == [{"x": "Rent", "y": 60, "percent": 100}]
+
+async def test_tag_report_rolls_up(api_client, report_book):
+    travel = (await api_client.post("/tags", json={
+        "name": "Travel", "canExpense": True, "canIncome": True, "canTransfer": True,
+    })).json()["id"]
+    await api_client.put(f"/tags/{report_book['trip'].id}", json={"pId": travel, "name": "Trip"})
+
+    assert (await api_client.get("/reports/expense-tag")).json() == [{"x": "Travel", "y": 60, "percent": 100}]
+    chart = (await api_client.get("/reports/expense-tag", params={"tags": travel})).json()
+    assert chart == [{"x": "Trip", "y": 60, "percent": 100}]
@@ -0,0 +1,45 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from moneynote.routers.responses import _parse_accept_encoding, encoded_json_response
+from moneynote.services.data_loader import EncodedPayload
+
+payload = EncodedPayload(body=b'[]', gzip_body=b'gzip', brotli_body=b'br', etag='"abc"')
+payload_without_brotli = EncodedPayload(body=b'[]', gzip_body=b'gzip', brotli_body=None, etag='"abc"')
+
+app = FastAPI()
+
+@app.get("/payload")
+def get_payload(request: Request):
+    return encoded_json_response(request, payload)
+
+@app.get("/payload-without-brotli")
+def get_payload_without_brotli(request: Request):
+    return encoded_json_response(request, payload_without_brotli)
+
+client = TestClient(app)
+
+def test_parse_accept_encoding():
+    assert _parse_accept_encoding("gzip, br;q=0.5, identity;q=0") == {"gzip": 1.0, "br": 0.5, "identity": 0.0}
+    assert _parse_accept_encoding("") == {}
+
+def test_prefers_brotli():
+    # The test client decodes the body itself, so stream the raw bytes
+    with client.stream("GET", "/payload", headers={"Accept-Encoding": "gzip, br"}) as response:
+        assert response.headers["Content-Encoding"] == "br"
+        assert b"".join(response.iter_raw()) == b"br"
+
+def test_refused_coding_is_skipped():
+    with client.stream("GET", "/payload", headers={"Accept-Encoding": "br;q=0, gzip"}) as response:
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert b"".join(response.iter_raw()) == b"gzip"
+
+def test_without_brotli_variant():
+    with client.stream("GET", "/payload-without-brotli", headers={"Accept-Encoding": "br"}) as response:
+        assert "Content-Encoding" not in response.headers
+        assert b"".join(response.iter_raw()) == b"[]"
+
+def test_if_none_match():
+    headers = {"Accept-Encoding": "identity"}
+    assert client.get("/payload", headers={**headers, "If-None-Match": 'W/"abc"'}).status_code == 304
+    assert client.get("/payload", headers={**headers, "If-None-Match": '"other", "abc"'}).status_code == 304
+    assert client.get("/payload", headers={**headers, "If-None-Match": '"other"'}).status_code == 200
@@ -26,4 +26,12 @@ def test_get_test3_authenticated():
     token = jwt.encode({"sub": "test-user"}, "secret", algorithm="HS256")
     response = client.get("/test3", headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
-    assert response.json() == {"base_url": settings.BASE_URL}
\ No newline at end of file
+    assert response.json() == {"base_url": settings.BASE_URL}
+
+def test_get_token_cache_stats():
+    token = jwt.encode({"sub": "test-user"}, "secret", algorithm="HS256")
+    client.get("/version", headers={"Authorization": f"Bearer {token}"})
+    response = client.get("/token-cache", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["hits"] >= 1
+    assert set(response.json()) == {"hits", "misses", "hit_rate", "size"}
@@ -0,0 +1,30 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+FLAGS = {"canExpense": True, "canIncome": True, "canTransfer": False}
+
+
+async def _add(api_client, name, parent=None):
+    response = await api_client.post("/tags", json={"name": name, "pId": parent, **FLAGS})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+async def test_tag_tree(api_client, user_book):
+    trip = await _add(api_client, "Trip")
+    hotel = await _add(api_client, "Hotel", trip)
+    work = await _add(api_client, "Work")
+
+    response = await api_client.put(f"/tags/{trip}", json={"pId": work, "canIncome": False})
+    assert (response.json()["parent_id"], response.json()["canIncome"]) == (work, False)
+    response = await api_client.put(f"/tags/{work}", json={"pId": hotel})
+    assert response.json()["detail"] == "A tag cannot be moved under itself"
+
+    tree = (await api_client.get("/tags/tree", params={"bookId": user_book["book"].id})).json()
+    assert [(tag["name"], tag["level"]) for tag in tree] == [("Work", 0)]
+    assert tree[0]["children"][0]["children"][0]["name"] == "Hotel"
+    assert tree[0]["children"][0]["children"][0]["level"] == 2
+
+    assert (await api_client.delete(f"/tags/{trip}")).json() is True
+    tree = (await api_client.get("/tags/tree", params={"bookId": user_book["book"].id})).json()
+    assert [tag["name"] for tag in tree] == ["Hotel", "Work"]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from moneynote.schemas.currency import Currency
+from moneynote.services.currency_index import UnknownCurrencyError, build_currency_index
+
+CURRENCIES = [
+    Currency(id="USD", name="US Dollar", description="", rate=1.0),
+    Currency(id="EUR", name="Euro", description="", rate=0.92),
+    Currency(id="JPY", name="Japanese Yen", description="", rate=157.65),
+]
+
+
+def test_build_currency_index():
+    index = build_currency_index(CURRENCIES)
+    assert index.codes == ("USD", "EUR", "JPY")
+    assert index.position("JPY") == 2
+    assert index.cross_rates.shape == (3, 3)
+    assert np.allclose(np.diag(index.cross_rates), 1.0)
+    assert not index.cross_rates.flags.writeable
+
+def test_rate():
+    index = build_currency_index(CURRENCIES)
+    assert index.rate("USD", "EUR") == pytest.approx(0.92)
+    assert index.rate("EUR", "JPY") == pytest.approx(157.65 / 0.92)
+    with pytest.raises(UnknownCurrencyError):
+        index.rate("USD", "XXX")
+
+def test_convert():
+    index = build_currency_index(CURRENCIES)
+    converted = index.convert([100, 100, 5, 0.125], ["USD", "EUR", "JPY", "USD"], ["EUR", "USD", "JPY", "USD"])
+    assert converted.tolist() == [92.0, 108.7, 5.0, 0.12]
+
+def test_convert_matches_single_rates():
+    index = build_currency_index(CURRENCIES)
+    rng = np.random.default_rng(0)
+    amounts = rng.uniform(0, 10000, size=5000)
+    from_codes = rng.choice(index.codes, size=5000).tolist()
+    to_codes = rng.choice(index.codes, size=5000).tolist()
+    expected = [round(amount * index.rate(f, t), 2) for amount, f, t in zip(amounts, from_codes, to_codes)]
+    assert np.allclose(index.convert(amounts, from_codes, to_codes), expected)
+
+def test_convert_unknown_and_mismatched():
+    index = build_currency_index(CURRENCIES)
+    with pytest.raises(UnknownCurrencyError) as e:
+        index.convert([1, 2], ["USD", "AAA"], ["BBB", "EUR"])
+    assert e.value.codes == ["AAA"]
+    with pytest.raises(ValueError):
+        index.convert([1], ["USD", "EUR"], ["EUR"])
+    assert index.convert([], [], []).tolist() == []
+
+def test_build_currency_index_rejects_bad_rates():
+    with pytest.raises(ValueError, match="greater than 0"):
+        build_currency_index([Currency(id="USD", name="", description="", rate=0)])
+    with pytest.raises(ValueError, match="unique"):
+        build_currency_index(CURRENCIES + CURRENCIES[:1])
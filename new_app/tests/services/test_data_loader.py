@@ -1,16 +1,31 @@
+import gzip
 import json
+import time
 from unittest.mock import mock_open, patch
 
 import pytest
+from moneynote.schemas.book_template import BookTemplate
+from moneynote.schemas.currency import Currency
 from moneynote.services import data_loader
 
+USD = {"id": "USD", "name": "United States Dollar", "description": "US currency", "rate": 1.0}
+TEMPLATE = {"id": "1", "name": "Template 1", "description": "A template", "categories": [], "tags": [], "payees": []}
+
+
+@pytest.fixture(autouse=True)
+def store():
+    """A store of its own, so the mocked files loaded here do not leak into the app's reference data."""
+    with patch.object(data_loader, "store", data_loader.ReferenceDataStore()):
+        yield
+
 
 def test_load_currencies_success():
-    mock_json_data = '[{"code": "USD", "name": "United States Dollar"}]'
+    mock_json_data = json.dumps([USD])
     with patch("builtins.open", mock_open(read_data=mock_json_data)):
-        with patch.object(json, 'load', return_value=[{"code": "USD", "name": "United States Dollar"}]):
+        with patch.object(json, 'load', return_value=[USD]):
             data_loader.load_currencies()
-            assert data_loader.CURRENCIES == [{"code": "USD", "name": "United States Dollar"}]
+            assert data_loader.CURRENCIES == (Currency(**USD),)
+            assert json.loads(data_loader.CURRENCIES_PAYLOAD.body) == [USD]
 
 def test_load_currencies_file_not_found():
     with patch("builtins.open", side_effect=FileNotFoundError):
@@ -23,12 +38,25 @@ def test_load_currencies_json_decode_error():
             with pytest.raises(RuntimeError, match="Failed to parse currency.json"):
                 data_loader.load_currencies()
 
+def test_load_currencies_validation_error():
+    with patch("builtins.open", mock_open(read_data="[]")):
+        with patch.object(json, 'load', return_value=[{"code": "USD", "name": "United States Dollar"}]):
+            with pytest.raises(RuntimeError, match="Failed to validate currency.json"):
+                data_loader.load_currencies()
+
 def test_load_book_templates_success():
-    mock_json_data = '[{"id": "1", "name": "Template 1"}]'
+    mock_json_data = json.dumps([TEMPLATE])
     with patch("builtins.open", mock_open(read_data=mock_json_data)):
-        with patch.object(json, 'load', return_value=[{"id": "1", "name": "Template 1"}]):
+        with patch.object(json, 'load', return_value=[TEMPLATE]):
             data_loader.load_book_templates()
-            assert data_loader.BOOK_TEMPLATES == [{"id": "1", "name": "Template 1"}]
+            assert data_loader.BOOK_TEMPLATES == (BookTemplate(**TEMPLATE),)
+            assert json.loads(data_loader.BOOK_TEMPLATES_PAYLOAD.body) == [TEMPLATE]
+
+def test_load_book_templates_validation_error():
+    with patch("builtins.open", mock_open(read_data="[]")):
+        with patch.object(json, 'load', return_value=[{"id": "1", "name": "Template 1"}]):
+            with pytest.raises(RuntimeError, match="Failed to validate book_tpl.json"):
+                data_loader.load_book_templates()
 
 def test_load_book_templates_file_not_found():
     with patch("builtins.open", side_effect=FileNotFoundError):
@@ -39,4 +67,71 @@ def test_load_book_templates_json_decode_error():
     with patch("builtins.open", mock_open(read_data="invalid json")):
         with patch.object(json, 'load', side_effect=json.JSONDecodeError("msg", "doc", 0)):
             with pytest.raises(RuntimeError, match="Failed to parse book_tpl.json"):
-                data_loader.load_book_templates()
\ No newline at end of file
+                data_loader.load_book_templates()
+
+def test_encode_payload():
+    adapter = data_loader.DATASETS["currencies"].adapter
+    payload = data_loader.encode_payload(adapter, [Currency(**USD)])
+    assert json.loads(payload.body) == [USD]
+    assert gzip.decompress(payload.gzip_body) == payload.body
+    assert payload.etag.startswith('"') and payload.etag.endswith('"')
+    assert data_loader.encode_payload(adapter, [Currency(**USD)]) == payload
+
+def test_get_currencies_payload_loads_lazily():
+    with patch.object(data_loader, "store", data_loader.ReferenceDataStore()):
+        payload = data_loader.get_currencies_payload()
+    assert len(json.loads(payload.body)) > 0
+
+def _write_currencies(data_dir, currencies):
+    (data_dir / "currency.json").write_text(json.dumps(currencies))
+
+def test_store_reloads_changed_file(tmp_path):
+    _write_currencies(tmp_path, [USD])
+    store = data_loader.ReferenceDataStore(data_dir=tmp_path)
+    first = store.get("currencies")
+    assert store.reload_if_changed() == []
+
+    _write_currencies(tmp_path, [{**USD, "rate": 2.0}])
+    assert store.reload_if_changed() == ["currencies"]
+    second = store.get("currencies")
+    assert second.items[0].rate == 2.0
+    assert second.index is not first.index
+    assert second.version != first.version
+    assert store.versions == {"currencies": second.version}
+    # The old snapshot is untouched, a request still holding it keeps consistent data
+    assert first.items[0].rate == 1.0
+
+def test_store_keeps_snapshot_when_file_is_invalid(tmp_path):
+    _write_currencies(tmp_path, [USD])
+    store = data_loader.ReferenceDataStore(data_dir=tmp_path)
+    first = store.get("currencies")
+
+    _write_currencies(tmp_path, [{"id": "USD"}])
+    assert store.reload_if_changed() == []
+    assert store.get("currencies") is first
+
+def test_store_push(tmp_path):
+    _write_currencies(tmp_path, [USD])
+    store = data_loader.ReferenceDataStore(data_dir=tmp_path)
+    snapshot = store.push("currencies", [{**USD, "rate": 3.0}])
+    assert store.get("currencies") is snapshot
+    assert store.get("currencies").items[0].rate == 3.0
+    assert store.get("currencies").index.rate("USD", "USD") == 1.0
+
+    with pytest.raises(RuntimeError, match="Failed to validate currency.json"):
+        store.push("currencies", [{"id": "USD"}])
+    assert store.get("currencies") is snapshot
+
+def test_store_watches_files(tmp_path):
+    _write_currencies(tmp_path, [USD])
+    store = data_loader.ReferenceDataStore(data_dir=tmp_path)
+    store.get("currencies")
+    store.start_watching(0.01)
+    try:
+        _write_currencies(tmp_path, [{**USD, "rate": 4.0}, {**USD, "id": "XXX"}])
+        deadline = time.monotonic() + 5
+        while len(store.get("currencies").items) != 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        store.stop_watching()
+    assert store.get("currencies").items[0].rate == 4.0
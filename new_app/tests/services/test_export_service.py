@@ -0,0 +1,50 @@
+import csv
+import io
+import zipfile
+from xml.etree import ElementTree
+
+import pytest
+from moneynote.models import BalanceFlow
+from moneynote.services.export_service import CsvExportWriter, XlsxExportWriter, stream_export
+
+pytestmark = pytest.mark.anyio
+
+NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def read_xlsx(data: bytes):
+    """The rows of the sheet, each a list of its cells' text."""
+    with zipfile.ZipFile(io.BytesIO(data)) as workbook:
+        sheet = ElementTree.fromstring(workbook.read("xl/worksheets/sheet1.xml"))
+    return [
+        ["".join(cell.itertext()) for cell in row.findall("s:c", NS)]
+        for row in sheet.findall("s:sheetData/s:row", NS)
+    ]
+
+def test_xlsx_writer():
+    writer = XlsxExportWriter()
+    data = writer.start(["Title", "Amount"])
+    data += writer.write_rows([["<a & b>", 12.5], ["bell\x07", None]])
+    data += writer.close()
+    assert read_xlsx(data) == [["Title", "Amount"], ["<a & b>", "12.5"], ["bell", ""]]
+
+def test_csv_writer():
+    writer = CsvExportWriter()
+    data = writer.start(["Title", "Amount"]) + writer.write_rows([["a,b", 12.5], ["c", 100.0]]) + writer.close()
+    assert data.startswith("﻿".encode())
+    assert list(csv.reader(io.StringIO(data.decode("utf-8-sig")))) == [["Title", "Amount"], ["a,b", "12.5"], ["c", "100"]]
+
+async def test_stream_export_stops_when_the_client_disconnects(db_session, user_book):
+    book_id = user_book["book"].id
+    db_session.add_all(BalanceFlow(book_id=book_id, type=400, amount=i, createTime=i) for i in range(10))
+    await db_session.commit()
+    checks = 0
+
+    async def is_disconnected():
+        nonlocal checks
+        checks += 1
+        return checks > 2
+
+    chunks = [chunk async for chunk in stream_export(db_session, book_id, CsvExportWriter(), 0, 3, is_disconnected=is_disconnected)]
+    # The header, then two batches of 3 flows
+    assert len(list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8-sig"))))) == 7
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import time
+
+import pytest
+from moneynote.services.gcs_service import BlobNotFoundError, LocalBlobStore
+
+
+def test_put_is_content_addressed(tmp_path):
+    store = LocalBlobStore(tmp_path, chunk_size=4)
+    info = store.put([b"hello ", b"world"])
+    assert info.key == hashlib.sha256(b"hello world").hexdigest()
+    assert info.size == 11
+    assert store.path(info.key).read_bytes() == b"hello world"
+    # The same content, chunked differently, is stored once
+    assert store.put([b"hello world"]) == info
+    assert [path.name for path in tmp_path.rglob("*") if path.is_file()] == [info.key]
+
+def test_open_range_chunks(tmp_path):
+    store = LocalBlobStore(tmp_path, chunk_size=4)
+    key = store.put([b"0123456789"]).key
+    assert list(store.open_range(key)) == [b"0123", b"4567", b"89"]
+    assert b"".join(store.open_range(key, 3, 8)) == b"345678"
+    assert b"".join(store.open_range(key, 7)) == b"789"
+    assert store.size(key) == 10
+
+def test_missing_blob(tmp_path):
+    store = LocalBlobStore(tmp_path, chunk_size=4)
+    key = store.put([b"data"]).key
+    assert store.delete(key)
+    assert not store.delete(key)
+    with pytest.raises(BlobNotFoundError):
+        store.size(key)
+    with pytest.raises(BlobNotFoundError):
+        list(store.open_range(key))
+
+def test_delete_stored_before(tmp_path):
+    store = LocalBlobStore(tmp_path, chunk_size=4)
+    key = store.put([b"data"]).key
+    os.utime(store.path(key), (1000, 1000))
+    assert list(store.list_blobs()) == [(key, 1000)]
+
+    # Stored again since, e.g. for a new file: kept
+    store.put([b"data"])
+    assert not store.delete(key, stored_before=time.time() - 60)
+    assert store.size(key) == 4
+    assert store.delete(key, stored_before=time.time() + 60)
+    assert list(store.list_blobs()) == []
+
+def test_delete_keeps_a_put_landing_meanwhile(tmp_path, monkeypatch):
+    store = LocalBlobStore(tmp_path, chunk_size=4)
+    key = store.put([b"data"]).key
+    os.utime(store.path(key), (time.time() - 10, time.time() - 10))
+    rename = os.rename
+
+    def rename_then_put(source, destination):
+        rename(source, destination)
+        store.put([b"data"])
+
+    # The blob moved aside is recent and goes back, but not over the one stored after the move
+    monkeypatch.setattr(os, "rename", rename_then_put)
+    assert not store.delete(key, stored_before=time.time() - 60)
+    assert store.path(key).stat().st_mtime > time.time() - 5
+    assert [path.name for path in store.path(key).parent.iterdir()] == [key]
+
+def test_keys_must_be_sha256(tmp_path):
+    with pytest.raises(ValueError):
+        LocalBlobStore(tmp_path, chunk_size=4).path("../../etc/passwd")
+
+def test_failed_put_leaves_nothing(tmp_path):
+    def chunks():
+        yield b"partial"
+        raise OSError("client went away")
+
+    with pytest.raises(OSError):
+        LocalBlobStore(tmp_path, chunk_size=4).put(chunks())
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,150 @@
+import io
+import json
+import random
+
+import pytest
+from moneynote.crud import crud_account, crud_rollup
+from moneynote.models import Account, BalanceFlow, Category, CategoryRelation, DailyRollup, Payee, Tag, TagRelation
+from moneynote.services import import_service
+from moneynote.services.import_service import import_flows, parse_csv, parse_json
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add_names(db_session, user_book):
+    book = user_book["book"]
+    db_session.add_all([
+        Category(name="Food", book_id=book.id, type=100),
+        Category(name="Salary", book_id=book.id, type=200),
+        Tag(name="Trip", book_id=book.id),
+        Tag(name="Work", book_id=book.id),
+        Payee(name="Shop", book_id=book.id),
+        Account(name="Bank", group_id=user_book["group"].id, type=100, currencyCode="USD", balance=0, initialBalance=0),
+        Account(name="Euro", group_id=user_book["group"].id, type=100, currencyCode="EUR", balance=0, initialBalance=0),
+    ])
+    await db_session.commit()
+
+async def _rollup_rows(db_session):
+    return {
+        (row.dimension, row.flow_type, row.day, row.dimension_id): (pytest.approx(row.amount), row.flowCount)
+        for row in (await db_session.scalars(select(DailyRollup))).all()
+    }
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_parse_json_array_and_lines(chunk_size):
+    values = [{"a": 1, "b": "x, ]"}, {"c": [1, 2.5]}, 30]
+    assert list(parse_json(io.StringIO(json.dumps(values)), chunk_size)) == values
+    lines = "\n".join(json.dumps(value) for value in values) + "\n"
+    assert list(parse_json(io.StringIO(lines), chunk_size)) == values
+
+def test_parse_json_invalid():
+    rows = parse_json(io.StringIO('[{"a": 1}, {"b": }]'), chunk_size=4)
+    assert next(rows) == {"a": 1}
+    with pytest.raises(ValueError):
+        next(rows)
+
+async def test_import_rows(db_session, user_book):
+    await _add_names(db_session, user_book)
+    rows = parse_csv(io.StringIO(
+        "type,title,amount,convertedAmount,createTime,account,to,category,tags,payee,confirm\n"
+        "expense,Lunch,12.5,,1000,Cash,,Food,\"Trip, Work\",Shop,\n"
+        "Income,,100,,1970-01-01T00:00:02,Bank,,Salary,,,yes\n"
+        "transfer,,50,40,3000,Cash,Euro,,,,\n"
+        "adjust,,7,,4000,Euro,,,,,no\n"
+        "expense,,1,,5000,Cash,,Rent,,,\n"
+        "expense,,10,,5000,Euro,,Food,Trip,,\n"
+        "loan,,1,,5000,,,,,,\n"
+        "expense,,many,,5000,,,Food,,,\n"
+    ))
+    result = await import_flows(db_session, user_book["book"], rows, batch_size=3)
+    assert result.imported == 5
+    assert result.errors == [
+        (5, "Category Rent not found"),
+        (7, "Invalid type"),
+        (8, "amount is not a number"),
+    ]
+
+    flows = (await db_session.scalars(select(BalanceFlow).order_by(BalanceFlow.createTime))).all()
+    assert [(flow.type, flow.amount, flow.convertedAmount, flow.createTime, flow.confirm) for flow in flows] == [
+        (100, 12.5, 12.5, 1000, True), (200, 100, 100, 2000, True), (300, 50, 40, 3000, True), (400, 7, 7, 4000, False),
+        # The convertedAmount left out, converted from EUR to the book's USD
+        (100, 10, 10.87, 5000, True),
+    ]
+    relations = (await db_session.execute(select(CategoryRelation.amount, CategoryRelation.convertedAmount))).all()
+    assert sorted(relations) == [(10, 10.87), (12.5, 12.5), (100, 100)]
+    tag_relations = (await db_session.execute(select(TagRelation.amount, TagRelation.convertedAmount))).all()
+    assert sorted(tag_relations) == [(10, 10.87), (12.5, 12.5), (12.5, 12.5)]
+    balances = dict((await db_session.execute(select(Account.name, Account.balance))).all())
+    assert balances == {"Cash": -62.5, "Bank": 100, "Euro": 30}
+    assert await crud_account.check_balances(db_session) == []
+
+async def test_import_matches_the_rebuilt_rollup(db_session, user_book):
+    await _add_names(db_session, user_book)
+    rng = random.Random(5)
+    rows = [
+        {
+            "type": rng.choice(["expense", "income", "transfer"]),
+            "amount": rng.randint(1, 100),
+            "createTime": rng.randint(0, 10 * 86_400_000),
+            "account": "Cash",
+            "to": "Bank",
+            "category": "Food",
+            "tags": rng.sample(["Trip", "Work"], rng.randint(0, 2)),
+            "confirm": rng.random() > 0.2,
+            "include": rng.random() > 0.2,
+        }
+        for _ in range(300)
+    ]
+    for row in rows:
+        if row["type"] == "income":
+            row["category"] = "Salary"
+    result = await import_flows(db_session, user_book["book"], iter(rows), batch_size=64)
+    assert (result.imported, result.errors) == (300, [])
+    imported = await _rollup_rows(db_session)
+    await crud_rollup.rebuild(db_session, user_book["book"].id)
+    await db_session.commit()
+    assert imported == await _rollup_rows(db_session)
+    assert await crud_account.check_balances(db_session) == []
+
+async def test_import_stops_at_an_invalid_file(db_session, user_book):
+    await _add_names(db_session, user_book)
+    rows = parse_json(io.StringIO(
+        '[{"type": "adjust", "amount": 1, "createTime": 0}, {"type": "adjust", "amount": 2, "createTime": 0}, {oops'
+    ))
+    result = await import_flows(db_session, user_book["book"], rows, batch_size=10)
+    assert result.imported == 2
+    assert [row for row, _ in result.errors] == [3]
+
+async def test_import_reports_a_failed_batch(db_session, user_book, monkeypatch):
+    await _add_names(db_session, user_book)
+    insert_flows = import_service.insert_flows
+    calls = []
+
+    async def locked_second_batch(db, flows):
+        calls.append(len(flows))
+        await insert_flows(db, flows)
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(import_service, "insert_flows", locked_second_batch)
+    rows = [{"type": "adjust", "amount": amount, "createTime": 0, "account": "Cash"} for amount in range(1, 6)]
+    result = await import_flows(db_session, user_book["book"], iter(rows), batch_size=2)
+    assert result.imported == 3
+    error = "Not imported, the batch failed: database is locked"
+    assert result.errors == [(3, error), (4, error)]
+    amounts = (await db_session.scalars(select(BalanceFlow.amount).order_by(BalanceFlow.amount))).all()
+    assert amounts == [1, 2, 5]
+    assert await crud_account.check_balances(db_session) == []
+
+async def test_import_rejects_an_unknown_currency(db_session, user_book):
+    await _add_names(db_session, user_book)
+    db_session.add(Account(name="Gold", group_id=user_book["group"].id, type=100, currencyCode="XAU", balance=0))
+    await db_session.commit()
+    rows = [
+        {"type": "expense", "amount": 1, "createTime": 0, "account": "Gold", "category": "Food"},
+        {"type": "expense", "amount": 1, "createTime": 0, "account": "Gold", "category": "Food", "convertedAmount": 2},
+    ]
+    result = await import_flows(db_session, user_book["book"], iter(rows), batch_size=10)
+    assert (result.imported, result.errors) == (1, [(1, "Unknown currency: XAU")])
@@ -0,0 +1,55 @@
+import pytest
+from database import create_engine, get_session
+from moneynote.models import Base, Book, Group
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def _pragma(engine, name):
+    async with engine.connect() as connection:
+        return (await connection.execute(text(f"PRAGMA {name}"))).scalar()
+
+async def test_sqlite_pragmas(db_engine):
+    assert await _pragma(db_engine, "journal_mode") == "wal"
+    assert await _pragma(db_engine, "mmap_size") == settings.SQLITE_MMAP_SIZE
+    assert await _pragma(db_engine, "foreign_keys") == 1
+    assert await _pragma(db_engine, "busy_timeout") == settings.SQLITE_BUSY_TIMEOUT_MS
+
+async def test_pool_settings(db_engine):
+    assert db_engine.pool.size() == settings.DATABASE_POOL_SIZE
+    assert db_engine.pool._max_overflow == settings.DATABASE_MAX_OVERFLOW
+    assert db_engine.pool._pre_ping == settings.DATABASE_POOL_PRE_PING
+
+async def test_memory_database_shares_one_connection():
+    engine = create_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.execute(text("CREATE TABLE t (x INTEGER)"))
+    async with engine.connect() as connection:
+        assert (await connection.execute(text("SELECT count(*) FROM t"))).scalar() == 0
+    await engine.dispose()
+
+async def test_create_tables(db_engine):
+    async with db_engine.connect() as connection:
+        rows = await connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))
+        assert {row[0] for row in rows} >= set(Base.metadata.tables)
+
+async def test_foreign_keys_enforced(db_session):
+    db_session.add(Book(name="Book", group_id=404))
+    with pytest.raises(Exception, match="FOREIGN KEY"):
+        await db_session.commit()
+
+async def test_session_round_trip(db_session):
+    group = Group(name="Family")
+    db_session.add(group)
+    await db_session.commit()
+    assert (await db_session.scalars(select(Group.name).where(Group.id == group.id))).one() == "Family"
+
+async def test_get_session():
+    sessions = get_session()
+    session = await anext(sessions)
+    assert isinstance(session, AsyncSession)
+    await sessions.aclose()
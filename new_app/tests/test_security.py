@@ -0,0 +1,71 @@
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from moneynote import security
+from moneynote.security import TokenCache, decode_token, get_user_identity_from_token
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    security.token_cache.clear()
+    yield
+    security.token_cache.clear()
+
+def test_get_user_identity_from_token_is_cached():
+    token = jwt.encode({"sub": "test-user"}, "secret", algorithm="HS256")
+    assert get_user_identity_from_token(token) == "test-user"
+    assert get_user_identity_from_token(token) == "test-user"
+    stats = security.token_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["size"] == 1
+
+def test_decoded_claims_are_a_copy():
+    token = jwt.encode({"sub": "test-user"}, "secret", algorithm="HS256")
+    decode_token(token)["sub"] = "someone-else"
+    assert decode_token(token) == {"sub": "test-user"}
+
+def test_invalid_token_is_not_cached():
+    for _ in range(2):
+        with pytest.raises(HTTPException) as e:
+            get_user_identity_from_token("invalidtoken")
+        assert e.value.status_code == 401
+    assert security.token_cache.stats()["size"] == 0
+
+def test_cache_evicts_least_recently_used():
+    cache = TokenCache(max_size=2, ttl_seconds=60)
+    cache.put("a", {"sub": "a"})
+    cache.put("b", {"sub": "b"})
+    assert cache.get("a") == {"sub": "a"}
+    cache.put("c", {"sub": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"sub": "a"}
+    assert cache.get("c") == {"sub": "c"}
+
+def test_cache_entry_expires_with_ttl(monkeypatch):
+    cache = TokenCache(max_size=10, ttl_seconds=60)
+    now = time.monotonic()
+    cache.put("a", {"sub": "a"})
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert cache.get("a") is None
+
+def test_cache_entry_expires_no_later_than_exp(monkeypatch):
+    cache = TokenCache(max_size=10, ttl_seconds=3600)
+    now = time.monotonic()
+    cache.put("a", {"sub": "a", "exp": time.time() + 10})
+    assert cache.get("a") == {"sub": "a", "exp": pytest.approx(time.time() + 10, abs=1)}
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get("a") is None
+
+def test_expired_token_is_not_cached():
+    cache = TokenCache(max_size=10, ttl_seconds=3600)
+    cache.put("a", {"sub": "a", "exp": time.time() - 1})
+    assert cache.stats()["size"] == 0
+
+def test_cache_disabled():
+    cache = TokenCache(max_size=0, ttl_seconds=60)
+    cache.put("a", {"sub": "a"})
+    assert cache.get("a") is None
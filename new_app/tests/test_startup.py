@@ -0,0 +1,59 @@
+import jwt
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from moneynote.routers.deps import get_current_user
+from moneynote.startup import (STARTUP_TIMINGS, get_deferred_routers, include_deferred_router,
+                               timed_step, warm_up)
+
+
+def _create_app():
+    app = FastAPI()
+    deferred_router = include_deferred_router(app, "moneynote.routers.system", "/deferred", tags=["deferred"])
+
+    @app.get("/after")
+    def after():
+        return {"after": True}
+
+    return app, deferred_router
+
+def test_deferred_router_loads_on_first_request():
+    app, deferred_router = _create_app()
+    client = TestClient(app)
+    assert "/deferred/version" not in client.get("/openapi.json").json()["paths"]
+
+    token = jwt.encode({"sub": "test-user"}, "secret", algorithm="HS256")
+    response = client.get("/deferred/version", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert deferred_router.loaded
+    assert get_deferred_routers(app) == []
+    assert "/deferred/version" in client.get("/openapi.json").json()["paths"]
+    assert client.get("/deferred/missing").status_code == 404
+    assert client.get("/after").json() == {"after": True}
+
+def test_deferred_router_does_not_match_other_paths():
+    app, deferred_router = _create_app()
+    client = TestClient(app)
+    assert client.get("/after").json() == {"after": True}
+    assert client.get("/deferredx").status_code == 404
+    assert not deferred_router.loaded
+
+def test_deferred_router_uses_dependency_overrides():
+    app, deferred_router = _create_app()
+    app.dependency_overrides[get_current_user] = lambda: "test-user"
+    assert TestClient(app).get("/deferred/version").status_code == 200
+
+def test_warm_up():
+    app, deferred_router = _create_app()
+    position = app.router.routes.index(deferred_router)
+    warm_up(app)
+    assert deferred_router.loaded
+    # The router takes the placeholder's place, ahead of routes declared after it
+    assert app.router.routes[position] is not deferred_router
+    assert app.router.routes[-1].path == "/after"
+    assert "/deferred/version" in TestClient(app).get("/openapi.json").json()["paths"]
+    assert "import moneynote.routers.system" in STARTUP_TIMINGS
+
+def test_timed_step():
+    with timed_step("test step"):
+        pass
+    assert STARTUP_TIMINGS["test step"] >= 0
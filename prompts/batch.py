@@ -0,0 +1,38 @@
+import re
+from string import Template
+
+## Batch Prompt
+"""
+Wraps several prompts that share a template into one gemini-cli invocation, see generate_doc_files_batch.
+Args:
+    document_count: The number of documents in the batch
+    tasks: The substituted prompt of every document, each one preceded by a batch task header
+"""
+
+batch_prompt_string = """
+You have $document_count documents to create. Each one is described by its own task below, with its own instructions and its own output file.
+
+The tasks are based on the same sources (the same reports, documents and source code). Read each shared source once and reuse what you learned from it for every task instead of reading it again.
+
+Complete the tasks one after the other. Save each document to the output file named in its task before starting the next one, and do not merge documents together.
+
+$tasks
+
+Please generate every document without stopping or asking for confirmation to continue.
+"""
+
+## Batch Task Header
+"""
+Args:
+    document_number: The 1-based number of the document in the batch
+    document_count: The number of documents in the batch
+    absolute_file_path: The absolute file path the document is saved to
+"""
+
+batch_task_header_string = "===== Document $document_number of $document_count, saved to $absolute_file_path ====="
+
+batch_prompt_template = Template(batch_prompt_string)
+batch_task_header_template = Template(batch_task_header_string)
+
+# Finds the batch task headers in a batch prompt, the group is the output file of the task that follows
+batch_task_header_pattern = re.compile(r"^===== Document \d+ of \d+, saved to (.+) =====$", re.MULTILINE)
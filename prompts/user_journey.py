@@ -76,6 +76,27 @@ Please generate the complete and final response without stopping or asking for c
 
 """
 
+# User Journey Prompt with sliced CodMod context
+
+"""
+The same prompt as above, with the CodMod report sections relevant to the journey included in the prompt
+(see context_slicer.py) instead of the whole reports.
+Args:
+    codmod_excerpt: The CodMod report sections relevant to the user journey
+    (plus every argument of the user journey prompt)
+"""
+
+user_journey_sliced_prompt_string = user_journey_prompt_string.replace(
+    "*   **Source for Code Analysis:** `$codmod_detailed_relative_file_path` and `$codmod_data_relative_file_path` (These are reports from a tool called CodMod).",
+    "*   **Source for Code Analysis:** The excerpts of `$codmod_detailed_relative_file_path` and `$codmod_data_relative_file_path` in the CodMod Report Excerpts section below (These are reports from a tool called CodMod). They contain every section of the reports about this user journey, only open the full reports if a detail is missing from them.",
+) + """
+## CodMod Report Excerpts
+
+````markdown
+$codmod_excerpt
+````
+"""
+
 # Functional Spec Introduction
 
 """
@@ -194,5 +215,6 @@ Please generate the complete and final response without stopping or asking for c
 """
 
 user_journey_prompt_template = Template(user_journey_prompt_string)
+user_journey_sliced_prompt_template = Template(user_journey_sliced_prompt_string)
 functional_specification_intro_prompt_template = Template(functional_specification_intro_prompt_string)
 brd_prompt_template = Template(brd_prompt_string)
\ No newline at end of file
@@ -0,0 +1,199 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Set
+
+import config
+import doc_cache
+import telemetry
+from helper_funcs import (generate_doc_file, generate_doc_files_batch,
+                          get_doc_cache_key, get_doc_inputs,
+                          group_doc_configs_for_batching)
+
+# How plan_build decides whether a doc is stale
+CHECK_HASH = "hash"
+CHECK_MTIME = "mtime"
+
+
+def build_dependency_graph(doc_configs: List[dict]) -> Dict[str, Set[str]]:
+    """
+    Builds the dependency graph between doc configs.
+
+    A doc depends on another doc when one of its inputs is the other doc's output file. Dependencies on docs
+    that are not in doc_configs (e.g. already built) are dropped. Inputs that no doc config produces (context docs, reports, source code) are not part of the graph.
+
+    Args:
+        doc_configs (List[dict]): The doc configs to schedule.
+
+    Returns:
+        Dict[str, Set[str]]: Maps each doc's file_path to the file_paths of the docs it depends on.
+
+    Raises:
+        ValueError: If two configs produce the same file, or the dependencies contain a cycle.
+    """
+    outputs = [doc_config["file_path"] for doc_config in doc_configs]
+    if len(outputs) != len(set(outputs)):
+        raise ValueError("More than one doc config produces the same file_path")
+
+    graph = {
+        doc_config["file_path"]: {
+            path
+            for path in get_doc_inputs(doc_config["file_path"], doc_config["substitutions"], doc_config.get("depends_on"))
+            if path in outputs
+        }
+        for doc_config in doc_configs
+    }
+    topological_order(graph)  # raises on cycles
+    return graph
+
+
+def topological_order(graph: Dict[str, Set[str]]) -> List[str]:
+    """
+    Orders the docs in a dependency graph so that every doc comes after the docs it depends on.
+    Docs with no ordering constraint between them keep the order they were declared in.
+
+    Raises:
+        ValueError: If the dependencies contain a cycle.
+    """
+    order = []
+    remaining = {path: set(dependencies) for path, dependencies in graph.items()}
+    while remaining:
+        ready = [path for path, dependencies in remaining.items() if not dependencies]
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+        for path in ready:
+            order.append(path)
+            del remaining[path]
+        for dependencies in remaining.values():
+            dependencies.difference_update(ready)
+    return order
+
+
+def _latest_mtime(path: str) -> float:
+    """
+    Returns the mtime of a file, or the newest mtime of the files under a directory. Missing paths return 0.
+    """
+    if os.path.isdir(path):
+        mtimes = [
+            os.path.getmtime(os.path.join(root, file_name))
+            for root, _, files in os.walk(path)
+            for file_name in files
+        ]
+        return max(mtimes, default=0.0)
+    if os.path.exists(path):
+        return os.path.getmtime(path)
+    return 0.0
+
+
+def _get_stale_reason(doc_config: dict, check: str) -> str:
+    """
+    Returns why a doc has to be (re)built looking only at its own output and inputs, or "" if it is up to date.
+    """
+    file_path = doc_config["file_path"]
+    depends_on = doc_config.get("depends_on")
+
+    if check == CHECK_MTIME:
+        if not os.path.exists(file_path):
+            return "missing"
+        output_mtime = os.path.getmtime(file_path)
+        for input_path in get_doc_inputs(file_path, doc_config["substitutions"], depends_on):
+            if _latest_mtime(input_path) > output_mtime:
+                return f"newer input {input_path}"
+        return ""
+
+    cache_key = get_doc_cache_key(file_path, doc_config["prompt_template"], doc_config["substitutions"], depends_on)
+    if doc_cache.is_up_to_date(file_path, cache_key):
+        return ""
+    if doc_cache.has_entry(cache_key):
+        return "restore from cache"
+    if not os.path.exists(file_path):
+        return "missing"
+    if doc_cache.get_output_key(file_path) is None:
+        return ""  # generate_doc_file adopts files the cache has no record of
+    return "prompt or inputs changed"
+
+
+def plan_build(doc_configs: List[dict], check: str = CHECK_HASH) -> List[dict]:
+    """
+    Computes the minimal set of docs to rebuild, in the order they have to be built.
+
+    A doc is stale if its own output is missing or out of date (see _get_stale_reason), or if any doc it
+    depends on is stale, since rebuilding that doc changes one of its inputs.
+
+    Args:
+        doc_configs (List[dict]): The doc targets, as passed to generate_doc_file.
+        check (str): CHECK_HASH compares doc cache keys, CHECK_MTIME compares file modification times.
+
+    Returns:
+        List[dict]: One {"doc_config", "reason"} step per stale doc, in topological order.
+    """
+    graph = build_dependency_graph(doc_configs)
+    configs_by_path = {doc_config["file_path"]: doc_config for doc_config in doc_configs}
+
+    plan = []
+    stale_paths = set()
+    for path in topological_order(graph):
+        stale_dependencies = sorted(graph[path] & stale_paths)
+        if stale_dependencies:
+            reason = f"upstream rebuilt: {', '.join(os.path.basename(dependency) for dependency in stale_dependencies)}"
+        else:
+            reason = _get_stale_reason(configs_by_path[path], check)
+        if reason:
+            stale_paths.add(path)
+            plan.append({"doc_config": configs_by_path[path], "reason": reason})
+    return plan
+
+
+def print_build_plan(plan: List[dict], total_docs: int):
+    """
+    Prints the docs a build will regenerate, with the reason each one is stale.
+    """
+    print(f"\n{len(plan)} of {total_docs} docs to build, {total_docs - len(plan)} up to date")
+    for step_number, step in enumerate(plan, start=1):
+        print(f"{step_number:>3}. {step['doc_config']['file_path']} ({step['reason']})")
+
+
+def run_doc_generation_jobs(doc_configs: List[dict], max_workers: int = config.DOC_GENERATION_MAX_WORKERS, force: bool = False, batch_size: int = config.DOC_GENERATION_BATCH_SIZE):
+    """
+    Generates all the doc files, running independent docs at the same time.
+
+    A doc is only started once every doc it depends on has finished. Each job spends its time waiting
+    on a gemini-cli subprocess, so a thread pool is enough to keep max_workers prompts in flight.
+    With a batch_size above 1, ready docs that share a prompt template are sent to gemini-cli together,
+    see generate_doc_files_batch.
+
+    Args:
+        doc_configs (List[dict]): The doc configs to generate, as passed to generate_doc_file.
+        max_workers (int): The maximum number of jobs (single docs or batches) run at the same time.
+        force (bool): Regenerate every doc, even the ones the doc cache considers up to date.
+        batch_size (int): The maximum number of docs sent in one prompt, 1 disables batching.
+    """
+    graph = build_dependency_graph(doc_configs)
+    configs_by_path = {doc_config["file_path"]: doc_config for doc_config in doc_configs}
+    waiting = {path: set(dependencies) for path, dependencies in graph.items()}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+
+        def submit_ready_jobs():
+            ready_paths = [path for path, dependencies in waiting.items() if not dependencies]
+            for path in ready_paths:
+                del waiting[path]
+            ready_configs = [configs_by_path[path] for path in ready_paths]
+            for group in group_doc_configs_for_batching(ready_configs, batch_size):
+                if len(group) == 1:
+                    future = telemetry.submit_in_context(executor, generate_doc_file, **group[0], force=force)
+                else:
+                    future = telemetry.submit_in_context(executor, generate_doc_files_batch, group, force=force)
+                running[future] = [doc_config["file_path"] for doc_config in group]
+
+        submit_ready_jobs()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                paths = running.pop(future)
+                future.result()  # re-raise any error from the job
+                for dependencies in waiting.values():
+                    dependencies.difference_update(paths)
+            submit_ready_jobs()
+
+    return None
@@ -0,0 +1,243 @@
+"""
+Structured run telemetry for the docs pipeline.
+
+Every traced call (a doc generation, a prompt, a task-master command, a retry back-off) is recorded as a span
+and appended as one JSON line to config.TELEMETRY_FILE when it ends:
+
+    {"run_id", "span_id", "parent_id", "name", "start", "duration_seconds", "status", "attributes"}
+
+Spans nest through a context variable, so a prompt's span points at the doc generation that ran it. Thread pool
+jobs have to be submitted with submit_in_context (see scheduler.py) to keep their parent.
+
+Print a timing report of the latest run (critical path, p50/p95 latency per prompt template, retries):
+
+    $ python telemetry.py
+    $ python telemetry.py --run-id <run_id> --file .telemetry/spans.jsonl
+"""
+import argparse
+import contextvars
+import functools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from string import Template
+from typing import Callable, Dict, List, Optional
+
+import config
+
+# One run per process, every span written by this process carries it
+RUN_ID = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+_current_span_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_span_id", default=None)
+_write_lock = threading.Lock()
+
+
+def _write_span(record: dict):
+    if not config.TELEMETRY_ENABLED:
+        return
+    line = json.dumps(record, default=str)
+    with _write_lock:
+        os.makedirs(os.path.dirname(config.TELEMETRY_FILE), exist_ok=True)
+        with open(config.TELEMETRY_FILE, "a") as telemetry_file:
+            telemetry_file.write(line + "\n")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Records the enclosed block as a span. Yields the span's attributes dict, so the block can add results to
+    it (e.g. the number of attempts) before the span is written.
+
+    Args:
+        name (str): The span name, e.g. "generate_doc_file".
+        **attributes: Attributes known when the span starts, e.g. the file path.
+    """
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _current_span_id.get()
+    token = _current_span_id.set(span_id)
+    start = time.time()
+    start_monotonic = time.monotonic()
+    status = "ok"
+    try:
+        yield attributes
+    except BaseException as e:
+        status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        _current_span_id.reset(token)
+        _write_span({
+            "run_id": RUN_ID,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "start": round(start, 6),
+            "duration_seconds": round(time.monotonic() - start_monotonic, 6),
+            "status": status,
+            "attributes": attributes,
+        })
+
+
+def traced(name: Optional[str] = None, get_attributes: Optional[Callable[..., dict]] = None):
+    """
+    Decorates a function so every call is recorded as a span.
+
+    Args:
+        name (str): The span name, defaults to the function name.
+        get_attributes (Callable): Called with the function's arguments, returns the span's starting attributes.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            attributes = get_attributes(*args, **kwargs) if get_attributes else {}
+            with span(name or function.__name__, **attributes):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def submit_in_context(executor, function: Callable, *args, **kwargs):
+    """
+    Submits a job to a thread pool in a copy of the current context, so the spans the job starts keep the
+    submitting span as their parent.
+    """
+    return executor.submit(contextvars.copy_context().run, function, *args, **kwargs)
+
+
+def get_template_name(prompt_template: Template) -> str:
+    """
+    Returns the name a prompt template is defined under in the prompts package, e.g.
+    "user_journey.brd_prompt_template", or "unknown" for a template defined elsewhere.
+    """
+    for module_name, module in list(sys.modules.items()):
+        if not module_name.startswith("prompts.") or module is None:
+            continue
+        for attribute_name, value in vars(module).items():
+            if value is prompt_template:
+                return f"{module_name.removeprefix('prompts.')}.{attribute_name}"
+    return "unknown"
+
+
+## Report
+
+# Spans that each generate one doc, or one batch of docs
+DOC_SPAN_NAMES = ("generate_doc_file", "generate_doc_files_batch")
+
+
+def _short_path(path: str) -> str:
+    # The docs folder plus the file name, e.g. "brds/Journey_1:_Monitoring_Financial_Situation.md"
+    return os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+
+
+def _describe_doc_span(record: dict) -> str:
+    attributes = record["attributes"]
+    if "file_paths" in attributes:
+        return f"batch of {len(attributes['file_paths'])}: {', '.join(_short_path(path) for path in attributes['file_paths'])}"
+    return _short_path(attributes.get("file_path", ""))
+
+
+def load_spans(file_path: str, run_id: Optional[str] = None) -> List[dict]:
+    """
+    Reads the spans of one run from a telemetry file.
+
+    Args:
+        file_path (str): The JSONL telemetry file.
+        run_id (str): The run to read, defaults to the run of the last span in the file.
+    """
+    with open(file_path, "r") as telemetry_file:
+        spans = [json.loads(line) for line in telemetry_file if line.strip()]
+    if not spans:
+        return []
+    run_id = run_id or spans[-1]["run_id"]
+    return [record for record in spans if record["run_id"] == run_id]
+
+
+def get_critical_path(doc_spans: List[dict]) -> List[dict]:
+    """
+    Returns the chain of doc generations that determined the run's wall-clock time.
+
+    Starting from the doc that finished last, each step goes back to the doc that finished last before it
+    started: the dependency (or the busy worker) it was waiting on.
+    """
+    def end_time(record: dict) -> float:
+        return record["start"] + record["duration_seconds"]
+
+    remaining = sorted(doc_spans, key=end_time)
+    if not remaining:
+        return []
+    path = [remaining.pop()]
+    while True:
+        predecessors = [record for record in remaining if end_time(record) <= path[-1]["start"] + 1e-3]
+        if not predecessors:
+            break
+        path.append(predecessors[-1])
+        remaining = predecessors[:-1]
+    return list(reversed(path))
+
+
+def _percentile(values: List[float], percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def print_summary(spans: List[dict]):
+    """
+    Prints the timing report of a run: where the time went, the critical path, p50/p95 doc generation latency
+    per prompt template and the retries of every doc that needed them.
+    """
+    if not spans:
+        print("No spans recorded")
+        return
+
+    durations_by_name: Dict[str, float] = {}
+    for record in spans:
+        durations_by_name[record["name"]] = durations_by_name.get(record["name"], 0.0) + record["duration_seconds"]
+    run_start = min(record["start"] for record in spans)
+    run_end = max(record["start"] + record["duration_seconds"] for record in spans)
+    print(f"Run {spans[0]['run_id']}: {run_end - run_start:.1f}s wall clock, {len(spans)} spans")
+    print(f"\n{'span':<32}{'count':>8}{'total (s)':>12}")
+    for name, total_seconds in sorted(durations_by_name.items(), key=lambda item: -item[1]):
+        count = sum(1 for record in spans if record["name"] == name)
+        print(f"{name:<32}{count:>8}{total_seconds:>12.1f}")
+
+    doc_spans = [record for record in spans if record["name"] in DOC_SPAN_NAMES]
+    print("\nCritical path")
+    for record in get_critical_path(doc_spans):
+        print(f"  {record['start'] - run_start:>8.1f}s +{record['duration_seconds']:>7.1f}s  {_describe_doc_span(record)}")
+
+    durations_by_template: Dict[str, List[float]] = {}
+    for record in doc_spans:
+        durations_by_template.setdefault(record["attributes"].get("template", "unknown"), []).append(record["duration_seconds"])
+    print(f"\n{'template':<64}{'jobs':>6}{'p50 (s)':>10}{'p95 (s)':>10}")
+    for template, durations in sorted(durations_by_template.items()):
+        print(f"{template:<64}{len(durations):>6}{_percentile(durations, 50):>10.1f}{_percentile(durations, 95):>10.1f}")
+
+    batch_spans = [record for record in spans if record["name"] == "generate_doc_files_batch"]
+    if batch_spans:
+        requeued = sum(record["attributes"].get("requeued", 0) for record in batch_spans)
+        batched = sum(len(record["attributes"]["file_paths"]) for record in batch_spans)
+        print(f"\nBatches: {len(batch_spans)} covering {batched} docs, {requeued} docs re-queued on their own")
+
+    retried = [record for record in doc_spans if record["attributes"].get("retries")]
+    total_retries = sum(record["attributes"]["retries"] for record in retried)
+    print(f"\nRetries: {total_retries} across {len(retried)} of {len(doc_spans)} jobs")
+    for record in retried:
+        outcomes = ", ".join(record["attributes"].get("outcomes", []))
+        print(f"  {_describe_doc_span(record)}: {record['attributes']['retries']} ({outcomes})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the timing report of a gen_docs.py or gen_next_prd.py run.")
+    parser.add_argument("--file", default=config.TELEMETRY_FILE, help="the JSONL telemetry file")
+    parser.add_argument("--run-id", help="the run to report on, defaults to the latest run")
+    args = parser.parse_args()
+    print_summary(load_spans(args.file, args.run_id))
+
+
+if __name__ == "__main__":
+    main()